@@ -14,10 +14,14 @@ from app.models import user as user_models  # noqa: F401
 from app.models import chat as legacy_chat_models  # noqa: F401
 from app.models import content as content_models_legacy  # noqa: F401 - MarketingCampaign, ContentPiece
 from app.models import log as log_models  # noqa: F401 - SearchLog
+from app.models import credits as credit_models  # noqa: F401 - CreditLedgerEntry
+from app.models import outbox as outbox_models  # noqa: F401 - OutboxEvent
+from app.models import media as media_models  # noqa: F401 - MediaAsset
 # Importar modelos de módulos modulares
 from app.modules.chat import models as chat_models  # noqa: F401
 from app.modules.analytics import models as analytics_models  # noqa: F401
 from app.modules.content_creator import models as content_models  # noqa: F401
+from app.modules.content_planner import models as content_planner_models  # noqa: F401
 from app.modules.data_mining import models as data_mining_models  # noqa: F401
 
 config = context.config
@@ -0,0 +1,59 @@
+"""usage_daily rollups
+
+Revision ID: 7c2e5d1a9b40
+Revises: cf9428b5de35
+Create Date: 2026-10-18 10:00:00.000000
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+# revision identifiers, used by Alembic.
+revision = '7c2e5d1a9b40'
+down_revision = 'cf9428b5de35'
+branch_labels = None
+depends_on = None
+
+
+# Histórico completo: la compactación solo recalcula los últimos días y
+# las estadísticas/quotas ya no leen usage_logs
+BACKFILL_USAGE_DAILY = """
+INSERT INTO usage_daily (user_id, feature_key, day, count, created_at, updated_at)
+SELECT user_id, feature_key, date_trunc('day', "timestamp")::date, count(*), now(), now()
+FROM usage_logs
+GROUP BY user_id, feature_key, date_trunc('day', "timestamp")::date
+ON CONFLICT ON CONSTRAINT uq_usage_daily_user_feature_day
+DO UPDATE SET count = EXCLUDED.count, updated_at = EXCLUDED.updated_at
+"""
+
+
+def upgrade() -> None:
+    # Bases de datos arrancadas con create_all ya pueden tener la tabla
+    if sa.inspect(op.get_bind()).has_table('usage_daily'):
+        op.create_index(op.f('ix_usage_logs_timestamp'), 'usage_logs', ['timestamp'], unique=False, if_not_exists=True)
+        op.execute(BACKFILL_USAGE_DAILY)
+        return
+    op.create_table('usage_daily',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('feature_key', sqlmodel.sql.sqltypes.AutoString(length=100), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('user_id', 'feature_key', 'day', name='uq_usage_daily_user_feature_day')
+    )
+    op.create_index(op.f('ix_usage_daily_user_id'), 'usage_daily', ['user_id'], unique=False)
+    op.create_index(op.f('ix_usage_daily_day'), 'usage_daily', ['day'], unique=False)
+    # La compactación recalcula por rango de timestamp
+    op.create_index(op.f('ix_usage_logs_timestamp'), 'usage_logs', ['timestamp'], unique=False, if_not_exists=True)
+    op.execute(BACKFILL_USAGE_DAILY)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_usage_logs_timestamp'), table_name='usage_logs')
+    op.drop_index(op.f('ix_usage_daily_day'), table_name='usage_daily')
+    op.drop_index(op.f('ix_usage_daily_user_id'), table_name='usage_daily')
+    op.drop_table('usage_daily')
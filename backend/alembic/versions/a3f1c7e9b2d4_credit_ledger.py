@@ -0,0 +1,47 @@
+"""credit ledger
+
+Libro append-only de movimientos de créditos (cargos, reembolsos y
+renovaciones mensuales), ver app/core/credits.py.
+
+Revision ID: a3f1c7e9b2d4
+Revises: e4a8b2c6d0f1
+Create Date: 2026-10-18 14:00:00.000000
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision = 'a3f1c7e9b2d4'
+down_revision = 'e4a8b2c6d0f1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('credit_ledger',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('kind', sqlmodel.sql.sqltypes.AutoString(length=20), nullable=False),
+    sa.Column('resource', sqlmodel.sql.sqltypes.AutoString(length=20), nullable=False),
+    sa.Column('monthly_delta', sa.Integer(), nullable=False),
+    sa.Column('extra_delta', sa.Integer(), nullable=False),
+    sa.Column('monthly_balance', sa.Integer(), nullable=False),
+    sa.Column('extra_balance', sa.Integer(), nullable=False),
+    sa.Column('campaign_id', sa.Integer(), nullable=True),
+    sa.Column('refund_of_id', sa.Integer(), nullable=True),
+    sa.Column('reason', sqlmodel.sql.sqltypes.AutoString(length=255), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('refund_of_id')
+    )
+    op.create_index(op.f('ix_credit_ledger_user_id'), 'credit_ledger', ['user_id'], unique=False)
+    op.create_index(op.f('ix_credit_ledger_campaign_id'), 'credit_ledger', ['campaign_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_credit_ledger_campaign_id'), table_name='credit_ledger')
+    op.drop_index(op.f('ix_credit_ledger_user_id'), table_name='credit_ledger')
+    op.drop_table('credit_ledger')
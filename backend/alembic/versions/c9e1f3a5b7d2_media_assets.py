@@ -0,0 +1,45 @@
+"""media assets
+
+Media store local direccionado por contenido, ver app/services/media_store.py.
+
+Revision ID: c9e1f3a5b7d2
+Revises: b7d2e4f6a8c1
+Create Date: 2026-10-18 18:00:00.000000
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision = 'c9e1f3a5b7d2'
+down_revision = 'b7d2e4f6a8c1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('media_assets',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('sha256', sqlmodel.sql.sqltypes.AutoString(length=64), nullable=False),
+    sa.Column('mime_type', sqlmodel.sql.sqltypes.AutoString(length=100), nullable=False),
+    sa.Column('size_bytes', sa.Integer(), nullable=False),
+    sa.Column('width', sa.Integer(), nullable=True),
+    sa.Column('height', sa.Integer(), nullable=True),
+    sa.Column('has_thumbnail', sa.Boolean(), nullable=False),
+    sa.Column('source_url', sqlmodel.sql.sqltypes.AutoString(length=1000), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_media_assets_sha256'), 'media_assets', ['sha256'], unique=True)
+    op.add_column('contentpiece', sa.Column('media_asset_id', sa.Integer(), nullable=True))
+    op.create_index(op.f('ix_contentpiece_media_asset_id'), 'contentpiece', ['media_asset_id'], unique=False)
+    op.create_foreign_key('fk_contentpiece_media_asset_id', 'contentpiece', 'media_assets', ['media_asset_id'], ['id'])
+
+
+def downgrade() -> None:
+    op.drop_constraint('fk_contentpiece_media_asset_id', 'contentpiece', type_='foreignkey')
+    op.drop_index(op.f('ix_contentpiece_media_asset_id'), table_name='contentpiece')
+    op.drop_column('contentpiece', 'media_asset_id')
+    op.drop_index(op.f('ix_media_assets_sha256'), table_name='media_assets')
+    op.drop_table('media_assets')
@@ -0,0 +1,26 @@
+"""user token_version
+
+Versión de token durable (ver app/core/principal.py): Redis solo la
+cachea, así que un flush o una eviction no revalidan tokens revocados.
+
+Revision ID: d4a6c8e0f2b3
+Revises: c9e1f3a5b7d2
+Create Date: 2026-10-19 10:00:00.000000
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd4a6c8e0f2b3'
+down_revision = 'c9e1f3a5b7d2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('user', sa.Column('token_version', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade() -> None:
+    op.drop_column('user', 'token_version')
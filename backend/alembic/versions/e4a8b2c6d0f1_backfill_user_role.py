@@ -0,0 +1,28 @@
+"""backfill user role
+
+Back-fill que antes hacía create_db_and_tables() en cada arranque de la
+API (UPDATE + recorrido ORM de todos los usuarios). Se ejecuta una vez.
+
+Revision ID: e4a8b2c6d0f1
+Revises: 7c2e5d1a9b40
+Create Date: 2026-10-18 12:00:00.000000
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision = 'e4a8b2c6d0f1'
+down_revision = '7c2e5d1a9b40'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute("""UPDATE "user" SET role = 'client' WHERE role IS NULL OR role = ''""")
+
+
+def downgrade() -> None:
+    # Back-fill de datos: no hay nada que deshacer
+    pass
@@ -0,0 +1,31 @@
+"""contentpiece media_url_from_service
+
+El media store solo descarga URLs que llegaron por el camino de servicio
+(API key de n8n o callback de proveedor), nunca las que fija un usuario
+(ver app/workers/tasks/media.py). Las filas existentes quedan en false:
+su origen no se conoce.
+
+Revision ID: e6b8d0f2a4c5
+Revises: d4a6c8e0f2b3
+Create Date: 2026-10-19 12:00:00.000000
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e6b8d0f2a4c5'
+down_revision = 'd4a6c8e0f2b3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        'contentpiece',
+        sa.Column('media_url_from_service', sa.Boolean(), server_default=sa.false(), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column('contentpiece', 'media_url_from_service')
@@ -1,13 +1,24 @@
-from typing import Callable, Dict, Any, Optional
+from functools import lru_cache
+from typing import AsyncGenerator, Callable, Dict, Any, Optional
 
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
 from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from app.core.database import get_session
+from app.core.dependencies import get_async_db
 from app.core.security import SECRET_KEY, ALGORITHM
-from app.core.exceptions import FeatureForbiddenError
+from app.core.exceptions import FeatureForbiddenError, QuotaExceededError
+from app.core.quota import QUOTA_LIMIT_KEYS, QuotaUsage, quota_enforcer
+from app.core.principal import (
+  Principal,
+  get_token_state,
+  principal_cache,
+  resolve_features,
+)
+from app.infrastructure.cache.redis import get_redis_client
 from app.models.user import (
   User,
   PlanTier,
@@ -76,17 +87,104 @@ async def get_current_user(
   return user
 
 
+async def get_current_principal(
+  session: Session = Depends(get_session),
+  token: str = Depends(reusable_oauth2),
+) -> Principal:
+  """
+  Dependency to get the authenticated principal without a per-request DB lookup.
+
+  Tokens carrying the principal claims (uid/plan/feat/role/tv) are trusted
+  as long as `tv` matches the user's token version: one Redis GET, and a
+  DB read only when the key is missing. Older tokens, stale versions and
+  Redis outages fall back to the principal cache (in-process LRU -> Redis
+  -> DB, see app/core/principal.py).
+  Use it instead of `get_current_user` whenever the handler only needs
+  id/email/plan/features/role; load the full row with
+  `session.get(User, principal.id)` when it needs more.
+
+  Raises:
+    HTTPException 401 if the token is invalid or the user does not exist
+    HTTPException 403 if the user is inactive
+  """
+  return await _resolve_principal(token, session)
+
+
+async def get_current_principal_async(
+  session: AsyncSession = Depends(get_async_db),
+  token: str = Depends(reusable_oauth2),
+) -> Principal:
+  """
+  `get_current_principal` on the request's AsyncSession (AsyncDatabaseDep).
+
+  For endpoints that take AsyncDatabaseDep: a cache miss reuses the
+  request's session instead of opening a second (sync) one. Pass it to
+  `requires_feature(..., principal=get_current_principal_async)`.
+  """
+  return await _resolve_principal(token, session)
+
+
+async def _resolve_principal(token: str, session: Session | AsyncSession) -> Principal:
+  credentials_exception = HTTPException(
+    status_code=status.HTTP_401_UNAUTHORIZED,
+    detail="Could not validate credentials",
+    headers={"WWW-Authenticate": "Bearer"},
+  )
+
+  try:
+    payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    email: str = payload.get("sub")
+    if email is None:
+      raise credentials_exception
+  except JWTError:
+    raise credentials_exception
+
+  redis = get_redis_client()
+  principal = await _principal_from_claims(payload, redis, session)
+  if principal is None:
+    # The session only opens a connection on a cache miss
+    principal = await principal_cache.get(email, redis=redis, session=session)
+  if principal is None:
+    raise credentials_exception
+
+  if not principal.is_active:
+    raise HTTPException(
+      status_code=status.HTTP_403_FORBIDDEN,
+      detail="Inactive user"
+    )
+
+  return principal
+
+
+async def _principal_from_claims(
+  payload: Dict[str, Any],
+  redis: Any,
+  session: Session | AsyncSession,
+) -> Optional[Principal]:
+  """Principal from a self-describing token, or None if its claims can't be trusted."""
+  if "tv" not in payload or "feat" not in payload:
+    return None
+  try:
+    state = await get_token_state(redis, int(payload["uid"]), session=session)
+    if state is None or state[0] != payload["tv"]:
+      return None
+    return Principal.from_claims(payload, is_active=state[1])
+  except Exception:
+    # Malformed claims, or Redis down so revocation can't be checked:
+    # use the cache/DB path
+    return None
+
+
 PLAN_PRIORITY = [PlanTier.MOTOR, PlanTier.CEREBRO, PlanTier.PARTNER]
 
 
-def _merge_features(user: User) -> Dict[str, Any]:
-  base_features = PLAN_FEATURE_MATRIX.get(user.plan_tier, {})
-  if user.features:
-    return {**base_features, **user.features}
-  return base_features
+def _merge_features(user: User | Principal) -> Dict[str, Any]:
+  if getattr(user, "features_resolved", False):
+    return user.features
+  return resolve_features(user.plan_tier, user.features)
 
 
-def get_current_plan_features(user: User = Depends(get_current_user)) -> Dict[str, Any]:
+def get_current_plan_features(user: Principal = Depends(get_current_principal)) -> Dict[str, Any]:
   """
   Dependency that returns the effective feature flags for the authenticated user.
   """
@@ -100,32 +198,159 @@ def _find_required_plan_for_feature(feature_key: str) -> Optional[PlanTier]:
   return None
 
 
-def requires_feature(feature_key: str) -> Callable:
+async def _consume_quota(
+  user_id: int,
+  feature_key: str,
+  features: Dict[str, Any],
+) -> Optional[QuotaUsage]:
   """
-  Dependency factory that ensures the current user's plan exposes a given feature.
+  Consume one unit of the plan quota for a feature (Redis Lua counter).
+
+  Raises:
+    HTTPException 429 with Retry-After (seconds until the period resets)
+  """
+  limit = features.get(QUOTA_LIMIT_KEYS[feature_key])
+  if limit is None:
+    return None
+  try:
+    return await quota_enforcer.consume(get_redis_client(), user_id, feature_key, int(limit))
+  except QuotaExceededError as e:
+    raise HTTPException(
+      status_code=e.status_code,
+      detail={"message": e.message, "feature": e.feature, "limit": e.limit, "used": e.used},
+      headers={"Retry-After": str(e.retry_after)},
+    )
+
+
+async def _release_quota(usage: Optional[QuotaUsage]) -> None:
+  """Refund a consumed unit when the request was shed or failed."""
+  if usage is not None:
+    await quota_enforcer.release(get_redis_client(), usage)
+
+
+async def _token_is_current(payload: Dict[str, Any]) -> bool:
+  """
+  Whether the token's `tv` is the user's current token version and the
+  account is active (one Redis GET; the DB only when the key is missing).
+  """
+  if "tv" not in payload:
+    return False
+  try:
+    state = await get_token_state(get_redis_client(), int(payload["uid"]))
+  except Exception:
+    # Redis down: let get_current_principal decide before consuming
+    return False
+  return state is not None and state[0] == payload["tv"] and state[1]
+
+
+@lru_cache(maxsize=None)
+def quota_guard(feature_key: str) -> Callable:
+  """
+  Dependency factory that consumes the plan quota straight from the JWT claims.
+
+  Uses the `uid` and `plan`/`feat` claims, so over-quota requests are
+  rejected before a DB session, admission slot or LLM call is spent.
+  Declare it before those dependencies in the endpoint. The `tv` claim is
+  checked against the user's token version first, so a revoked token or a
+  deactivated account never consumes the victim's quota.
+  Cached per feature so FastAPI resolves it once per request even when it
+  is also pulled in by `requires_feature(..., consume_quota=True)`.
+
+  The unit is refunded if the request fails afterwards (admission 503,
+  engine error), so only served requests count against the quota.
+
+  Yields None (nothing consumed) for tokens without those claims, stale
+  or inactive tokens and plans without the feature; `requires_feature`
+  then falls back to the validated principal.
   """
   async def _dependency(
-    user: User = Depends(get_current_user),
-  ) -> User:
-    features = _merge_features(user)
-    if not features.get(feature_key, False):
-      required_plan = _find_required_plan_for_feature(feature_key)
-      required_label = required_plan.value if required_plan else "CEREBRO"
-      raise FeatureForbiddenError(
-        feature=feature_key,
-        required_plan=required_label,
-      )
-    return user
+    token: str = Depends(reusable_oauth2),
+  ) -> AsyncGenerator[Optional[QuotaUsage], None]:
+    usage = None
+    if feature_key in QUOTA_LIMIT_KEYS:
+      usage = await _consume_from_claims(feature_key, token)
+    try:
+      yield usage
+    except Exception:
+      await _release_quota(usage)
+      raise
   return _dependency
 
 
+async def _consume_from_claims(feature_key: str, token: str) -> Optional[QuotaUsage]:
+  try:
+    payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    plan_tier = PlanTier(payload.get("plan"))
+    user_id = int(payload["uid"])
+  except (JWTError, KeyError, TypeError, ValueError):
+    return None
+  features = payload.get("feat") or PLAN_FEATURE_MATRIX.get(plan_tier, {})
+  if not features.get(feature_key, False):
+    return None
+  if not await _token_is_current(payload):
+    return None
+  return await _consume_quota(user_id, feature_key, features)
+
+
+def _check_feature(user: Principal, feature_key: str) -> Dict[str, Any]:
+  features = _merge_features(user)
+  if not features.get(feature_key, False):
+    required_plan = _find_required_plan_for_feature(feature_key)
+    required_label = required_plan.value if required_plan else "CEREBRO"
+    raise FeatureForbiddenError(
+      feature=feature_key,
+      required_plan=required_label,
+    )
+  return features
+
+
+def requires_feature(
+  feature_key: str,
+  consume_quota: bool = False,
+  principal: Callable = get_current_principal,
+) -> Callable:
+  """
+  Dependency factory that ensures the current user's plan exposes a given feature.
+
+  With `consume_quota=True` each request also consumes one unit of the
+  feature's plan quota (see app/core/quota.py) and is rejected with 429
+  once the period's limit is reached; the unit is refunded if the request
+  fails afterwards.
+  Endpoints on AsyncDatabaseDep pass `principal=get_current_principal_async`
+  so the principal lookup shares the request's session.
+  """
+  if not consume_quota:
+    async def _dependency(
+      user: Principal = Depends(principal),
+    ) -> Principal:
+      _check_feature(user, feature_key)
+      return user
+    return _dependency
+
+  async def _quota_dependency(
+    quota: Optional[QuotaUsage] = Depends(quota_guard(feature_key)),
+    user: Principal = Depends(principal),
+  ) -> AsyncGenerator[Principal, None]:
+    features = _check_feature(user, feature_key)
+    fallback = None
+    if quota is None and feature_key in QUOTA_LIMIT_KEYS:
+      # Token without uid/plan/tv claims (or per-user feature override)
+      fallback = await _consume_quota(user.id, feature_key, features)
+    try:
+      yield user
+    except Exception:
+      await _release_quota(fallback)
+      raise
+  return _quota_dependency
+
+
 def requires_plan(min_plan: PlanTier) -> Callable:
   """
   Dependency factory that enforces a minimum subscription tier.
   """
   async def _dependency(
-    user: User = Depends(get_current_user),
-  ) -> User:
+    user: Principal = Depends(get_current_principal),
+  ) -> Principal:
     if PLAN_PRIORITY.index(user.plan_tier) < PLAN_PRIORITY.index(min_plan):
       raise FeatureForbiddenError(
         feature="plan_access",
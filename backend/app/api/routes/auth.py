@@ -8,9 +8,10 @@ from sqlmodel import Session, select
 from app.api.deps import get_current_user
 from app.core.config import settings
 from app.core.database import get_session
+from app.core.exceptions import ServiceOverloadedError
+from app.core.hashing import password_hasher
+from app.core.principal import Principal
 from app.core.security import (
-  verify_password,
-  get_password_hash,
   create_access_token,
   ACCESS_TOKEN_EXPIRE_MINUTES
 )
@@ -61,11 +62,24 @@ class Token(BaseModel):
   token_type: str
 
 
+def _hashing_overloaded(exc: ServiceOverloadedError) -> HTTPException:
+  """Map a shed password-hashing request to 503 + Retry-After."""
+  return HTTPException(
+    status_code=exc.status_code,
+    detail={"message": exc.message, "reason": exc.reason},
+    headers={"Retry-After": str(exc.retry_after)},
+  )
+
+
 # Helper function to authenticate user
-def authenticate_user(session: Session, email: str, password: str) -> User | None:
+async def authenticate_user(session: Session, email: str, password: str) -> User | None:
   """
   Authenticate a user by email and password.
   
+  bcrypt runs on the password hashing pool (app/core/hashing.py), not on
+  the event loop. Hashes below the current cost are upgraded after the
+  response, off the request path.
+  
   Args:
     session: Database session
     email: User email
@@ -73,6 +87,9 @@ def authenticate_user(session: Session, email: str, password: str) -> User | Non
     
   Returns:
     User object if credentials are valid, None otherwise
+    
+  Raises:
+    ServiceOverloadedError if the hashing pool queue is full
   """
   statement = select(User).where(User.email == email)
   user = session.exec(statement).first()
@@ -80,12 +97,15 @@ def authenticate_user(session: Session, email: str, password: str) -> User | Non
   if not user:
     return None
     
-  if not verify_password(password, user.hashed_password):
+  if not await password_hasher.verify(password, user.hashed_password):
     return None
     
   if not user.is_active:
     return None
   
+  if password_hasher.needs_rehash(user.hashed_password):
+    password_hasher.schedule_rehash(user.id, password, user.hashed_password)
+  
   # Ensure role is set (backward compatibility for existing users)
   if not hasattr(user, 'role') or user.role is None or user.role == '':
     user.role = "client"
@@ -117,6 +137,7 @@ async def register(
   Raises:
     HTTPException 400 if email already exists
     HTTPException 403 if admin_key is invalid or ADMIN_SECRET_CODE is not configured
+    HTTPException 503 if the password hashing pool is saturated
   """
   # Check if email already exists
   statement = select(User).where(User.email == user_data.email)
@@ -154,7 +175,10 @@ async def register(
   # It is assigned internally based on the admin_key validation above.
   
   # Hash password
-  hashed_password = get_password_hash(user_data.password)
+  try:
+    hashed_password = await password_hasher.hash(user_data.password)
+  except ServiceOverloadedError as e:
+    raise _hashing_overloaded(e)
   
   # Create new user with assigned role
   new_user = User(
@@ -195,9 +219,13 @@ async def login_for_access_token(
     
   Raises:
     HTTPException 401 if credentials are invalid
+    HTTPException 503 if the password hashing pool is saturated
   """
   # Authenticate user (form_data.username is the email in our case)
-  user = authenticate_user(session, form_data.username, form_data.password)
+  try:
+    user = await authenticate_user(session, form_data.username, form_data.password)
+  except ServiceOverloadedError as e:
+    raise _hashing_overloaded(e)
   
   if not user:
     raise HTTPException(
@@ -208,8 +236,12 @@ async def login_for_access_token(
   
   # Create access token
   access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+  # Self-describing token: uid/plan/feat/role authorize gated endpoints
+  # without a DB lookup while "tv" matches the user's token version
+  # (see app/core/principal.py)
+  claims = Principal.from_user(user).to_claims(user.token_version)
   access_token = create_access_token(
-    data={"sub": user.email},
+    data=claims,
     expires_delta=access_token_expires
   )
   
@@ -4,6 +4,7 @@ from pydantic import BaseModel
 from sqlmodel import Session
 
 from app.api.deps import get_current_user
+from app.core.principal import principal_cache
 from app.core.database import get_session
 from app.models.user import User
 from app.services.stripe_service import create_checkout_session
@@ -46,9 +47,8 @@ async def upgrade_plan(
     HTTPException 500 if database update fails
   """
   try:
-    # Merge current_user into this session to avoid session binding issues
-    # This ensures the user object is attached to the current session
-    user_in_session = session.merge(current_user)
+    # get_current_user shares this request's session: the user is already attached
+    user_in_session = current_user
     
     # Update user's plan tier
     user_in_session.plan_tier = plan_update.plan
@@ -57,6 +57,8 @@ async def upgrade_plan(
     session.commit()
     session.refresh(user_in_session)
     
+    await principal_cache.invalidate(user_in_session.email, user_id=user_in_session.id, session=session)
+    
     return {
       "status": "success",
       "new_tier": user_in_session.plan_tier
@@ -3,9 +3,10 @@ from pydantic import BaseModel
 from sqlmodel import Session, select
 
 from app.api.deps import requires_feature
+from app.core.principal import Principal
 from app.core.database import get_session
+from app.core.dependencies import get_read_db
 from app.models.log import SearchLog
-from app.models.user import User
 from app.models.mining import MiningReport
 from app.services.mining_report import generate_mining_report
 
@@ -18,8 +19,8 @@ class MiningReportRequest(BaseModel):
 
 @router.get("/logs")
 async def get_search_logs(
-  current_user: User = Depends(requires_feature("access_mining")),
-  session: Session = Depends(get_session)
+  current_user: Principal = Depends(requires_feature("access_mining")),
+  session: Session = Depends(get_read_db)
 ) -> list[dict]:
   """
   Get search logs for Data Mining activities.
@@ -57,7 +58,7 @@ async def get_search_logs(
 @router.post("/mining-report", response_model=MiningReport)
 async def create_mining_report(
   request: MiningReportRequest,
-  current_user: User = Depends(requires_feature("access_mining")),
+  current_user: Principal = Depends(requires_feature("access_mining")),
   session: Session = Depends(get_session)
 ) -> MiningReport:
   """
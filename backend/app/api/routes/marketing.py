@@ -2,22 +2,37 @@
 Marketing Routes - Gestión de Campañas de Marketing
 
 Este módulo maneja la creación de campañas de marketing con gestión de créditos.
-Las campañas se envían a n8n para su procesamiento asíncrono.
+Las campañas se envían a n8n para su procesamiento asíncrono a través del
+outbox transaccional (app/core/outbox.py).
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status, Header, Request
-from pydantic import BaseModel
+from fastapi import APIRouter, Depends, HTTPException, status, Header, Request, Response
+from pydantic import BaseModel, Field
+from sqlalchemy import and_, case, func, insert, or_, update
 from sqlmodel import Session, select
 from typing import Any, Dict, List
-import httpx
 import os
-import re
 
-from app.api.deps import get_current_user, requires_feature
+from app.api.deps import requires_feature
+from app.api.routes.media import media_asset_url, media_thumbnail_url
+from app.core.callbacks import (
+    KIND_PIECE_MEDIA,
+    KIND_PIECE_STATUS,
+    apply_callbacks,
+    enqueue_callback,
+    enqueue_callbacks,
+    write_piece_updates,
+)
+from app.core.conditional import compute_etag, conditional_get
+from app.core.credits import credit_ledger
+from app.core.outbox import TOPIC_MARKETING_CAMPAIGN, enqueue_event
+from app.core.principal import Principal
 from app.core.database import get_session
+from app.services.media_extraction import extract_media_url_from_payload
 from app.core.config import settings
-from app.models.user import User
+from app.infrastructure.cache.redis import get_redis_client
 from app.models.content import MarketingCampaign, ContentPiece
+from app.models.media import MediaAsset
 from datetime import datetime, timezone
 
 router = APIRouter()
@@ -65,7 +80,7 @@ class CampaignCreateRequest(BaseModel):
     influencer_name: str
     tone_of_voice: str
     platforms: list[str]
-    content_count: int
+    content_count: int = Field(ge=1, description="Número de piezas (coste en créditos de vídeo)")
     topic: str  # Tema o contexto de la campaña - REQUERIDO para que la IA sepa qué generar
     scheduled_at: str | None = None
 
@@ -81,18 +96,23 @@ class CampaignCreateResponse(BaseModel):
 @router.post("/create-campaign", response_model=CampaignCreateResponse)
 async def create_campaign(
     campaign: CampaignCreateRequest,
-    current_user: User = Depends(requires_feature("access_marketing")),
+    current_user: Principal = Depends(requires_feature("access_marketing")),
     session: Session = Depends(get_session)
 ) -> CampaignCreateResponse:
     """
     Crea una nueva campaña de marketing y descuenta los créditos correspondientes.
     
-    Lógica de gasto de créditos:
+    Lógica de gasto de créditos (ver app/core/credits.py):
     1. PRIORIDAD: Resta primero de monthly_credits_video
     2. SECUNDARIA: Si no alcanza, usa extra_credits_video
     3. Si la suma de ambos no alcanza, lanza HTTPException 402 (Payment Required)
     
-    Una vez cobrado, envía la orden a n8n vía webhook.
+    El cargo es un UPDATE condicional atómico que se confirma en la misma
+    transacción que la campaña, con su fila en el libro de créditos, y con
+    el evento del outbox que lleva la orden a n8n (ver app/core/outbox.py).
+    La respuesta sale tras el COMMIT, sin esperar a n8n: el dispatcher del
+    worker entrega la orden con reintentos y, si no puede, reembolsa el
+    cargo y marca la campaña "failed".
     
     Args:
         campaign: Datos de la campaña a crear
@@ -104,51 +124,18 @@ async def create_campaign(
         
     Raises:
         HTTPException 402 si no hay suficientes créditos
-        HTTPException 500 si falla la conexión con n8n o la actualización de DB
+        HTTPException 409 si otro cargo concurrente impidió cobrar
+        HTTPException 500 si falla la actualización de DB
     """
-    # Merge user into session to ensure we're working with the latest data
-    user_in_session = session.merge(current_user)
-    session.refresh(user_in_session)
+    from app.core.exceptions import CreditContentionError, InsufficientCreditsError
     
     # Calcular coste (asumimos que content_count son vídeos)
     cost = campaign.content_count
     
-    # Calcular créditos disponibles
-    total_available = user_in_session.monthly_credits_video + user_in_session.extra_credits_video
-    
-    # Verificar si hay suficientes créditos
-    if total_available < cost:
-        raise HTTPException(
-            status_code=status.HTTP_402_PAYMENT_REQUIRED,
-            detail=f"Créditos insuficientes. Necesitas {cost} créditos, pero solo tienes {total_available} disponibles."
-        )
-    
-    # LÓGICA DE GASTO: Primero mensuales, luego extra
-    remaining_cost = cost
-    monthly_used = 0
-    extra_used = 0
-    
-    # 1. PRIORIDAD: Usar créditos mensuales primero
-    if user_in_session.monthly_credits_video > 0:
-        monthly_used = min(user_in_session.monthly_credits_video, remaining_cost)
-        user_in_session.monthly_credits_video -= monthly_used
-        remaining_cost -= monthly_used
-    
-    # 2. SECUNDARIA: Si aún falta, usar créditos extra
-    if remaining_cost > 0 and user_in_session.extra_credits_video > 0:
-        extra_used = min(user_in_session.extra_credits_video, remaining_cost)
-        user_in_session.extra_credits_video -= extra_used
-        remaining_cost -= extra_used
-    
-    # Crear registro de campaña en la base de datos
+    # Crear la campaña, cobrarla y encolar la orden en una sola transacción
     try:
-        # Guardar cambios de créditos del usuario
-        session.add(user_in_session)
-        session.flush()  # Para asegurar que el user_id esté disponible
-        
-        # Crear registro de MarketingCampaign
         marketing_campaign = MarketingCampaign(
-            user_id=user_in_session.id,
+            user_id=current_user.id,
             name=campaign.name,
             influencer_name=campaign.influencer_name,
             tone_of_voice=campaign.tone_of_voice,
@@ -159,12 +146,44 @@ async def create_campaign(
             created_at=datetime.now(timezone.utc)
         )
         session.add(marketing_campaign)
-        session.commit()
-        session.refresh(marketing_campaign)
-        session.refresh(user_in_session)
-        
+        session.flush()  # Para tener el campaign_id en el libro y en la orden
         campaign_id = marketing_campaign.id
         
+        # Orden para n8n (incluye campaign_id)
+        enqueue_event(
+            session,
+            TOPIC_MARKETING_CAMPAIGN,
+            {
+                "user_id": current_user.id,
+                "email": current_user.email,
+                "campaign_id": campaign_id,  # ID de la campaña creada en DB
+                "campaign_name": campaign.name,
+                "influencer": campaign.influencer_name,
+                "tone": campaign.tone_of_voice,
+                "platforms": campaign.platforms,
+                "pieces": campaign.content_count,
+                "topic": campaign.topic  # CRÍTICO: Tema/contexto para que la IA sepa qué generar
+            },
+            dedup_key=f"marketing_campaign:{campaign_id}",
+        )
+        
+        # El cargo va al final: el lock de la fila del usuario dura solo hasta el commit
+        debit = credit_ledger.debit(
+            session, current_user.id, cost, resource="video",
+            campaign_id=campaign_id, reason="marketing_campaign",
+        )
+        session.commit()
+        
+    except InsufficientCreditsError as e:
+        session.rollback()
+        raise HTTPException(status_code=status.HTTP_402_PAYMENT_REQUIRED, detail=e.message)
+    except CreditContentionError as e:
+        session.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=e.message,
+            headers={"Retry-After": str(e.retry_after)},
+        )
     except Exception as e:
         session.rollback()
         raise HTTPException(
@@ -172,46 +191,12 @@ async def create_campaign(
             detail=f"Error al crear la campaña en la base de datos: {str(e)}"
         )
     
-    # Enviar orden a n8n vía webhook (incluir campaign_id)
-    n8n_webhook_url = "http://n8n:5678/webhook/marketing-campaign-trigger"
-    payload = {
-        "user_id": user_in_session.id,
-        "email": user_in_session.email,
-        "campaign_id": campaign_id,  # ID de la campaña creada en DB
-        "campaign_name": campaign.name,
-        "influencer": campaign.influencer_name,
-        "tone": campaign.tone_of_voice,
-        "platforms": campaign.platforms,
-        "pieces": campaign.content_count,
-        "topic": campaign.topic  # CRÍTICO: Tema/contexto para que la IA sepa qué generar
-    }
-    
-    try:
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.post(n8n_webhook_url, json=payload)
-            response.raise_for_status()
-    except httpx.TimeoutException:
-        # Si n8n no responde, no fallamos la transacción (ya cobramos los créditos)
-        # Pero registramos el error para debugging
-        print(f"⚠️  WARNING: n8n webhook timeout para usuario {user_in_session.id}")
-    except httpx.HTTPStatusError as e:
-        # Si n8n devuelve error, registramos pero no fallamos
-        print(f"⚠️  WARNING: n8n webhook error {e.response.status_code} para usuario {user_in_session.id}")
-    except Exception as e:
-        # Otros errores de conexión
-        print(f"⚠️  WARNING: Error al conectar con n8n: {str(e)}")
-    
     # Retornar respuesta exitosa
     return CampaignCreateResponse(
         status="success",
         message=f"Campaña '{campaign.name}' creada exitosamente. {cost} créditos descontados.",
         campaign_id=campaign_id,  # Incluir el ID de la campaña creada
-        credits_remaining={
-            "monthly_video": user_in_session.monthly_credits_video,
-            "extra_video": user_in_session.extra_credits_video,
-            "monthly_image": user_in_session.monthly_credits_image,
-            "extra_image": user_in_session.extra_credits_image,
-        }
+        credits_remaining=debit.balances,
     )
 
 
@@ -287,6 +272,8 @@ class ContentPieceResponse(BaseModel):
     status: str
     created_at: datetime
     updated_at: datetime | None
+    local_media_url: str | None = None  # Copia en el media store (si ya se descargó)
+    thumbnail_url: str | None = None
 
 
 class SavePlanResponse(BaseModel):
@@ -321,77 +308,114 @@ class SavePlanResponse(BaseModel):
         }
 
 
-@router.post("/campaign/{campaign_id}/save-plan", response_model=SavePlanResponse)
-async def save_content_plan(
+def persist_content_plan(
+    session: Session,
     campaign_id: int,
     plan: SavePlanRequest,
-    current_user: User = Depends(requires_feature("access_marketing")),
-    session: Session = Depends(get_session)
+    user_id: int | None = None
 ) -> SavePlanResponse:
     """
-    Guarda el plan de contenido generado por n8n.
-    
-    Este endpoint es llamado por n8n después de generar el plan de contenido
-    (captions, scripts visuales, etc.) pero antes de generar los media (imágenes/videos).
-    
-    Crea registros ContentPiece con estado "PENDING" para cada pieza del plan.
+    Persiste un plan de contenido en una sola transacción (camino común de
+    save-plan y su versión pública para n8n).
+    
+    Idempotente por campaña: si la campaña ya tiene piezas (n8n ejecutó el
+    workflow dos veces para la misma orden) se devuelven las existentes y
+    el plan repetido se descarta, de modo que n8n sigue con los IDs reales
+    ya guardados y no se generan piezas duplicadas.
+    
+    Cuatro round trips en total, independientemente del tamaño del plan:
+    1. UPDATE de la campaña a "in_progress" con RETURNING (verifica que
+       existe y, si se indica user_id, que pertenece al usuario). Bloquea
+       la fila hasta el COMMIT: un save-plan concurrente de la misma
+       campaña espera y ve las piezas de este
+    2. SELECT de las piezas existentes de la campaña
+    3. INSERT multi-fila de las piezas con RETURNING (IDs y defaults de la
+       DB en el orden del plan, sin flush ni refresh por pieza), solo si
+       no había ninguna
+    4. COMMIT
     
     Args:
-        campaign_id: ID de la campaña (debe existir y pertenecer al usuario)
-        plan: Lista de piezas de contenido con caption y visual_script
-        current_user: Usuario autenticado
         session: Sesión de base de datos
+        campaign_id: ID de la campaña
+        plan: Piezas a crear (estado PENDING)
+        user_id: Propietario requerido (None para el endpoint de servicio)
         
     Returns:
-        SavePlanResponse con la lista completa de piezas creadas (incluyendo IDs reales de DB, caption, visual_script, etc.)
+        SavePlanResponse con las piezas de la campaña (IDs reales de DB)
         
     Raises:
         HTTPException 404 si la campaña no existe o no pertenece al usuario
         HTTPException 500 si falla la creación de las piezas
     """
-    # Verificar que la campaña existe y pertenece al usuario
-    campaign = session.get(MarketingCampaign, campaign_id)
-    if not campaign:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Campaña con ID {campaign_id} no encontrada"
-        )
-    
-    if campaign.user_id != current_user.id:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Campaña no encontrada"
+    now = datetime.now(timezone.utc)
+    
+    campaign_update = (
+        update(MarketingCampaign)
+        .where(MarketingCampaign.id == campaign_id)
+        .values(
+            # Un plan repetido no reabre una campaña ya completada
+            status=case((MarketingCampaign.status == "completed", MarketingCampaign.status), else_="in_progress"),
+            updated_at=now,
         )
+        .returning(MarketingCampaign.id)
+    )
+    if user_id is not None:
+        campaign_update = campaign_update.where(MarketingCampaign.user_id == user_id)
     
-    # Crear las piezas de contenido con estado PENDING
-    created_pieces = []
     try:
-        for piece_data in plan.pieces:
-            content_piece = ContentPiece(
-                campaign_id=campaign_id,
-                platform=piece_data.platform,
-                type=piece_data.type,
-                caption=piece_data.caption,
-                visual_script=piece_data.visual_script,
-                style=piece_data.style if piece_data.style else "cinematic",  # Guardar el estilo
-                status="PENDING",
-                created_at=datetime.now(timezone.utc)
+        if session.execute(campaign_update).first() is None:
+            session.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Campaña con ID {campaign_id} no encontrada"
             )
-            session.add(content_piece)
-            session.flush()  # Para obtener el ID sin hacer commit
-            created_pieces.append(content_piece)
         
-        # Actualizar el estado de la campaña a "in_progress"
-        campaign.status = "in_progress"
-        campaign.updated_at = datetime.now(timezone.utc)
-        session.add(campaign)
-        
-        session.commit()
+        created_pieces: List[ContentPiece] = list(session.scalars(
+            select(ContentPiece).where(ContentPiece.campaign_id == campaign_id).order_by(ContentPiece.id)
+        ))
+        already_saved = bool(created_pieces)
+        if plan.pieces and not already_saved:
+            rows = [
+                {
+                    "campaign_id": campaign_id,
+                    "platform": piece_data.platform,
+                    "type": piece_data.type,
+                    "caption": piece_data.caption,
+                    "visual_script": piece_data.visual_script,
+                    "style": piece_data.style or "cinematic",
+                    "status": "PENDING",
+                    "created_at": now,
+                }
+                for piece_data in plan.pieces
+            ]
+            created_pieces = list(session.scalars(
+                insert(ContentPiece).returning(ContentPiece, sort_by_parameter_order=True),
+                rows
+            ))
         
-        # REFRESCAR todas las piezas para obtener los datos completos de la DB
-        for piece in created_pieces:
-            session.refresh(piece)
+        # Construir la respuesta antes del commit: tras él las instancias
+        # expiran y cada acceso volvería a consultar la pieza
+        pieces_response = [
+            ContentPieceResponse(
+                id=piece.id,
+                campaign_id=piece.campaign_id,
+                platform=piece.platform,
+                type=piece.type,
+                caption=piece.caption,
+                visual_script=piece.visual_script,
+                style=piece.style,
+                media_url=piece.media_url,
+                status=piece.status,
+                created_at=piece.created_at,
+                updated_at=piece.updated_at
+            )
+            for piece in created_pieces
+        ]
         
+        session.commit()
+    
+    except HTTPException:
+        raise
     except Exception as e:
         session.rollback()
         raise HTTPException(
@@ -399,251 +423,358 @@ async def save_content_plan(
             detail=f"Error al guardar el plan de contenido: {str(e)}"
         )
     
-    # Construir respuesta con piezas completas (incluyendo IDs reales)
-    pieces_response = [
-        ContentPieceResponse(
-            id=piece.id,
-            campaign_id=piece.campaign_id,
-            platform=piece.platform,
-            type=piece.type,
-            caption=piece.caption,
-            visual_script=piece.visual_script,
-            style=piece.style,  # Incluir el estilo en la respuesta
-            media_url=piece.media_url,
-            status=piece.status,
-            created_at=piece.created_at,
-            updated_at=piece.updated_at
-        )
-        for piece in created_pieces
-    ]
-    
-    # LOG DEBUG: Ver qué estamos devolviendo
-    print(f"✅ Save Plan Response for campaign {campaign_id}:")
-    print(f"   - Total pieces created: {len(pieces_response)}")
-    for p in pieces_response:
-        print(f"   - Piece ID {p.id}: platform='{p.platform}', type='{p.type}', visual_script_length={len(p.visual_script)}")
+    if already_saved:
+        print(f"⚠️ Save Plan for campaign {campaign_id}: plan already saved, returning {len(pieces_response)} existing pieces")
+        message = f"Plan ya guardado. {len(pieces_response)} piezas existentes."
+    else:
+        print(f"✅ Save Plan for campaign {campaign_id}: {len(pieces_response)} pieces created")
+        message = f"Plan guardado exitosamente. {len(pieces_response)} piezas creadas."
     
     return SavePlanResponse(
         status="success",
-        message=f"Plan guardado exitosamente. {len(pieces_response)} piezas creadas.",
+        message=message,
         campaign_id=campaign_id,
         pieces=pieces_response
     )
 
 
+@router.post("/campaign/{campaign_id}/save-plan", response_model=SavePlanResponse)
+async def save_content_plan(
+    campaign_id: int,
+    plan: SavePlanRequest,
+    current_user: Principal = Depends(requires_feature("access_marketing")),
+    session: Session = Depends(get_session)
+) -> SavePlanResponse:
+    """
+    Guarda el plan de contenido generado por n8n.
+    
+    Este endpoint es llamado por n8n después de generar el plan de contenido
+    (captions, scripts visuales, etc.) pero antes de generar los media (imágenes/videos).
+    
+    Crea registros ContentPiece con estado "PENDING" para cada pieza del plan.
+    
+    Args:
+        campaign_id: ID de la campaña (debe existir y pertenecer al usuario)
+        plan: Lista de piezas de contenido con caption y visual_script
+        current_user: Usuario autenticado
+        session: Sesión de base de datos
+        
+    Returns:
+        SavePlanResponse con la lista completa de piezas creadas (incluyendo IDs reales de DB, caption, visual_script, etc.)
+        
+    Raises:
+        HTTPException 404 si la campaña no existe o no pertenece al usuario
+        HTTPException 500 si falla la creación de las piezas
+    """
+    return persist_content_plan(session, campaign_id, plan, user_id=current_user.id)
+
+
 class UpdateMediaRequest(BaseModel):
     """Request para actualizar el media_url de una pieza de contenido."""
     media_url: str
 
 
-def extract_media_url_from_payload(payload: Dict[str, Any]) -> str | None:
+class UpdateMediaResponse(BaseModel):
+    """Response de la actualización de media (callback aceptado o aplicado)."""
+    status: str  # "accepted" (encolado) o "applied" (aplicado en línea)
+    message: str
+    piece_id: int
+    media_url: str | None = None
+    entry_id: str | None = None  # ID de la entrada en el stream de callbacks
+
+
+async def accept_media_callback(
+    session: Session,
+    response: Response,
+    piece_id: int,
+    payload: Dict[str, Any],
+    user_id: int | None = None,
+) -> UpdateMediaResponse:
     """
-    Adaptador Universal: Extrae la URL del media desde cualquier formato de callback.
+    Encola un callback de media (fast-ack) o lo aplica en línea sin Redis.
     
-    Compatible con:
-    - Fal.ai: { "video": { "url": "..." } } o { "images": [{ "url": "..." }] }
-    - PiAPI: { "media_url": "..." } o { "url": "..." }
-    - Otros formatos: Búsqueda recursiva de URLs
-    
-    Prioridad de búsqueda:
-    1. Campos conocidos de Fal.ai (video.url, images[0].url)
-    2. Campos genéricos (media_url, url)
-    3. Búsqueda recursiva de URLs válidas
+    El consumer del worker resuelve la URL, comprueba la pieza (y que
+    pertenezca a `user_id` si se indica) y la actualiza en lote; ver
+    app/core/callbacks.py.
     
     Args:
-        payload: Diccionario JSON del callback (cualquier estructura)
+        session: Sesión de base de datos (solo para el camino en línea)
+        response: Response inyectada (200 si se aplica en línea)
+        piece_id: ID de la pieza de contenido
+        payload: Body crudo del callback
+        user_id: Usuario que debe poseer la pieza (endpoint autenticado)
         
     Returns:
-        URL del media encontrada o None si no se encuentra
-    """
-    if not payload:
-        return None
-    
-    # 1. PRIORIDAD: Campos conocidos de Fal.ai
-    
-    # Fal.ai - Video format
-    if "video" in payload:
-        video_data = payload["video"]
-        if isinstance(video_data, dict):
-            if "url" in video_data and video_data["url"]:
-                return str(video_data["url"])
-            # También puede venir como "file" o "file_url"
-            if "file" in video_data and video_data["file"]:
-                return str(video_data["file"])
-            if "file_url" in video_data and video_data["file_url"]:
-                return str(video_data["file_url"])
-        # Si video es directamente una string URL
-        elif isinstance(video_data, str) and video_data.startswith(("http://", "https://")):
-            return video_data
-    
-    # Fal.ai - Images format
-    if "images" in payload:
-        images_data = payload["images"]
-        if isinstance(images_data, list) and len(images_data) > 0:
-            first_image = images_data[0]
-            if isinstance(first_image, dict):
-                # Buscar url, file, file_url
-                for key in ["url", "file", "file_url", "image_url"]:
-                    if key in first_image and first_image[key]:
-                        return str(first_image[key])
-            elif isinstance(first_image, str) and first_image.startswith(("http://", "https://")):
-                return first_image
-    
-    # Fal.ai - Image format (singular)
-    if "image" in payload:
-        image_data = payload["image"]
-        if isinstance(image_data, dict):
-            for key in ["url", "file", "file_url", "image_url"]:
-                if key in image_data and image_data[key]:
-                    return str(image_data[key])
-        elif isinstance(image_data, str) and image_data.startswith(("http://", "https://")):
-            return image_data
-    
-    # 2. SEGUNDARIA: Campos genéricos estándar
-    
-    # Campo directo media_url
-    if "media_url" in payload and payload["media_url"]:
-        return str(payload["media_url"])
-    
-    # Campo directo url (puede ser el media o un webhook URL, pero lo intentamos)
-    if "url" in payload and payload["url"]:
-        url_str = str(payload["url"])
-        # Verificar que parezca una URL de media (no un webhook)
-        if url_str.startswith(("http://", "https://")) and not "webhook" in url_str.lower():
-            return url_str
-    
-    # 3. BÚSQUEDA RECURSIVA: Encontrar cualquier URL válida
-    
-    url_pattern = re.compile(r'https?://[^\s"\'<>)]+')
-    media_extensions = ['.jpg', '.jpeg', '.png', '.gif', '.webp', '.mp4', '.mov', '.avi', '.mkv', '.webm']
-    
-    def find_url_recursive(obj: Any, depth: int = 0) -> str | None:
-        """
-        Busca recursivamente una URL en el objeto.
-        Prioriza URLs que parezcan ser de media (imágenes/videos).
-        """
-        # Límite de profundidad para evitar recursión infinita
-        if depth > 10:
-            return None
-            
-        if isinstance(obj, str):
-            # Si es una URL válida, verificar si parece ser media
-            match = url_pattern.search(obj)
-            if match:
-                url = match.group(0)
-                # Priorizar URLs que contengan extensiones de media o dominios conocidos
-                url_lower = url.lower()
-                if any(ext in url_lower for ext in media_extensions):
-                    return url
-                # O dominios de CDN/storage comunes
-                if any(domain in url_lower for domain in ['cdn.', 'storage.', 's3.', 'bucket', 'media.', 'assets.']):
-                    return url
-                # Si no tiene extensión pero termina con una ruta que parece media
-                if not url.endswith(('.json', '.html', '.xml', '.txt', '/')) and len(url.split('/')[-1]) > 5:
-                    return url
-                # Como último recurso, devolver cualquier URL
-                return url
-                
-        elif isinstance(obj, dict):
-            # Buscar primero en claves que sugieran media
-            priority_keys = ['url', 'file', 'file_url', 'media_url', 'image_url', 'video_url', 'src', 'href']
-            for key in priority_keys:
-                if key in obj:
-                    result = find_url_recursive(obj[key], depth + 1)
-                    if result:
-                        return result
-            
-            # Si no encontramos en claves prioritarias, buscar en todos los valores
-            for value in obj.values():
-                result = find_url_recursive(value, depth + 1)
-                if result:
-                    return result
-                    
-        elif isinstance(obj, list):
-            # Buscar en el primer elemento (más probable que sea el media principal)
-            for item in obj:
-                result = find_url_recursive(item, depth + 1)
-                if result:
-                    return result
+        UpdateMediaResponse con status "accepted" o "applied"
         
-        return None
+    Raises:
+        HTTPException 400 si el camino en línea no puede aplicar el callback
+    """
+    try:
+        entry_id = await enqueue_callback(get_redis_client(), KIND_PIECE_MEDIA, piece_id, payload, user_id=user_id)
+    except Exception as e:
+        print(f"⚠️  WARNING: Callback stream no disponible ({str(e)}); aplicando pieza {piece_id} en línea")
+        counts = apply_callbacks(session, [{
+            "entry_id": "inline",
+            "kind": KIND_PIECE_MEDIA,
+            "key": piece_id,
+            "user_id": user_id,
+            "payload": payload,
+        }])
+        if not counts["pieces_updated"]:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"No se pudo actualizar la pieza {piece_id}: no existe o el payload no contiene una URL de media"
+            )
+        response.status_code = status.HTTP_200_OK
+        return UpdateMediaResponse(
+            status="applied",
+            message=f"Media actualizado exitosamente para la pieza {piece_id}",
+            piece_id=piece_id,
+            media_url=extract_media_url_from_payload(payload),
+        )
     
-    return find_url_recursive(payload)
+    return UpdateMediaResponse(
+        status="accepted",
+        message=f"Callback recibido para la pieza {piece_id}; se aplicará en segundo plano",
+        piece_id=piece_id,
+        entry_id=entry_id,
+    )
 
 
-class UpdateMediaResponse(BaseModel):
-    """Response de la actualización de media."""
-    status: str
-    message: str
+# Tope de piezas por llamada bulk (un UPDATE por lote)
+BULK_MEDIA_MAX_ITEMS = 500
+
+# Estados que n8n puede fijar en una pieza
+BULK_MEDIA_STATUSES = ("COMPLETED", "FAILED", "GENERATING")
+
+
+class BulkMediaItem(BaseModel):
+    """Una pieza dentro de un callback bulk de media."""
     piece_id: int
-    media_url: str
+    media_url: str | None = None  # URL ya resuelta
+    payload: Dict[str, Any] | None = None  # Callback crudo del proveedor (si no hay media_url)
+    status: str = "COMPLETED"  # COMPLETED, FAILED o GENERATING
+
+
+class BulkUpdateMediaRequest(BaseModel):
+    """Request para actualizar el media de varias piezas en una llamada."""
+    items: List[BulkMediaItem] = Field(..., min_length=1, max_length=BULK_MEDIA_MAX_ITEMS)
+
+
+class BulkMediaItemResult(BaseModel):
+    """Resultado por pieza de un callback bulk."""
+    piece_id: int
+    result: str  # accepted, updated, not_found, invalid_status, missing_media_url, superseded
+    status: str | None = None
+    media_url: str | None = None
+
+
+class BulkUpdateMediaResponse(BaseModel):
+    """Response de la actualización bulk de media."""
+    status: str  # accepted (encolado), success, partial o failed
+    message: str
+    updated: int
+    rejected: int
+    campaign_ids: List[int]
+    results: List[BulkMediaItemResult]
+    accepted: int = 0  # Items encolados en el stream de callbacks
+
+
+def _resolve_bulk_media_items(
+    items: List[BulkMediaItem],
+) -> tuple[List[BulkMediaItemResult], Dict[int, int]]:
+    """
+    Resuelve la URL de cada item (media_url o extracción del payload) y
+    valida su estado. Si una pieza aparece varias veces gana el último item,
+    campo a campo: un item sin URL conserva la del anterior (como si se
+    aplicaran en orden).
+    
+    Returns:
+        (results, latest): un resultado por item, en orden, y piece_id ->
+            índice en results del item que se aplica
+    """
+    results: List[BulkMediaItemResult] = []
+    latest: Dict[int, int] = {}  # piece_id -> índice en results
+    for item in items:
+        piece_status = item.status.strip().upper()
+        media_url = item.media_url or (extract_media_url_from_payload(item.payload) if item.payload else None)
+        if piece_status not in BULK_MEDIA_STATUSES:
+            results.append(BulkMediaItemResult(piece_id=item.piece_id, result="invalid_status", status=item.status))
+            continue
+        if piece_status == "COMPLETED" and not media_url:
+            results.append(BulkMediaItemResult(piece_id=item.piece_id, result="missing_media_url", status=piece_status))
+            continue
+        if item.piece_id in latest:
+            superseded = results[latest[item.piece_id]]
+            superseded.result = "superseded"
+            media_url = media_url or superseded.media_url
+        latest[item.piece_id] = len(results)
+        results.append(BulkMediaItemResult(piece_id=item.piece_id, result="updated", status=piece_status, media_url=media_url))
+    return results, latest
+
+
+def apply_bulk_media_updates(
+    session: Session,
+    items: List[BulkMediaItem],
+    user_id: int | None = None,
+) -> BulkUpdateMediaResponse:
+    """
+    Aplica un lote de actualizaciones de media en una sola transacción.
+    
+    Camino en línea de bulk-update-media cuando el stream de callbacks no
+    está disponible: delega en write_piece_updates (una query de
+    propiedad, un UPDATE para todas las piezas y otro para el progreso de
+    sus campañas).
+    
+    Args:
+        session: Sesión de base de datos
+        items: Items del request, en orden
+        user_id: Usuario que debe poseer las piezas (endpoint autenticado)
+        
+    Returns:
+        BulkUpdateMediaResponse con un resultado por item, en orden
+    """
+    results, latest = _resolve_bulk_media_items(items)
+    written = write_piece_updates(session, {
+        piece_id: (results[index].media_url, results[index].status, user_id)
+        for piece_id, index in latest.items()
+    })
+    for piece_id in written["rejected"]:
+        results[latest[piece_id]].result = "not_found"
+    session.commit()
+    
+    updated = len(written["updated"])
+    return BulkUpdateMediaResponse(
+        status="success" if updated == len(items) else ("partial" if updated else "failed"),
+        message=f"{updated} de {len(items)} piezas actualizadas",
+        updated=updated,
+        rejected=len(items) - updated,
+        campaign_ids=written["campaigns"],
+        results=results,
+    )
 
 
-@router.patch("/content/{piece_id}/update-media", response_model=UpdateMediaResponse)
+async def accept_bulk_media_updates(
+    session: Session,
+    response: Response,
+    items: List[BulkMediaItem],
+    user_id: int | None = None,
+) -> BulkUpdateMediaResponse:
+    """
+    Encola los items válidos de un bulk-update-media en el stream de
+    callbacks (fast-ack) o los aplica en línea sin Redis.
+    
+    Pasan por el mismo stream que los callbacks por pieza, así que se
+    aplican en orden de llegada respecto a ellos: un callback anterior que
+    siga en el stream no sobrescribe el valor bulk. El consumer comprueba
+    que las piezas existen (y pertenecen a `user_id` si se indica).
+    
+    Args:
+        session: Sesión de base de datos (solo para el camino en línea)
+        response: Response inyectada (200 si se aplica en línea)
+        items: Items del request, en orden
+        user_id: Usuario que debe poseer las piezas (endpoint autenticado)
+        
+    Returns:
+        BulkUpdateMediaResponse con un resultado por item, en orden
+    """
+    results, latest = _resolve_bulk_media_items(items)
+    if latest:
+        try:
+            await enqueue_callbacks(
+                get_redis_client(),
+                KIND_PIECE_STATUS,
+                {
+                    piece_id: {"media_url": results[index].media_url, "status": results[index].status}
+                    for piece_id, index in latest.items()
+                },
+                user_id=user_id,
+            )
+        except Exception as e:
+            print(f"⚠️  WARNING: Callback stream no disponible ({str(e)}); aplicando {len(items)} items en línea")
+            response.status_code = status.HTTP_200_OK
+            return apply_bulk_media_updates(session, items, user_id=user_id)
+    
+    for index in latest.values():
+        results[index].result = "accepted"
+    accepted = len(latest)
+    return BulkUpdateMediaResponse(
+        status="accepted" if accepted else "failed",
+        message=f"{accepted} de {len(items)} piezas encoladas; se aplicarán en segundo plano",
+        updated=0,
+        rejected=len(items) - accepted,
+        campaign_ids=[],
+        results=results,
+        accepted=accepted,
+    )
+
+
+@router.patch(
+    "/content/{piece_id}/update-media",
+    response_model=UpdateMediaResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+)
 async def update_content_media(
     piece_id: int,
     update: UpdateMediaRequest,
-    current_user: User = Depends(requires_feature("access_marketing")),
+    response: Response,
+    current_user: Principal = Depends(requires_feature("access_marketing")),
     session: Session = Depends(get_session)
 ) -> UpdateMediaResponse:
     """
-    Actualiza el media_url de una pieza de contenido y cambia su estado a COMPLETED.
+    Registra el media_url de una pieza de contenido (pasa a COMPLETED).
     
     Este endpoint es llamado por n8n cuando la imagen/video ha sido generado
-    y está listo para ser usado.
+    y está listo para ser usado. Responde 202 en cuanto el callback está en
+    el stream; el worker comprueba que la pieza pertenece al usuario y la
+    actualiza (ver accept_media_callback).
     
     Args:
         piece_id: ID de la pieza de contenido
         update: Request con el media_url
+        response: Response inyectada
         current_user: Usuario autenticado
         session: Sesión de base de datos
         
     Returns:
-        UpdateMediaResponse con el estado actualizado
-        
-    Raises:
-        HTTPException 404 si la pieza no existe o no pertenece al usuario
-        HTTPException 500 si falla la actualización
+        UpdateMediaResponse con el estado del callback
     """
-    # Obtener la pieza de contenido
-    content_piece = session.get(ContentPiece, piece_id)
-    if not content_piece:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Pieza de contenido con ID {piece_id} no encontrada"
-        )
+    return await accept_media_callback(
+        session, response, piece_id, {"media_url": update.media_url}, user_id=current_user.id
+    )
+
+
+@router.patch(
+    "/content/bulk-update-media",
+    response_model=BulkUpdateMediaResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+)
+async def bulk_update_content_media(
+    bulk: BulkUpdateMediaRequest,
+    response: Response,
+    current_user: Principal = Depends(requires_feature("access_marketing")),
+    session: Session = Depends(get_session)
+) -> BulkUpdateMediaResponse:
+    """
+    Actualiza el media_url/estado de varias piezas en una sola llamada.
     
-    # Verificar que la campaña pertenece al usuario
-    campaign = session.get(MarketingCampaign, content_piece.campaign_id)
-    if not campaign or campaign.user_id != current_user.id:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Pieza de contenido no encontrada"
-        )
+    Pensado para n8n al terminar una campaña: en lugar de un callback por
+    pieza, envía todas las piezas en un request. Responde 202 con un
+    resultado por item en cuanto los items válidos están en el stream de
+    callbacks; el worker los aplica en orden con el resto de callbacks.
+    Solo se actualizan piezas de campañas del usuario.
     
-    # Actualizar el media_url y el estado
-    try:
-        content_piece.media_url = update.media_url
-        content_piece.status = "COMPLETED"
-        content_piece.updated_at = datetime.now(timezone.utc)
-        
-        session.add(content_piece)
-        session.commit()
-        session.refresh(content_piece)
+    Args:
+        bulk: Items (piece_id, media_url o payload, status)
+        response: Response inyectada
+        current_user: Usuario autenticado
+        session: Sesión de base de datos
         
-    except Exception as e:
-        session.rollback()
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Error al actualizar el media: {str(e)}"
-        )
-    
-    return UpdateMediaResponse(
-        status="success",
-        message=f"Media actualizado exitosamente para la pieza {piece_id}",
-        piece_id=piece_id,
-        media_url=update.media_url
-    )
+    Returns:
+        BulkUpdateMediaResponse con el resultado de cada item
+    """
+    return await accept_bulk_media_updates(session, response, bulk.items, user_id=current_user.id)
 
 
 # ============================================================================
@@ -703,93 +834,25 @@ async def save_content_plan_public(
             ]
         }
     """
-    # Verificar que la campaña existe
-    campaign = session.get(MarketingCampaign, campaign_id)
-    if not campaign:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Campaña con ID {campaign_id} no encontrada"
-        )
-    
     # Validar que hay piezas en el plan
-    if not plan.pieces or len(plan.pieces) == 0:
+    if not plan.pieces:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="El plan debe contener al menos una pieza de contenido. Formato esperado: { 'pieces': [...] }"
         )
     
-    # Crear las piezas de contenido con estado PENDING
-    created_pieces = []
-    try:
-        for piece_data in plan.pieces:
-            content_piece = ContentPiece(
-                campaign_id=campaign_id,
-                platform=piece_data.platform,
-                type=piece_data.type,
-                caption=piece_data.caption,
-                visual_script=piece_data.visual_script,
-                style=piece_data.style if piece_data.style else "cinematic",  # Guardar el estilo
-                status="PENDING",
-                created_at=datetime.now(timezone.utc)
-            )
-            session.add(content_piece)
-            session.flush()  # Para obtener el ID sin hacer commit
-            created_pieces.append(content_piece)
-        
-        # Actualizar el estado de la campaña a "in_progress"
-        campaign.status = "in_progress"
-        campaign.updated_at = datetime.now(timezone.utc)
-        session.add(campaign)
-        
-        session.commit()
-        
-        # REFRESCAR todas las piezas para obtener los datos completos de la DB
-        for piece in created_pieces:
-            session.refresh(piece)
-        
-    except Exception as e:
-        session.rollback()
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Error al guardar el plan de contenido: {str(e)}"
-        )
-    
-    # Construir respuesta con piezas completas (incluyendo IDs reales)
-    pieces_response = [
-        ContentPieceResponse(
-            id=piece.id,
-            campaign_id=piece.campaign_id,
-            platform=piece.platform,
-            type=piece.type,
-            caption=piece.caption,
-            visual_script=piece.visual_script,
-            style=piece.style,  # Incluir el estilo en la respuesta
-            media_url=piece.media_url,
-            status=piece.status,
-            created_at=piece.created_at,
-            updated_at=piece.updated_at
-        )
-        for piece in created_pieces
-    ]
-    
-    # LOG DEBUG: Ver qué estamos devolviendo
-    print(f"✅ Save Plan (PUBLIC) Response for campaign {campaign_id}:")
-    print(f"   - Total pieces created: {len(pieces_response)}")
-    for p in pieces_response:
-        print(f"   - Piece ID {p.id}: platform='{p.platform}', type='{p.type}', visual_script_length={len(p.visual_script)}")
-    
-    return SavePlanResponse(
-        status="success",
-        message=f"Plan guardado exitosamente. {len(pieces_response)} piezas creadas.",
-        campaign_id=campaign_id,
-        pieces=pieces_response
-    )
+    return persist_content_plan(session, campaign_id, plan)
 
 
-@router.patch("/public/content/{piece_id}/update-media")
+@router.patch(
+    "/public/content/{piece_id}/update-media",
+    response_model=UpdateMediaResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+)
 async def update_content_media_public(
     piece_id: int,
     request: Request,
+    response: Response,
     _: bool = Depends(verify_service_api_key),  # Validar API key pero no usar el resultado
     session: Session = Depends(get_session)
 ) -> UpdateMediaResponse:
@@ -799,7 +862,9 @@ async def update_content_media_public(
     🔌 ADAPTADOR UNIVERSAL: Acepta cualquier formato de callback de proveedores (Fal.ai, PiAPI, etc.)
     
     No requiere autenticación de usuario, solo API key de servicio.
-    Actualiza el media_url y cambia el estado a COMPLETED.
+    Responde 202 en cuanto el payload crudo está en el stream de callbacks;
+    el worker extrae la URL, actualiza el media_url y cambia el estado a
+    COMPLETED (ver accept_media_callback).
     
     Formatos soportados:
     
@@ -820,90 +885,73 @@ async def update_content_media_public(
        Prioriza URLs que parezcan ser de media (con extensiones .mp4, .jpg, etc. o dominios de CDN).
     
     Args:
-        piece_id: ID de la pieza de contenido (puede venir en query param o body)
+        piece_id: ID de la pieza de contenido
         request: Request completo para extraer el body JSON flexible
+        response: Response inyectada
         _: API key validada (no se usa)
         session: Sesión de base de datos
         
     Returns:
-        UpdateMediaResponse con el estado actualizado
+        UpdateMediaResponse con el estado del callback
         
     Raises:
-        HTTPException 404 si la pieza no existe
-        HTTPException 400 si no se puede extraer la URL del media
-        HTTPException 500 si falla la actualización
+        HTTPException 400 si el body no es un objeto JSON
     """
-    # Obtener la pieza de contenido
-    content_piece = session.get(ContentPiece, piece_id)
-    if not content_piece:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Pieza de contenido con ID {piece_id} no encontrada"
-        )
-    
     # Parsear el body JSON (acepta cualquier estructura)
     try:
-        payload: Dict[str, Any] = await request.json()
-        # LOG DEBUG: Ver el payload completo recibido
-        print(f"📦 Received webhook payload for piece {piece_id}:")
-        print(f"   - Payload keys: {list(payload.keys())}")
-        print(f"   - Payload preview: {str(payload)[:500]}...")
+        payload = await request.json()
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"Error al parsear el JSON del request: {str(e)}"
         )
-    
-    # Extraer la URL del media usando el adaptador universal
-    media_url = extract_media_url_from_payload(payload)
-    
-    # LOG DEBUG: Ver si se encontró la URL
-    if media_url:
-        print(f"✅ Extracted media URL: {media_url[:100]}...")
-    else:
-        print(f"⚠️  Could not extract media URL from payload")
-        print(f"   - Payload structure: {str(payload)[:1000]}")
-    
-    if not media_url:
+    if not isinstance(payload, dict):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"No se pudo extraer la URL del media desde el payload. Payload recibido: {payload}"
+            detail="El body del callback debe ser un objeto JSON"
         )
     
-    # Actualizar el media_url y el estado
-    try:
-        # LOG DEBUG: Ver qué estamos recibiendo
-        print(f"🔄 Updating content piece {piece_id}:")
-        print(f"   - Previous status: {content_piece.status}")
-        print(f"   - Previous media_url: {content_piece.media_url}")
-        print(f"   - New media_url: {media_url[:100] if media_url else None}...")
-        
-        content_piece.media_url = media_url
-        content_piece.status = "COMPLETED"  # Normalizar a mayúsculas
-        content_piece.updated_at = datetime.now(timezone.utc)
-        
-        session.add(content_piece)
-        session.commit()
-        session.refresh(content_piece)
-        
-        print(f"✅ Successfully updated piece {piece_id}:")
-        print(f"   - New status: {content_piece.status}")
-        print(f"   - New media_url: {content_piece.media_url[:100] if content_piece.media_url else None}...")
-        
-    except Exception as e:
-        session.rollback()
-        print(f"❌ Error updating piece {piece_id}: {str(e)}")
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Error al actualizar el media: {str(e)}"
-        )
+    return await accept_media_callback(session, response, piece_id, payload)
+
+
+@router.patch(
+    "/public/content/bulk-update-media",
+    response_model=BulkUpdateMediaResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+)
+async def bulk_update_content_media_public(
+    bulk: BulkUpdateMediaRequest,
+    response: Response,
+    _: bool = Depends(verify_service_api_key),  # Validar API key pero no usar el resultado
+    session: Session = Depends(get_session)
+) -> BulkUpdateMediaResponse:
+    """
+    Versión pública del endpoint bulk-update-media para uso por n8n.
     
-    return UpdateMediaResponse(
-        status="success",
-        message=f"Media actualizado exitosamente para la pieza {piece_id}",
-        piece_id=piece_id,
-        media_url=media_url
-    )
+    No requiere autenticación de usuario, solo API key de servicio. Cada
+    item puede traer la URL ya resuelta o el callback crudo del proveedor
+    en `payload` (se extrae igual que en update-media). Responde 202 con
+    los items encolados (ver accept_bulk_media_updates).
+    
+    Body esperado:
+    {
+        "items": [
+            { "piece_id": 50, "media_url": "https://..." },
+            { "piece_id": 51, "payload": { "video": { "url": "https://..." } } },
+            { "piece_id": 52, "status": "FAILED" }
+        ]
+    }
+    
+    Args:
+        bulk: Items (piece_id, media_url o payload, status)
+        response: Response inyectada
+        _: API key validada (no se usa)
+        session: Sesión de base de datos
+        
+    Returns:
+        BulkUpdateMediaResponse con el resultado de cada item
+    """
+    return await accept_bulk_media_updates(session, response, bulk.items)
 
 
 # ============================================================================
@@ -944,6 +992,14 @@ class MarketingCampaignListItemResponse(BaseModel):
     total_pieces_count: int  # Número total de piezas
 
 
+# REGLA DE ORO: una pieza con media_url está completada (independientemente
+# del status); si no, solo si su status es COMPLETED (en cualquier casing)
+PIECE_COMPLETED = or_(
+    and_(ContentPiece.media_url.is_not(None), func.trim(ContentPiece.media_url) != ""),
+    func.upper(ContentPiece.status) == "COMPLETED",
+)
+
+
 class MarketingCampaignListResponse(BaseModel):
     """Response model para la lista de campañas."""
     campaigns: List[MarketingCampaignListItemResponse]
@@ -952,7 +1008,7 @@ class MarketingCampaignListResponse(BaseModel):
 
 @router.get("/campaigns", response_model=MarketingCampaignListResponse)
 async def list_marketing_campaigns(
-    current_user: User = Depends(requires_feature("access_marketing")),
+    current_user: Principal = Depends(requires_feature("access_marketing")),
     session: Session = Depends(get_session),
     limit: int = 50,
     offset: int = 0
@@ -981,25 +1037,38 @@ async def list_marketing_campaigns(
     )
     campaigns = session.exec(statement).all()
     
-    # Contar total (para paginación)
-    count_statement = select(MarketingCampaign).where(MarketingCampaign.user_id == current_user.id)
-    total_campaigns = len(session.exec(count_statement).all())
+    # Contar total (para paginación) sin cargar las filas
+    count_statement = (
+        select(func.count())
+        .select_from(MarketingCampaign)
+        .where(MarketingCampaign.user_id == current_user.id)
+    )
+    total_campaigns = session.exec(count_statement).one()
+    
+    # Progreso de toda la página en una sola query agregada (sin cargar
+    # captions ni scripts de las piezas)
+    progress: Dict[int, tuple[int, int]] = {}
+    campaign_ids = [campaign.id for campaign in campaigns]
+    if campaign_ids:
+        progress_statement = (
+            select(
+                ContentPiece.campaign_id,
+                func.count(ContentPiece.id),
+                func.count(ContentPiece.id).filter(PIECE_COMPLETED),
+            )
+            .where(ContentPiece.campaign_id.in_(campaign_ids))
+            .group_by(ContentPiece.campaign_id)
+        )
+        progress = {
+            campaign_id: (total, completed)
+            for campaign_id, total, completed in session.exec(progress_statement).all()
+        }
     
-    # Para cada campaña, contar piezas completadas
     campaign_responses = []
     for campaign in campaigns:
         # Parsear platforms (puede ser string separado por comas)
         platforms_list = campaign.platforms.split(",") if isinstance(campaign.platforms, str) else campaign.platforms
-        
-        # Contar piezas de contenido
-        pieces_statement = select(ContentPiece).where(ContentPiece.campaign_id == campaign.id)
-        all_pieces = session.exec(pieces_statement).all()
-        total_pieces = len(all_pieces)
-        # REGLA DE ORO: Si tiene media_url, es completada (independientemente del status)
-        completed_pieces = len([
-            p for p in all_pieces 
-            if (p.media_url and p.media_url.strip()) or (p.status and p.status.upper() == "COMPLETED")
-        ])
+        total_pieces, completed_pieces = progress.get(campaign.id, (0, 0))
         
         campaign_responses.append(
             MarketingCampaignListItemResponse(
@@ -1024,26 +1093,73 @@ async def list_marketing_campaigns(
     )
 
 
+def get_campaign_version(session: Session, campaign_id: int):
+    """
+    Versión de una campaña y sus piezas en una sola query indexada.
+    
+    No carga captions, scripts ni media_url: solo updated_at/status de la
+    campaña y agregados de las piezas (count, max(id), max(updated_at)).
+    Cualquier alta, baja o actualización cambia alguno de los valores.
+    
+    Returns:
+        Fila (user_id, updated_at, status, pieces, max_piece_id,
+        max_piece_updated_at) o None si la campaña no existe
+    """
+    statement = (
+        select(
+            MarketingCampaign.user_id,
+            MarketingCampaign.updated_at,
+            MarketingCampaign.status,
+            func.count(ContentPiece.id),
+            func.max(ContentPiece.id),
+            func.max(ContentPiece.updated_at),
+        )
+        .outerjoin(ContentPiece, ContentPiece.campaign_id == MarketingCampaign.id)
+        .where(MarketingCampaign.id == campaign_id)
+        .group_by(MarketingCampaign.id)
+    )
+    return session.exec(statement).first()
+
+
 @router.get("/campaign/{campaign_id}", response_model=MarketingCampaignDetailResponse)
 async def get_marketing_campaign(
     campaign_id: int,
-    current_user: User = Depends(requires_feature("access_marketing")),
+    request: Request,
+    response: Response,
+    current_user: Principal = Depends(requires_feature("access_marketing")),
     session: Session = Depends(get_session)
 ) -> MarketingCampaignDetailResponse:
     """
     Obtiene los detalles completos de una campaña de marketing, incluyendo todas sus piezas de contenido.
     
+    El dashboard sondea este endpoint: responde con ETag y, si el cliente ya
+    tiene la versión actual (If-None-Match), devuelve 304 sin cargar ni
+    serializar las piezas.
+    
     Args:
         campaign_id: ID de la campaña
+        request: Request (If-None-Match)
+        response: Response (recibe el ETag)
         current_user: Usuario autenticado
         session: Sesión de base de datos
         
     Returns:
-        MarketingCampaignDetailResponse con campaña y piezas anidadas
+        MarketingCampaignDetailResponse con campaña y piezas anidadas (o 304)
         
     Raises:
         HTTPException 404 si la campaña no existe o no pertenece al usuario
     """
+    version = get_campaign_version(session, campaign_id)
+    if not version or version[0] != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Campaña con ID {campaign_id} no encontrada"
+        )
+    etag = compute_etag("marketing:campaign", campaign_id, *version[1:])
+    not_modified = conditional_get(request, response, etag)
+    if not_modified is not None:
+        return not_modified
+    
     # Obtener campaña
     campaign = session.get(MarketingCampaign, campaign_id)
     
@@ -1072,9 +1188,22 @@ async def get_marketing_campaign(
     # Parsear platforms
     platforms_list = campaign.platforms.split(",") if isinstance(campaign.platforms, str) else campaign.platforms
     
+    # Copias locales del media (media store) de todas las piezas en una query
+    asset_ids = {piece.media_asset_id for piece in pieces if piece.media_asset_id}
+    assets = {}
+    if asset_ids:
+        assets = {
+            asset_id: (sha256, has_thumbnail)
+            for asset_id, sha256, has_thumbnail in session.exec(
+                select(MediaAsset.id, MediaAsset.sha256, MediaAsset.has_thumbnail)
+                .where(MediaAsset.id.in_(asset_ids))
+            ).all()
+        }
+    
     # Construir respuesta con piezas anidadas - Asegurar que media_url se devuelve tal cual está en DB
     content_pieces = []
     for piece in pieces:
+        asset = assets.get(piece.media_asset_id)
         piece_response = ContentPieceResponse(
             id=piece.id,
             campaign_id=piece.campaign_id,
@@ -1086,13 +1215,15 @@ async def get_marketing_campaign(
             media_url=piece.media_url,  # Devolver tal cual está en DB (puede ser None o string)
             status=piece.status,  # Devolver tal cual está en DB (puede ser "COMPLETED", "completed", etc.)
             created_at=piece.created_at,
-            updated_at=piece.updated_at
+            updated_at=piece.updated_at,
+            local_media_url=media_asset_url(asset[0]) if asset else None,
+            thumbnail_url=media_thumbnail_url(asset[0]) if asset and asset[1] else None
         )
         content_pieces.append(piece_response)
         # LOG DEBUG: Ver qué estamos devolviendo
         print(f"   ✅ Serialized piece {piece.id}: status='{piece_response.status}', media_url_length={len(piece_response.media_url) if piece_response.media_url else 0}, media_url_preview={piece_response.media_url[:80] if piece_response.media_url else 'NULL'}...")
     
-    response = MarketingCampaignDetailResponse(
+    campaign_detail = MarketingCampaignDetailResponse(
         id=campaign.id,
         user_id=campaign.user_id,
         name=campaign.name,
@@ -1117,5 +1248,5 @@ async def get_marketing_campaign(
         else:
             print(f"   - ❌ Piece {p.id}: NO media_url (status='{p.status}')")
     
-    return response
+    return campaign_detail
 
@@ -0,0 +1,140 @@
+"""
+Media Routes - Servir el media store local
+
+Sirve los ficheros que el worker copia al media store
+(app/services/media_store.py) en lugar de enlazar al CDN del proveedor.
+
+- URLs direccionadas por contenido (`/media/{sha256}`): el contenido de
+  una URL no cambia nunca, así que se cachean un año (`immutable`) y el
+  ETag es el propio hash
+- Range requests (vídeo con seek) y HEAD vía FileResponse, que usa
+  `http.response.pathsend` si el servidor ASGI lo soporta
+- Con MEDIA_STORE_ACCEL_PREFIX definido, la respuesta lleva
+  `X-Accel-Redirect` y el proxy (Caddy) sirve el fichero desde el volumen
+  con sendfile, sin pasar los bytes por Python
+
+Las rutas son públicas: el hash (256 bits) actúa como capability, igual
+que las URLs firmadas que sustituyen. Todo va con
+`X-Content-Type-Options: nosniff`; solo imágenes y vídeos se sirven
+inline, cualquier otro tipo (incluido SVG) como `attachment`, de modo que
+un fichero del store nunca se ejecuta en el origen de la API.
+"""
+
+import re
+from pathlib import Path
+
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.responses import FileResponse, Response
+from sqlmodel import Session, select
+
+from app.core.conditional import etag_matches
+from app.core.config import settings
+from app.core.database import get_session
+from app.models.media import MediaAsset
+from app.services.media_store import is_servable_mime_type, media_store
+
+router = APIRouter()
+
+
+# Contenido inmutable: caché compartida de un año sin revalidar
+MEDIA_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+_SHA256_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+
+
+def media_asset_url(sha256: str) -> str:
+    """URL pública del fichero original de un MediaAsset."""
+    return f"/api/v1/media/{sha256}"
+
+
+def media_thumbnail_url(sha256: str) -> str:
+    """URL pública del thumbnail de un MediaAsset."""
+    return f"/api/v1/media/{sha256}/thumbnail"
+
+
+def _not_found() -> HTTPException:
+    return HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Media no encontrado")
+
+
+def serve_media_file(request: Request, path: Path, etag: str, media_type: str) -> Response:
+    """
+    Respuesta para un fichero del store (304, X-Accel-Redirect o FileResponse).
+
+    Args:
+        request: Request (If-None-Match, Range)
+        path: Ruta del fichero en el store
+        etag: ETag fuerte del contenido
+        media_type: Content-Type
+
+    Returns:
+        Response lista para devolver
+
+    Raises:
+        HTTPException 404 si el fichero no está en disco
+    """
+    headers = {
+        "Cache-Control": MEDIA_CACHE_CONTROL,
+        "ETag": etag,
+        "X-Content-Type-Options": "nosniff",
+        "Content-Disposition": "inline" if is_servable_mime_type(media_type) else "attachment",
+    }
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    if not path.is_file():
+        raise _not_found()
+
+    if settings.MEDIA_STORE_ACCEL_PREFIX:
+        headers["X-Accel-Redirect"] = f"{settings.MEDIA_STORE_ACCEL_PREFIX.rstrip('/')}/{media_store.relative_path(path)}"
+        return Response(headers=headers, media_type=media_type)
+
+    return FileResponse(path, media_type=media_type, headers=headers)
+
+
+@router.api_route("/{sha256}", methods=["GET", "HEAD"])
+async def get_media(
+    sha256: str,
+    request: Request,
+    session: Session = Depends(get_session)
+) -> Response:
+    """
+    Sirve el fichero original de un MediaAsset.
+
+    Soporta `Range` (206/416) y `If-None-Match` (304).
+
+    Args:
+        sha256: Hash del fichero
+        request: Request
+        session: Sesión de base de datos
+
+    Returns:
+        Fichero con caché inmutable
+
+    Raises:
+        HTTPException 404 si el hash no existe en el store
+    """
+    if not _SHA256_PATTERN.match(sha256):
+        raise _not_found()
+    mime_type = session.exec(select(MediaAsset.mime_type).where(MediaAsset.sha256 == sha256)).first()
+    if mime_type is None:
+        raise _not_found()
+    return serve_media_file(request, media_store.object_path(sha256), f'"{sha256}"', mime_type)
+
+
+@router.api_route("/{sha256}/thumbnail", methods=["GET", "HEAD"])
+async def get_media_thumbnail(sha256: str, request: Request) -> Response:
+    """
+    Sirve el thumbnail JPEG de un MediaAsset (sin consultar la base de datos).
+
+    Args:
+        sha256: Hash del fichero original
+        request: Request
+
+    Returns:
+        Thumbnail con caché inmutable
+
+    Raises:
+        HTTPException 404 si no hay thumbnail para el hash
+    """
+    if not _SHA256_PATTERN.match(sha256):
+        raise _not_found()
+    return serve_media_file(request, media_store.thumbnail_path(sha256), f'"{sha256}-thumb"', "image/jpeg")
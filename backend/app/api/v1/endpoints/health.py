@@ -15,10 +15,18 @@ from typing import Dict, Any, Optional
 from datetime import datetime
 import asyncio
 
-from app.infrastructure.db.session import engine
+from sqlmodel import Session
+
+from app.infrastructure.db.metrics import checkout_metrics
+from app.infrastructure.db.session import engine, replica_monitor
 from app.infrastructure.cache.redis import get_redis_client
 from app.modules.chat.engine.gemini import GeminiEngine
 from app.core.config import settings
+from app.core.admission import llm_admission
+from app.core.hashing import password_hasher
+from app.core.outbox import get_outbox_backlog, get_outbox_stats
+from app.core.read_routing import read_router
+from app.workers.queues import get_queue_stats, get_total_queue_depth
 
 router = APIRouter(prefix="/health", tags=["health"])
 
@@ -157,7 +165,7 @@ async def check_worker_status() -> Dict[str, Any]:
         
         # Intentar obtener tamaño de la cola
         try:
-            queue_size = await redis_client.llen("arq:queue")
+            queue_size = await get_total_queue_depth(redis_client)
         except Exception:
             queue_size = 0
         
@@ -195,7 +203,7 @@ async def check_worker() -> ServiceStatus:
         # Arq usa claves específicas en Redis
         try:
             # Verificar si hay jobs en la cola
-            queue_length = await redis_client.llen("arq:queue")
+            queue_length = await get_total_queue_depth(redis_client)
             latency_ms = (time.time() - start) * 1000
             
             return ServiceStatus(
@@ -373,3 +381,132 @@ async def simple_health() -> Dict[str, str]:
         "version": settings.VERSION
     }
 
+
+
+@router.get(
+    "/admission",
+    response_model=Dict[str, Any],
+    summary="Métricas de admission control",
+    description="Slots en uso, profundidad de cola y peticiones descartadas de los endpoints LLM y del pool de bcrypt (por proceso)"
+)
+async def admission_metrics() -> Dict[str, Any]:
+    """
+    Métricas del admission control de este proceso.
+    
+    Útil para dimensionar LLM_MAX_CONCURRENT / LLM_MAX_QUEUE (y
+    PASSWORD_HASH_WORKERS con `avg_queue_ms` del pool de bcrypt) y alertar
+    cuando `shed_total` crece (el servicio está rechazando carga).
+    
+    Returns:
+        Dict con in_flight, queue_depth, admitted_total y shed_by_reason
+    """
+    return {
+        "timestamp": datetime.utcnow().isoformat(),
+        "controllers": [llm_admission.snapshot(), password_hasher.snapshot()]
+    }
+
+
+@router.get(
+    "/database",
+    response_model=Dict[str, Any],
+    summary="Métricas de base de datos",
+    description="Checkouts de conexión por request, lag de la réplica y reparto de lecturas entre réplica y primario (por proceso)"
+)
+async def database_metrics() -> Dict[str, Any]:
+    """
+    Uso de conexiones y routing de lecturas de este proceso.
+    
+    `checkouts` es la distribución de conexiones pedidas al pool por
+    request: más de una indica sesiones duplicadas en la cadena de
+    dependencies.
+    
+    `routed_by_reason` cuenta por qué cada lectura fue a la réplica o al
+    primario (replica, recent_write, replica_lag, no_replica, ...): un
+    `replica_lag` alto indica que READ_REPLICA_MAX_LAG_SECONDS es corto o
+    que la réplica no da abasto.
+    
+    Returns:
+        Dict con checkouts por request, estado del monitor de lag y
+        decisiones de routing
+    """
+    return {
+        "timestamp": datetime.utcnow().isoformat(),
+        "checkouts": checkout_metrics.snapshot(),
+        "replica": replica_monitor.snapshot(),
+        "read_routing": read_router.snapshot(),
+    }
+
+
+@router.get(
+    "/queues",
+    response_model=Dict[str, Any],
+    summary="Métricas de colas de Arq",
+    description="Profundidad, jobs listos y tiempos de espera por cola nombrada (interactive, bulk, maintenance)"
+)
+async def queue_metrics() -> Dict[str, Any]:
+    """
+    Estado de las colas de Arq para decidir cuándo escalar cada pool.
+    
+    Returns:
+        Dict con una entrada por cola: depth, ready, oldest_ready_age_s,
+        avg_wait_ms y last_wait_ms (medidos por los workers al iniciar jobs)
+    
+    Raises:
+        HTTPException 503: Si Redis no está disponible
+    """
+    try:
+        queues = await get_queue_stats(get_redis_client())
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"Redis no disponible: {str(e)}"
+        )
+    return {
+        "timestamp": datetime.utcnow().isoformat(),
+        "queues": queues
+    }
+
+
+def _read_outbox_backlog() -> Dict[str, Any]:
+    with Session(engine) as session:
+        return get_outbox_backlog(session)
+
+
+@router.get(
+    "/outbox",
+    response_model=Dict[str, Any],
+    summary="Métricas del outbox de n8n",
+    description="Eventos pendientes, edad del más antiguo, dead-letters y contadores de entrega del dispatcher"
+)
+async def outbox_metrics() -> Dict[str, Any]:
+    """
+    Estado del outbox transaccional (eventos hacia n8n).
+    
+    `oldest_pending_age_s` creciendo indica que el dispatcher no da abasto
+    o que n8n está caído (los reintentos se ven en `delivery.retried`);
+    `dead` > 0 son órdenes que no se entregaron y se reembolsaron;
+    `unconfirmed` son POSTs sin respuesta de n8n (ni reintento ni reembolso).
+    
+    Returns:
+        Dict con backlog (tabla outbox_events) y delivery (contadores
+        acumulados en Redis por los workers; None si Redis no responde)
+    
+    Raises:
+        HTTPException 503: Si la base de datos no está disponible
+    """
+    try:
+        backlog = await asyncio.to_thread(_read_outbox_backlog)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"Base de datos no disponible: {str(e)}"
+        )
+    try:
+        delivery = await get_outbox_stats(get_redis_client())
+    except Exception:
+        delivery = None
+    return {
+        "timestamp": datetime.utcnow().isoformat(),
+        "backlog": backlog,
+        "delivery": delivery,
+    }
@@ -10,7 +10,9 @@ from pydantic import BaseModel, Field
 from typing import Optional
 
 from app.api.deps import requires_feature, requires_plan, get_current_user
+from app.core.principal import Principal
 from app.models.user import User, PlanTier
+from app.workers.queues import enqueue, queue_for
 
 router = APIRouter(prefix="/utils", tags=["utils"])
 
@@ -97,7 +99,8 @@ async def trigger_heavy_task(
                 detail="Arq worker no inicializado. Verifica el startup del backend."
             )
         
-        job = await arq_pool.enqueue_job(
+        job = await enqueue(
+            arq_pool,
             "heavy_background_task",
             task_name=payload.task_name,
             duration_seconds=payload.duration_seconds,
@@ -161,7 +164,7 @@ async def get_job_status_endpoint(
         
         from arq.jobs import Job
         
-        job = Job(job_id, arq_pool)
+        job = Job(job_id, arq_pool, _queue_name=queue_for("heavy_background_task"))
         job_status = await job.status()
         
         if job_status is None:
@@ -207,6 +210,6 @@ async def get_job_status_endpoint(
     summary="Verificar privilegios para minería de datos",
     description="Ejemplo de cómo aplicar un guard de plan. Solo CEREBRO o superior."
 )
-async def verify_mining_access(_: User = Depends(requires_plan(PlanTier.CEREBRO))) -> dict:
+async def verify_mining_access(_: Principal = Depends(requires_plan(PlanTier.CEREBRO))) -> dict:
     return {"detail": "Tienes acceso a las capacidades de minería de datos."}
 
@@ -0,0 +1,243 @@
+"""
+Admission Control para endpoints LLM
+
+Limita cuántas llamadas al motor de IA están en vuelo en este proceso y
+cuántas pueden esperar turno. Lo que no cabe se rechaza de inmediato con
+503 + Retry-After en lugar de acumular requests que retienen conexiones
+del pool de base de datos mientras esperan a Gemini.
+
+Reglas de admisión (en orden):
+1. Cap por usuario: requests en vuelo + en cola de un mismo usuario
+2. Cap por client_id: idem para widgets de un mismo cliente
+3. Cola acotada: si no hay slot libre y la cola está llena, se rechaza
+4. Espera acotada: si el slot no llega en `queue_timeout` (o antes del
+   deadline del request), se rechaza
+
+La cola no es FIFO estricta: cada petición lleva una PriorityClass derivada
+del plan (ver app/core/priority.py) y los slots libres se conceden por
+`llegada - adelanto de la clase`, de modo que PARTNER pasa delante sin
+dejar sin servicio a MOTOR/CEREBRO.
+
+El estado es por proceso (cada worker de uvicorn tiene su controlador);
+el límite global efectivo es `max_concurrent * workers`.
+"""
+
+import asyncio
+import heapq
+import itertools
+import math
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.core.deadline import get_current_deadline
+from app.core.priority import LLM_HEADSTART_SECONDS, PriorityClass
+
+
+@dataclass
+class AdmissionTicket:
+    """Slot concedido; se devuelve con `AdmissionController.release`."""
+    user_key: Optional[str]
+    client_key: Optional[str]
+    priority: PriorityClass = PriorityClass.LOW
+    admitted_at: float = field(default_factory=time.monotonic)
+    queued_ms: float = 0.0
+
+
+class AdmissionController:
+    """
+    Semáforo con cola de prioridad acotada y caps por usuario/cliente.
+
+    Attributes:
+        name: Nombre del recurso protegido (para métricas)
+        max_concurrent: Llamadas simultáneas permitidas
+        max_queue: Requests que pueden esperar slot
+        per_user_limit: Máximo de requests (en vuelo + cola) por usuario
+        per_client_limit: Máximo de requests (en vuelo + cola) por client_id
+        queue_timeout: Espera máxima en cola (segundos)
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_concurrent: int,
+        max_queue: int,
+        per_user_limit: int,
+        per_client_limit: int,
+        queue_timeout: float,
+    ):
+        self.name = name
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.per_user_limit = per_user_limit
+        self.per_client_limit = per_client_limit
+        self.queue_timeout = queue_timeout
+
+        self._available = max_concurrent
+        # Heap de (orden_efectivo, secuencia, future); los futures cancelados
+        # se descartan de forma perezosa al conceder el siguiente slot
+        self._waiters: List[Tuple[float, int, asyncio.Future]] = []
+        self._sequence = itertools.count()
+        self._in_flight = 0
+        self._queued = 0
+        self._queued_by_priority: Counter = Counter()
+        self._by_user: Counter = Counter()
+        self._by_client: Counter = Counter()
+
+        # Métricas acumuladas
+        self._admitted_total = 0
+        self._admitted_by_priority: Counter = Counter()
+        self._shed_total: Counter = Counter()
+        # EWMA del tiempo de servicio para estimar Retry-After
+        self._avg_service_seconds = 5.0
+
+    async def acquire(
+        self,
+        user_key: Optional[str] = None,
+        client_key: Optional[str] = None,
+        priority: PriorityClass = PriorityClass.LOW,
+    ) -> AdmissionTicket:
+        """
+        Solicita un slot, esperando en la cola acotada si es necesario.
+
+        Args:
+            user_key: Identificador del usuario (o IP para anónimos)
+            client_key: client_id del widget (opcional)
+            priority: Clase de prioridad derivada del plan
+
+        Returns:
+            AdmissionTicket: Slot concedido
+
+        Raises:
+            ServiceOverloadedError: Si la petición se descarta
+        """
+        if user_key and self._by_user[user_key] >= self.per_user_limit:
+            self._shed("user_limit")
+        if client_key and self._by_client[client_key] >= self.per_client_limit:
+            self._shed("client_limit")
+
+        start = time.monotonic()
+        if self._available > 0 and self._queued == 0:
+            # Camino rápido: slot libre y nadie esperando
+            self._available -= 1
+            self._track(user_key, client_key, +1)
+            return self._admit(user_key, client_key, priority, start)
+
+        if self._queued >= self.max_queue:
+            self._shed("queue_full")
+
+        future = asyncio.get_running_loop().create_future()
+        order = start - LLM_HEADSTART_SECONDS[priority]
+        heapq.heappush(self._waiters, (order, next(self._sequence), future))
+
+        self._track(user_key, client_key, +1)
+        self._queued += 1
+        self._queued_by_priority[priority] += 1
+        try:
+            timeout = self.queue_timeout
+            deadline = get_current_deadline()
+            if deadline:
+                timeout = deadline.cap(timeout)
+            await asyncio.wait_for(future, timeout=timeout)
+        except asyncio.TimeoutError:
+            self._track(user_key, client_key, -1)
+            self._shed("queue_timeout")
+        except BaseException:
+            # Cancelado justo después de recibir el slot: devolverlo
+            if future.done() and not future.cancelled():
+                self._grant_next()
+            self._track(user_key, client_key, -1)
+            raise
+        finally:
+            self._queued -= 1
+            self._queued_by_priority[priority] -= 1
+
+        return self._admit(user_key, client_key, priority, start)
+
+    def release(self, ticket: AdmissionTicket) -> None:
+        """Devuelve el slot y actualiza la estimación de tiempo de servicio."""
+        elapsed = time.monotonic() - ticket.admitted_at
+        self._avg_service_seconds = 0.8 * self._avg_service_seconds + 0.2 * elapsed
+        self._in_flight -= 1
+        self._track(ticket.user_key, ticket.client_key, -1)
+        self._grant_next()
+
+    def _admit(
+        self,
+        user_key: Optional[str],
+        client_key: Optional[str],
+        priority: PriorityClass,
+        start: float,
+    ) -> AdmissionTicket:
+        self._in_flight += 1
+        self._admitted_total += 1
+        self._admitted_by_priority[priority] += 1
+        return AdmissionTicket(
+            user_key=user_key,
+            client_key=client_key,
+            priority=priority,
+            queued_ms=(time.monotonic() - start) * 1000,
+        )
+
+    def _grant_next(self) -> None:
+        """Cede un slot libre al waiter con menor orden efectivo."""
+        while self._waiters:
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                future.set_result(True)
+                return
+        self._available += 1
+
+    def retry_after(self) -> int:
+        """Segundos sugeridos al cliente: tiempo estimado para vaciar la cola."""
+        waves = (self._queued + 1) / max(1, self.max_concurrent)
+        return max(1, math.ceil(waves * self._avg_service_seconds))
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Métricas actuales (para /health/admission y logging)."""
+        return {
+            "name": self.name,
+            "in_flight": self._in_flight,
+            "queue_depth": self._queued,
+            "max_concurrent": self.max_concurrent,
+            "max_queue": self.max_queue,
+            "queue_depth_by_priority": {
+                PriorityClass(p).name: n for p, n in self._queued_by_priority.items() if n
+            },
+            "admitted_total": self._admitted_total,
+            "admitted_by_priority": {
+                PriorityClass(p).name: n for p, n in self._admitted_by_priority.items()
+            },
+            "shed_total": sum(self._shed_total.values()),
+            "shed_by_reason": dict(self._shed_total),
+            "avg_service_seconds": round(self._avg_service_seconds, 3),
+        }
+
+    def _track(self, user_key: Optional[str], client_key: Optional[str], delta: int) -> None:
+        if user_key:
+            self._by_user[user_key] += delta
+            if self._by_user[user_key] <= 0:
+                del self._by_user[user_key]
+        if client_key:
+            self._by_client[client_key] += delta
+            if self._by_client[client_key] <= 0:
+                del self._by_client[client_key]
+
+    def _shed(self, reason: str) -> None:
+        from app.core.exceptions import ServiceOverloadedError
+
+        self._shed_total[reason] += 1
+        raise ServiceOverloadedError(reason=reason, retry_after=self.retry_after())
+
+
+# Singleton por proceso para las llamadas al motor de IA
+llm_admission = AdmissionController(
+    name="llm",
+    max_concurrent=settings.LLM_MAX_CONCURRENT,
+    max_queue=settings.LLM_MAX_QUEUE,
+    per_user_limit=settings.LLM_PER_USER_LIMIT,
+    per_client_limit=settings.LLM_PER_CLIENT_LIMIT,
+    queue_timeout=settings.LLM_QUEUE_TIMEOUT_SECONDS,
+)
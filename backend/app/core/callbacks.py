@@ -0,0 +1,407 @@
+"""
+Callback Ingestion - Fast-ack de los callbacks de n8n y proveedores
+
+Cuando una campaña termina, n8n dispara decenas de callbacks a la vez
+(`update-media` por pieza, callback del content planner) y mantiene su
+ejecución abierta hasta recibir respuesta. Los endpoints ya no hacen el
+trabajo dentro del request: validan el secret/API key, añaden el payload
+crudo a un Redis Stream (un XADD) y responden 202. `bulk-update-media`
+encola sus items ya resueltos en el mismo stream (un MULTI/EXEC), de modo
+que un callback por pieza anterior todavía en el stream no puede pisar
+un valor bulk más nuevo.
+
+El consumer (`ingest_callbacks` en app/workers/tasks/callbacks.py) aplica
+los callbacks en lotes:
+
+- Un solo consumer activo a la vez (lock en Redis): el stream se aplica
+  en orden, así que el orden por pieza/campaña se conserva, incluidas las
+  entradas pendientes de un consumer caído (se reclaman primero)
+- Por lote, los callbacks de cada pieza se funden campo a campo (última
+  URL no nula, último estado) y el último de cada campaña gana; las piezas y
+  las campañas del planner se actualizan con un UPDATE por clave primaria
+  (executemany) cada una y una query previa de existencia/propiedad, y el
+  lote entero se confirma con un único commit
+- Idempotente: aplicar dos veces el mismo callback deja el mismo estado,
+  y solo se hace XACK tras el commit (at-least-once)
+- Si un lote falla por un error no transitorio se reaplica entrada a
+  entrada; la que sigue fallando detiene el consumer (sin adelantar las
+  posteriores) hasta que se ha entregado CALLBACK_MAX_DELIVERIES veces, y
+  entonces pasa a CALLBACK_DEAD_LETTER_STREAM y se confirma
+
+Si Redis no responde al encolar, el endpoint aplica el callback en línea
+(el comportamiento anterior) en lugar de perderlo.
+"""
+
+import json
+import logging
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import String, and_, bindparam, case, func, or_, select, update
+from sqlmodel import Session
+
+from app.models.content import ContentPiece, MarketingCampaign
+from app.services.media_extraction import extract_media_url_from_payload
+
+
+logger = logging.getLogger("bai.callbacks")
+
+CALLBACK_STREAM = "bai:events:callbacks"
+CALLBACK_GROUP = "callback-consumer"
+CALLBACK_DEAD_LETTER_STREAM = "bai:events:callbacks:dead"
+
+# Entregas de una entrada que falla antes de apartarla a dead-letter
+CALLBACK_MAX_DELIVERIES = 5
+
+# Un único consumer aplica el stream (orden total); el lock caduca solo si
+# el consumer muere sin liberarlo
+CALLBACK_LOCK_KEY = "bai:callbacks:lock"
+CALLBACK_LOCK_TTL_MS = 60_000
+
+# Tope aproximado del stream (XADD MAXLEN ~)
+STREAM_MAXLEN = 100_000
+
+KIND_PIECE_MEDIA = "piece_media"
+# Item de bulk-update-media ya validado: {"media_url": str | None, "status": str}
+KIND_PIECE_STATUS = "piece_status"
+KIND_PLANNER = "planner"
+
+# Estados de pieza que ya no cambian (la campaña se completa cuando todas
+# sus piezas están en uno de ellos)
+PIECE_TERMINAL_STATUSES = ("COMPLETED", "FAILED")
+
+# Libera el lock solo si sigue siendo nuestro
+_RELEASE_LUA = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+def _fields(kind: str, key: int, payload: Dict[str, Any], user_id: Optional[int]) -> Dict[str, str]:
+    return {
+        "kind": kind,
+        "key": str(key),
+        "user_id": "" if user_id is None else str(user_id),
+        "ts": datetime.now(timezone.utc).isoformat(),
+        "payload": json.dumps(payload, default=str),
+    }
+
+
+async def enqueue_callback(
+    redis: Any,
+    kind: str,
+    key: int,
+    payload: Dict[str, Any],
+    user_id: Optional[int] = None,
+) -> str:
+    """
+    Añade un callback al stream de ingestión.
+
+    Args:
+        redis: Cliente redis.asyncio
+        kind: KIND_PIECE_MEDIA o KIND_PLANNER
+        key: piece_id o campaign_id (clave de orden y de colapso)
+        payload: Body crudo del callback
+        user_id: Usuario que debe poseer la pieza (endpoints autenticados)
+
+    Returns:
+        str: ID de la entrada en el stream
+    """
+    entry_id = await redis.xadd(
+        CALLBACK_STREAM,
+        _fields(kind, key, payload, user_id),
+        maxlen=STREAM_MAXLEN,
+        approximate=True,
+    )
+    return entry_id.decode() if isinstance(entry_id, bytes) else entry_id
+
+
+async def enqueue_callbacks(
+    redis: Any,
+    kind: str,
+    payloads: Dict[int, Dict[str, Any]],
+    user_id: Optional[int] = None,
+) -> List[str]:
+    """
+    Añade varios callbacks al stream en un round trip (MULTI/EXEC).
+
+    Args:
+        redis: Cliente redis.asyncio
+        kind: Tipo de los callbacks (p.ej. KIND_PIECE_STATUS)
+        payloads: key -> payload, en el orden en que deben aplicarse
+        user_id: Usuario que debe poseer las piezas (endpoints autenticados)
+
+    Returns:
+        List[str]: IDs de las entradas en el stream, en orden
+    """
+    async with redis.pipeline(transaction=True) as pipe:
+        for key, payload in payloads.items():
+            pipe.xadd(
+                CALLBACK_STREAM,
+                _fields(kind, key, payload, user_id),
+                maxlen=STREAM_MAXLEN,
+                approximate=True,
+            )
+        entry_ids = await pipe.execute()
+    return [entry_id.decode() if isinstance(entry_id, bytes) else entry_id for entry_id in entry_ids]
+
+
+def decode_callbacks(entries: List[Tuple[str, Dict[str, str]]]) -> Tuple[List[Dict[str, Any]], List[str]]:
+    """
+    Decodifica entradas del stream (en orden) a callbacks.
+
+    Returns:
+        (callbacks, ids): callbacks válidos e IDs de todas las entradas
+            (las corruptas se descartan pero también se confirman)
+    """
+    callbacks, ids = [], []
+    for entry_id, fields in entries:
+        ids.append(entry_id)
+        try:
+            callbacks.append({
+                "entry_id": entry_id,
+                "kind": fields["kind"],
+                "key": int(fields["key"]),
+                "user_id": int(fields["user_id"]) if fields.get("user_id") else None,
+                "payload": json.loads(fields["payload"]),
+            })
+        except (KeyError, ValueError) as e:
+            logger.warning(f"Dropping malformed callback entry {entry_id}: {str(e)}")
+    return callbacks, ids
+
+
+def write_piece_updates(
+    session: Session,
+    updates: Dict[int, Tuple[Optional[str], str, Optional[int]]],
+) -> Dict[str, Any]:
+    """
+    Escribe un lote de actualizaciones de piezas sin hacer commit.
+
+    Una query de existencia/propiedad, un único UPDATE por clave primaria
+    (executemany) para todas las piezas y un único UPDATE de progreso para
+    sus campañas: se toca `updated_at` (ETag del dashboard) y la campaña
+    pasa a "completed" cuando todas sus piezas están en estado terminal.
+
+    Una URL escrita sin user_id (API key de servicio o callback de
+    proveedor) se marca `media_url_from_service`: solo esas las descarga
+    el media store; las que fija un usuario se enlazan tal cual.
+
+    Args:
+        session: Sesión de base de datos
+        updates: piece_id -> (media_url o None para conservar el actual,
+            status, user_id que debe poseer la pieza o None)
+
+    Returns:
+        dict con "updated" (IDs actualizados), "rejected" (IDs inexistentes
+        o de otro usuario) y "campaigns" (IDs de campañas tocadas)
+    """
+    result: Dict[str, Any] = {"updated": [], "rejected": [], "campaigns": []}
+    if not updates:
+        return result
+
+    pieces = {
+        piece_id: (campaign_id, owner_id)
+        for piece_id, campaign_id, owner_id in session.execute(
+            select(ContentPiece.id, ContentPiece.campaign_id, MarketingCampaign.user_id)
+            .join(MarketingCampaign, MarketingCampaign.id == ContentPiece.campaign_id)
+            .where(ContentPiece.id.in_(list(updates)))
+        ).all()
+    }
+
+    now = datetime.now(timezone.utc)
+    rows, campaign_ids = [], set()
+    for piece_id, (media_url, status, user_id) in updates.items():
+        if piece_id not in pieces or (user_id is not None and pieces[piece_id][1] != user_id):
+            result["rejected"].append(piece_id)
+            continue
+        rows.append({
+            "piece_id": piece_id,
+            "media_url": media_url,
+            "from_service": user_id is None,
+            "status": status,
+        })
+        campaign_ids.add(pieces[piece_id][0])
+    if not rows:
+        return result
+
+    # Un único UPDATE por clave primaria para todo el lote (executemany);
+    # media_url NULL conserva la URL actual (p. ej. al marcar FAILED)
+    table = ContentPiece.__table__
+    new_media_url = bindparam("media_url", type_=String)
+    session.execute(
+        update(table)
+        .where(table.c.id == bindparam("piece_id"))
+        .values(
+            media_url=func.coalesce(new_media_url, table.c.media_url),
+            # Una URL distinta invalida la copia local (el worker la vuelve a descargar)
+            media_asset_id=case(
+                (or_(new_media_url.is_(None), new_media_url == table.c.media_url), table.c.media_asset_id),
+                else_=None,
+            ),
+            media_url_from_service=case(
+                (new_media_url.is_(None), table.c.media_url_from_service),
+                else_=bindparam("from_service"),
+            ),
+            status=bindparam("status"),
+            updated_at=now,
+        ),
+        rows,
+    )
+
+    # Progreso de las campañas afectadas en un solo UPDATE
+    open_pieces = (
+        select(ContentPiece.id)
+        .where(
+            ContentPiece.campaign_id == MarketingCampaign.id,
+            func.upper(ContentPiece.status).not_in(PIECE_TERMINAL_STATUSES),
+        )
+        .exists()
+    )
+    session.execute(
+        update(MarketingCampaign)
+        .where(MarketingCampaign.id.in_(campaign_ids))
+        .values(
+            status=case(
+                (and_(MarketingCampaign.status != "failed", ~open_pieces), "completed"),
+                else_=MarketingCampaign.status,
+            ),
+            updated_at=now,
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+    result["updated"] = [row["piece_id"] for row in rows]
+    result["campaigns"] = sorted(campaign_ids)
+    return result
+
+
+def _merge_piece_updates(
+    callbacks: List[Dict[str, Any]],
+) -> Tuple[List[Dict[int, Tuple[Optional[str], str, Optional[int]]]], int]:
+    """
+    Funde los callbacks de pieza (en orden de stream) en rondas de
+    write_piece_updates equivalentes a aplicarlos uno a uno.
+
+    Campo a campo: gana la última URL no nula y el último estado, así un
+    FAILED sin URL posterior a un callback con URL conserva esa URL. Si
+    una pieza recibe callbacks de otro principal (servicio/usuario), el
+    siguiente va en una ronda nueva: la propiedad y `media_url_from_service`
+    dependen de quién escribe cada valor.
+
+    Returns:
+        (rounds, rejected): rondas en orden y callbacks sin URL extraíble
+    """
+    rounds: List[Dict[int, Tuple[Optional[str], str, Optional[int]]]] = []
+    rejected = 0
+    for callback in callbacks:
+        piece_id, user_id = callback["key"], callback["user_id"]
+        if callback["kind"] == KIND_PIECE_STATUS:
+            media_url, status = callback["payload"].get("media_url"), callback["payload"]["status"]
+        else:
+            media_url, status = extract_media_url_from_payload(callback["payload"]), "COMPLETED"
+            if not media_url:
+                logger.warning(f"Callback {callback['entry_id']} for piece {piece_id}: no media URL in payload")
+                rejected += 1
+                continue
+
+        last = next((index for index in range(len(rounds) - 1, -1, -1) if piece_id in rounds[index]), None)
+        if last is not None and rounds[last][piece_id][2] == user_id:
+            previous_url = rounds[last][piece_id][0]
+            rounds[last][piece_id] = (media_url or previous_url, status, user_id)
+            continue
+        target = 0 if last is None else last + 1
+        if target == len(rounds):
+            rounds.append({})
+        rounds[target][piece_id] = (media_url, status, user_id)
+    return rounds, rejected
+
+
+def _apply_piece_media(session: Session, callbacks: List[Dict[str, Any]]) -> Dict[str, int]:
+    rounds, rejected = _merge_piece_updates(callbacks)
+    updated = set()
+    for updates in rounds:
+        result = write_piece_updates(session, updates)
+        for piece_id in result["rejected"]:
+            logger.warning(f"Callback for piece {piece_id} rejected: piece not found or not owned by user {updates[piece_id][2]}")
+        updated.update(result["updated"])
+        rejected += len(result["rejected"])
+    return {"pieces_updated": len(updated), "rejected": rejected}
+
+
+def _apply_planner(session: Session, callbacks: List[Dict[str, Any]]) -> Dict[str, int]:
+    from app.modules.content_planner.models import CampaignStatus, ContentCampaign
+
+    counts = {"campaigns_updated": 0, "rejected": 0}
+    latest = {callback["key"]: callback["payload"] for callback in callbacks}
+    existing = set(session.execute(
+        select(ContentCampaign.id).where(ContentCampaign.id.in_(list(latest)))
+    ).scalars())
+
+    now = datetime.now(timezone.utc)
+    rows = []
+    for campaign_id, payload in latest.items():
+        if campaign_id not in existing:
+            logger.warning(f"Planner callback rejected: campaign {campaign_id} not found")
+            counts["rejected"] += 1
+            continue
+        # Mismos cambios que ContentPlannerService.update_campaign_status
+        row = {"id": campaign_id, "updated_at": now}
+        if payload.get("error"):
+            row.update(status=CampaignStatus.FAILED, error_message=payload["error"])
+        else:
+            row.update(status=CampaignStatus.COMPLETED, completed_at=now)
+            if payload.get("generated_content"):
+                row["generated_content"] = payload["generated_content"]
+        rows.append(row)
+
+    if rows:
+        # UPDATE por clave primaria (executemany), sin commit: lo confirma
+        # apply_callbacks junto con las piezas
+        session.execute(update(ContentCampaign), rows)
+    counts["campaigns_updated"] = len(rows)
+    return counts
+
+
+def apply_callbacks(session: Session, callbacks: List[Dict[str, Any]]) -> Dict[str, int]:
+    """
+    Aplica un lote de callbacks (en orden de stream) en una transacción.
+
+    Ningún paso hace commit por su cuenta: el lote se confirma entero al
+    final (y solo entonces el consumer hace XACK).
+
+    Args:
+        session: Sesión propia del consumer
+        callbacks: Salida de decode_callbacks
+
+    Returns:
+        dict con piezas/campañas actualizadas y callbacks rechazados
+    """
+    pieces = [callback for callback in callbacks if callback["kind"] in (KIND_PIECE_MEDIA, KIND_PIECE_STATUS)]
+    planner = [callback for callback in callbacks if callback["kind"] == KIND_PLANNER]
+    counts = {"pieces_updated": 0, "campaigns_updated": 0, "rejected": 0}
+    if pieces:
+        result = _apply_piece_media(session, pieces)
+        counts["pieces_updated"] = result["pieces_updated"]
+        counts["rejected"] += result["rejected"]
+    if planner:
+        result = _apply_planner(session, planner)
+        counts["campaigns_updated"] = result["campaigns_updated"]
+        counts["rejected"] += result["rejected"]
+    unknown = len(callbacks) - len(pieces) - len(planner)
+    if unknown:
+        logger.warning(f"Dropping {unknown} callbacks of unknown kind")
+        counts["rejected"] += unknown
+    session.commit()
+    return counts
+
+
+async def acquire_consumer_lock(redis: Any, token: str) -> bool:
+    """Toma el lock de consumer único (SET NX PX)."""
+    return bool(await redis.set(CALLBACK_LOCK_KEY, token, nx=True, px=CALLBACK_LOCK_TTL_MS))
+
+
+async def release_consumer_lock(redis: Any, token: str) -> None:
+    """Libera el lock si sigue siendo de este consumer."""
+    await redis.eval(_RELEASE_LUA, 1, CALLBACK_LOCK_KEY, token)
@@ -0,0 +1,99 @@
+"""
+Conditional GET - ETags por versión para endpoints de polling
+
+El dashboard sondea cada pocos segundos recursos que casi nunca cambian
+(detalle de campaña, estado de jobs, historial de chat). En lugar de
+volver a cargar y serializar el recurso completo, cada endpoint calcula
+un ETag a partir de la *versión* del recurso, obtenida con una query
+ligera e indexada que no carga los payloads pesados (JSONB, captions):
+
+- `updated_at` de la fila (mantenido por `onupdate` en los modelos)
+- Agregados baratos de las filas hijas (count / max(id) / max(updated_at))
+
+Si el header `If-None-Match` del cliente coincide, se responde 304 sin
+cuerpo antes de cargar o serializar nada; si no, la respuesta normal
+lleva el ETag para el siguiente sondeo.
+
+Los ETags son débiles (`W/"..."`): identifican el estado del recurso, no
+los bytes exactos del JSON.
+
+Uso:
+    etag = compute_etag("campaign", campaign_id, updated_at, pieces_count)
+    not_modified = conditional_get(request, response, etag)
+    if not_modified is not None:
+        return not_modified
+"""
+
+import hashlib
+from typing import Any, Optional
+
+from starlette.requests import Request
+from starlette.responses import Response
+
+
+# Respuestas privadas por usuario: los proxies no deben compartirlas y el
+# navegador debe revalidar siempre (el sondeo es la revalidación)
+CACHE_CONTROL = "private, no-cache"
+
+
+def compute_etag(namespace: str, *parts: Any) -> str:
+    """
+    ETag débil a partir de la versión de un recurso.
+
+    Args:
+        namespace: Tipo de recurso/representación (cambiarlo invalida los
+            ETags emitidos si cambia el esquema de la respuesta)
+        *parts: Componentes de la versión (ids, timestamps, contadores)
+
+    Returns:
+        str: ETag con comillas, p.ej. `W/"3f2a..."`
+    """
+    raw = "|".join(str(part) for part in (namespace, *parts))
+    return f'W/"{hashlib.blake2b(raw.encode(), digest_size=12).hexdigest()}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Comparación débil de `If-None-Match` (RFC 9110 §13.1.2).
+
+    Acepta `*` y listas separadas por comas; ignora el prefijo `W/`.
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(
+        candidate.strip().removeprefix("W/") == opaque
+        for candidate in if_none_match.split(",")
+    )
+
+
+def not_modified(etag: str) -> Response:
+    """Respuesta 304 sin cuerpo con el ETag vigente."""
+    return Response(
+        status_code=304,
+        headers={"ETag": etag, "Cache-Control": CACHE_CONTROL},
+    )
+
+
+def conditional_get(request: Request, response: Response, etag: str) -> Optional[Response]:
+    """
+    Resuelve un GET condicional.
+
+    Args:
+        request: Request entrante (para leer If-None-Match)
+        response: Response inyectada por FastAPI (recibe el ETag si hay
+            que servir el recurso)
+        etag: ETag de la versión actual
+
+    Returns:
+        Optional[Response]: 304 si el cliente ya tiene esta versión (la
+            ruta debe devolverla tal cual); None si hay que construir la
+            respuesta normal
+    """
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return not_modified(etag)
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = CACHE_CONTROL
+    return None
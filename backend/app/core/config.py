@@ -7,6 +7,11 @@ class Settings(BaseSettings):
   VERSION: str = "0.1.0"
   GOOGLE_API_KEY: str | None = None
   DATABASE_URL: str = "postgresql+psycopg://postgres:postgres@db:5432/bai"
+  DATABASE_READ_URL: str | None = None  # Réplica de lectura (None = todo al primario)
+  READ_REPLICA_MAX_LAG_SECONDS: float = 5.0  # Más retraso: lecturas al primario
+  READ_REPLICA_CHECK_INTERVAL_SECONDS: float = 2.0
+  READ_YOUR_WRITES_SECONDS: float = 5.0  # Tras una escritura del usuario, leer del primario
+  SCHEMA_REVISION_CHECK: bool = True  # Arranque falla si la DB no está en la head de Alembic
   # SECRET_KEY must be set via environment variable - no insecure default
   SECRET_KEY: str
   
@@ -57,7 +62,59 @@ class Settings(BaseSettings):
   N8N_GENERATION_WEBHOOK_URL: str | None = None  # URL del webhook de n8n para generación de contenido
   INTERNAL_WEBHOOK_SECRET: str | None = None  # Secret para validar callbacks de n8n
   N8N_SERVICE_API_KEY: str | None = None  # API Key para que n8n llame a endpoints internos
+  N8N_MARKETING_CAMPAIGN_WEBHOOK_URL: str = "http://n8n:5678/webhook/marketing-campaign-trigger"
+
+  # Transactional Outbox (entrega de eventos a n8n desde el worker)
+  OUTBOX_BATCH_SIZE: int = 50  # Eventos reclamados por lote
+  OUTBOX_CONCURRENCY: int = 10  # POSTs simultáneos a n8n por lote
+  OUTBOX_DELIVERY_TIMEOUT_SECONDS: float = 10.0  # Timeout de cada POST
+  OUTBOX_MAX_ATTEMPTS: int = 8  # Intentos antes de dead-letter
+  OUTBOX_RETRY_BASE_SECONDS: float = 5.0  # Backoff exponencial: base * 2^(intento-1)
+  OUTBOX_RETRY_MAX_SECONDS: float = 900.0  # Tope del backoff
+
+  # Media Store (copia local direccionada por contenido en el volumen shared_data)
+  MEDIA_STORE_DIR: str = "app/data/media"  # Relativo al cwd del backend/worker (/app)
+  MEDIA_STORE_MAX_BYTES: int = 500 * 1024 * 1024  # Tamaño máximo por fichero
+  MEDIA_STORE_DOWNLOAD_TIMEOUT_SECONDS: float = 120.0
+  MEDIA_STORE_CONCURRENCY: int = 4  # Descargas simultáneas por ejecución
+  MEDIA_STORE_BATCH_SIZE: int = 50  # Piezas por ejecución del cron
+  MEDIA_STORE_THUMBNAIL_SIZE: int = 512  # Lado mayor del thumbnail (px)
+  MEDIA_STORE_RETRY_SECONDS: int = 3600  # Espera tras una descarga fallida
+  MEDIA_STORE_ACCEL_PREFIX: str | None = None  # Si se define, el proxy sirve el fichero (X-Accel-Redirect)
+  # Hosts de los proveedores de generación de los que se descarga (separados por comas; incluye subdominios)
+  MEDIA_STORE_ALLOWED_HOSTS: str = "fal.media,fal.run,heygen.ai,heygen.com,theapi.app,piapi.ai,oaidalleapiprodscus.blob.core.windows.net"
+  MEDIA_STORE_MAX_REDIRECTS: int = 5
   
+  # Request Deadlines
+  REQUEST_TIMEOUT_SECONDS: float = 30.0  # Default cuando la ruta no define uno propio
+  REQUEST_TIMEOUT_MAX_SECONDS: float = 120.0  # Tope para el header X-Request-Timeout
+  CHAT_REQUEST_TIMEOUT_SECONDS: float = 45.0  # Default de los endpoints de chat (Gemini + reintentos)
+
+  # LLM Admission Control (por proceso)
+  LLM_MAX_CONCURRENT: int = 8  # Llamadas simultáneas a Gemini
+  LLM_MAX_QUEUE: int = 32  # Requests esperando slot antes de descartar
+  LLM_PER_USER_LIMIT: int = 2  # En vuelo + en cola por usuario (o IP anónima)
+  LLM_PER_CLIENT_LIMIT: int = 8  # En vuelo + en cola por client_id de widget
+  LLM_QUEUE_TIMEOUT_SECONDS: float = 10.0  # Espera máxima en cola
+
+  # Arq Worker Pools (una cola nombrada por pool)
+  WORKER_INTERACTIVE_MAX_JOBS: int = 20
+  WORKER_INTERACTIVE_JOB_TIMEOUT: int = 60
+  WORKER_BULK_MAX_JOBS: int = 4
+  WORKER_BULK_JOB_TIMEOUT: int = 900
+  WORKER_MAINTENANCE_MAX_JOBS: int = 2
+  WORKER_MAINTENANCE_JOB_TIMEOUT: int = 1800
+
+  # Principal Cache (usuario autenticado sin lookup en DB)
+  PRINCIPAL_CACHE_TTL_SECONDS: float = 15.0  # LRU en proceso
+  PRINCIPAL_CACHE_MAX_ENTRIES: int = 10_000
+  PRINCIPAL_REDIS_TTL_SECONDS: int = 300  # Copia compartida entre procesos
+
+  # Password Hashing (bcrypt en pool dedicado, por proceso)
+  PASSWORD_BCRYPT_ROUNDS: int = 12  # Subirlo rehashea en el siguiente login
+  PASSWORD_HASH_WORKERS: int = 2  # Hashes simultáneos
+  PASSWORD_HASH_MAX_QUEUE: int = 64  # Logins esperando antes de responder 503
+
   # Observability
   ENVIRONMENT: str = "development"
   APP_VERSION: str = "1.0.0"
@@ -0,0 +1,286 @@
+"""
+Credit Ledger - Cargos de créditos atómicos con libro append-only
+
+Cada cargo es un único `UPDATE "user" ... RETURNING` condicional: el saldo
+se descuenta en la base de datos y la condición del WHERE garantiza que
+ninguna bolsa queda en negativo, así dos lanzamientos concurrentes del
+mismo usuario no pueden cobrar ambos con el mismo saldo. No hay
+lectura-modificación-escritura en Python ni `SELECT ... FOR UPDATE`: el
+lock de fila dura solo lo que tarda el UPDATE + INSERT del libro + COMMIT.
+
+Reparto del coste (igual que antes): primero la bolsa mensual, después la
+extra. El WHERE exige `monthly >= monthly_used AND extra >= extra_used`
+(lo que implica `monthly + extra >= cost`); el primer intento asume que
+la bolsa mensual cubre todo el coste, que es el caso habitual. Si el
+UPDATE no toca ninguna fila se leen los saldos, se rehace el reparto y se
+reintenta: solo se reintenta cuando otro cargo cambió el saldo en medio.
+
+Cada cambio de saldo deja una fila en `credit_ledger` en la misma
+transacción (debit, refund de un cargo cuyo envío a n8n falló,
+monthly_reset). Los métodos no hacen commit: el cargo se confirma junto
+con lo que se cobra (p.ej. la campaña).
+"""
+
+import logging
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session
+
+from app.models.credits import CreditLedgerEntry
+from app.models.user import User
+
+
+logger = logging.getLogger("bai.credits")
+
+CREDIT_RESOURCES = ("video", "image")
+
+# Intentos de cargo antes de responder 409 (solo se agotan si el saldo
+# cambia entre la lectura y el UPDATE en todos ellos)
+DEBIT_ATTEMPTS = 5
+
+DEBIT = "debit"
+REFUND = "refund"
+MONTHLY_RESET = "monthly_reset"
+
+
+@dataclass(frozen=True)
+class CreditMovement:
+    """Resultado de un movimiento: fila del libro y saldos tras aplicarlo."""
+    entry_id: int
+    resource: str
+    monthly_delta: int
+    extra_delta: int
+    # {"monthly_video", "extra_video", "monthly_image", "extra_image"}
+    balances: Dict[str, int]
+
+
+def _columns(resource: str):
+    if resource not in CREDIT_RESOURCES:
+        raise ValueError(f"Unknown credit resource: {resource}")
+    return getattr(User, f"monthly_credits_{resource}"), getattr(User, f"extra_credits_{resource}")
+
+
+# Saldos completos del usuario en el RETURNING (la respuesta los muestra)
+_BALANCE_COLUMNS = (
+    User.monthly_credits_video,
+    User.extra_credits_video,
+    User.monthly_credits_image,
+    User.extra_credits_image,
+)
+
+
+def _balances(row) -> Dict[str, int]:
+    return {
+        "monthly_video": row[0],
+        "extra_video": row[1],
+        "monthly_image": row[2],
+        "extra_image": row[3],
+    }
+
+
+def split_cost(monthly: int, cost: int) -> Tuple[int, int]:
+    """Reparto del coste: (de la bolsa mensual, de la bolsa extra)."""
+    monthly_used = min(max(monthly, 0), cost)
+    return monthly_used, cost - monthly_used
+
+
+class CreditLedger:
+    """Cargos, reembolsos y renovaciones de créditos con su libro."""
+
+    def _append(
+        self,
+        session: Session,
+        user_id: int,
+        kind: str,
+        resource: str,
+        monthly_delta: int,
+        extra_delta: int,
+        balances: Dict[str, int],
+        campaign_id: Optional[int] = None,
+        refund_of_id: Optional[int] = None,
+        reason: Optional[str] = None,
+    ) -> CreditMovement:
+        entry_id = session.execute(
+            insert(CreditLedgerEntry).returning(CreditLedgerEntry.id),
+            {
+                "user_id": user_id,
+                "kind": kind,
+                "resource": resource,
+                "monthly_delta": monthly_delta,
+                "extra_delta": extra_delta,
+                "monthly_balance": balances[f"monthly_{resource}"],
+                "extra_balance": balances[f"extra_{resource}"],
+                "campaign_id": campaign_id,
+                "refund_of_id": refund_of_id,
+                "reason": reason,
+            },
+        ).scalar_one()
+        return CreditMovement(entry_id, resource, monthly_delta, extra_delta, balances)
+
+    def debit(
+        self,
+        session: Session,
+        user_id: int,
+        cost: int,
+        resource: str = "video",
+        campaign_id: Optional[int] = None,
+        reason: Optional[str] = None,
+    ) -> CreditMovement:
+        """
+        Descuenta `cost` créditos (mensuales primero) y registra el cargo.
+
+        Args:
+            session: Sesión de la transacción que se cobra (no hace commit)
+            user_id: Usuario al que se cobra
+            cost: Créditos a descontar (>= 0)
+            resource: "video" o "image"
+            campaign_id: Campaña que origina el cargo
+            reason: Descripción libre del cargo
+
+        Returns:
+            CreditMovement: Cargo registrado y saldos resultantes
+
+        Raises:
+            InsufficientCreditsError: Si monthly + extra < cost
+            CreditContentionError: Si el saldo cambió en todos los intentos
+        """
+        from app.core.exceptions import CreditContentionError, InsufficientCreditsError
+
+        if cost < 0:
+            raise ValueError("cost must be >= 0")
+        monthly_col, extra_col = _columns(resource)
+
+        monthly_used, extra_used = cost, 0
+        for attempt in range(DEBIT_ATTEMPTS):
+            row = session.execute(
+                update(User)
+                .where(User.id == user_id, monthly_col >= monthly_used, extra_col >= extra_used)
+                .values({monthly_col: monthly_col - monthly_used, extra_col: extra_col - extra_used})
+                .returning(*_BALANCE_COLUMNS)
+            ).first()
+            if row is not None:
+                return self._append(
+                    session, user_id, DEBIT, resource, -monthly_used, -extra_used,
+                    _balances(row), campaign_id=campaign_id, reason=reason,
+                )
+
+            # El reparto supuesto ya no vale: leer saldos y rehacerlo
+            current = session.execute(
+                select(monthly_col, extra_col).where(User.id == user_id)
+            ).first()
+            if current is None:
+                raise ValueError(f"User {user_id} not found")
+            monthly, extra = current
+            if monthly + extra < cost:
+                raise InsufficientCreditsError(resource, cost, monthly + extra)
+            monthly_used, extra_used = split_cost(monthly, cost)
+
+        logger.warning(f"Credit debit for user {user_id} gave up after {DEBIT_ATTEMPTS} attempts")
+        raise CreditContentionError()
+
+    def refund(self, session: Session, debit_entry_id: int, reason: Optional[str] = None) -> Optional[CreditMovement]:
+        """
+        Devuelve un cargo a las bolsas de las que salió.
+
+        Idempotente: un cargo se reembolsa como mucho una vez (índice único
+        en `refund_of_id`); el segundo intento no cambia saldos.
+
+        Args:
+            session: Sesión de la transacción (no hace commit)
+            debit_entry_id: Fila `debit` del libro a compensar
+            reason: Motivo (p.ej. error del webhook de n8n)
+
+        Returns:
+            Optional[CreditMovement]: Reembolso registrado, o None si el
+                cargo ya estaba reembolsado
+        """
+        debit = session.get(CreditLedgerEntry, debit_entry_id)
+        if debit is None or debit.kind != DEBIT:
+            raise ValueError(f"Ledger entry {debit_entry_id} is not a debit")
+        monthly_col, extra_col = _columns(debit.resource)
+        monthly_back, extra_back = -debit.monthly_delta, -debit.extra_delta
+
+        try:
+            with session.begin_nested():
+                row = session.execute(
+                    update(User)
+                    .where(User.id == debit.user_id)
+                    .values({monthly_col: monthly_col + monthly_back, extra_col: extra_col + extra_back})
+                    .returning(*_BALANCE_COLUMNS)
+                ).one()
+                return self._append(
+                    session, debit.user_id, REFUND, debit.resource, monthly_back, extra_back,
+                    _balances(row), campaign_id=debit.campaign_id,
+                    refund_of_id=debit.id, reason=reason,
+                )
+        except IntegrityError:
+            logger.info(f"Ledger debit {debit_entry_id} already refunded")
+            return None
+
+    def reset_monthly(
+        self,
+        session: Session,
+        user_id: int,
+        allowances: Dict[str, int],
+        reason: Optional[str] = None,
+    ) -> Dict[str, CreditMovement]:
+        """
+        Renueva las bolsas mensuales (p.ej. al cobrar la suscripción).
+
+        Los créditos mensuales no se acumulan: la bolsa pasa a valer la
+        asignación del plan y el libro registra la diferencia. La bolsa
+        extra no se toca.
+
+        Idempotente por `reason`: si el libro ya tiene una renovación del
+        usuario con el mismo motivo (p.ej. un webhook reenviado), no se
+        vuelve a renovar.
+
+        Args:
+            session: Sesión de la transacción (no hace commit)
+            user_id: Usuario a renovar
+            allowances: Créditos mensuales por recurso, p.ej. {"video": 10}
+            reason: Motivo (p.ej. id de la factura)
+
+        Returns:
+            Dict[str, CreditMovement]: Movimiento por recurso renovado
+                (vacío si esa renovación ya estaba registrada)
+        """
+        columns = {resource: _columns(resource) for resource in allowances}
+        # Renovación puntual: aquí sí se bloquea la fila para conocer el
+        # saldo previo y registrar el delta exacto
+        previous = session.execute(
+            select(*(monthly_col for monthly_col, _ in columns.values()))
+            .where(User.id == user_id)
+            .with_for_update()
+        ).one()
+        if reason is not None and session.execute(
+            select(CreditLedgerEntry.id)
+            .where(
+                CreditLedgerEntry.user_id == user_id,
+                CreditLedgerEntry.kind == MONTHLY_RESET,
+                CreditLedgerEntry.reason == reason,
+            )
+            .limit(1)
+        ).first() is not None:
+            logger.info(f"Monthly reset '{reason}' already applied for user {user_id}")
+            return {}
+        row = session.execute(
+            update(User)
+            .where(User.id == user_id)
+            .values({columns[resource][0]: amount for resource, amount in allowances.items()})
+            .returning(*_BALANCE_COLUMNS)
+        ).one()
+        balances = _balances(row)
+        return {
+            resource: self._append(
+                session, user_id, MONTHLY_RESET, resource,
+                amount - previous[index], 0, balances, reason=reason,
+            )
+            for index, (resource, amount) in enumerate(allowances.items())
+        }
+
+
+credit_ledger = CreditLedger()
@@ -0,0 +1,217 @@
+"""
+Request Deadlines
+
+Propaga un deadline por request a través de todo el camino de ejecución
+(motor de IA, Brave Search, webhooks de n8n y base de datos) usando un
+ContextVar, sin tener que pasar el deadline explícitamente por cada firma.
+
+El deadline se fija en la capa HTTP (ver `request_deadline` en
+app/core/dependencies.py) a partir del default de la ruta o del header
+`X-Request-Timeout`, y el trabajo se cancela cuando:
+- El deadline expira (DeadlineExceededError -> 504)
+- Starlette reporta que el cliente se desconectó (ClientDisconnectedError)
+
+Uso:
+    deadline = get_current_deadline()
+    if deadline:
+        result = await deadline.guard(some_coroutine())
+"""
+
+import asyncio
+import time
+from contextvars import ContextVar
+from typing import Any, Awaitable, Optional, TypeVar
+
+from starlette.requests import Request
+
+
+T = TypeVar("T")
+
+REQUEST_TIMEOUT_HEADER = "X-Request-Timeout"
+
+# Intervalo de sondeo de desconexión del cliente mientras hay trabajo en curso
+DISCONNECT_POLL_INTERVAL = 0.5
+
+_current_deadline: ContextVar[Optional["RequestDeadline"]] = ContextVar(
+    "bai_request_deadline", default=None
+)
+
+
+class RequestDeadline:
+    """
+    Deadline absoluto (reloj monotónico) asociado a un request HTTP.
+
+    Attributes:
+        timeout: Presupuesto total en segundos con el que se creó
+        expires_at: Instante monotónico en el que expira
+        request: Request de Starlette (opcional, para detectar desconexión)
+    """
+
+    def __init__(self, timeout: float, request: Optional[Request] = None):
+        self.timeout = timeout
+        self.expires_at = time.monotonic() + timeout
+        self.request = request
+        self._disconnected = False
+
+    def remaining(self) -> float:
+        """Segundos restantes hasta el deadline (nunca negativo)."""
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def cap(self, timeout: float) -> float:
+        """
+        Limita un timeout local (httpx, sleeps de backoff) al tiempo restante.
+
+        Args:
+            timeout: Timeout propio de la operación en segundos
+
+        Returns:
+            float: min(timeout, remaining())
+        """
+        return min(timeout, self.remaining())
+
+    async def is_client_disconnected(self) -> bool:
+        """
+        Consulta a Starlette si el cliente cerró la conexión.
+
+        El resultado positivo se memoriza: una vez desconectado no se vuelve
+        a consultar el canal ASGI.
+        """
+        if self._disconnected:
+            return True
+        if self.request is None:
+            return False
+        try:
+            self._disconnected = await self.request.is_disconnected()
+        except Exception:
+            # Si el servidor ASGI no soporta la consulta, asumimos conectado
+            return False
+        return self._disconnected
+
+    async def check(self) -> None:
+        """
+        Verifica que el request siga vivo antes de empezar trabajo costoso.
+
+        Raises:
+            DeadlineExceededError: Si el deadline ya expiró
+            ClientDisconnectedError: Si el cliente se desconectó
+        """
+        # Import diferido (ciclo con app.core.exceptions)
+        from app.core.exceptions import ClientDisconnectedError, DeadlineExceededError
+
+        if self.expired:
+            raise DeadlineExceededError(self.timeout)
+        if await self.is_client_disconnected():
+            raise ClientDisconnectedError()
+
+    async def guard(self, awaitable: Awaitable[T]) -> T:
+        """
+        Ejecuta un awaitable cancelándolo si expira el deadline o si el
+        cliente se desconecta mientras está en curso.
+
+        Args:
+            awaitable: Corrutina o future a ejecutar
+
+        Returns:
+            El resultado del awaitable
+
+        Raises:
+            DeadlineExceededError: Si el deadline expira antes de terminar
+            ClientDisconnectedError: Si el cliente se desconecta antes de terminar
+        """
+        await self.check()
+        task = asyncio.ensure_future(awaitable)
+        try:
+            while True:
+                poll = min(DISCONNECT_POLL_INTERVAL, self.remaining())
+                done, _ = await asyncio.wait({task}, timeout=poll)
+                if done:
+                    return task.result()
+                await self.check()
+        finally:
+            if not task.done():
+                task.cancel()
+
+
+def get_current_deadline() -> Optional[RequestDeadline]:
+    """Retorna el deadline del request en curso (None fuera de un request)."""
+    return _current_deadline.get()
+
+
+def set_current_deadline(deadline: Optional[RequestDeadline]):
+    """
+    Fija el deadline del contexto actual.
+
+    Returns:
+        Token para restaurar el valor previo con `reset_current_deadline`
+    """
+    return _current_deadline.set(deadline)
+
+
+def reset_current_deadline(token: Any) -> None:
+    """Restaura el deadline previo a `set_current_deadline`."""
+    try:
+        _current_deadline.reset(token)
+    except ValueError:
+        # El token se creó en otro Context (p.ej. teardown en otra task)
+        _current_deadline.set(None)
+
+
+def remaining_timeout(default: float) -> float:
+    """
+    Timeout efectivo para una operación de I/O dentro del request actual.
+
+    Fuera de un request (workers, scripts) retorna el default sin cambios.
+
+    Args:
+        default: Timeout propio de la operación en segundos
+
+    Returns:
+        float: Timeout limitado por el deadline en curso
+    """
+    deadline = get_current_deadline()
+    if deadline is None:
+        return default
+    return deadline.cap(default)
+
+
+async def run_with_deadline(awaitable: Awaitable[T]) -> T:
+    """
+    Ejecuta un awaitable bajo el deadline actual si existe.
+
+    Atajo para el patrón "si hay deadline, usar guard; si no, await directo"
+    que permite reutilizar servicios desde workers sin request HTTP.
+    """
+    deadline = get_current_deadline()
+    if deadline is None:
+        return await awaitable
+    return await deadline.guard(awaitable)
+
+
+def parse_timeout_header(value: Optional[str], default: float, maximum: float) -> float:
+    """
+    Interpreta el header X-Request-Timeout (segundos, admite decimales).
+
+    Valores inválidos o no positivos se ignoran; el resultado nunca supera
+    `maximum` para que un cliente no pueda reservar capacidad indefinidamente.
+
+    Args:
+        value: Valor crudo del header
+        default: Default de la ruta
+        maximum: Tope global configurado
+
+    Returns:
+        float: Timeout efectivo en segundos
+    """
+    timeout = default
+    if value:
+        try:
+            requested = float(value)
+            if requested > 0:
+                timeout = requested
+        except ValueError:
+            pass
+    return min(timeout, maximum)
@@ -11,14 +11,34 @@ Principio: Dependency Inversion (DIP)
 """
 
 from functools import lru_cache
-from typing import Annotated, TYPE_CHECKING
+from typing import Annotated, AsyncGenerator, Generator, Optional, Tuple, TYPE_CHECKING
 from fastapi import Depends, Request
 from sqlmodel import Session
-
-from app.infrastructure.db.session import get_session
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.config import settings
+from app.core.admission import AdmissionTicket, llm_admission
+from app.core.priority import PriorityClass, priority_for_plan
+from app.core.deadline import (
+    REQUEST_TIMEOUT_HEADER,
+    RequestDeadline,
+    parse_timeout_header,
+    reset_current_deadline,
+    set_current_deadline,
+)
+from app.core.database import get_session as get_primary_session
+from app.core.read_routing import REPLICA, read_router
+from app.core.security import ALGORITHM, SECRET_KEY
+from app.infrastructure.db.session import (
+    get_session,
+    get_session_dependency,
+    get_read_engine,
+    async_read_session_scope,
+    async_session_scope,
+)
 from app.modules.chat.engine.interface import AIEngineProtocol
 from app.modules.chat.engine.gemini import GeminiEngine
-from app.modules.chat.repository import ChatRepository
+from app.modules.chat.repository import AsyncChatRepository
 from app.modules.chat.service import ChatService
 from app.infrastructure.cache.redis import CacheService, get_redis_client
 
@@ -27,24 +47,211 @@ from app.infrastructure.cache.redis import CacheService, get_redis_client
 # DATABASE DEPENDENCIES
 # ============================================
 
-def get_db():
+# Sesión por request compartida: es el mismo callable que
+# app.core.database.get_session (ver get_session_dependency)
+get_db = get_session_dependency
+
+
+# Type alias para cleaner annotations
+DatabaseDep = Annotated[Session, Depends(get_db)]
+
+
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
     """
-    Dependency para obtener una sesión de base de datos.
+    Dependency para obtener una sesión async (SQLAlchemy asyncio + psycopg).
     
-    Generator function compatible con FastAPI's Depends().
-    NO retorna directamente, sino que yield la sesión.
+    Los endpoints se migran de DatabaseDep a AsyncDatabaseDep módulo a
+    módulo, junto con sus repositorios async (empezando por chat).
+    
+    Yields:
+        AsyncSession: Sesión async con commit/rollback automático
+    """
+    async with async_session_scope() as session:
+        yield session
+
+
+# Type alias
+AsyncDatabaseDep = Annotated[AsyncSession, Depends(get_async_db)]
+
+
+async def read_session_target(request: Request) -> str:
+    """
+    Destino de las lecturas del request: "replica" o "primary".
+    
+    Ver app/core/read_routing.py (método, lag de la réplica y ventana
+    read-your-writes del usuario).
+    """
+    return await read_router.choose(request.method, request.headers.get("authorization"))
+
+
+def get_read_db(
+    target: str = Depends(read_session_target),
+    primary: Session = Depends(get_primary_session),
+) -> Generator[Session, None, None]:
+    """
+    Dependency de sesión para endpoints de solo lectura.
+    
+    Con destino réplica abre una sesión sobre el engine de lectura (sin
+    commit); si no, devuelve la sesión del primario de `get_session`, que
+    no abre conexión si no se usa y respeta los dependency_overrides.
+    
+    Yields:
+        Session: Sesión de réplica o del primario
+    """
+    read_engine = get_read_engine()
+    if target != REPLICA or read_engine is None:
+        yield primary
+        return
+    session = Session(read_engine)
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+# Type alias
+ReadDatabaseDep = Annotated[Session, Depends(get_read_db)]
+
+
+async def get_async_read_db(
+    target: str = Depends(read_session_target),
+) -> AsyncGenerator[AsyncSession, None]:
+    """Variante async de `get_read_db` (ver AsyncDatabaseDep)."""
+    scope = async_read_session_scope if target == REPLICA else async_session_scope
+    async with scope() as session:
+        yield session
+
+
+# Type alias
+AsyncReadDatabaseDep = Annotated[AsyncSession, Depends(get_async_read_db)]
+
+
+# ============================================
+# REQUEST DEADLINE DEPENDENCIES
+# ============================================
+
+def request_deadline(default_seconds: Optional[float] = None):
+    """
+    Factory de dependencies que fija el deadline del request.
+    
+    El timeout efectivo es el header X-Request-Timeout si viene (acotado por
+    REQUEST_TIMEOUT_MAX_SECONDS) o el default de la ruta. El deadline queda
+    disponible vía `get_current_deadline()` para engine, tools y DB.
+    
+    Args:
+        default_seconds: Default propio de la ruta (None = REQUEST_TIMEOUT_SECONDS)
     
     Returns:
-        Generator[Session, None, None]: Generador que yield una Session
+        Callable: Dependency async generator para Depends()
+    
+    Example:
+        @router.post("/message")
+        async def send_message(
+            deadline: RequestDeadline = Depends(request_deadline(45.0)),
+        ): ...
     """
-    # Usar get_session_dependency que es un generador correcto para FastAPI
-    # NO usar get_session() directamente porque es un @contextmanager
-    from app.infrastructure.db.session import get_session_dependency
-    yield from get_session_dependency()
+    async def dependency(request: Request) -> AsyncGenerator[RequestDeadline, None]:
+        timeout = parse_timeout_header(
+            request.headers.get(REQUEST_TIMEOUT_HEADER),
+            default=default_seconds or settings.REQUEST_TIMEOUT_SECONDS,
+            maximum=settings.REQUEST_TIMEOUT_MAX_SECONDS,
+        )
+        deadline = RequestDeadline(timeout=timeout, request=request)
+        # Dependency async: corre en la misma task que el endpoint, así el
+        # ContextVar es visible para todo lo que el endpoint await-ee
+        token = set_current_deadline(deadline)
+        try:
+            yield deadline
+        finally:
+            reset_current_deadline(token)
+    
+    return dependency
 
 
-# Type alias para cleaner annotations
-DatabaseDep = Annotated[Session, Depends(get_db)]
+# Type alias (default global de REQUEST_TIMEOUT_SECONDS)
+DeadlineDep = Annotated[RequestDeadline, Depends(request_deadline())]
+
+
+# ============================================
+# ADMISSION CONTROL DEPENDENCIES
+# ============================================
+
+def _admission_identity(request: Request) -> Tuple[str, PriorityClass]:
+    """
+    Identifica al llamante y su prioridad sin tocar la base de datos.
+    
+    Usa los claims `sub` y `plan` del JWT (solo verificación de firma, sin
+    lookup) y cae a la IP del cliente con prioridad LOW para requests
+    anónimos (widgets) o tokens emitidos antes de incluir el plan.
+    
+    Returns:
+        Tuple[str, PriorityClass]: (clave de usuario, clase de prioridad)
+    """
+    authorization = request.headers.get("Authorization", "")
+    if authorization.lower().startswith("bearer "):
+        from jose import jwt, JWTError
+        try:
+            payload = jwt.decode(
+                authorization[7:],
+                SECRET_KEY,
+                algorithms=[ALGORITHM]
+            )
+            if payload.get("sub"):
+                return f"user:{payload['sub']}", priority_for_plan(payload.get("plan"))
+        except JWTError:
+            pass
+    host = request.client.host if request.client else "unknown"
+    return f"ip:{host}", PriorityClass.LOW
+
+
+async def _admission_client_key(request: Request) -> Optional[str]:
+    """Extrae `client_id` del body JSON (ya cacheado por Starlette)."""
+    if request.method != "POST":
+        return None
+    try:
+        body = await request.json()
+    except Exception:
+        return None
+    client_id = body.get("client_id") if isinstance(body, dict) else None
+    return f"client:{client_id}" if client_id else None
+
+
+async def llm_admission_slot(request: Request) -> AsyncGenerator[AdmissionTicket, None]:
+    """
+    Dependency que reserva un slot de LLM durante todo el request.
+    
+    Debe declararse ANTES que DatabaseDep/ChatServiceDep en la firma del
+    endpoint: así la espera en cola y el rechazo ocurren sin haber tomado
+    todavía una conexión del pool. Los slots se conceden por prioridad de
+    plan (PARTNER > CEREBRO > MOTOR/anónimos) con aging anti-inanición.
+    
+    Raises:
+        HTTPException 503: Con header Retry-After si la petición se descarta
+    """
+    from fastapi import HTTPException
+    from app.core.exceptions import ServiceOverloadedError
+    
+    user_key, priority = _admission_identity(request)
+    try:
+        ticket = await llm_admission.acquire(
+            user_key=user_key,
+            client_key=await _admission_client_key(request),
+            priority=priority,
+        )
+    except ServiceOverloadedError as e:
+        raise HTTPException(
+            status_code=e.status_code,
+            detail={"message": e.message, "reason": e.reason},
+            headers={"Retry-After": str(e.retry_after)}
+        )
+    try:
+        yield ticket
+    finally:
+        llm_admission.release(ticket)
+
+
+# Type alias
+LLMAdmissionDep = Annotated[AdmissionTicket, Depends(llm_admission_slot)]
 
 
 # ============================================
@@ -95,22 +302,41 @@ CacheDep = Annotated[CacheService, Depends(get_cache_service)]
 # ============================================
 
 def get_chat_repository(
-    session: DatabaseDep
-) -> ChatRepository:
+    session: AsyncDatabaseDep
+) -> AsyncChatRepository:
     """
     Dependency para obtener el repositorio de Chat.
     
     Args:
-        session: Sesión de base de datos (inyectada)
+        session: Sesión async de base de datos (inyectada)
     
     Returns:
-        ChatRepository: Repositorio de Chat
+        AsyncChatRepository: Repositorio async de Chat
     """
-    return ChatRepository(session=session)
+    return AsyncChatRepository(session=session)
 
 
 # Type alias
-ChatRepositoryDep = Annotated[ChatRepository, Depends(get_chat_repository)]
+ChatRepositoryDep = Annotated[AsyncChatRepository, Depends(get_chat_repository)]
+
+
+def get_read_chat_repository(
+    session: AsyncReadDatabaseDep
+) -> AsyncChatRepository:
+    """
+    Repositorio de Chat sobre la sesión de lectura (réplica si procede).
+    
+    Args:
+        session: Sesión async de lectura (inyectada, ver get_async_read_db)
+    
+    Returns:
+        AsyncChatRepository: Repositorio async de Chat de solo lectura
+    """
+    return AsyncChatRepository(session=session)
+
+
+# Type alias
+ReadChatRepositoryDep = Annotated[AsyncChatRepository, Depends(get_read_chat_repository)]
 
 
 # ============================================
@@ -146,6 +372,32 @@ def get_chat_service(
 ChatServiceDep = Annotated[ChatService, Depends(get_chat_service)]
 
 
+def get_read_chat_service(
+    ai_engine: AIEngineDep,
+    repository: ReadChatRepositoryDep,
+    cache: CacheDep
+) -> ChatService:
+    """
+    Servicio de Chat para endpoints de solo lectura.
+    
+    Igual que `get_chat_service`, pero su repositorio lee de la sesión de
+    lectura: las consultas del servicio van a la réplica cuando el
+    enrutado de lecturas lo permite.
+    
+    Returns:
+        ChatService: Servicio de negocio de Chat
+    """
+    return ChatService(
+        ai_engine=ai_engine,
+        repository=repository,
+        cache=cache
+    )
+
+
+# Type alias
+ReadChatServiceDep = Annotated[ChatService, Depends(get_read_chat_service)]
+
+
 # ============================================
 # ARQ REDIS POOL DEPENDENCIES
 # ============================================
@@ -48,6 +48,65 @@ class FeatureForbiddenError(BAIException):
         super().__init__(message, status_code=403)
 
 
+class DeadlineExceededError(BAIException):
+    """El request superó su deadline antes de completar el trabajo."""
+
+    def __init__(self, timeout: float):
+        self.timeout = timeout
+        message = f"La operación superó el tiempo máximo del request ({timeout:.1f}s)."
+        super().__init__(message, status_code=504)
+
+
+class ClientDisconnectedError(BAIException):
+    """El cliente cerró la conexión; el trabajo en curso se abandona."""
+
+    def __init__(self, message: str = "El cliente cerró la conexión"):
+        # 499: convención de nginx para "Client Closed Request"
+        super().__init__(message, status_code=499)
+
+
+class ServiceOverloadedError(BAIException):
+    """Petición descartada por admission control (503 + Retry-After)."""
+
+    def __init__(self, reason: str, retry_after: int):
+        self.reason = reason
+        self.retry_after = retry_after
+        message = "El servicio está saturado. Inténtalo de nuevo en unos segundos."
+        super().__init__(message, status_code=503)
+
+
+class QuotaExceededError(BAIException):
+    """Cuota del plan agotada para el período en curso (429 + Retry-After)."""
+
+    def __init__(self, feature: str, limit: int, used: int, retry_after: int):
+        self.feature = feature
+        self.limit = limit
+        self.used = used
+        self.retry_after = retry_after
+        message = f"Has alcanzado el límite de tu plan para '{feature}' ({used}/{limit}) este mes"
+        super().__init__(message, status_code=429)
+
+
+class InsufficientCreditsError(BAIException):
+    """La suma de créditos mensuales y extra no cubre el coste (402)."""
+
+    def __init__(self, resource: str, cost: int, available: int):
+        self.resource = resource
+        self.cost = cost
+        self.available = available
+        message = f"Créditos insuficientes. Necesitas {cost} créditos, pero solo tienes {available} disponibles."
+        super().__init__(message, status_code=402)
+
+
+class CreditContentionError(BAIException):
+    """El saldo cambió en cada intento de cargo concurrente (409 + Retry-After)."""
+
+    def __init__(self, retry_after: int = 1):
+        self.retry_after = retry_after
+        message = "Hay otra operación de créditos en curso. Inténtalo de nuevo."
+        super().__init__(message, status_code=409)
+
+
 # Global exception handlers (se registran en main.py)
 async def bai_exception_handler(request: Request, exc: BAIException):
     """Handler para excepciones de B.A.I."""
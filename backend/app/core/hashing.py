@@ -0,0 +1,179 @@
+"""
+Password Hashing - bcrypt fuera del event loop
+
+Cada hash/verify de bcrypt cuesta 100-300 ms de CPU. Ejecutado dentro de
+un handler `async def` congela el event loop del proceso durante ese
+tiempo: una ráfaga de logins bloquea el chat y el resto de endpoints.
+
+`PasswordHasher` ejecuta el trabajo en un pool de threads dedicado (la
+extensión C de bcrypt libera el GIL, así que los threads hashean en
+paralelo sin el coste de serializar a un pool de procesos):
+
+- Concurrencia acotada: `max_workers` hashes simultáneos por proceso
+- Cola acotada: si hay `max_queue` peticiones esperando, se rechaza de
+  inmediato (ServiceOverloadedError -> 503 + Retry-After)
+- Métricas de tiempo en cola y de servicio (`snapshot`, expuesto en
+  /health/admission)
+
+El rehash por subida de coste (PASSWORD_BCRYPT_ROUNDS) se lanza después
+de responder al login (`schedule_rehash`) y pasa por el mismo pool.
+"""
+
+import asyncio
+import logging
+import math
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional, Set
+
+from sqlalchemy import update
+
+from app.core.config import settings
+from app.core.security import pwd_context
+from app.models.user import User
+
+
+logger = logging.getLogger("bai.hashing")
+
+
+class PasswordHasher:
+    """
+    Pool acotado para operaciones de bcrypt.
+
+    Attributes:
+        max_workers: Hashes simultáneos (threads del pool)
+        max_queue: Peticiones que pueden esperar turno
+    """
+
+    def __init__(self, max_workers: int, max_queue: int):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pending = 0
+        self._rehash_tasks: Set[asyncio.Task] = set()
+
+        # Métricas acumuladas
+        self._completed = 0
+        self._shed = 0
+        self._rehashed = 0
+        self._avg_queue_ms = 0.0
+        self._max_queue_ms = 0.0
+        self._avg_service_ms = 0.0
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        """
+        Verifica una contraseña en el pool.
+
+        Raises:
+            ServiceOverloadedError: Si la cola del pool está llena
+        """
+        return await self._run(pwd_context.verify, plain_password, hashed_password)
+
+    async def hash(self, password: str) -> str:
+        """
+        Hashea una contraseña en el pool.
+
+        Raises:
+            ServiceOverloadedError: Si la cola del pool está llena
+        """
+        return await self._run(pwd_context.hash, password)
+
+    def needs_rehash(self, hashed_password: str) -> bool:
+        """True si el hash usa un esquema o coste anterior (no hace bcrypt)."""
+        return pwd_context.needs_update(hashed_password)
+
+    def schedule_rehash(self, user_id: int, plain_password: str, old_hash: str) -> None:
+        """
+        Rehashea la contraseña con el coste actual sin bloquear la respuesta.
+
+        Llamar tras un login correcto cuando `needs_rehash(old_hash)`. La
+        escritura es condicional (solo si el hash no cambió entretanto) y
+        cualquier error se registra y se descarta: se reintentará en el
+        siguiente login.
+        """
+        task = asyncio.create_task(self._rehash(user_id, plain_password, old_hash))
+        self._rehash_tasks.add(task)
+        task.add_done_callback(self._rehash_tasks.discard)
+
+    async def _rehash(self, user_id: int, plain_password: str, old_hash: str) -> None:
+        from app.infrastructure.db.session import async_session_scope
+
+        try:
+            new_hash = await self.hash(plain_password)
+            async with async_session_scope() as session:
+                await session.execute(
+                    update(User)
+                    .where(User.id == user_id, User.hashed_password == old_hash)
+                    .values(hashed_password=new_hash)
+                )
+                await session.commit()
+            self._rehashed += 1
+        except Exception as e:
+            logger.warning(f"Password rehash skipped for user {user_id}: {e}")
+
+    async def _run(self, fn, *args: Any) -> Any:
+        from app.core.exceptions import ServiceOverloadedError
+
+        if self._pending >= self.max_workers + self.max_queue:
+            self._shed += 1
+            raise ServiceOverloadedError(reason="password_queue_full", retry_after=self.retry_after())
+
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers,
+                thread_name_prefix="bai-bcrypt",
+            )
+
+        enqueued = time.monotonic()
+        started: Dict[str, float] = {}
+
+        def _job():
+            started["at"] = time.monotonic()
+            return fn(*args)
+
+        self._pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, _job)
+        finally:
+            self._pending -= 1
+            finished = time.monotonic()
+            if "at" in started:
+                self._observe(
+                    queue_ms=(started["at"] - enqueued) * 1000,
+                    service_ms=(finished - started["at"]) * 1000,
+                )
+
+    def _observe(self, queue_ms: float, service_ms: float) -> None:
+        self._completed += 1
+        self._avg_queue_ms = 0.8 * self._avg_queue_ms + 0.2 * queue_ms
+        self._avg_service_ms = 0.8 * self._avg_service_ms + 0.2 * service_ms
+        self._max_queue_ms = max(self._max_queue_ms, queue_ms)
+
+    def retry_after(self) -> int:
+        """Segundos sugeridos al cliente: tiempo estimado para vaciar la cola."""
+        waves = (self._pending + 1) / max(1, self.max_workers)
+        return max(1, math.ceil(waves * self._avg_service_ms / 1000))
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Métricas actuales (para /health/admission y logging)."""
+        in_flight = min(self._pending, self.max_workers)
+        return {
+            "name": "password_hashing",
+            "in_flight": in_flight,
+            "queue_depth": self._pending - in_flight,
+            "max_concurrent": self.max_workers,
+            "max_queue": self.max_queue,
+            "completed_total": self._completed,
+            "shed_total": self._shed,
+            "rehashed_total": self._rehashed,
+            "avg_queue_ms": round(self._avg_queue_ms, 1),
+            "max_queue_ms": round(self._max_queue_ms, 1),
+            "avg_service_ms": round(self._avg_service_ms, 1),
+        }
+
+
+# Singleton por proceso (el pool se crea con el primer uso)
+password_hasher = PasswordHasher(
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    max_queue=settings.PASSWORD_HASH_MAX_QUEUE,
+)
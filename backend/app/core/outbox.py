@@ -0,0 +1,406 @@
+"""
+Transactional Outbox - Entrega fiable de eventos a n8n
+
+Los endpoints ya no llaman a n8n dentro del request: escriben un
+`OutboxEvent` en la misma transacción que el cambio de negocio (campaña +
+cargo de créditos) y responden en cuanto el COMMIT termina. Si el commit
+falla no hay evento; si n8n está caído el evento espera en la tabla.
+
+El dispatcher (cron `dispatch_outbox` del worker) entrega los eventos:
+
+1. Reclama un lote de pendientes vencidos con un único
+   `UPDATE ... WHERE id IN (SELECT ... FOR UPDATE SKIP LOCKED) RETURNING`,
+   que suma el intento y aplaza `next_attempt_at` un lease: varios
+   dispatchers no se pisan y, si uno muere a mitad, el lote se reintenta
+   al vencer el lease
+2. Envía los POST en paralelo (OUTBOX_CONCURRENCY) con la clave de
+   deduplicación en `Idempotency-Key`: una entrega repetida (lease
+   vencido) se puede descartar en destino
+3. Liquida el lote en una transacción: entregados; reintentos con backoff
+   exponencial con jitter; dead-letter si n8n lo rechaza (4xx) o se agotan
+   OUTBOX_MAX_ATTEMPTS, ejecutando el handler del topic (p.ej. reembolsar
+   los créditos de la campaña)
+
+Solo se reintenta lo que n8n seguro que no recibió (conexión rechazada o
+sin establecer, 5xx, 408/409/425/429). Si el POST salió y la respuesta no
+llega (timeout de lectura, conexión cortada), el webhook responde al
+terminar el workflow ("Respond When Last Node Finishes") y n8n puede estar
+generando el contenido: el evento queda "unconfirmed", sin reintento ni
+dead-letter (reintentarlo duplicaría la generación y reembolsarlo
+fallaría una campaña que sí se produce).
+
+Las métricas de entrega (entregados, reintentos, dead, lag) se acumulan en
+Redis y se exponen con el estado de la tabla en /health/outbox.
+"""
+
+import asyncio
+import logging
+import random
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy import func, select, update
+from sqlmodel import Session
+
+from app.core.config import settings
+from app.core.credits import DEBIT, credit_ledger
+from app.models.content import MarketingCampaign
+from app.models.credits import CreditLedgerEntry
+from app.models.outbox import OutboxEvent
+
+
+logger = logging.getLogger("bai.outbox")
+
+PENDING = "pending"
+DELIVERED = "delivered"
+UNCONFIRMED = "unconfirmed"
+DEAD = "dead"
+
+TOPIC_MARKETING_CAMPAIGN = "marketing_campaign.created"
+
+# Contadores de entrega (hash en Redis, escrito por los dispatchers)
+OUTBOX_STATS_KEY = "bai:outbox_stats"
+
+# Estados HTTP de n8n que merecen reintento (el resto de 4xx son definitivos)
+RETRYABLE_STATUS = frozenset({408, 409, 425, 429})
+
+
+# ============================================================================
+# TOPICS
+# ============================================================================
+
+def _fail_marketing_campaign(session: Session, payload: Dict[str, Any], error: str) -> None:
+    """Dead-letter de una campaña: reembolsa su cargo y la marca "failed"."""
+    campaign_id = payload["campaign_id"]
+    debit_id = session.execute(
+        select(CreditLedgerEntry.id)
+        .where(CreditLedgerEntry.campaign_id == campaign_id, CreditLedgerEntry.kind == DEBIT)
+        .order_by(CreditLedgerEntry.id.desc())
+        .limit(1)
+    ).scalar()
+    if debit_id is not None:
+        credit_ledger.refund(session, debit_id, reason=f"n8n dispatch failed: {error}"[:255])
+    session.execute(
+        update(MarketingCampaign)
+        .where(MarketingCampaign.id == campaign_id)
+        .values(status="failed", updated_at=datetime.now(timezone.utc))
+    )
+
+
+@dataclass(frozen=True)
+class OutboxTopic:
+    """Destino de un topic y qué hacer si el evento no se puede entregar."""
+    webhook_url: Callable[[], str]
+    on_dead: Optional[Callable[[Session, Dict[str, Any], str], None]] = None
+
+
+OUTBOX_TOPICS: Dict[str, OutboxTopic] = {
+    TOPIC_MARKETING_CAMPAIGN: OutboxTopic(
+        webhook_url=lambda: settings.N8N_MARKETING_CAMPAIGN_WEBHOOK_URL,
+        on_dead=_fail_marketing_campaign,
+    ),
+}
+
+
+def enqueue_event(session: Session, topic: str, payload: Dict[str, Any], dedup_key: str) -> OutboxEvent:
+    """
+    Añade un evento al outbox dentro de la transacción de `session`.
+
+    Se entrega solo si la transacción hace commit; no hace flush ni commit.
+
+    Args:
+        session: Sesión de la transacción de negocio
+        topic: Topic registrado en OUTBOX_TOPICS
+        payload: Cuerpo JSON del POST a n8n
+        dedup_key: Clave única del evento (p.ej. "marketing_campaign:42")
+
+    Returns:
+        OutboxEvent: Evento añadido a la sesión
+    """
+    if topic not in OUTBOX_TOPICS:
+        raise ValueError(f"Unknown outbox topic: {topic}")
+    event = OutboxEvent(topic=topic, dedup_key=dedup_key, payload=payload)
+    session.add(event)
+    return event
+
+
+def retry_delay(attempts: int) -> float:
+    """Backoff exponencial con jitter (mitad fija, mitad aleatoria)."""
+    delay = min(
+        settings.OUTBOX_RETRY_MAX_SECONDS,
+        settings.OUTBOX_RETRY_BASE_SECONDS * 2 ** max(attempts - 1, 0),
+    )
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
+# ============================================================================
+# DISPATCHER
+# ============================================================================
+
+@dataclass(frozen=True)
+class ClaimedEvent:
+    id: int
+    topic: str
+    dedup_key: str
+    payload: Dict[str, Any]
+    attempts: int
+    created_at: datetime
+
+
+@dataclass(frozen=True)
+class DeliveryResult:
+    event: ClaimedEvent
+    delivered: bool
+    retryable: bool = True
+    error: Optional[str] = None
+    # El POST salió pero no hubo respuesta: n8n puede haberlo procesado
+    unconfirmed: bool = False
+
+
+class OutboxDispatcher:
+    """Reclama, entrega y liquida lotes de eventos del outbox."""
+
+    def claim(self, session: Session, limit: int, now: Optional[datetime] = None) -> List[ClaimedEvent]:
+        """
+        Reclama hasta `limit` eventos vencidos (y hace commit del lease).
+
+        Args:
+            session: Sesión propia del dispatcher
+            limit: Tamaño del lote
+            now: Instante de referencia (tests)
+
+        Returns:
+            List[ClaimedEvent]: Eventos reclamados, en orden de creación
+        """
+        now = now or datetime.now(timezone.utc)
+        lease = timedelta(seconds=settings.OUTBOX_DELIVERY_TIMEOUT_SECONDS * 3 + 30)
+        due = (
+            select(OutboxEvent.id)
+            .where(OutboxEvent.status == PENDING, OutboxEvent.next_attempt_at <= now)
+            .order_by(OutboxEvent.id)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        rows = session.execute(
+            update(OutboxEvent)
+            .where(OutboxEvent.id.in_(due))
+            .values(attempts=OutboxEvent.attempts + 1, next_attempt_at=now + lease)
+            .returning(
+                OutboxEvent.id,
+                OutboxEvent.topic,
+                OutboxEvent.dedup_key,
+                OutboxEvent.payload,
+                OutboxEvent.attempts,
+                OutboxEvent.created_at,
+            )
+            .execution_options(synchronize_session=False)
+        ).all()
+        session.commit()
+        return sorted((ClaimedEvent(*row) for row in rows), key=lambda event: event.id)
+
+    async def deliver(self, client: Any, event: ClaimedEvent) -> DeliveryResult:
+        """POST del evento a su webhook; clasifica el error si falla."""
+        import httpx
+
+        topic = OUTBOX_TOPICS.get(event.topic)
+        if topic is None:
+            return DeliveryResult(event, False, retryable=False, error=f"unknown topic {event.topic}")
+        try:
+            response = await client.post(
+                topic.webhook_url(),
+                json=event.payload,
+                headers={
+                    "Idempotency-Key": event.dedup_key,
+                    "X-BAI-Event-Id": str(event.id),
+                    "X-BAI-Event-Topic": event.topic,
+                },
+            )
+        except (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout) as e:
+            # La petición no llegó a salir: reintentar es seguro
+            return DeliveryResult(event, False, error=f"{type(e).__name__}: {e}"[:500])
+        except (httpx.ReadTimeout, httpx.ReadError, httpx.RemoteProtocolError) as e:
+            return DeliveryResult(event, False, retryable=False, unconfirmed=True, error=f"{type(e).__name__}: {e}"[:500])
+        except httpx.HTTPError as e:
+            return DeliveryResult(event, False, error=f"{type(e).__name__}: {e}"[:500])
+        if response.is_success:
+            return DeliveryResult(event, True)
+        code = response.status_code
+        return DeliveryResult(
+            event,
+            False,
+            retryable=code >= 500 or code in RETRYABLE_STATUS,
+            error=f"HTTP {code}",
+        )
+
+    def settle(self, session: Session, results: List[DeliveryResult], now: Optional[datetime] = None) -> Dict[str, Any]:
+        """
+        Registra el resultado de un lote en una transacción.
+
+        Args:
+            session: Sesión propia del dispatcher
+            results: Resultados de `deliver`
+            now: Instante de referencia (tests)
+
+        Returns:
+            dict con delivered, unconfirmed, retried, dead y lag acumulado
+            de los entregados (ms)
+        """
+        now = now or datetime.now(timezone.utc)
+        counts: Dict[str, Any] = {"delivered": 0, "unconfirmed": 0, "retried": 0, "dead": 0, "lag_ms_total": 0.0}
+
+        delivered = [result.event for result in results if result.delivered]
+        if delivered:
+            session.execute(
+                update(OutboxEvent)
+                .where(OutboxEvent.id.in_([event.id for event in delivered]))
+                .values(status=DELIVERED, delivered_at=now, last_error=None)
+                .execution_options(synchronize_session=False)
+            )
+            counts["delivered"] = len(delivered)
+            for event in delivered:
+                created_at = event.created_at
+                if created_at.tzinfo is None:
+                    created_at = created_at.replace(tzinfo=timezone.utc)
+                counts["lag_ms_total"] += max(0.0, (now - created_at).total_seconds() * 1000)
+
+        unconfirmed = [result for result in results if result.unconfirmed]
+        for result in unconfirmed:
+            logger.warning(f"Outbox event {result.event.id} ({result.event.topic}) unconfirmed: {result.error}")
+        if unconfirmed:
+            session.execute(
+                update(OutboxEvent),
+                [
+                    {"id": result.event.id, "status": UNCONFIRMED, "delivered_at": now, "last_error": result.error}
+                    for result in unconfirmed
+                ],
+            )
+            counts["unconfirmed"] = len(unconfirmed)
+
+        retries = []
+        for result in results:
+            if result.delivered or result.unconfirmed:
+                continue
+            event = result.event
+            if result.retryable and event.attempts < settings.OUTBOX_MAX_ATTEMPTS:
+                retries.append({
+                    "id": event.id,
+                    "next_attempt_at": now + timedelta(seconds=retry_delay(event.attempts)),
+                    "last_error": result.error,
+                })
+                continue
+            self._dead_letter(session, event, result.error or "rejected")
+            counts["dead"] += 1
+        if retries:
+            # UPDATE por clave primaria en bloque (executemany)
+            session.execute(update(OutboxEvent), retries)
+            counts["retried"] = len(retries)
+
+        session.commit()
+        return counts
+
+    def _dead_letter(self, session: Session, event: ClaimedEvent, error: str) -> None:
+        topic = OUTBOX_TOPICS.get(event.topic)
+        logger.error(f"Outbox event {event.id} ({event.topic}) dead after {event.attempts} attempts: {error}")
+        if topic is not None and topic.on_dead is not None:
+            try:
+                with session.begin_nested():
+                    topic.on_dead(session, event.payload, error)
+            except Exception as e:
+                logger.error(f"Outbox dead-letter handler for event {event.id} failed: {str(e)}")
+                error = f"{error}; dead-letter handler failed: {e}"
+        session.execute(
+            update(OutboxEvent)
+            .where(OutboxEvent.id == event.id)
+            .values(status=DEAD, last_error=error[:500])
+            .execution_options(synchronize_session=False)
+        )
+
+    async def dispatch_batch(self, session: Session, client: Any) -> Dict[str, Any]:
+        """
+        Reclama, entrega y liquida un lote.
+
+        Args:
+            session: Sesión propia del dispatcher
+            client: httpx.AsyncClient compartido por la ejecución
+
+        Returns:
+            dict con claimed, delivered, unconfirmed, retried, dead y lag_ms_total
+        """
+        events = self.claim(session, settings.OUTBOX_BATCH_SIZE)
+        if not events:
+            return {"claimed": 0, "delivered": 0, "unconfirmed": 0, "retried": 0, "dead": 0, "lag_ms_total": 0.0}
+
+        semaphore = asyncio.Semaphore(settings.OUTBOX_CONCURRENCY)
+
+        async def bounded(event: ClaimedEvent) -> DeliveryResult:
+            async with semaphore:
+                return await self.deliver(client, event)
+
+        results = await asyncio.gather(*(bounded(event) for event in events))
+        return {"claimed": len(events), **self.settle(session, list(results))}
+
+
+outbox_dispatcher = OutboxDispatcher()
+
+
+# ============================================================================
+# METRICS
+# ============================================================================
+
+async def record_dispatch(redis: Any, counts: Dict[str, Any], elapsed_ms: float) -> None:
+    """Acumula los contadores de una ejecución del dispatcher en Redis."""
+    try:
+        async with redis.pipeline(transaction=False) as pipe:
+            pipe.hincrby(OUTBOX_STATS_KEY, "runs", 1)
+            for key in ("claimed", "delivered", "unconfirmed", "retried", "dead"):
+                pipe.hincrby(OUTBOX_STATS_KEY, key, counts.get(key, 0))
+            pipe.hincrbyfloat(OUTBOX_STATS_KEY, "lag_ms_total", counts.get("lag_ms_total", 0.0))
+            pipe.hset(OUTBOX_STATS_KEY, mapping={
+                "last_run_ms": round(elapsed_ms, 1),
+                "last_run_ts": int(time.time()),
+            })
+            await pipe.execute()
+    except Exception:
+        # Las métricas nunca deben hacer fallar la entrega
+        pass
+
+
+def get_outbox_backlog(session: Session) -> Dict[str, Any]:
+    """Pendientes, edad del más antiguo, sin confirmar y dead-letters en la tabla."""
+    now = datetime.now(timezone.utc)
+    pending, oldest = session.execute(
+        select(func.count(OutboxEvent.id), func.min(OutboxEvent.created_at))
+        .where(OutboxEvent.status == PENDING)
+    ).one()
+    dead, unconfirmed = session.execute(
+        select(
+            func.count(OutboxEvent.id).filter(OutboxEvent.status == DEAD),
+            func.count(OutboxEvent.id).filter(OutboxEvent.status == UNCONFIRMED),
+        )
+    ).one()
+    if oldest is not None and oldest.tzinfo is None:
+        oldest = oldest.replace(tzinfo=timezone.utc)
+    return {
+        "pending": pending,
+        "oldest_pending_age_s": round((now - oldest).total_seconds(), 1) if oldest else 0.0,
+        "unconfirmed": unconfirmed,
+        "dead": dead,
+    }
+
+
+async def get_outbox_stats(redis: Any) -> Dict[str, Any]:
+    """Contadores acumulados por los dispatchers (ver record_dispatch)."""
+    raw = await redis.hgetall(OUTBOX_STATS_KEY)
+    delivered = int(raw.get("delivered", 0))
+    return {
+        "runs": int(raw.get("runs", 0)),
+        "claimed": int(raw.get("claimed", 0)),
+        "delivered": delivered,
+        "unconfirmed": int(raw.get("unconfirmed", 0)),
+        "retried": int(raw.get("retried", 0)),
+        "dead": int(raw.get("dead", 0)),
+        "avg_delivery_lag_ms": round(float(raw.get("lag_ms_total", 0)) / delivered, 1) if delivered else None,
+        "last_run_ms": float(raw["last_run_ms"]) if "last_run_ms" in raw else None,
+    }
@@ -0,0 +1,392 @@
+"""
+Principal Cache - Usuario autenticado sin lookup en DB por request
+
+El principal es el subconjunto del usuario que necesitan los gates de
+autorización (id, email, plan, features, is_active, role). Se resuelve en
+tres niveles:
+
+1. LRU en proceso con TTL corto (PRINCIPAL_CACHE_TTL_SECONDS)
+2. Redis `bai:principal:{email}` (PRINCIPAL_REDIS_TTL_SECONDS), compartido
+   entre workers de uvicorn
+3. Postgres (sesión async) solo en caso de fallo de ambos
+
+Cualquier cambio en esos campos (webhooks de billing, cambio de plan,
+cambios de admin) debe llamar a `principal_cache.invalidate(email)`: borra
+la copia de Redis y publica el email en `bai:principal:invalidate`, canal
+que cada proceso escucha (`listen`, arrancado en el lifespan) para vaciar
+su LRU. Los TTL acotan la ventana de datos obsoletos si un mensaje se
+pierde.
+
+Los handlers que necesitan la fila completa (créditos, stripe_customer_id)
+la cargan ellos mismos con `session.get(User, principal.id)`.
+
+Tokens autodescriptivos: el access token lleva el principal ya resuelto
+(`uid`, `plan`, `feat`, `role`) y la versión de token del usuario (`tv`).
+La versión vive en `User.token_version`; Redis cachea `{versión}:{activo}`
+en `bai:token_version:{user_id}`. Mientras `tv` coincida y la cuenta siga
+activa, los gates autorizan solo con el token (un GET, sin DB).
+
+- `invalidate(email, user_id=...)` incrementa la versión en la DB y escribe
+  el nuevo estado en Redis: los claims anteriores dejan de aceptarse al
+  instante y esos tokens vuelven al camino del cache
+- Si la clave no está (flush, eviction, TTL) se lee la DB: nunca se asume
+  "versión 0", así que un token revocado no vuelve a ser válido
+- La clave caduca con PRINCIPAL_REDIS_TTL_SECONDS, que acota también los
+  cambios hechos directamente en la DB (p.ej. desactivar una cuenta)
+"""
+
+import asyncio
+import json
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, Optional, Tuple, Union
+
+from sqlalchemy import update
+from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.config import settings
+from app.models.user import PLAN_FEATURE_MATRIX, PlanTier, User
+
+
+logger = logging.getLogger("bai.principal")
+
+PRINCIPAL_KEY = "bai:principal:{email}"
+INVALIDATION_CHANNEL = "bai:principal:invalidate"
+TOKEN_VERSION_KEY = "bai:token_version:{user_id}"
+
+# Sesión del request (sync o async) para los fallos de cache; None abre una
+# sesión async propia
+RequestSessionType = Optional[Union[Session, AsyncSession]]
+
+
+def resolve_features(plan_tier: PlanTier, overrides: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Feature flags efectivos: matriz del plan + overrides del usuario."""
+    base_features = PLAN_FEATURE_MATRIX.get(plan_tier, {})
+    if overrides:
+        return {**base_features, **overrides}
+    return base_features
+
+
+@dataclass(frozen=True)
+class Principal:
+    """Usuario autenticado tal como lo ven los gates (inmutable)."""
+    id: int
+    email: str
+    plan_tier: PlanTier
+    features: Optional[Dict[str, Any]]
+    is_active: bool
+    role: str
+    # True si `features` ya es el dict efectivo (principal salido de claims)
+    features_resolved: bool = False
+
+    @classmethod
+    def from_user(cls, user: User) -> "Principal":
+        return cls(
+            id=user.id,
+            email=user.email,
+            plan_tier=PlanTier(user.plan_tier),
+            features=user.features,
+            is_active=user.is_active,
+            # Usuarios legacy sin role: "client" (sin back-fill en el request)
+            role=user.role or "client",
+        )
+
+    def to_json(self) -> str:
+        data = asdict(self)
+        data["plan_tier"] = self.plan_tier.value
+        return json.dumps(data)
+
+    @classmethod
+    def from_json(cls, raw: str) -> "Principal":
+        data = json.loads(raw)
+        data["plan_tier"] = PlanTier(data["plan_tier"])
+        return cls(**data)
+
+    def to_claims(self, token_version: int) -> Dict[str, Any]:
+        """Claims del access token (ver `from_claims`)."""
+        return {
+            "sub": self.email,
+            "uid": self.id,
+            "plan": self.plan_tier.value,
+            "feat": resolve_features(self.plan_tier, self.features),
+            "role": self.role,
+            "tv": token_version,
+        }
+
+    @classmethod
+    def from_claims(cls, payload: Dict[str, Any], is_active: bool) -> "Principal":
+        """
+        Principal desde un token ya verificado (firma y versión).
+
+        Args:
+            payload: Claims del token
+            is_active: Estado actual de la cuenta (ver get_token_state)
+
+        Raises:
+            KeyError, TypeError, ValueError: Si faltan claims o son inválidos
+        """
+        return cls(
+            id=int(payload["uid"]),
+            email=payload["sub"],
+            plan_tier=PlanTier(payload["plan"]),
+            features=dict(payload["feat"]),
+            is_active=is_active,
+            role=payload.get("role") or "client",
+            features_resolved=True,
+        )
+
+
+def _encode_token_state(token_version: int, is_active: bool) -> str:
+    return f"{token_version}:{int(is_active)}"
+
+
+def _decode_token_state(raw: Any) -> Tuple[int, bool]:
+    if isinstance(raw, bytes):
+        raw = raw.decode()
+    version, _, active = raw.partition(":")
+    return int(version), active != "0"
+
+
+async def _first(statement: Any, session: RequestSessionType) -> Any:
+    """Primera fila con la sesión del request, o con una sesión async propia."""
+    if isinstance(session, AsyncSession):
+        return (await session.exec(statement)).first()
+    if session is not None:
+        return session.exec(statement).first()
+
+    from app.infrastructure.db.session import async_session_scope
+
+    async with async_session_scope() as async_session:
+        return (await async_session.exec(statement)).first()
+
+
+async def _load_token_state(user_id: int, session: RequestSessionType) -> Optional[Tuple[int, bool]]:
+    row = await _first(select(User.token_version, User.is_active).where(User.id == user_id), session)
+    return (int(row[0]), bool(row[1])) if row else None
+
+
+async def get_token_state(
+    redis: Any,
+    user_id: int,
+    session: RequestSessionType = None,
+) -> Optional[Tuple[int, bool]]:
+    """
+    Versión de token vigente y si la cuenta está activa.
+
+    Lee Redis; si la clave no existe la carga de la DB y la repone con
+    SET NX (una invalidación concurrente, que escribe con SET, gana).
+
+    Args:
+        redis: Cliente redis.asyncio
+        user_id: ID del usuario
+        session: Sesión del request (sync o async) para el fallo de cache (None = sesión async propia)
+
+    Returns:
+        (token_version, is_active) o None si el usuario no existe
+
+    Raises:
+        Exception: Errores de Redis (el llamador decide el fallback)
+    """
+    key = TOKEN_VERSION_KEY.format(user_id=user_id)
+    raw = await redis.get(key)
+    if raw is not None:
+        return _decode_token_state(raw)
+    state = await _load_token_state(user_id, session)
+    if state is not None:
+        await redis.set(key, _encode_token_state(*state), nx=True, ex=settings.PRINCIPAL_REDIS_TTL_SECONDS)
+    return state
+
+
+class PrincipalCache:
+    """
+    LRU con TTL en proceso respaldado por Redis, con invalidación pub/sub.
+
+    Attributes:
+        ttl: Vida de una entrada en el LRU local (segundos)
+        max_entries: Tamaño máximo del LRU local
+        redis_ttl: Vida de la copia en Redis (segundos)
+    """
+
+    def __init__(self, ttl: float, max_entries: int, redis_ttl: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.redis_ttl = redis_ttl
+        self._entries: "OrderedDict[str, Tuple[float, Principal]]" = OrderedDict()
+        self._hits = {"local": 0, "redis": 0, "db": 0}
+        self._invalidations = 0
+        # Se incrementa en cada invalidación: una carga que empezó antes no
+        # debe volver a cachear el valor antiguo
+        self._generation = 0
+
+    async def get(
+        self,
+        email: str,
+        redis: Optional[Any] = None,
+        session: RequestSessionType = None,
+    ) -> Optional[Principal]:
+        """
+        Resuelve el principal de un email (JWT `sub`).
+
+        Args:
+            email: Email del usuario
+            redis: Cliente redis.asyncio (None = solo LRU + DB)
+            session: Sesión del request (sync o async) para el fallo de cache (None = sesión async propia)
+
+        Returns:
+            Principal o None si el usuario no existe
+        """
+        entry = self._entries.get(email)
+        if entry and entry[0] > time.monotonic():
+            self._entries.move_to_end(email)
+            self._hits["local"] += 1
+            return entry[1]
+
+        if redis is not None:
+            try:
+                raw = await redis.get(PRINCIPAL_KEY.format(email=email))
+                if raw:
+                    principal = Principal.from_json(raw)
+                    self._store_local(email, principal)
+                    self._hits["redis"] += 1
+                    return principal
+            except Exception as e:
+                logger.warning(f"Principal cache read skipped (redis): {e}")
+
+        generation = self._generation
+        principal = await self._load(email, session)
+        self._hits["db"] += 1
+        if principal is None or generation != self._generation:
+            return principal
+        self._store_local(email, principal)
+        if redis is not None:
+            try:
+                await redis.set(PRINCIPAL_KEY.format(email=email), principal.to_json(), ex=self.redis_ttl)
+            except Exception as e:
+                logger.warning(f"Principal cache write skipped (redis): {e}")
+        return principal
+
+    async def invalidate(
+        self,
+        email: str,
+        user_id: Optional[int] = None,
+        redis: Optional[Any] = None,
+        session: Optional[Session] = None,
+    ) -> None:
+        """
+        Invalida el principal en este proceso, en Redis y en el resto de procesos.
+
+        Llamar después del commit que cambia plan, features, is_active o role.
+        Con `user_id` también incrementa `User.token_version` (y lo confirma),
+        de modo que los claims de los tokens ya emitidos dejan de usarse
+        aunque Redis pierda la clave.
+
+        Args:
+            email: Email del usuario modificado
+            user_id: ID del usuario (para la versión de token)
+            redis: Cliente redis.asyncio (por defecto el singleton)
+            session: Sesión para el incremento (None = sesión async propia)
+
+        Raises:
+            Exception: Si falla el incremento en la DB (sin él los tokens
+                emitidos seguirían siendo válidos)
+        """
+        self.evict(email)
+        state = None
+        if user_id is not None:
+            state = await self._bump_token_version(user_id, session)
+        if redis is None:
+            from app.infrastructure.cache.redis import get_redis_client
+            redis = get_redis_client()
+        try:
+            async with redis.pipeline(transaction=False) as pipe:
+                pipe.delete(PRINCIPAL_KEY.format(email=email))
+                if user_id is not None:
+                    key = TOKEN_VERSION_KEY.format(user_id=user_id)
+                    if state is None:
+                        pipe.delete(key)
+                    else:
+                        pipe.set(key, _encode_token_state(*state), ex=self.redis_ttl)
+                pipe.publish(INVALIDATION_CHANNEL, email)
+                await pipe.execute()
+        except Exception as e:
+            # La versión ya cambió en la DB: la clave de Redis caduca sola
+            logger.warning(f"Principal invalidation not propagated (redis): {e}")
+
+    async def _bump_token_version(self, user_id: int, session: Optional[Session]) -> Optional[Tuple[int, bool]]:
+        statement = (
+            update(User)
+            .where(User.id == user_id)
+            .values(token_version=User.token_version + 1)
+            .returning(User.token_version, User.is_active)
+        )
+        if session is not None:
+            row = session.execute(statement).first()
+            session.commit()
+        else:
+            from app.infrastructure.db.session import async_session_scope
+
+            async with async_session_scope() as async_session:
+                row = (await async_session.execute(statement)).first()
+        return (int(row[0]), bool(row[1])) if row else None
+
+    def evict(self, email: str) -> None:
+        """Elimina la entrada del LRU local."""
+        self._generation += 1
+        if self._entries.pop(email, None) is not None:
+            self._invalidations += 1
+
+    async def listen(self, redis: Any) -> None:
+        """
+        Consume invalidaciones de otros procesos hasta ser cancelado.
+
+        Reintenta la suscripción si Redis se cae; mientras tanto el TTL local
+        acota la obsolescencia.
+        """
+        while True:
+            pubsub = redis.pubsub()
+            try:
+                await pubsub.subscribe(INVALIDATION_CHANNEL)
+                async for message in pubsub.listen():
+                    if message.get("type") == "message":
+                        self.evict(message["data"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Principal invalidation listener reconnecting: {e}")
+                # Sin mensajes durante la caída: vaciar para no servir datos viejos
+                self._entries.clear()
+                await asyncio.sleep(1.0)
+            finally:
+                try:
+                    await pubsub.aclose()
+                except Exception:
+                    pass
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Métricas del cache (para health/logging)."""
+        return {
+            "entries": len(self._entries),
+            "hits": dict(self._hits),
+            "invalidations": self._invalidations,
+        }
+
+    def _store_local(self, email: str, principal: Principal) -> None:
+        self._entries[email] = (time.monotonic() + self.ttl, principal)
+        self._entries.move_to_end(email)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def _load(self, email: str, session: RequestSessionType = None) -> Optional[Principal]:
+        user = await _first(select(User).where(User.email == email), session)
+        return Principal.from_user(user) if user else None
+
+
+# Singleton por proceso
+principal_cache = PrincipalCache(
+    ttl=settings.PRINCIPAL_CACHE_TTL_SECONDS,
+    max_entries=settings.PRINCIPAL_CACHE_MAX_ENTRIES,
+    redis_ttl=settings.PRINCIPAL_REDIS_TTL_SECONDS,
+)
@@ -0,0 +1,64 @@
+"""
+Priority Classes por Plan
+
+Deriva una clase de prioridad del `User.plan_tier` para repartir capacidad
+escasa (slots de LLM y colas de Arq) a favor de los planes superiores.
+
+Modelo: "ventaja temporal acotada" (aging). Cada clase recibe un adelanto
+fijo en segundos respecto a su instante real de llegada; el orden de
+servicio es `llegada - adelanto`. Así PARTNER adelanta a quien llegó poco
+antes que él, pero una petición MOTOR que lleva esperando más que el
+adelanto máximo ya no puede ser superada: los planes inferiores nunca
+sufren inanición.
+"""
+
+from enum import IntEnum
+from typing import Optional
+
+from app.models.user import PlanTier
+
+
+class PriorityClass(IntEnum):
+    """Menor valor = mayor prioridad."""
+    HIGH = 0
+    NORMAL = 1
+    LOW = 2
+
+
+_PLAN_PRIORITY = {
+    PlanTier.PARTNER: PriorityClass.HIGH,
+    PlanTier.CEREBRO: PriorityClass.NORMAL,
+    PlanTier.MOTOR: PriorityClass.LOW,
+}
+
+# Adelanto en la cola de slots LLM (escala: segundos de espera en proceso)
+LLM_HEADSTART_SECONDS = {
+    PriorityClass.HIGH: 5.0,
+    PriorityClass.NORMAL: 2.0,
+    PriorityClass.LOW: 0.0,
+}
+
+# Adelanto en las colas de Arq (escala: minutos de backlog en el worker)
+JOB_HEADSTART_SECONDS = {
+    PriorityClass.HIGH: 300.0,
+    PriorityClass.NORMAL: 60.0,
+    PriorityClass.LOW: 0.0,
+}
+
+
+def priority_for_plan(plan_tier: Optional[str]) -> PriorityClass:
+    """
+    Resuelve la clase de prioridad de un plan.
+
+    Args:
+        plan_tier: PlanTier o su valor string (p.ej. claim "plan" del JWT)
+
+    Returns:
+        PriorityClass: LOW si el plan es desconocido o None (anónimos, widgets)
+    """
+    if plan_tier is None:
+        return PriorityClass.LOW
+    try:
+        return _PLAN_PRIORITY[PlanTier(plan_tier)]
+    except ValueError:
+        return PriorityClass.LOW
@@ -0,0 +1,93 @@
+"""
+List Projections - Listados sin cargar las columnas JSONB pesadas
+
+Los listados (campañas del planner y del creator, queries de data mining)
+cargaban filas completas, incluidos `generated_content`, `results` y los
+metadatos JSONB, que pueden ocupar cientos de KB por fila (TOAST) y que
+el dashboard no usa en la lista. Ahora:
+
+- Las columnas pesadas se difieren (`defer(..., raiseload=True)`): no se
+  leen ni se destostean, y acceder a una por error lanza en lugar de
+  hacer una query por fila
+- El cliente que las necesite las pide con `include=`, p.ej.
+  `?include=generated_content` o `?include=all`
+- La respuesta omite los campos no incluidos (no se serializan como null)
+- El endpoint de detalle sigue siendo la forma de obtener el contenido
+
+Uso:
+    include = parse_include(include_param, HEAVY_FIELDS)
+    statement = select(Model).options(*defer_heavy(Model, HEAVY_FIELDS, include))
+"""
+
+from typing import Any, FrozenSet, List, Optional, Sequence
+
+from fastapi import HTTPException, status
+from sqlalchemy.orm import defer
+
+
+def parse_include(include: Optional[str], allowed: Sequence[str]) -> FrozenSet[str]:
+    """
+    Campos pesados pedidos por el cliente (`include=a,b` o `include=all`).
+
+    Args:
+        include: Valor del parámetro (separado por comas) o None
+        allowed: Campos pesados que el listado puede incluir
+
+    Returns:
+        frozenset con los campos a cargar
+
+    Raises:
+        HTTPException 400: Si se pide un campo desconocido
+    """
+    if not include:
+        return frozenset()
+    requested = {field.strip() for field in include.split(",") if field.strip()}
+    if "all" in requested:
+        return frozenset(allowed)
+    unknown = requested - set(allowed)
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=(
+                f"Campos no soportados en include: {', '.join(sorted(unknown))}. "
+                f"Permitidos: {', '.join(allowed)} o 'all'"
+            ),
+        )
+    return frozenset(requested)
+
+
+def defer_heavy(model: Any, heavy: Sequence[str], include: FrozenSet[str]) -> List[Any]:
+    """
+    Opciones de carga que difieren las columnas pesadas no incluidas.
+
+    Args:
+        model: Modelo SQLModel del listado
+        heavy: Columnas pesadas del modelo
+        include: Columnas pedidas (salida de parse_include)
+
+    Returns:
+        Lista de opciones para `select(...).options(*opciones)`
+    """
+    return [defer(getattr(model, field), raiseload=True) for field in heavy if field not in include]
+
+
+def projected(row: Any, heavy: Sequence[str], include: FrozenSet[str], **fields: Any) -> dict:
+    """
+    Kwargs del schema de respuesta sin los campos pesados no incluidos.
+
+    Los campos omitidos quedan "unset" en el schema y el listado (con
+    `response_model_exclude_unset=True`) no los serializa.
+
+    Args:
+        row: Fila cargada con defer_heavy
+        heavy: Columnas pesadas del modelo
+        include: Columnas pedidas
+        **fields: Campos ligeros del schema
+
+    Returns:
+        dict para construir el schema de respuesta
+    """
+    for field in heavy:
+        if field in include:
+            fields[field] = getattr(row, field)
+    return fields
@@ -0,0 +1,220 @@
+"""
+Quota Enforcement - Cuotas de plan con contadores en Redis
+
+Cada (usuario, feature, mes UTC) tiene un contador en Redis
+`bai:quota:{feature}:{user_id}:{YYYYMM}`. Comprobar y consumir es un único
+script Lua (GET + comparación + INCR atómicos), así que la decisión cuesta
+un round trip y no depende del tamaño de usage_logs.
+
+El límite sale del plan (`PLAN_FEATURE_MATRIX`, ver QUOTA_LIMIT_KEYS). El
+contador cuenta peticiones servidas: la unidad se consume al admitir y se
+devuelve (`release`, DECR) si el request se descarta después (503 del
+admission control) o falla. El cron `reconcile_quota_counters` lo sube al
+uso durable (rollups de analytics) si se quedó por debajo, p.ej. tras un
+reinicio de Redis. Nunca lo baja: un INCR en vuelo o un evento que el
+collector aún no ha persistido no deben devolver cuota.
+
+Si Redis no responde, la comprobación falla en abierto: una caída de la
+cache no debe dejar sin servicio a los clientes de pago.
+"""
+
+import logging
+import math
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+
+logger = logging.getLogger("bai.quota")
+
+QUOTA_KEY = "bai:quota:{feature}:{user_id}:{period}"
+
+# Feature -> clave del límite en PLAN_FEATURE_MATRIX
+QUOTA_LIMIT_KEYS: Dict[str, str] = {
+    "ai_content_generation": "max_chats",
+}
+
+# Comprueba y consume una unidad. Devuelve {admitido (0/1), usados}
+_CONSUME_LUA = """
+local limit = tonumber(ARGV[1])
+local used = tonumber(redis.call('GET', KEYS[1]) or '0')
+if used >= limit then
+    return {0, used}
+end
+used = redis.call('INCR', KEYS[1])
+if redis.call('TTL', KEYS[1]) < 0 then
+    redis.call('EXPIREAT', KEYS[1], ARGV[2])
+end
+return {1, used}
+"""
+
+# Devuelve una unidad consumida (sin bajar de 0 ni crear la clave)
+_RELEASE_LUA = """
+local used = tonumber(redis.call('GET', KEYS[1]) or '0')
+if used <= 0 then
+    return 0
+end
+return redis.call('DECR', KEYS[1])
+"""
+
+# max(contador, durable) atómico: solo sube el contador
+_RECONCILE_LUA = """
+local durable = tonumber(ARGV[1])
+local current = redis.call('GET', KEYS[1])
+if current ~= false and tonumber(current) >= durable then
+    return 0
+end
+if current == false then
+    redis.call('SET', KEYS[1], durable, 'EXAT', ARGV[2])
+else
+    redis.call('SET', KEYS[1], durable, 'KEEPTTL')
+end
+return 1
+"""
+
+
+@dataclass
+class QuotaUsage:
+    """Resultado de un consumo de cuota admitido."""
+    user_id: int
+    feature_key: str
+    limit: int
+    used: int
+    period: str
+
+
+def current_period(now: Optional[datetime] = None) -> str:
+    """Período de cuota (mes UTC) en formato YYYYMM."""
+    now = now or datetime.now(timezone.utc)
+    return now.strftime("%Y%m")
+
+
+def period_reset_at(now: Optional[datetime] = None) -> datetime:
+    """Inicio (UTC) del siguiente período de cuota."""
+    now = now or datetime.now(timezone.utc)
+    if now.month == 12:
+        return datetime(now.year + 1, 1, 1, tzinfo=timezone.utc)
+    return datetime(now.year, now.month + 1, 1, tzinfo=timezone.utc)
+
+
+def quota_key(feature_key: str, user_id: int, period: Optional[str] = None) -> str:
+    return QUOTA_KEY.format(feature=feature_key, user_id=user_id, period=period or current_period())
+
+
+def parse_quota_key(key: str) -> Optional[Dict[str, Any]]:
+    """Inversa de `quota_key`: {feature_key, user_id, period} o None."""
+    parts = key.split(":")
+    if len(parts) != 5 or parts[0] != "bai" or parts[1] != "quota":
+        return None
+    try:
+        return {"feature_key": parts[2], "user_id": int(parts[3]), "period": parts[4]}
+    except ValueError:
+        return None
+
+
+class QuotaEnforcer:
+    """Consume y reconcilia contadores de cuota con scripts Lua (EVALSHA)."""
+
+    def __init__(self):
+        self._consume_script = None
+        self._release_script = None
+        self._reconcile_script = None
+
+    def _scripts(self, redis: Any):
+        if self._consume_script is None:
+            self._consume_script = redis.register_script(_CONSUME_LUA)
+            self._release_script = redis.register_script(_RELEASE_LUA)
+            self._reconcile_script = redis.register_script(_RECONCILE_LUA)
+        return self._consume_script, self._reconcile_script
+
+    async def consume(
+        self,
+        redis: Any,
+        user_id: int,
+        feature_key: str,
+        limit: int,
+    ) -> Optional[QuotaUsage]:
+        """
+        Consume una unidad de cuota o rechaza si el período está agotado.
+
+        Args:
+            redis: Cliente redis.asyncio
+            user_id: ID del usuario
+            feature_key: Feature con cuota (ver QUOTA_LIMIT_KEYS)
+            limit: Límite del plan para el período
+
+        Returns:
+            QuotaUsage si se admite, None si Redis no está disponible (fail-open)
+
+        Raises:
+            QuotaExceededError: Si el usuario agotó la cuota del período
+        """
+        from app.core.exceptions import QuotaExceededError
+
+        now = datetime.now(timezone.utc)
+        period = current_period(now)
+        reset_at = period_reset_at(now)
+        consume_script, _ = self._scripts(redis)
+        try:
+            admitted, used = await consume_script(
+                keys=[quota_key(feature_key, user_id, period)],
+                args=[limit, int(reset_at.timestamp())],
+                client=redis,
+            )
+        except Exception as e:
+            logger.warning(f"Quota check skipped (redis unavailable): {e}")
+            return None
+
+        if not admitted:
+            retry_after = max(1, math.ceil(reset_at.timestamp() - time.time()))
+            raise QuotaExceededError(
+                feature=feature_key,
+                limit=limit,
+                used=int(used),
+                retry_after=retry_after,
+            )
+        return QuotaUsage(user_id=user_id, feature_key=feature_key, limit=limit, used=int(used), period=period)
+
+    async def release(self, redis: Any, usage: QuotaUsage) -> None:
+        """
+        Devuelve la unidad de un consumo cuyo request no llegó a servirse.
+
+        Args:
+            redis: Cliente redis.asyncio
+            usage: Consumo admitido (su período, aunque el mes haya cambiado)
+        """
+        self._scripts(redis)
+        try:
+            await self._release_script(
+                keys=[quota_key(usage.feature_key, usage.user_id, usage.period)],
+                client=redis,
+            )
+        except Exception as e:
+            logger.warning(f"Quota release skipped (redis unavailable): {e}")
+
+    async def reconcile(self, redis: Any, key: str, durable_count: int, period: str) -> bool:
+        """
+        Sube un contador al uso durable si está por debajo (nunca lo baja).
+
+        Args:
+            redis: Cliente redis.asyncio
+            key: Clave del contador
+            durable_count: Uso del período según los rollups
+            period: Período del contador (YYYYMM), para su expiración
+
+        Returns:
+            bool: True si se reescribió
+        """
+        _, reconcile_script = self._scripts(redis)
+        reset_at = period_reset_at(datetime.strptime(period, "%Y%m").replace(tzinfo=timezone.utc))
+        updated = await reconcile_script(
+            keys=[key],
+            args=[durable_count, int(reset_at.timestamp())],
+            client=redis,
+        )
+        return bool(updated)
+
+
+# Singleton por proceso (los scripts se registran con el primer cliente)
+quota_enforcer = QuotaEnforcer()
@@ -0,0 +1,150 @@
+"""
+Read Routing - Lecturas a la réplica con read-your-writes
+
+Decide, por request, si un endpoint de solo lectura (ReadDatabaseDep /
+AsyncReadDatabaseDep) usa la réplica o el primario:
+
+1. Métodos no seguros (POST, PUT, ...) -> primario: la dependency puede
+   reutilizarse sin riesgo en rutas que escriben
+2. Sin réplica configurada, o retrasada / sin medición reciente
+   (`replica_monitor`) -> primario
+3. El usuario escribió hace menos de READ_YOUR_WRITES_SECONDS -> primario,
+   para que vea sus propios cambios aunque la réplica vaya por detrás
+4. En otro caso -> réplica
+
+Las escrituras se marcan con `ReadYourWritesMiddleware`: toda petición no
+segura con respuesta 2xx/3xx de un usuario autenticado fija, antes de
+enviar la respuesta, la clave `bai:rw:{user_id}` con TTL igual a la
+ventana. El usuario se identifica por el claim `uid` del JWT (solo
+verificación de firma). Si Redis no responde no se puede saber si hubo
+escrituras recientes y se usa el primario.
+"""
+
+import logging
+from collections import Counter
+from typing import Any, Dict, Optional
+
+from jose import JWTError, jwt
+
+from app.core.config import settings
+from app.core.security import ALGORITHM, SECRET_KEY
+from app.infrastructure.cache.redis import get_redis_client
+from app.infrastructure.db.session import get_read_engine, replica_monitor
+
+
+logger = logging.getLogger("bai.read_routing")
+
+RW_STICKY_KEY = "bai:rw:{user_id}"
+SAFE_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+
+PRIMARY = "primary"
+REPLICA = "replica"
+
+
+def user_id_from_authorization(authorization: Optional[str]) -> Optional[int]:
+    """Claim `uid` de un header `Authorization: Bearer ...` (None si no hay)."""
+    if not authorization or not authorization.lower().startswith("bearer "):
+        return None
+    try:
+        payload = jwt.decode(authorization[7:], SECRET_KEY, algorithms=[ALGORITHM])
+        return int(payload["uid"])
+    except (JWTError, KeyError, TypeError, ValueError):
+        return None
+
+
+def sticky_window_seconds() -> int:
+    """La ventana cubre como mínimo el retraso máximo tolerado de la réplica."""
+    return max(1, int(max(settings.READ_YOUR_WRITES_SECONDS, settings.READ_REPLICA_MAX_LAG_SECONDS) + 0.999))
+
+
+class ReadRouter:
+    """Elige primario o réplica por request y cuenta las decisiones."""
+
+    def __init__(self):
+        self._routed: Counter = Counter()
+
+    async def choose(self, method: str, authorization: Optional[str]) -> str:
+        """
+        Destino de las lecturas de un request.
+
+        Args:
+            method: Método HTTP
+            authorization: Header Authorization (para read-your-writes)
+
+        Returns:
+            str: PRIMARY o REPLICA
+        """
+        if method not in SAFE_METHODS:
+            return self._route(PRIMARY, "unsafe_method")
+        if get_read_engine() is None:
+            return self._route(PRIMARY, "no_replica")
+        if not replica_monitor.is_usable():
+            return self._route(PRIMARY, "replica_lag")
+
+        user_id = user_id_from_authorization(authorization)
+        if user_id is not None:
+            try:
+                if await get_redis_client().exists(RW_STICKY_KEY.format(user_id=user_id)):
+                    return self._route(PRIMARY, "recent_write")
+            except Exception as e:
+                logger.warning(f"Read-your-writes check failed, using primary: {e}")
+                return self._route(PRIMARY, "sticky_check_failed")
+
+        return self._route(REPLICA, "replica")
+
+    def _route(self, target: str, reason: str) -> str:
+        self._routed[reason] += 1
+        return target
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Decisiones acumuladas por motivo (para /health/database)."""
+        return {"routed_by_reason": dict(self._routed)}
+
+
+# Singleton por proceso
+read_router = ReadRouter()
+
+
+async def mark_user_write(user_id: int, redis: Optional[Any] = None) -> None:
+    """Abre la ventana read-your-writes de un usuario."""
+    redis = redis or get_redis_client()
+    await redis.set(RW_STICKY_KEY.format(user_id=user_id), 1, ex=sticky_window_seconds())
+
+
+class ReadYourWritesMiddleware:
+    """
+    Middleware ASGI que marca las escrituras de cada usuario autenticado.
+
+    Solo actúa si hay réplica configurada; sin ella todas las lecturas van
+    al primario y marcar sería un round trip a Redis inútil.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if (
+            scope["type"] != "http"
+            or scope["method"] in SAFE_METHODS
+            or not settings.DATABASE_READ_URL
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope.get("headers") or [])
+        user_id = user_id_from_authorization(headers.get(b"authorization", b"").decode("latin-1"))
+        if user_id is None:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_wrapper(message):
+            # Marcar antes de enviar la respuesta: un GET que llegue justo
+            # después de recibirla ya encuentra la ventana abierta
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                try:
+                    await mark_user_write(user_id)
+                except Exception as e:
+                    logger.warning(f"Read-your-writes mark skipped (redis): {e}")
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
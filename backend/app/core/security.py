@@ -5,7 +5,13 @@ from passlib.context import CryptContext
 from app.core.config import settings
 
 # Password hashing context (using bcrypt)
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Hashes with fewer rounds than PASSWORD_BCRYPT_ROUNDS report needs_update()
+# and are upgraded after login (see app/core/hashing.py)
+pwd_context = CryptContext(
+  schemes=["bcrypt"],
+  deprecated="auto",
+  bcrypt__rounds=settings.PASSWORD_BCRYPT_ROUNDS,
+)
 
 # JWT Configuration
 SECRET_KEY = settings.SECRET_KEY
@@ -17,6 +23,8 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
   """
   Verify a plain password against a hashed password.
   
+  Blocking (bcrypt). From async handlers use `password_hasher.verify`.
+  
   Args:
     plain_password: The plain text password to verify
     hashed_password: The bcrypt hashed password from database
@@ -31,6 +39,8 @@ def get_password_hash(password: str) -> str:
   """
   Hash a password using bcrypt.
   
+  Blocking (bcrypt). From async handlers use `password_hasher.hash`.
+  
   Args:
     password: The plain text password to hash
     
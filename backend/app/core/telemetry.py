@@ -6,16 +6,12 @@ métricas y logs estructurados.
 
 Permite visualizar el ciclo de vida completo de una request:
 Request → Auth → DB → LLM → Tool Use → Response
+
+El SDK, los exporters (gRPC) y las instrumentaciones se importan dentro de
+`setup_telemetry`: importar este módulo no carga OpenTelemetry, así los
+procesos que no activan telemetría no pagan su arranque ni su memoria.
 """
 
-from opentelemetry import trace
-from opentelemetry.sdk.trace import TracerProvider
-from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter
-from opentelemetry.sdk.resources import Resource
-from opentelemetry.exporter.otlp.proto.grpc.trace_exporter import OTLPSpanExporter
-from opentelemetry.instrumentation.fastapi import FastAPIInstrumentor
-from opentelemetry.instrumentation.sqlalchemy import SQLAlchemyInstrumentor
-from opentelemetry.instrumentation.httpx import HTTPXClientInstrumentor
 import os
 
 
@@ -26,6 +22,14 @@ def setup_telemetry(app=None):
     Args:
         app: Instancia de FastAPI (opcional, para auto-instrumentación)
     """
+    from opentelemetry import trace
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.instrumentation.fastapi import FastAPIInstrumentor
+    from opentelemetry.instrumentation.sqlalchemy import SQLAlchemyInstrumentor
+    from opentelemetry.instrumentation.httpx import HTTPXClientInstrumentor
+
     # Crear resource con metadata del servicio
     resource = Resource.create({
         "service.name": "bai-backend",
@@ -40,6 +44,8 @@ def setup_telemetry(app=None):
     # Exporters según entorno
     if os.getenv("ENVIRONMENT") == "production":
         # En producción, enviar a OTLP collector (Jaeger, Tempo, etc.)
+        from opentelemetry.exporter.otlp.proto.grpc.trace_exporter import OTLPSpanExporter
+
         otlp_exporter = OTLPSpanExporter(
             endpoint=os.getenv("OTLP_ENDPOINT", "http://otel-collector:4317"),
             insecure=True
@@ -73,6 +79,8 @@ def get_tracer(name: str):
     Returns:
         Tracer: Tracer de OpenTelemetry
     """
+    from opentelemetry import trace
+
     return trace.get_tracer(name)
 
 
@@ -18,7 +18,13 @@ class BaseModel(SQLModel):
     
     id: Optional[int] = Field(default=None, primary_key=True, description="ID único")
     created_at: datetime = Field(default_factory=datetime.utcnow, description="Fecha de creación")
-    updated_at: Optional[datetime] = Field(default=None, description="Fecha de actualización")
+    # onupdate: cualquier UPDATE (ORM o Core) que no fije updated_at lo
+    # actualiza, así sirve como versión del recurso (ETags de polling)
+    updated_at: Optional[datetime] = Field(
+        default=None,
+        description="Fecha de actualización",
+        sa_column_kwargs={"onupdate": datetime.utcnow},
+    )
     
     def update_timestamp(self):
         """Actualiza el timestamp de modificación"""
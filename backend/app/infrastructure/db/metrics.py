@@ -0,0 +1,105 @@
+"""
+Database Metrics - Checkouts de conexión por request
+
+Cada engine registra un listener del evento `checkout` del pool que suma
+en el contador del request en curso (ContextVar fijada por
+`DBCheckoutMiddleware`). Al terminar el request el contador se agrega en
+`checkout_metrics` (expuesto en /health/database), y con DEBUG se devuelve
+en el header X-DB-Checkouts.
+
+Un request de solo lectura bien resuelto hace 0 checkouts (principal desde
+claims o cache) o 1; más de uno indica sesiones duplicadas o conexiones
+devueltas al pool y vueltas a pedir a mitad del request.
+"""
+
+from collections import Counter
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+
+
+CHECKOUTS_HEADER = "X-DB-Checkouts"
+
+
+@dataclass
+class RequestDBStats:
+    """Contador mutable compartido por todas las tasks/threads del request."""
+    checkouts: int = 0
+
+
+_request_db_stats: ContextVar[Optional[RequestDBStats]] = ContextVar("request_db_stats", default=None)
+
+
+def _on_checkout(dbapi_connection, connection_record, connection_proxy) -> None:
+    stats = _request_db_stats.get()
+    if stats is not None:
+        stats.checkouts += 1
+
+
+def track_checkouts(engine: Engine) -> Engine:
+    """Registra el contador de checkouts en un engine sync (o `async_engine.sync_engine`)."""
+    event.listen(engine, "checkout", _on_checkout)
+    return engine
+
+
+class CheckoutMetrics:
+    """Distribución de checkouts por request (por proceso)."""
+
+    def __init__(self):
+        self._requests = 0
+        self._checkouts = 0
+        self._max = 0
+        self._by_count: Counter = Counter()
+
+    def observe(self, checkouts: int) -> None:
+        self._requests += 1
+        self._checkouts += checkouts
+        self._max = max(self._max, checkouts)
+        self._by_count[checkouts if checkouts < 3 else "3+"] += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Métricas acumuladas (para /health/database)."""
+        return {
+            "requests": self._requests,
+            "checkouts_total": self._checkouts,
+            "avg_checkouts_per_request": round(self._checkouts / self._requests, 3) if self._requests else 0.0,
+            "max_checkouts_per_request": self._max,
+            "requests_by_checkouts": {str(k): v for k, v in self._by_count.items()},
+        }
+
+
+# Singleton por proceso
+checkout_metrics = CheckoutMetrics()
+
+
+class DBCheckoutMiddleware:
+    """Middleware ASGI que abre el contador de checkouts de cada request HTTP."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestDBStats()
+        token = _request_db_stats.set(stats)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start" and settings.DEBUG:
+                headers = list(message.get("headers") or [])
+                headers.append((CHECKOUTS_HEADER.lower().encode(), str(stats.checkouts).encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _request_db_stats.reset(token)
+            checkout_metrics.observe(stats.checkouts)
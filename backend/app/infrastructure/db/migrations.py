@@ -0,0 +1,138 @@
+"""
+Schema Revision Check - Arranque condicionado a las migraciones
+
+El arranque (API y workers) ya no crea tablas ni corrige datos: solo
+compara la revisión de Alembic aplicada en la base de datos con las heads
+de `alembic/versions` y falla de inmediato si la base de datos va por
+detrás. Es una query (`SELECT version_num FROM alembic_version`) en lugar
+de create_all + inspección + back-fills sobre toda la tabla de usuarios.
+
+Las migraciones se aplican antes de arrancar con
+`python -m app.infrastructure.db.migrations` (servicio `migrate` de
+docker-compose): `alembic upgrade head`. Sin `alembic_version`:
+
+- Base de datos vacía: create_all y se marca la head
+- Esquema creado por el create_all del arranque anterior: se marca la
+  revisión genesis (ese esquema es el de genesis) y se aplica
+  `upgrade head`, así se ejecutan las columnas nuevas y los back-fills
+  que create_all no hace sobre tablas existentes
+
+Los back-fills de datos viven en revisiones de una sola ejecución.
+"""
+
+import logging
+import os
+from functools import lru_cache
+from typing import FrozenSet
+
+from alembic import command
+from alembic.config import Config
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from sqlalchemy import inspect
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+
+
+logger = logging.getLogger("bai.db")
+
+# Esquema que dejaba el create_all del arranque antes de Alembic
+GENESIS_REVISION = "cf9428b5de35"
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+
+class SchemaRevisionError(RuntimeError):
+    """La base de datos no está en la revisión que espera el código."""
+
+
+def _alembic_config() -> Config:
+    config = Config(os.path.join(BACKEND_DIR, "alembic.ini"))
+    config.set_main_option("script_location", os.path.join(BACKEND_DIR, "alembic"))
+    return config
+
+
+@lru_cache(maxsize=None)
+def get_expected_heads() -> FrozenSet[str]:
+    """Heads de `alembic/versions` (lo que el código desplegado espera)."""
+    return frozenset(ScriptDirectory.from_config(_alembic_config()).get_heads())
+
+
+def get_current_heads(engine: Engine) -> FrozenSet[str]:
+    """Revisiones aplicadas en la base de datos (vacío si nunca se migró)."""
+    with engine.connect() as connection:
+        return frozenset(MigrationContext.configure(connection).get_current_heads())
+
+
+def check_schema_revision(engine: Engine) -> None:
+    """
+    Verifica que la base de datos está en la head de Alembic.
+
+    Con SCHEMA_REVISION_CHECK=False solo registra un warning (entornos
+    efímeros que crean el esquema por otros medios).
+
+    Args:
+        engine: Engine del primario
+
+    Raises:
+        SchemaRevisionError: Si la revisión aplicada no coincide con las heads
+    """
+    expected = get_expected_heads()
+    current = get_current_heads(engine)
+    if current == expected:
+        logger.info(f"Database schema at revision {', '.join(sorted(current))}")
+        return
+
+    message = (
+        f"Database schema revision {sorted(current) or 'none'} does not match "
+        f"code heads {sorted(expected)}. Run `alembic upgrade head` before starting."
+    )
+    if not settings.SCHEMA_REVISION_CHECK:
+        logger.warning(message)
+        return
+    raise SchemaRevisionError(message)
+
+
+def migrate(engine: Engine) -> None:
+    """
+    Lleva la base de datos a la head (paso de despliegue, no de arranque).
+
+    Con `alembic_version` aplica `alembic upgrade head`. Sin ella, una base
+    de datos vacía se crea con create_all y se marca en la head; una con
+    tablas (create_all de versiones anteriores) se marca en genesis y se
+    migra hasta la head.
+    """
+    config = _alembic_config()
+    if get_current_heads(engine):
+        command.upgrade(config, "head")
+        return
+
+    if inspect(engine).has_table("user"):
+        logger.info(f"Schema without alembic_version: stamping {GENESIS_REVISION} and upgrading to head")
+        command.stamp(config, GENESIS_REVISION)
+        command.upgrade(config, "head")
+        return
+
+    from sqlmodel import SQLModel
+
+    # Registrar todos los modelos en la metadata (igual que alembic/env.py)
+    from app.infrastructure.db.base import BaseModel  # noqa: F401
+    from app.models import user, chat, content, log, credits, outbox, media  # noqa: F401
+    from app.modules.chat import models as chat_models  # noqa: F401
+    from app.modules.analytics import models as analytics_models  # noqa: F401
+    from app.modules.content_creator import models as content_models  # noqa: F401
+    from app.modules.content_planner import models as content_planner_models  # noqa: F401
+    from app.modules.data_mining import models as data_mining_models  # noqa: F401
+
+    logger.info("Empty database: creating schema and stamping head")
+    SQLModel.metadata.create_all(engine)
+    command.stamp(config, "head")
+
+
+if __name__ == "__main__":
+    from app.infrastructure.db.session import engine
+
+    logging.basicConfig(level=logging.INFO)
+    migrate(engine)
+    check_schema_revision(engine)
@@ -2,15 +2,28 @@
 Database Session Factory
 
 Proporciona la factory para crear sesiones de base de datos SQLModel.
-Preparado para soportar read-replicas y sharding en el futuro.
+
+Si DATABASE_READ_URL está configurado, las rutas de solo lectura pueden
+usar la réplica (ver app/core/read_routing.py). `replica_monitor` mide el
+retraso de replicación en segundo plano; con la réplica retrasada o caída
+las lecturas vuelven al primario.
 """
 
 from sqlmodel import Session, create_engine, SQLModel
-from contextlib import contextmanager
-from typing import Generator
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy import event, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
+from contextlib import asynccontextmanager, contextmanager
+from functools import lru_cache
+from typing import Any, AsyncGenerator, Dict, Generator, Optional
+import asyncio
+import logging
 import os
+import time
 
 from app.core.config import settings
+from app.infrastructure.db.metrics import track_checkouts
 
 
 # ============================================
@@ -18,20 +31,177 @@ from app.core.config import settings
 # ============================================
 
 # Engine principal (write)
-engine = create_engine(
+engine = track_checkouts(create_engine(
     settings.DATABASE_URL,
     echo=settings.DEBUG,  # Log SQL queries en desarrollo
     pool_pre_ping=True,  # Verificar conexiones antes de usar
     pool_size=10,  # Tamaño del pool de conexiones
     max_overflow=20,  # Conexiones adicionales permitidas
+))
+
+logger = logging.getLogger("bai.db")
+
+
+# ============================================
+# READ REPLICA
+# ============================================
+
+@lru_cache(maxsize=None)
+def get_read_engine() -> Optional[Engine]:
+    """
+    Engine de la réplica de lectura (None si DATABASE_READ_URL no está configurado).
+    
+    Se crea en el primer uso: los procesos que nunca leen de la réplica
+    (workers, scripts) no abren su pool.
+    """
+    if not settings.DATABASE_READ_URL:
+        return None
+    return track_checkouts(create_engine(
+        settings.DATABASE_READ_URL,
+        echo=settings.DEBUG,
+        pool_pre_ping=True,
+        pool_size=10,
+        max_overflow=20,
+    ))
+
+
+@lru_cache(maxsize=None)
+def get_async_read_engine() -> Optional[AsyncEngine]:
+    """Variante async de `get_read_engine`."""
+    if not settings.DATABASE_READ_URL:
+        return None
+    read_engine = create_async_engine(
+        settings.DATABASE_READ_URL,
+        echo=settings.DEBUG,
+        pool_pre_ping=True,
+        pool_size=10,
+        max_overflow=20,
+    )
+    track_checkouts(read_engine.sync_engine)
+    return read_engine
+
+
+# Retraso de replicación en segundos. 0 si la réplica ya aplicó todo lo que
+# recibió (un primario sin escrituras no cuenta como retraso) o si el
+# servidor no está en recovery (p.ej. dos instancias locales independientes)
+REPLICA_LAG_SQL = text(
+    """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+    """
+)
+
+
+class ReplicaMonitor:
+    """
+    Mide periódicamente el retraso de la réplica (una query cada `interval`).
+    
+    La decisión de routing solo lee el último valor en memoria. Sin medición
+    reciente (monitor parado, réplica caída) la réplica se considera no
+    utilizable y las lecturas van al primario.
+    
+    Attributes:
+        max_lag: Retraso máximo aceptable (segundos)
+        interval: Período entre mediciones (segundos)
+    """
+
+    def __init__(self, max_lag: float, interval: float):
+        self.max_lag = max_lag
+        self.interval = interval
+        self.lag_seconds: Optional[float] = None
+        self._checked_at = 0.0
+        self._errors = 0
+
+    def probe(self) -> float:
+        """Mide el retraso actual (bloqueante)."""
+        read_engine = get_read_engine()
+        with read_engine.connect() as connection:
+            return float(connection.execute(REPLICA_LAG_SQL).scalar() or 0)
+
+    async def run(self) -> None:
+        """Bucle de medición hasta ser cancelado (arrancado en el lifespan)."""
+        while True:
+            try:
+                self.lag_seconds = await asyncio.to_thread(self.probe)
+                self._checked_at = time.monotonic()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self._errors += 1
+                self.lag_seconds = None
+                logger.warning(f"Replica lag probe failed: {e}")
+            await asyncio.sleep(self.interval)
+
+    def is_usable(self) -> bool:
+        """True si la última medición es reciente y el retraso está dentro del límite."""
+        if self.lag_seconds is None:
+            return False
+        if time.monotonic() - self._checked_at > self.interval * 3:
+            return False
+        return self.lag_seconds <= self.max_lag
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Estado del monitor (para /health/database)."""
+        return {
+            "configured": bool(settings.DATABASE_READ_URL),
+            "usable": self.is_usable(),
+            "lag_seconds": self.lag_seconds,
+            "max_lag_seconds": self.max_lag,
+            "probe_errors": self._errors,
+        }
+
+
+# Singleton por proceso
+replica_monitor = ReplicaMonitor(
+    max_lag=settings.READ_REPLICA_MAX_LAG_SECONDS,
+    interval=settings.READ_REPLICA_CHECK_INTERVAL_SECONDS,
 )
 
-# TODO: Read replica para queries de solo lectura
-# read_engine = create_engine(
-#     settings.DATABASE_READ_URL,
-#     echo=settings.DEBUG,
-#     pool_pre_ping=True,
-# )
+
+# ============================================
+# ASYNC ENGINE
+# ============================================
+
+@lru_cache(maxsize=None)
+def get_async_engine() -> AsyncEngine:
+    """
+    Engine async (psycopg 3 en modo asyncio) para los handlers async.
+    
+    El mismo DATABASE_URL `postgresql+psycopg://` sirve para ambos engines:
+    create_async_engine selecciona el dialecto psycopg_async. Se crea en el
+    primer uso para que procesos que solo usan el engine sync (workers,
+    scripts) no abran un segundo pool.
+    
+    Returns:
+        AsyncEngine: Engine async con su propio pool de conexiones
+    """
+    async_engine = create_async_engine(
+        settings.DATABASE_URL,
+        echo=settings.DEBUG,
+        pool_pre_ping=True,
+        pool_size=10,
+        max_overflow=20,
+    )
+    track_checkouts(async_engine.sync_engine)
+    return async_engine
+
+
+@lru_cache(maxsize=None)
+def get_async_session_factory() -> async_sessionmaker:
+    """
+    Factory de AsyncSession (SQLModel, con `exec`).
+    
+    expire_on_commit=False: tras el commit los objetos siguen legibles sin
+    un refresh implícito, que en async requeriría otro await.
+    """
+    return async_sessionmaker(
+        get_async_engine(),
+        class_=AsyncSession,
+        expire_on_commit=False,
+    )
 
 
 # ============================================
@@ -65,12 +235,51 @@ def get_session() -> Generator[Session, None, None]:
         session.close()
 
 
+class RequestSession(Session):
+    """
+    Sesión de request que registra si hubo escrituras.
+    
+    `info[HAS_WRITES]` se activa al hacer flush o al ejecutar cualquier
+    sentencia que no sea un SELECT (incluido `text()`, por prudencia) y se
+    limpia en cada commit/rollback.
+    """
+
+
+HAS_WRITES = "has_writes"
+
+
+@event.listens_for(RequestSession, "after_flush")
+def _flag_flush(session, flush_context) -> None:
+    session.info[HAS_WRITES] = True
+
+
+@event.listens_for(RequestSession, "do_orm_execute")
+def _flag_write_statement(orm_execute_state) -> None:
+    if not orm_execute_state.is_select:
+        orm_execute_state.session.info[HAS_WRITES] = True
+
+
+@event.listens_for(RequestSession, "after_commit")
+@event.listens_for(RequestSession, "after_rollback")
+def _clear_writes(session) -> None:
+    session.info.pop(HAS_WRITES, None)
+
+
+def session_has_writes(session: Session) -> bool:
+    """True si la sesión tiene escrituras sin confirmar (ejecutadas o pendientes)."""
+    return bool(session.info.get(HAS_WRITES) or session.new or session.dirty or session.deleted)
+
+
 def get_session_dependency():
     """
-    Generator function para usar como FastAPI dependency.
+    Sesión de base de datos por request (FastAPI dependency).
     
-    Compatible con Depends() de FastAPI.
-    Crea la sesión manualmente y maneja el ciclo de vida correctamente.
+    Es el mismo callable que `app.core.database.get_session` y que
+    `get_db`/DatabaseDep: FastAPI cachea las dependencies por callable, así
+    que todas las dependencies y el handler de un request comparten una
+    única sesión. La conexión se pide al pool en la primera query (la
+    sesión no conecta al crearse), y al final solo se hace commit si hubo
+    escrituras; un request de solo lectura cierra la sesión sin COMMIT.
     
     Usage:
         @app.get("/example")
@@ -81,10 +290,11 @@ def get_session_dependency():
     # IMPORTANTE: NO usar 'with get_session() as session:' porque get_session()
     # es un @contextmanager que cierra la sesión antes de que FastAPI pueda usarla.
     # Crear la sesión manualmente y manejar commit/rollback/close.
-    session = Session(engine)
+    session = RequestSession(engine)
     try:
         yield session
-        session.commit()
+        if session_has_writes(session):
+            session.commit()
     except Exception:
         session.rollback()
         raise
@@ -92,6 +302,70 @@ def get_session_dependency():
         session.close()
 
 
+@asynccontextmanager
+async def async_session_scope() -> AsyncGenerator[AsyncSession, None]:
+    """
+    Context manager async equivalente a `get_session()` (commit/rollback).
+    
+    Uso:
+        async with async_session_scope() as session:
+            await session.exec(select(...))
+    """
+    session = get_async_session_factory()()
+    try:
+        yield session
+        await session.commit()
+    except Exception:
+        await session.rollback()
+        raise
+    finally:
+        await session.close()
+
+
+async def get_async_session_dependency() -> AsyncGenerator[AsyncSession, None]:
+    """
+    Async generator para usar como FastAPI dependency (ver AsyncDatabaseDep).
+    
+    Las queries no bloquean el event loop: mientras una petición espera a
+    Postgres, el resto de requests del proceso siguen avanzando.
+    """
+    async with async_session_scope() as session:
+        yield session
+
+
+def apply_statement_timeout(session: Session, timeout_seconds: float) -> None:
+    """
+    Limita las queries de la transacción actual al deadline del request.
+
+    Usa `set_config(..., is_local=true)`, equivalente a SET LOCAL: el límite
+    se descarta en el siguiente commit/rollback, por lo que hay que volver a
+    aplicarlo tras cada commit si el trabajo continúa.
+
+    Args:
+        session: Sesión de base de datos
+        timeout_seconds: Tiempo restante del request
+    """
+    if session.get_bind().dialect.name != "postgresql":
+        return
+    # statement_timeout = 0 significa "sin límite" en Postgres: usar mínimo 1ms
+    timeout_ms = max(1, int(timeout_seconds * 1000))
+    session.execute(
+        text("SELECT set_config('statement_timeout', :timeout, true)"),
+        {"timeout": str(timeout_ms)},
+    )
+
+
+async def apply_statement_timeout_async(session: AsyncSession, timeout_seconds: float) -> None:
+    """Variante async de `apply_statement_timeout`."""
+    if session.get_bind().dialect.name != "postgresql":
+        return
+    timeout_ms = max(1, int(timeout_seconds * 1000))
+    await session.execute(
+        text("SELECT set_config('statement_timeout', :timeout, true)"),
+        {"timeout": str(timeout_ms)},
+    )
+
+
 def get_db_session() -> Session:
     """
     Dependency function para FastAPI.
@@ -110,18 +384,44 @@ def init_db():
     """
     Inicializa la base de datos creando todas las tablas.
     
-    En producción, usar Alembic migrations en su lugar.
+    Solo para scripts y tests: la API y los workers no crean tablas al
+    arrancar (ver app.infrastructure.db.migrations).
     """
     SQLModel.metadata.create_all(engine)
 
 
 def get_read_session() -> Session:
     """
-    Obtiene una sesión de read replica (futuro).
+    Obtiene una sesión de la réplica de lectura.
+    
+    Sin réplica configurada, o si está retrasada más de
+    READ_REPLICA_MAX_LAG_SECONDS, devuelve una sesión del primario. Para
+    endpoints usar ReadDatabaseDep, que además respeta read-your-writes.
     
     Returns:
-        Session: Sesión de read replica
+        Session: Sesión de réplica (o del primario como fallback)
+    """
+    read_engine = get_read_engine()
+    if read_engine is None or not replica_monitor.is_usable():
+        return Session(engine)
+    return Session(read_engine)
+
+
+@asynccontextmanager
+async def async_read_session_scope() -> AsyncGenerator[AsyncSession, None]:
+    """
+    Sesión async de la réplica de lectura (sin commit: solo lectura).
+    
+    Mismo fallback al primario que `get_read_session`.
     """
-    # TODO: Implementar cuando se configure read replica
-    return Session(engine)  # Por ahora, usar engine principal
+    read_engine = get_async_read_engine()
+    if read_engine is None or not replica_monitor.is_usable():
+        async with async_session_scope() as session:
+            yield session
+        return
+    session = AsyncSession(read_engine, expire_on_commit=False)
+    try:
+        yield session
+    finally:
+        await session.close()
 
@@ -17,7 +17,8 @@ from app.core.exceptions import (
     ai_engine_exception_handler,
     validation_exception_handler
 )
-from app.infrastructure.db.session import init_db
+from app.infrastructure.db.migrations import check_schema_revision
+from app.infrastructure.db.session import engine
 from app.api.v1.router import api_router
 from app.modules.chat.engine.interface import AIEngineError
 from fastapi.exceptions import RequestValidationError
@@ -28,12 +29,12 @@ async def lifespan(app: FastAPI):
     """
     Lifespan events para la aplicación.
     
-    Startup: Inicializa base de datos y telemetría
+    Startup: Verifica la revisión del esquema e inicializa telemetría
     Shutdown: Limpia recursos (Redis, etc.)
     """
     # Startup
     print("🚀 Inicializando B.A.I. Modular Monolith...")
-    init_db()
+    check_schema_revision(engine)
     setup_telemetry(app)
     print("✅ B.A.I. iniciado correctamente")
     
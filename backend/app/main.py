@@ -1,11 +1,10 @@
-from contextlib import asynccontextmanager
+import asyncio
+from contextlib import asynccontextmanager, suppress
 from typing import List, Dict, Any
 from fastapi import FastAPI, Depends, Request, Response
 from fastapi.middleware.cors import CORSMiddleware  # <--- CAMBIO CLAVE: Importamos el estándar
 from pydantic import BaseModel
 from sqlmodel import Session, select
-from arq import create_pool
-from arq.connections import RedisSettings
 
 from app.api.router import router as legacy_router
 from app.api.v1.router import api_router as api_v1_router
@@ -13,15 +12,24 @@ from app.api.routes import auth as auth_router
 from app.api.routes import data as data_router
 from app.api.routes import billing as billing_router
 from app.api.routes import marketing as marketing_router
+from app.api.routes import media as media_router
 from app.api.deps import get_current_user
 from app.core.config import settings
-from app.core.database import create_db_and_tables, get_session
+from app.core.principal import principal_cache
+from app.core.read_routing import ReadYourWritesMiddleware
+from app.core.database import engine, get_session
 from app.services.bai_brain import get_bai_response, get_widget_response
 from app.models.chat import ChatMessage  # Import to register the model
 from app.models.user import User  # Import to register the model
 from app.models.log import SearchLog  # Import to register the model
 from app.models.content import MarketingCampaign, ContentPiece  # Import to register the models
-from app.workers.settings import WorkerSettings
+from app.models.credits import CreditLedgerEntry  # Import to register the model
+from app.models.outbox import OutboxEvent  # Import to register the model
+from app.models.media import MediaAsset  # Import to register the model
+from app.infrastructure.cache.redis import get_redis_client
+from app.infrastructure.db.metrics import DBCheckoutMiddleware
+from app.infrastructure.db.migrations import check_schema_revision
+from app.infrastructure.db.session import replica_monitor
 
 
 class ChatRequest(BaseModel):
@@ -36,8 +44,13 @@ class WidgetChatRequest(BaseModel):
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # Startup: Create database tables
-    create_db_and_tables()
+    # Startup: el esquema lo aplica el job de migraciones; aquí solo se
+    # comprueba la revisión (una query) y se falla rápido si va por detrás
+    await asyncio.to_thread(check_schema_revision, engine)
+    # arq se importa aquí: solo lo necesita el pool de encolado del proceso API
+    from arq import create_pool
+    from arq.connections import RedisSettings
+
     redis_settings = RedisSettings(
         host=settings.REDIS_HOST,
         port=settings.REDIS_PORT,
@@ -45,9 +58,19 @@ async def lifespan(app: FastAPI):
         database=settings.REDIS_DB,
     )
     app.state.arq_pool = await create_pool(redis_settings)
+    # Invalidaciones de principals publicadas por otros procesos
+    principal_listener = asyncio.create_task(principal_cache.listen(get_redis_client()))
+    background = [principal_listener]
+    if settings.DATABASE_READ_URL:
+        # Sin medición de lag la réplica no se usa
+        background.append(asyncio.create_task(replica_monitor.run()))
     try:
         yield
     finally:
+        for task in background:
+            task.cancel()
+            with suppress(asyncio.CancelledError):
+                await task
         arq_pool = getattr(app.state, "arq_pool", None)
         if arq_pool:
             await arq_pool.close()
@@ -59,6 +82,9 @@ def create_app() -> FastAPI:
         version=settings.VERSION,
         lifespan=lifespan
     )
+    # Antes que CORS: el último middleware añadido es el más externo
+    application.add_middleware(ReadYourWritesMiddleware)
+    application.add_middleware(DBCheckoutMiddleware)
     configure_cors(application)
     configure_routes(application)
     return application
@@ -115,6 +141,7 @@ def configure_routes(app: FastAPI) -> None:
     app.include_router(data_router.router, prefix="/api/data", tags=["data"])
     app.include_router(billing_router.router, prefix="/api/billing", tags=["billing"])
     app.include_router(marketing_router.router, prefix="/api/v1/marketing", tags=["marketing"])
+    app.include_router(media_router.router, prefix="/api/v1/media", tags=["media"])
 
 
 async def root() -> dict[str, str]:
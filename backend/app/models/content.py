@@ -7,6 +7,7 @@ y las piezas de contenido generadas por la IA.
 
 from datetime import datetime, timezone
 from typing import Optional
+from sqlalchemy import false
 from sqlmodel import SQLModel, Field
 
 
@@ -26,7 +27,10 @@ class MarketingCampaign(SQLModel, table=True):
     content_count: int = Field(default=0)
     status: str = Field(default="pending", max_length=50)  # pending, in_progress, completed, failed
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
-    updated_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = Field(
+        default=None,
+        sa_column_kwargs={"onupdate": lambda: datetime.now(timezone.utc)},  # Versión para ETags
+    )
 
 
 class ContentPiece(SQLModel, table=True):
@@ -43,7 +47,13 @@ class ContentPiece(SQLModel, table=True):
     visual_script: str = Field()  # Texto largo para el script visual
     style: Optional[str] = Field(default="cinematic", max_length=50)  # "cinematic" o "avatar" - estilo de video
     media_url: Optional[str] = Field(default=None, max_length=1000)  # URL de imagen/video generado
+    # True si media_url llegó por API key/callback (solo esas se copian al media store)
+    media_url_from_service: bool = Field(default=False, sa_column_kwargs={"server_default": false()})
+    media_asset_id: Optional[int] = Field(default=None, foreign_key="media_assets.id", index=True)  # Copia local (media store)
     status: str = Field(default="PENDING", max_length=50)  # PENDING, GENERATING, COMPLETED, FAILED
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
-    updated_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = Field(
+        default=None,
+        sa_column_kwargs={"onupdate": lambda: datetime.now(timezone.utc)},  # Versión para ETags
+    )
 
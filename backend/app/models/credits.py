@@ -0,0 +1,39 @@
+"""
+Credit Models - Libro de movimientos de créditos
+
+Los saldos viven en la fila del usuario (`monthly_credits_*`,
+`extra_credits_*`); cada cambio de saldo deja aquí una fila inmutable con
+el desglose por bolsa y el saldo resultante. La tabla es append-only:
+un reembolso es un movimiento nuevo que apunta al cargo que compensa.
+"""
+
+from datetime import datetime, timezone
+from typing import Optional
+from sqlmodel import SQLModel, Field
+
+
+class CreditLedgerEntry(SQLModel, table=True):
+    """
+    Movimiento de créditos de un usuario.
+
+    kind:
+    - debit: cargo (deltas negativos)
+    - refund: devolución de un cargo (`refund_of_id`, como mucho una por cargo)
+    - monthly_reset: renovación de la bolsa mensual
+    """
+    __tablename__ = "credit_ledger"
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    user_id: int = Field(foreign_key="user.id", index=True)
+    kind: str = Field(max_length=20)  # debit, refund, monthly_reset
+    resource: str = Field(max_length=20)  # video, image
+    monthly_delta: int = Field(default=0)
+    extra_delta: int = Field(default=0)
+    # Saldos de la bolsa tras aplicar el movimiento
+    monthly_balance: int = Field(default=0)
+    extra_balance: int = Field(default=0)
+    # Sin FK: el libro sobrevive al borrado de la campaña
+    campaign_id: Optional[int] = Field(default=None, index=True)
+    refund_of_id: Optional[int] = Field(default=None, unique=True)
+    reason: Optional[str] = Field(default=None, max_length=255)
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
@@ -0,0 +1,32 @@
+"""
+Media Models - Copia local del media generado
+
+Los ficheros se guardan en el volumen shared_data direccionados por su
+SHA-256 (ver app/services/media_store.py): el mismo fichero descargado
+para varias piezas se guarda una sola vez.
+"""
+
+from datetime import datetime, timezone
+from typing import Optional
+
+from sqlmodel import SQLModel, Field
+
+
+class MediaAsset(SQLModel, table=True):
+    """
+    Fichero de media almacenado localmente.
+
+    La ruta en disco se deriva del hash; las piezas lo referencian con
+    ContentPiece.media_asset_id.
+    """
+    __tablename__ = "media_assets"
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    sha256: str = Field(max_length=64, unique=True, index=True)
+    mime_type: str = Field(max_length=100)
+    size_bytes: int
+    width: Optional[int] = Field(default=None)
+    height: Optional[int] = Field(default=None)
+    has_thumbnail: bool = Field(default=False)
+    source_url: str = Field(max_length=1000)  # Primera URL de la que se descargó
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
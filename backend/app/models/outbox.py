@@ -0,0 +1,40 @@
+"""
+Outbox Models - Eventos pendientes de entregar a n8n
+
+Los endpoints escriben el evento en la misma transacción que el cambio de
+negocio (p.ej. la campaña y su cargo de créditos); el dispatcher del
+worker lo entrega después con reintentos (ver app/core/outbox.py).
+"""
+
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlmodel import SQLModel, Field, Column
+
+
+class OutboxEvent(SQLModel, table=True):
+    """
+    Evento del outbox transaccional.
+
+    status:
+    - pending: por entregar (o reintentando, ver next_attempt_at)
+    - delivered: n8n respondió 2xx
+    - unconfirmed: el POST salió pero no hubo respuesta (timeout de
+      lectura); n8n puede haberlo procesado, no se reintenta
+    - dead: agotó los reintentos o n8n lo rechazó (4xx); se ejecutó el
+      handler de dead-letter del topic
+    """
+    __tablename__ = "outbox_events"
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    topic: str = Field(max_length=100)
+    # Clave de deduplicación: única en la tabla y enviada como Idempotency-Key
+    dedup_key: str = Field(max_length=255, unique=True)
+    payload: Dict[str, Any] = Field(sa_column=Column(JSONB, nullable=False))
+    status: str = Field(default="pending", max_length=20, index=True)
+    attempts: int = Field(default=0)
+    next_attempt_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc), index=True)
+    last_error: Optional[str] = Field(default=None, max_length=500)
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    delivered_at: Optional[datetime] = Field(default=None)
@@ -40,6 +40,14 @@ PLAN_FEATURE_MATRIX: Dict[PlanTier, Dict[str, Any]] = {
   },
 }
 
+# Créditos mensuales por plan: cada renovación de la suscripción (invoice
+# pagada) deja la bolsa mensual en estos valores (CreditLedger.reset_monthly)
+PLAN_MONTHLY_CREDITS: Dict[PlanTier, Dict[str, int]] = {
+  PlanTier.MOTOR: {"video": 0, "image": 0},
+  PlanTier.CEREBRO: {"video": 10, "image": 50},
+  PlanTier.PARTNER: {"video": 50, "image": 200},
+}
+
 
 class User(SQLModel, table=True):
   """
@@ -67,6 +75,9 @@ class User(SQLModel, table=True):
 
   role: Optional[str] = Field(default="client", max_length=50)
   is_active: bool = Field(default=True)
+  # Se incrementa al cambiar plan/features/role/is_active: invalida los
+  # claims de los access tokens ya emitidos (ver app/core/principal.py)
+  token_version: int = Field(default=0, sa_column_kwargs={"server_default": "0"})
 
   # CRÉDITOS MENSUALES (Se resetean cada mes - Plan Cerebro)
   monthly_credits_video: int = Field(default=0)
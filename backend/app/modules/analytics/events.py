@@ -0,0 +1,185 @@
+"""
+Analytics Events - Buffer de telemetría en Redis Streams
+
+Los procesos de la API no escriben `UsageLog`/`SearchLog` en Postgres:
+añaden un evento a un Redis Stream (un XADD, ~0.1 ms) y el collector
+(`collect_telemetry` en app/workers/tasks/telemetry.py) drena el stream en
+lotes con INSERTs multi-fila.
+
+Semántica at-least-once:
+- El collector lee con XREADGROUP y solo hace XACK después del commit
+- Si un collector muere con entradas pendientes, otro las reclama con
+  XAUTOCLAIM pasado `CLAIM_IDLE_MS`
+- Un fallo entre commit y XACK puede duplicar un lote (aceptable para
+  telemetría; las rollups/quotas se reconcilian aparte)
+"""
+
+import json
+import os
+import socket
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.modules.analytics.rollups import add_usage_rollup
+
+
+TELEMETRY_STREAM = "bai:events:telemetry"
+COLLECTOR_GROUP = "telemetry-collector"
+
+# Eventos que Postgres rechaza (ver app/workers/streams.py)
+TELEMETRY_DEAD_LETTER_STREAM = "bai:events:telemetry:dead"
+
+# Tope aproximado del stream (XADD MAXLEN ~): protege la memoria de Redis
+# si los collectors se caen durante horas
+STREAM_MAXLEN = 1_000_000
+
+# Entradas pendientes sin ACK durante más de este tiempo se reclaman
+CLAIM_IDLE_MS = 60_000
+
+EVENT_USAGE = "usage"
+EVENT_SEARCH = "search"
+
+
+def consumer_name() -> str:
+    """Nombre estable del consumer dentro del grupo (host + pid)."""
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+def _event_fields(event_type: str, payload: Dict[str, Any]) -> Dict[str, str]:
+    return {
+        "type": event_type,
+        "ts": datetime.utcnow().isoformat(),
+        "payload": json.dumps(payload, default=str),
+    }
+
+
+def add_usage_event(
+    pipe: Any,
+    user_id: int,
+    feature_key: str,
+    tracking_metadata: Optional[Dict[str, Any]] = None,
+) -> None:
+    """
+    Añade un evento de uso a un pipeline de Redis ya abierto.
+
+    Permite agrupar el XADD con otros comandos del request (quotas,
+    rollups) en un único round trip.
+
+    Args:
+        pipe: Pipeline de redis.asyncio
+        user_id: ID del usuario
+        feature_key: Clave de la feature usada
+        tracking_metadata: Metadata adicional (modelo, longitudes, etc.)
+    """
+    pipe.xadd(
+        TELEMETRY_STREAM,
+        _event_fields(EVENT_USAGE, {
+            "user_id": user_id,
+            "feature_key": feature_key,
+            "tracking_metadata": tracking_metadata,
+        }),
+        maxlen=STREAM_MAXLEN,
+        approximate=True,
+    )
+
+
+async def emit_usage_event(
+    redis: Any,
+    user_id: int,
+    feature_key: str,
+    tracking_metadata: Optional[Dict[str, Any]] = None,
+) -> None:
+    """
+    Registra el uso de una feature en el buffer de telemetría.
+
+    El rollup diario de Redis se incrementa en el mismo round trip, de modo
+    que dashboards y quotas lo ven antes de que el collector lo persista.
+
+    Args:
+        redis: Cliente redis.asyncio
+        user_id: ID del usuario
+        feature_key: Clave de la feature usada
+        tracking_metadata: Metadata adicional
+    """
+    async with redis.pipeline(transaction=False) as pipe:
+        add_usage_event(pipe, user_id, feature_key, tracking_metadata)
+        add_usage_rollup(pipe, user_id, feature_key)
+        await pipe.execute()
+
+
+async def emit_search_event(
+    redis: Any,
+    user_id: int,
+    query: str,
+    summary: str,
+    status: str,
+) -> None:
+    """
+    Registra una búsqueda (SearchLog) en el buffer de telemetría.
+
+    Args:
+        redis: Cliente redis.asyncio
+        user_id: ID del usuario
+        query: Query de búsqueda
+        summary: Resumen del resultado (ya truncado)
+        status: "completed" o "failed"
+    """
+    await redis.xadd(
+        TELEMETRY_STREAM,
+        _event_fields(EVENT_SEARCH, {
+            "user_id": user_id,
+            "query": query,
+            "summary": summary,
+            "status": status,
+        }),
+        maxlen=STREAM_MAXLEN,
+        approximate=True,
+    )
+
+
+def decode_events(
+    entries: List[Tuple[str, Dict[str, str]]],
+) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]], List[str]]:
+    """
+    Convierte entradas del stream en filas listas para INSERT multi-fila.
+
+    Las entradas corruptas se descartan (se devuelven en los IDs para ACK:
+    reintentarlas no las arreglaría).
+
+    Args:
+        entries: Lista de (stream_id, fields) de XREADGROUP/XAUTOCLAIM
+
+    Returns:
+        Tuple de (filas usage_logs, filas searchlog, todos los stream IDs)
+    """
+    usage_rows: List[Dict[str, Any]] = []
+    search_rows: List[Dict[str, Any]] = []
+    ids: List[str] = []
+    for entry_id, fields in entries:
+        ids.append(entry_id)
+        if not fields:
+            # Entrada borrada por MAXLEN mientras estaba pendiente
+            continue
+        try:
+            payload = json.loads(fields["payload"])
+            timestamp = datetime.fromisoformat(fields["ts"])
+            event_type = fields.get("type")
+            if event_type == EVENT_USAGE:
+                usage_rows.append({
+                    "user_id": payload["user_id"],
+                    "feature_key": payload["feature_key"],
+                    "tracking_metadata": payload.get("tracking_metadata"),
+                    "timestamp": timestamp,
+                    "created_at": timestamp,
+                })
+            elif event_type == EVENT_SEARCH:
+                search_rows.append({
+                    "user_id": payload["user_id"],
+                    "query": payload["query"][:500],
+                    "summary": payload["summary"][:2000],
+                    "status": payload["status"],
+                    "timestamp": timestamp,
+                })
+        except (KeyError, ValueError, TypeError):
+            continue
+    return usage_rows, search_rows, ids
@@ -5,10 +5,10 @@ Define los modelos de dominio del módulo Analytics.
 """
 
 from sqlmodel import SQLModel, Field
-from sqlalchemy import Column
+from sqlalchemy import Column, UniqueConstraint
 from sqlalchemy.dialects.postgresql import JSONB
 from typing import Optional, Dict, Any
-from datetime import datetime
+from datetime import date, datetime
 from app.infrastructure.db.base import BaseModel
 
 
@@ -31,6 +31,7 @@ class UsageLog(BaseModel, table=True):
     )
     timestamp: datetime = Field(
         default_factory=lambda: datetime.utcnow(),
+        index=True,
         description="Timestamp del uso"
     )
     
@@ -45,3 +46,22 @@ class UsageLog(BaseModel, table=True):
             }
         }
 
+
+class UsageDaily(BaseModel, table=True):
+    """
+    Rollup diario de uso por (usuario, feature, día UTC).
+    
+    Lo mantiene el cron `compact_usage_rollups` recalculando los últimos días
+    desde usage_logs (upsert idempotente). Los dashboards y quotas leen de
+    aquí los días cerrados en lugar de hacer COUNT(*) sobre usage_logs.
+    """
+    
+    __tablename__ = "usage_daily"
+    __table_args__ = (
+        UniqueConstraint("user_id", "feature_key", "day", name="uq_usage_daily_user_feature_day"),
+    )
+    
+    user_id: int = Field(foreign_key="user.id", index=True, description="ID del usuario")
+    feature_key: str = Field(..., max_length=100, description="Clave de la feature usada")
+    day: date = Field(..., index=True, description="Día UTC")
+    count: int = Field(default=0, description="Usos en el día")
@@ -0,0 +1,180 @@
+"""
+Analytics Rollups - Contadores de uso pre-agregados
+
+Dos niveles, ambos por (usuario, feature, día UTC):
+
+- Redis: hash `bai:usage:{user_id}:{YYYYMMDD}` (feature -> count) que se
+  incrementa en el mismo pipeline que el XADD del evento. Cubre los días
+  "calientes" (hoy y ayer), incluidos eventos que el collector aún no ha
+  insertado en usage_logs.
+- Postgres: tabla `usage_daily`, recalculada desde usage_logs por el cron
+  `compact_usage_rollups` (upsert idempotente). Es la fuente para los días
+  cerrados.
+
+Las lecturas de dashboard/quotas son un HGETALL por día caliente más una
+query acotada sobre usage_daily (≤31 filas por feature y mes), sin
+COUNT(*) sobre usage_logs.
+"""
+
+from datetime import date, datetime, time, timedelta
+from typing import Any, Dict, Iterable, List, Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlmodel import Session
+
+from app.modules.analytics.models import UsageDaily, UsageLog
+
+
+ROLLUP_KEY = "bai:usage:{user_id}:{day}"
+
+# Días (contando hoy) que se sirven desde Redis
+HOT_DAYS = 2
+
+# Los hashes sobreviven a los días calientes con margen para la compactación
+ROLLUP_TTL_SECONDS = (HOT_DAYS + 1) * 24 * 3600
+
+# Días que recalcula cada compactación (hoy incluido)
+COMPACT_LOOKBACK_DAYS = 2
+
+
+def utc_today() -> date:
+    return datetime.utcnow().date()
+
+
+def rollup_key(user_id: int, day: date) -> str:
+    return ROLLUP_KEY.format(user_id=user_id, day=day.strftime("%Y%m%d"))
+
+
+def add_usage_rollup(pipe: Any, user_id: int, feature_key: str, day: Optional[date] = None) -> None:
+    """
+    Añade el incremento del rollup a un pipeline de Redis ya abierto.
+
+    Args:
+        pipe: Pipeline de redis.asyncio
+        user_id: ID del usuario
+        feature_key: Clave de la feature usada
+        day: Día UTC del uso (hoy por defecto)
+    """
+    key = rollup_key(user_id, day or utc_today())
+    pipe.hincrby(key, feature_key, 1)
+    pipe.expire(key, ROLLUP_TTL_SECONDS)
+
+
+async def incr_usage_rollup(redis: Any, user_id: int, feature_key: str, day: Optional[date] = None) -> None:
+    """Incrementa el rollup de un uso (fuera de un pipeline existente)."""
+    async with redis.pipeline(transaction=False) as pipe:
+        add_usage_rollup(pipe, user_id, feature_key, day)
+        await pipe.execute()
+
+
+def _days(start_day: date, end_day: date) -> List[date]:
+    return [start_day + timedelta(days=i) for i in range((end_day - start_day).days + 1)]
+
+
+async def get_daily_counts(
+    redis: Optional[Any],
+    session: Session,
+    user_id: int,
+    feature_keys: Iterable[str],
+    start_day: date,
+    end_day: Optional[date] = None,
+) -> Dict[date, Dict[str, int]]:
+    """
+    Usos por día y feature en un rango (ambos extremos incluidos).
+
+    Los días calientes se leen de Redis; el resto, y los días calientes sin
+    hash (Redis reiniciado o no disponible), de usage_daily. En ese último
+    caso el día de hoy refleja la última compactación.
+
+    Args:
+        redis: Cliente redis.asyncio (None para leer solo de Postgres)
+        session: Sesión de base de datos
+        user_id: ID del usuario
+        feature_keys: Features a consultar
+        start_day: Primer día UTC
+        end_day: Último día UTC (hoy por defecto)
+
+    Returns:
+        dict día -> {feature_key: count}, con todos los días y features
+    """
+    features = list(feature_keys)
+    end_day = end_day or utc_today()
+    days = _days(start_day, end_day)
+    counts: Dict[date, Dict[str, int]] = {day: {f: 0 for f in features} for day in days}
+
+    hot_start = utc_today() - timedelta(days=HOT_DAYS - 1)
+    hot_days = [day for day in days if day >= hot_start]
+    from_redis = set()
+    if redis is not None and hot_days:
+        try:
+            async with redis.pipeline(transaction=False) as pipe:
+                for day in hot_days:
+                    pipe.hgetall(rollup_key(user_id, day))
+                results = await pipe.execute()
+            for day, values in zip(hot_days, results):
+                if values:
+                    from_redis.add(day)
+                    for feature in features:
+                        counts[day][feature] = int(values.get(feature, 0))
+        except Exception:
+            from_redis.clear()
+
+    cold_days = [day for day in days if day not in from_redis]
+    if cold_days:
+        rows = session.execute(
+            select(UsageDaily.day, UsageDaily.feature_key, UsageDaily.count).where(
+                UsageDaily.user_id == user_id,
+                UsageDaily.feature_key.in_(features),
+                UsageDaily.day >= cold_days[0],
+                UsageDaily.day <= cold_days[-1],
+            )
+        ).all()
+        for day, feature, count in rows:
+            if day in counts and day not in from_redis:
+                counts[day][feature] = count
+
+    return counts
+
+
+def compact_usage_daily(session: Session, start_day: date, end_day: date) -> int:
+    """
+    Recalcula usage_daily desde usage_logs para un rango de días.
+
+    Un único INSERT ... SELECT ... GROUP BY con ON CONFLICT DO UPDATE: es
+    idempotente y corrige cualquier deriva (eventos duplicados o perdidos
+    en Redis). El commit lo hace el llamador.
+
+    Args:
+        session: Sesión de base de datos
+        start_day: Primer día UTC a recalcular
+        end_day: Último día UTC a recalcular
+
+    Returns:
+        int: Filas (usuario, feature, día) escritas
+    """
+    start = datetime.combine(start_day, time.min)
+    end = datetime.combine(end_day + timedelta(days=1), time.min)
+    day_expr = func.date(UsageLog.timestamp)
+    aggregated = (
+        select(
+            UsageLog.user_id,
+            UsageLog.feature_key,
+            day_expr.label("day"),
+            func.count().label("count"),
+            func.now().label("created_at"),
+            func.now().label("updated_at"),
+        )
+        .where(UsageLog.timestamp >= start, UsageLog.timestamp < end)
+        .group_by(UsageLog.user_id, UsageLog.feature_key, day_expr)
+    )
+    statement = pg_insert(UsageDaily).from_select(
+        ["user_id", "feature_key", "day", "count", "created_at", "updated_at"],
+        aggregated,
+    )
+    statement = statement.on_conflict_do_update(
+        constraint="uq_usage_daily_user_feature_day",
+        set_={"count": statement.excluded["count"], "updated_at": statement.excluded["updated_at"]},
+    )
+    result = session.execute(statement)
+    return result.rowcount or 0
@@ -5,19 +5,22 @@ Define los endpoints HTTP para el módulo Analytics.
 Solo maneja HTTP (request/response), delega la lógica a AnalyticsService.
 """
 
-from fastapi import APIRouter, HTTPException, status, Depends
+from fastapi import APIRouter, HTTPException, status, Depends, Query
 from typing import Optional
 
 from app.modules.analytics.schemas import (
     DashboardMetrics,
     UsageStats,
+    UsageTimeseries,
     AnalyticsResponse
 )
 from app.modules.analytics.service import AnalyticsService
-from app.api.deps import get_current_user
+from app.api.deps import get_current_principal
+from app.core.principal import Principal
 from app.core.database import get_session
-from app.models.user import User
+from app.core.dependencies import get_read_db
 from app.infrastructure.cache.redis import get_redis_client
+from app.workers.queues import get_total_queue_depth
 from sqlmodel import Session
 
 
@@ -37,8 +40,8 @@ def get_analytics_service() -> AnalyticsService:
     description="Retorna métricas agregadas para el dashboard principal"
 )
 async def get_dashboard_metrics(
-    current_user: User = Depends(get_current_user),
-    session: Session = Depends(get_session),
+    current_user: Principal = Depends(get_current_principal),
+    session: Session = Depends(get_read_db),
     analytics_service: AnalyticsService = Depends(get_analytics_service)
 ) -> DashboardMetrics:
     """
@@ -60,23 +63,26 @@ async def get_dashboard_metrics(
     """
     try:
         # Obtener estado del worker (desde Redis)
+        redis_client = None
         try:
             redis_client = get_redis_client()
             await redis_client.ping()
             try:
-                queue_size = await redis_client.llen("arq:queue")
+                queue_size = await get_total_queue_depth(redis_client)
             except Exception:
                 queue_size = 0
             worker_status = "healthy"
         except Exception:
+            redis_client = None
             worker_status = "down"
             queue_size = 0
         
-        # Obtener métricas del dashboard
-        metrics = analytics_service.get_dashboard_metrics(
-            user_id=current_user.id,
+        # Obtener métricas del dashboard (rollups: Redis si está disponible)
+        metrics = await analytics_service.get_dashboard_metrics(
+            user=current_user,
             session=session,
-            worker_queue_size=worker_queue_size,
+            redis=redis_client,
+            worker_queue_size=queue_size,
             worker_status=worker_status
         )
         
@@ -98,7 +104,7 @@ async def get_dashboard_metrics(
 async def get_feature_usage(
     feature_key: str,
     period: str = "month",
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     session: Session = Depends(get_session),
     analytics_service: AnalyticsService = Depends(get_analytics_service)
 ) -> UsageStats:
@@ -116,11 +122,12 @@ async def get_feature_usage(
         UsageStats: Estadísticas de uso
     """
     try:
-        stats = analytics_service.get_usage_stats(
-            user_id=current_user.id,
+        stats = await analytics_service.get_usage_stats(
+            user=current_user,
             feature_key=feature_key,
             session=session,
-            period=period
+            period=period,
+            redis=get_redis_client()
         )
         
         return UsageStats(**stats)
@@ -131,3 +138,46 @@ async def get_feature_usage(
             detail=f"Error al obtener estadísticas: {str(e)}"
         )
 
+
+@router.get(
+    "/usage/{feature_key}/timeseries",
+    response_model=UsageTimeseries,
+    summary="Serie diaria de uso de una feature",
+    description="Retorna los usos por día (UTC) de una feature, servidos desde los rollups diarios"
+)
+async def get_feature_usage_timeseries(
+    feature_key: str,
+    days: int = Query(default=30, ge=1, le=92, description="Días de la serie (hoy incluido)"),
+    current_user: Principal = Depends(get_current_principal),
+    session: Session = Depends(get_session),
+    analytics_service: AnalyticsService = Depends(get_analytics_service)
+) -> UsageTimeseries:
+    """
+    Endpoint para obtener la serie diaria de uso de una feature.
+    
+    Args:
+        feature_key: Clave de la feature (ej: "ai_content_generation")
+        days: Número de días de la serie
+        current_user: Usuario autenticado
+        session: Sesión de base de datos
+        analytics_service: Servicio de analytics (inyectado)
+    
+    Returns:
+        UsageTimeseries: Un punto por día, del más antiguo a hoy
+    """
+    try:
+        series = await analytics_service.get_usage_timeseries(
+            user=current_user,
+            feature_key=feature_key,
+            session=session,
+            days=days,
+            redis=get_redis_client()
+        )
+        
+        return UsageTimeseries(**series)
+    
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error al obtener la serie de uso: {str(e)}"
+        )
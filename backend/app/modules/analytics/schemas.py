@@ -7,7 +7,7 @@ del módulo Analytics.
 
 from pydantic import BaseModel, Field
 from typing import Optional, Dict, Any
-from datetime import datetime
+from datetime import date, datetime
 
 
 class UsageLogCreate(BaseModel):
@@ -29,6 +29,22 @@ class UsageStats(BaseModel):
     limit: Optional[int] = Field(default=None, description="Límite del plan (si aplica)")
 
 
+class UsageTimeseriesPoint(BaseModel):
+    """Usos de una feature en un día UTC"""
+    
+    day: date
+    count: int = Field(..., description="Número de usos en el día")
+
+
+class UsageTimeseries(BaseModel):
+    """Serie diaria de uso de una feature"""
+    
+    feature_key: str
+    days: int = Field(..., description="Número de días de la serie (hoy incluido)")
+    total: int = Field(..., description="Usos en todo el rango")
+    points: list[UsageTimeseriesPoint] = Field(default_factory=list, description="Un punto por día, en orden")
+
+
 class DashboardMetrics(BaseModel):
     """Métricas agregadas para el dashboard"""
     
@@ -3,7 +3,7 @@ Analytics Service - Lógica de Negocio del Módulo Analytics
 
 Este servicio orquesta toda la lógica relacionada con tracking y métricas:
 - Registro de uso de features
-- Agregación de métricas
+- Agregación de métricas (sobre rollups diarios, ver rollups.py)
 - Cálculo de quotas y límites
 
 Principio: Single Responsibility (SRP)
@@ -12,11 +12,20 @@ Principio: Single Responsibility (SRP)
 """
 
 from typing import Dict, Any, List, Optional
-from datetime import datetime, timedelta
-from sqlmodel import Session, select, func
+from datetime import date, datetime, timedelta
+from sqlmodel import Session
+from sqlalchemy import insert
 
 from app.modules.analytics.models import UsageLog
-from app.models.user import User, PlanTier, PLAN_FEATURE_MATRIX
+from app.modules.analytics.rollups import (
+    COMPACT_LOOKBACK_DAYS,
+    compact_usage_daily,
+    get_daily_counts,
+    utc_today,
+)
+from app.models.log import SearchLog
+from app.models.user import PlanTier, PLAN_FEATURE_MATRIX
+from app.core.principal import Principal
 
 
 class AnalyticsService:
@@ -59,64 +68,142 @@ class AnalyticsService:
         
         return usage_log
     
-    def get_usage_stats(
+    def ingest_events(
         self,
-        user_id: int,
+        usage_rows: List[Dict[str, Any]],
+        search_rows: List[Dict[str, Any]],
+        session: Session
+    ) -> Dict[str, int]:
+        """
+        Inserta un lote de eventos del buffer de telemetría.
+        
+        Usa `insert()` Core con lista de parámetros: SQLAlchemy 2 lo emite
+        como INSERT multi-fila (insertmanyvalues) en lugar de un INSERT por
+        objeto ORM, sin refresh ni identity map. El commit lo hace el
+        llamador para poder confirmar el lote antes del XACK.
+        
+        Args:
+            usage_rows: Filas para usage_logs (ver events.decode_events)
+            search_rows: Filas para searchlog
+            session: Sesión de base de datos
+        
+        Returns:
+            dict con el número de filas insertadas por tabla
+        """
+        if usage_rows:
+            session.execute(insert(UsageLog), usage_rows)
+        if search_rows:
+            session.execute(insert(SearchLog), search_rows)
+        return {"usage_logs": len(usage_rows), "searchlog": len(search_rows)}
+    
+    def compact_rollups(self, session: Session, days: int = COMPACT_LOOKBACK_DAYS) -> int:
+        """
+        Recalcula el rollup diario (usage_daily) de los últimos `days` días.
+        
+        Args:
+            session: Sesión de base de datos (el commit lo hace el llamador)
+            days: Días a recalcular, hoy incluido
+        
+        Returns:
+            int: Filas (usuario, feature, día) escritas
+        """
+        today = utc_today()
+        return compact_usage_daily(session, today - timedelta(days=days - 1), today)
+    
+    @staticmethod
+    def _period_start(period: str) -> date:
+        """Primer día UTC del período ("today", "week" = últimos 7 días, "month")."""
+        today = utc_today()
+        if period == "today":
+            return today
+        if period == "week":
+            return today - timedelta(days=6)
+        return today.replace(day=1)
+    
+    @staticmethod
+    def _feature_limit(user: Principal, feature_key: str) -> Optional[int]:
+        plan_features = PLAN_FEATURE_MATRIX.get(user.plan_tier, {})
+        # El límite puede estar en max_chats o en un campo específico de la feature
+        if feature_key == "ai_content_generation":
+            return plan_features.get("max_chats")
+        return None
+    
+    async def get_usage_stats(
+        self,
+        user: Principal,
         feature_key: str,
         session: Session,
-        period: str = "month"
+        period: str = "month",
+        redis: Optional[Any] = None
     ) -> Dict[str, Any]:
         """
         Obtiene estadísticas de uso de una feature para un usuario.
         
+        Lee los rollups diarios (Redis + usage_daily), no usage_logs.
+        
         Args:
-            user_id: ID del usuario
+            user: Usuario (ya cargado por la dependencia de auth)
             feature_key: Clave de la feature
             session: Sesión de base de datos
             period: Período ("today", "week", "month")
+            redis: Cliente redis.asyncio (None = solo usage_daily)
         
         Returns:
             dict con count, period, limit
         """
-        # Calcular fecha de inicio según período
-        now = datetime.utcnow()
-        if period == "today":
-            start_date = now.replace(hour=0, minute=0, second=0, microsecond=0)
-        elif period == "week":
-            start_date = now - timedelta(days=7)
-        elif period == "month":
-            start_date = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-        else:
-            start_date = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-        
-        # Contar usos en el período
-        statement = select(func.count(UsageLog.id)).where(
-            UsageLog.user_id == user_id,
-            UsageLog.feature_key == feature_key,
-            UsageLog.timestamp >= start_date
+        counts = await get_daily_counts(
+            redis, session, user.id, [feature_key], self._period_start(period)
         )
-        count = session.exec(statement).first() or 0
-        
-        # Obtener límite del plan del usuario
-        user = session.exec(select(User).where(User.id == user_id)).first()
-        limit = None
-        if user:
-            plan_features = PLAN_FEATURE_MATRIX.get(user.plan_tier, {})
-            # El límite puede estar en max_chats o en un campo específico de la feature
-            if feature_key == "ai_content_generation":
-                limit = plan_features.get("max_chats")
         
         return {
             "feature_key": feature_key,
-            "count": count,
+            "count": sum(day[feature_key] for day in counts.values()),
             "period": period,
-            "limit": limit
+            "limit": self._feature_limit(user, feature_key)
         }
     
-    def get_dashboard_metrics(
+    async def get_usage_timeseries(
         self,
-        user_id: int,
+        user: Principal,
+        feature_key: str,
+        session: Session,
+        days: int = 30,
+        redis: Optional[Any] = None
+    ) -> Dict[str, Any]:
+        """
+        Serie diaria de uso de una feature (últimos `days` días, hoy incluido).
+        
+        Args:
+            user: Usuario autenticado
+            feature_key: Clave de la feature
+            session: Sesión de base de datos
+            days: Número de días de la serie
+            redis: Cliente redis.asyncio (None = solo usage_daily)
+        
+        Returns:
+            dict con feature_key, days, total y points [{day, count}]
+        """
+        today = utc_today()
+        counts = await get_daily_counts(
+            redis, session, user.id, [feature_key], today - timedelta(days=days - 1), today
+        )
+        points = [
+            {"day": day, "count": values[feature_key]}
+            for day, values in sorted(counts.items())
+        ]
+        
+        return {
+            "feature_key": feature_key,
+            "days": days,
+            "total": sum(point["count"] for point in points),
+            "points": points
+        }
+    
+    async def get_dashboard_metrics(
+        self,
+        user: Principal,
         session: Session,
+        redis: Optional[Any] = None,
         worker_queue_size: int = 0,
         worker_status: str = "healthy"
     ) -> Dict[str, Any]:
@@ -124,19 +211,15 @@ class AnalyticsService:
         Obtiene métricas agregadas para el dashboard.
         
         Args:
-            user_id: ID del usuario
+            user: Usuario autenticado (no se vuelve a consultar)
             session: Sesión de base de datos
+            redis: Cliente redis.asyncio para los rollups calientes
             worker_queue_size: Tamaño de la cola de workers (desde health check)
             worker_status: Estado del worker (desde health check)
         
         Returns:
             dict con todas las métricas del dashboard
         """
-        # Obtener usuario y plan
-        user = session.exec(select(User).where(User.id == user_id)).first()
-        if not user:
-            raise ValueError(f"Usuario con ID {user_id} no encontrado")
-        
         plan_features = PLAN_FEATURE_MATRIX.get(user.plan_tier, {})
         
         # Calcular conversiones (mock por ahora - puede venir de otra tabla)
@@ -144,26 +227,21 @@ class AnalyticsService:
         total_conversions = 0
         conversions_this_month = 0
         
-        # Obtener estadísticas de uso para features premium
+        # Obtener estadísticas de uso para features premium (una sola lectura
+        # de rollups para todas las features del mes)
         usage_stats = []
         if user.plan_tier in [PlanTier.CEREBRO, PlanTier.PARTNER]:
-            # Trackear uso de AI content generation
-            ai_usage = self.get_usage_stats(
-                user_id=user_id,
-                feature_key="ai_content_generation",
-                session=session,
-                period="month"
-            )
-            usage_stats.append(ai_usage)
-            
-            # Trackear uso de data mining
-            mining_usage = self.get_usage_stats(
-                user_id=user_id,
-                feature_key="access_mining",
-                session=session,
-                period="month"
+            feature_keys = ["ai_content_generation", "access_mining"]
+            counts = await get_daily_counts(
+                redis, session, user.id, feature_keys, self._period_start("month")
             )
-            usage_stats.append(mining_usage)
+            for feature_key in feature_keys:
+                usage_stats.append({
+                    "feature_key": feature_key,
+                    "count": sum(day[feature_key] for day in counts.values()),
+                    "period": "month",
+                    "limit": self._feature_limit(user, feature_key)
+                })
         
         # Construir límites del plan
         plan_limits = {
@@ -181,4 +259,3 @@ class AnalyticsService:
             "current_plan": user.plan_tier.value,
             "plan_limits": plan_limits
         }
-
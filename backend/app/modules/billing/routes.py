@@ -15,6 +15,7 @@ from app.modules.billing.schemas import (
 )
 from app.modules.billing.service import BillingService
 from app.api.deps import get_current_user
+from app.core.principal import principal_cache
 from app.core.database import get_session
 from app.models.user import User
 from sqlmodel import Session
@@ -137,6 +138,10 @@ async def stripe_webhook(
             session=session
         )
         
+        # El plan cacheado en los principals ya no es válido
+        if result.get("user_email"):
+            await principal_cache.invalidate(result["user_email"], user_id=result.get("user_id"), session=session)
+        
         return WebhookResponse(
             received=True,
             message=result.get("message", "Webhook procesado correctamente")
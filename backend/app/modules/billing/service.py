@@ -5,6 +5,7 @@ Este servicio orquesta toda la lógica relacionada con Stripe:
 - Creación de sesiones de checkout
 - Verificación de webhooks
 - Actualización de suscripciones de usuarios
+- Renovación mensual de créditos al pagar cada factura de la suscripción
 - Gestión de clientes de Stripe
 
 Principio: Single Responsibility (SRP)
@@ -12,15 +13,20 @@ Principio: Single Responsibility (SRP)
 - No conoce detalles de HTTP (routes) ni de persistencia (repository)
 """
 
-import stripe
 from typing import Optional
 from sqlmodel import Session, select
 
 from app.core.config import settings
-from app.models.user import User, PlanTier, SubscriptionStatus
+from app.core.credits import credit_ledger
+from app.models.user import User, PlanTier, SubscriptionStatus, PLAN_MONTHLY_CREDITS
 from app.core.exceptions import BAIException
 
 
+# Facturas de renovación del período (la del alta la aplica el checkout,
+# que conoce el plan nuevo); las de prorrateo no renuevan créditos
+RENEWAL_BILLING_REASONS = ("subscription_cycle",)
+
+
 class BillingService:
     """
     Servicio de negocio para el módulo Billing.
@@ -35,7 +41,12 @@ class BillingService:
             raise ValueError(
                 "STRIPE_API_KEY is not configured. Please set it in your .env file."
             )
+        # SDK diferido: stripe solo se importa al construir el servicio
+        # (primer request de billing), no al arrancar la API ni los workers
+        import stripe
+
         stripe.api_key = settings.STRIPE_API_KEY
+        self._stripe = stripe
     
     def create_checkout_session(
         self,
@@ -74,7 +85,7 @@ class BillingService:
         
         # Si no tiene customer_id, crear uno en Stripe
         if not stripe_customer_id:
-            customer = stripe.Customer.create(
+            customer = self._stripe.Customer.create(
                 email=user_email,
                 metadata={"user_id": str(user_id)}
             )
@@ -87,7 +98,7 @@ class BillingService:
             session.refresh(user)
         
         # Crear sesión de checkout
-        checkout_session = stripe.checkout.Session.create(
+        checkout_session = self._stripe.checkout.Session.create(
             customer=stripe_customer_id,
             mode="subscription",
             payment_method_types=["card"],
@@ -134,7 +145,7 @@ class BillingService:
             )
         
         try:
-            event = stripe.Webhook.construct_event(
+            event = self._stripe.Webhook.construct_event(
                 payload,
                 signature,
                 settings.STRIPE_WEBHOOK_SECRET
@@ -142,7 +153,7 @@ class BillingService:
             return event  # stripe.Webhook.construct_event retorna un dict
         except ValueError as e:
             raise ValueError(f"Invalid payload: {str(e)}")
-        except stripe.error.SignatureVerificationError as e:
+        except self._stripe.error.SignatureVerificationError as e:
             raise ValueError(f"Invalid signature: {str(e)}")
     
     def handle_webhook_event(
@@ -172,6 +183,8 @@ class BillingService:
             return self._handle_subscription_deleted(event_data, session)
         elif event_type == "customer.subscription.updated":
             return self._handle_subscription_updated(event_data, session)
+        elif event_type == "invoice.paid":
+            return self._handle_invoice_paid(event_data, session)
         else:
             # Evento no manejado (no es error, solo lo ignoramos)
             return {
@@ -188,7 +201,9 @@ class BillingService:
         """
         Maneja el evento checkout.session.completed.
         
-        Actualiza el plan_tier y subscription_status del usuario.
+        Actualiza el plan_tier y subscription_status del usuario y asigna
+        los créditos mensuales del plan para el primer período (factura
+        del alta).
         """
         # Obtener metadata de la sesión
         metadata = session_data.get("metadata", {})
@@ -213,6 +228,11 @@ class BillingService:
             user.stripe_customer_id = str(customer_id)
         
         db_session.add(user)
+        invoice_id = session_data.get("invoice")
+        if isinstance(invoice_id, dict):
+            invoice_id = invoice_id.get("id")
+        if invoice_id:
+            self._reset_monthly_credits(user, str(invoice_id), db_session)
         db_session.commit()
         db_session.refresh(user)
         
@@ -220,6 +240,7 @@ class BillingService:
             "status": "success",
             "event_type": "checkout.session.completed",
             "user_id": user_id,
+            "user_email": user.email,
             "new_plan": plan_tier_str,
             "message": f"Usuario {user_id} actualizado a plan {plan_tier_str}"
         }
@@ -259,6 +280,7 @@ class BillingService:
             "status": "success",
             "event_type": "customer.subscription.deleted",
             "user_id": user.id,
+            "user_email": user.email,
             "message": f"Suscripción del usuario {user.id} cancelada"
         }
     
@@ -303,10 +325,68 @@ class BillingService:
             "status": "success",
             "event_type": "customer.subscription.updated",
             "user_id": user.id,
+            "user_email": user.email,
             "new_status": user.subscription_status.value,
             "message": f"Estado de suscripción del usuario {user.id} actualizado a {user.subscription_status.value}"
         }
     
+    def _handle_invoice_paid(
+        self,
+        invoice_data: dict,
+        db_session: Session
+    ) -> dict:
+        """
+        Maneja el evento invoice.paid.
+        
+        Cada factura pagada de renovación renueva las bolsas mensuales de
+        créditos según el plan del usuario. Idempotente por factura (Stripe
+        reenvía los webhooks).
+        """
+        invoice_id = invoice_data.get("id")
+        customer_id = invoice_data.get("customer")
+        billing_reason = invoice_data.get("billing_reason")
+        
+        if billing_reason not in RENEWAL_BILLING_REASONS:
+            return {
+                "status": "ignored",
+                "event_type": "invoice.paid",
+                "message": f"Factura {invoice_id} ({billing_reason}) no renueva créditos"
+            }
+        
+        user = db_session.exec(
+            select(User).where(User.stripe_customer_id == customer_id)
+        ).first()
+        
+        if not user:
+            return {
+                "status": "ignored",
+                "event_type": "invoice.paid",
+                "message": f"Usuario con customer_id {customer_id} no encontrado"
+            }
+        
+        movements = self._reset_monthly_credits(user, str(invoice_id), db_session)
+        db_session.commit()
+        
+        return {
+            "status": "success",
+            "event_type": "invoice.paid",
+            "user_id": user.id,
+            "user_email": user.email,
+            "message": (
+                f"Créditos mensuales del usuario {user.id} renovados"
+                if movements else f"Factura {invoice_id} ya aplicada"
+            )
+        }
+    
+    def _reset_monthly_credits(self, user: User, invoice_id: str, db_session: Session) -> dict:
+        """Renueva las bolsas mensuales del plan del usuario (sin commit)."""
+        return credit_ledger.reset_monthly(
+            db_session,
+            user.id,
+            PLAN_MONTHLY_CREDITS[user.plan_tier],
+            reason=f"invoice:{invoice_id}",
+        )
+    
     def _get_plan_mapping(self, plan: str) -> Optional[dict]:
         """
         Mapea un plan string a PlanTier y price_id de Stripe.
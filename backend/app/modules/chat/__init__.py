@@ -17,7 +17,7 @@ Migrado desde:
 """
 
 from app.modules.chat.service import ChatService
-from app.modules.chat.repository import ChatRepository
+from app.modules.chat.repository import ChatRepository, AsyncChatRepository
 from app.modules.chat.models import ChatMessage
 from app.modules.chat.utils.prompt_manager import PromptManager
 from app.modules.chat.utils.email_handler import EmailCommandHandler
@@ -25,6 +25,7 @@ from app.modules.chat.utils.email_handler import EmailCommandHandler
 __all__ = [
     "ChatService",
     "ChatRepository",
+    "AsyncChatRepository",
     "ChatMessage",
     "PromptManager",
     "EmailCommandHandler",
@@ -12,8 +12,6 @@ import asyncio
 import json
 import re
 from typing import List, Dict, Any, Optional, AsyncIterator
-import google.generativeai as genai
-from google.api_core import exceptions as google_exceptions
 
 from app.modules.chat.engine.interface import (
     AIEngineProtocol,
@@ -21,6 +19,8 @@ from app.modules.chat.engine.interface import (
     AIEngineError,
     AIEngineTimeoutError
 )
+from app.core.deadline import get_current_deadline
+from app.core.exceptions import BAIException, DeadlineExceededError
 
 
 class GeminiEngine(AIEngineProtocol):
@@ -44,6 +44,10 @@ class GeminiEngine(AIEngineProtocol):
         if not self.api_key:
             raise ValueError("GOOGLE_API_KEY no encontrada en variables de entorno")
         
+        # SDK diferido: importar google.generativeai cuesta ~1 s y bastante
+        # memoria; solo lo pagan los procesos que construyen el motor
+        import google.generativeai as genai
+
         genai.configure(api_key=self.api_key)
         self.model = genai.GenerativeModel(self.MODEL_NAME)
     
@@ -62,6 +66,9 @@ class GeminiEngine(AIEngineProtocol):
         - Reintentos con backoff exponencial para errores 429 (Quota Exceeded)
         - Extracción de retry_delay de la respuesta de Gemini
         - Máximo 3 intentos
+        - Respeta el deadline del request (ver app/core/deadline.py): cada
+          llamada usa como timeout el tiempo restante y no se reintenta si
+          el backoff no cabe en el presupuesto
         
         Args:
             prompt: Mensaje del usuario
@@ -75,11 +82,17 @@ class GeminiEngine(AIEngineProtocol):
         
         Raises:
             AIEngineError: Si Gemini falla después de todos los reintentos
+            DeadlineExceededError: Si el deadline del request expira
+            ClientDisconnectedError: Si el cliente se desconecta
         """
         max_retries = 3
         base_delay = 1.0  # Segundos base para backoff exponencial
+        deadline = get_current_deadline()
         
         for attempt in range(max_retries):
+            if deadline:
+                await deadline.check()
+            
             try:
                 # Construir prompt completo
                 full_prompt = self._build_prompt(
@@ -95,11 +108,20 @@ class GeminiEngine(AIEngineProtocol):
                     "max_output_tokens": kwargs.get("max_tokens", 2048),
                 }
                 
-                # Generar respuesta
-                response = self.model.generate_content(
+                # Timeout del cliente HTTP de Gemini acotado al deadline
+                request_options = {}
+                if deadline:
+                    request_options["timeout"] = deadline.remaining()
+                
+                # Generar respuesta en un thread: generate_content es bloqueante
+                # y no debe congelar el event loop (ni impedir la cancelación)
+                call = asyncio.to_thread(
+                    self.model.generate_content,
                     full_prompt,
-                    generation_config=generation_config
+                    generation_config=generation_config,
+                    request_options=request_options or None
                 )
+                response = await deadline.guard(call) if deadline else await call
                 
                 # Extraer texto de la respuesta
                 response_text = response.text if hasattr(response, 'text') else str(response)
@@ -115,6 +137,9 @@ class GeminiEngine(AIEngineProtocol):
                     model=self.MODEL_NAME
                 )
             
+            except BAIException:
+                # Deadline / desconexión: no es un error de Gemini, no reintentar
+                raise
             except Exception as e:
                 # Detectar error 429 (Quota Exceeded)
                 is_quota_error = self._is_quota_exceeded_error(e)
@@ -130,6 +155,11 @@ class GeminiEngine(AIEngineProtocol):
                         # Backoff exponencial: 1s, 2s, 4s...
                         wait_time = base_delay * (2 ** attempt)
                     
+                    # Si el backoff no cabe en el deadline, fallar ya en vez de
+                    # dormir para luego abandonar el request igualmente
+                    if deadline and wait_time >= deadline.remaining():
+                        raise DeadlineExceededError(deadline.timeout)
+                    
                     # Log del reintento (puede ser mejorado con logging estructurado)
                     print(
                         f"[GeminiEngine] Quota exceeded (attempt {attempt + 1}/{max_retries}). "
@@ -177,7 +207,9 @@ class GeminiEngine(AIEngineProtocol):
             if pattern in error_str:
                 return True
         
-        # Verificar si es una excepción de Google API Core
+        # Verificar si es una excepción de Google API Core (ya cargado por __init__)
+        from google.api_core import exceptions as google_exceptions
+
         if isinstance(error, google_exceptions.ResourceExhausted):
             return True
         
@@ -9,8 +9,9 @@ Principio: Separation of Concerns
 - El repositorio puede cambiar de implementación (SQL → NoSQL) sin afectar el servicio
 """
 
-from typing import List, Optional
-from sqlmodel import Session, select
+from typing import List, Optional, Tuple
+from sqlmodel import Session, select, delete, func
+from sqlmodel.ext.asyncio.session import AsyncSession
 from datetime import datetime, timezone
 
 from app.modules.chat.models import ChatMessage
@@ -161,3 +162,135 @@ class ChatRepository:
         self.session.commit()
         return count
 
+
+class AsyncChatRepository:
+    """
+    Variante async de ChatRepository (AsyncSession + psycopg async).
+    
+    Misma interfaz que ChatRepository con métodos `async`; es la que usan
+    los endpoints HTTP para no bloquear el event loop en cada query.
+    """
+    
+    def __init__(self, session: AsyncSession):
+        """
+        Inicializa el repositorio con una sesión async.
+        
+        Args:
+            session: AsyncSession de SQLModel
+        """
+        self.session = session
+    
+    async def save_conversation_pair(
+        self,
+        user_id: int,
+        user_message: str,
+        ai_response: str
+    ) -> None:
+        """
+        Guarda un par de mensajes (usuario + IA) en una transacción atómica.
+        
+        Args:
+            user_id: ID del usuario
+            user_message: Mensaje del usuario
+            ai_response: Respuesta de la IA
+        
+        Raises:
+            Exception: Si falla la transacción
+        """
+        try:
+            now = datetime.now(timezone.utc)
+            self.session.add_all([
+                ChatMessage(user_id=user_id, role="user", content=user_message, timestamp=now),
+                ChatMessage(user_id=user_id, role="bai", content=ai_response, timestamp=datetime.now(timezone.utc)),
+            ])
+            # Commit atómico (ambos o ninguno); expire_on_commit=False evita el refresh
+            await self.session.commit()
+        
+        except Exception:
+            await self.session.rollback()
+            raise
+    
+    async def get_recent_messages(
+        self,
+        user_id: int,
+        limit: int = 10
+    ) -> List[ChatMessage]:
+        """
+        Obtiene los mensajes más recientes de un usuario en orden cronológico.
+        
+        Args:
+            user_id: ID del usuario
+            limit: Número máximo de mensajes
+        
+        Returns:
+            List[ChatMessage]: Lista de mensajes ordenados por timestamp (ascendente)
+        """
+        statement = (
+            select(ChatMessage)
+            .where(ChatMessage.user_id == user_id)
+            .order_by(ChatMessage.timestamp.desc())
+            .limit(limit)
+        )
+        history_messages = (await self.session.exec(statement)).all()
+        return list(reversed(history_messages))
+    
+    async def get_all_messages(
+        self,
+        user_id: int
+    ) -> List[ChatMessage]:
+        """
+        Obtiene todos los mensajes de un usuario.
+        
+        Args:
+            user_id: ID del usuario
+        
+        Returns:
+            List[ChatMessage]: Lista completa de mensajes ordenados por timestamp
+        """
+        statement = (
+            select(ChatMessage)
+            .where(ChatMessage.user_id == user_id)
+            .order_by(ChatMessage.timestamp.asc())
+        )
+        return list((await self.session.exec(statement)).all())
+    
+    async def get_history_version(
+        self,
+        user_id: int
+    ) -> Tuple[int, Optional[int]]:
+        """
+        Versión del historial de un usuario sin cargar los mensajes.
+        
+        El historial solo crece (mensajes nuevos) o se borra entero, así que
+        (count, max(id)) cambia con cualquier modificación.
+        
+        Args:
+            user_id: ID del usuario
+        
+        Returns:
+            Tuple[int, Optional[int]]: (número de mensajes, id más alto)
+        """
+        statement = select(func.count(ChatMessage.id), func.max(ChatMessage.id)).where(
+            ChatMessage.user_id == user_id
+        )
+        count, max_id = (await self.session.exec(statement)).one()
+        return count, max_id
+    
+    async def delete_user_messages(
+        self,
+        user_id: int
+    ) -> int:
+        """
+        Elimina todos los mensajes de un usuario (un único DELETE).
+        
+        Args:
+            user_id: ID del usuario
+        
+        Returns:
+            int: Número de mensajes eliminados
+        """
+        result = await self.session.execute(
+            delete(ChatMessage).where(ChatMessage.user_id == user_id)
+        )
+        await self.session.commit()
+        return result.rowcount or 0
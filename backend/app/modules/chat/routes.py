@@ -5,8 +5,8 @@ Define los endpoints HTTP para el módulo Chat.
 Solo maneja HTTP (request/response), delega la lógica a ChatService.
 """
 
-from fastapi import APIRouter, HTTPException, status, Depends
-from typing import List
+from fastapi import APIRouter, HTTPException, status, Depends, Request, Response
+from typing import Annotated, List, Optional
 
 from app.modules.chat.schemas import (
     ChatMessageRequest,
@@ -18,17 +18,43 @@ from app.modules.chat.schemas import (
 from app.modules.chat.service import ChatService
 from app.core.dependencies import (
     ChatServiceDep,
-    DatabaseDep,
+    ReadChatServiceDep,
+    AsyncDatabaseDep,
+    AsyncReadDatabaseDep,
     AIEngineDep,
-    ArqRedisDep
+    ArqRedisDep,
+    LLMAdmissionDep,
+    request_deadline
 )
+from app.core.conditional import compute_etag, conditional_get
+from app.core.config import settings
+from app.core.deadline import RequestDeadline
+from app.core.quota import QuotaUsage
+from app.core.exceptions import DeadlineExceededError, ClientDisconnectedError
 from app.modules.chat.models import ChatMessage
-from app.api.deps import requires_feature
-from app.models.user import User
+from app.workers.queues import enqueue
+from app.modules.analytics.events import emit_usage_event
+from app.infrastructure.cache.redis import get_redis_client
+from app.api.deps import get_current_principal_async, quota_guard, requires_feature
+from app.core.principal import Principal
 
 
 router = APIRouter(prefix="/api/v1/chat", tags=["chat"])
 
+# Deadline por defecto de los endpoints LLM (sobrescribible con X-Request-Timeout)
+ChatDeadlineDep = Annotated[
+    RequestDeadline,
+    Depends(request_deadline(settings.CHAT_REQUEST_TIMEOUT_SECONDS))
+]
+
+# Cuota mensual de mensajes (max_chats): se resuelve antes del slot de LLM y
+# de la sesión de DB y se devuelve si el request se descarta o falla;
+# requires_feature(..., consume_quota=True) la reutiliza
+ChatQuotaDep = Annotated[
+    Optional[QuotaUsage],
+    Depends(quota_guard("ai_content_generation"))
+]
+
 
 @router.post(
     "/message",
@@ -38,16 +64,26 @@ router = APIRouter(prefix="/api/v1/chat", tags=["chat"])
     description="Procesa un mensaje del usuario y genera una respuesta del motor de IA"
 )
 async def send_message(
+    deadline: ChatDeadlineDep,
+    quota: ChatQuotaDep,
+    admission: LLMAdmissionDep,
     chat_request: ChatMessageRequest,
     arq_pool: ArqRedisDep,
     chat_service: ChatServiceDep,
-    session: DatabaseDep,
-    current_user: User = Depends(requires_feature("ai_content_generation")),
+    session: AsyncDatabaseDep,
+    current_user: Principal = Depends(requires_feature(
+        "ai_content_generation",
+        consume_quota=True,
+        principal=get_current_principal_async,
+    )),
 ) -> ChatMessageResponse:
     """
     Endpoint para enviar un mensaje de chat (autenticado).
     
     Args:
+        deadline: Deadline del request (default de chat o X-Request-Timeout)
+        quota: Consumo de cuota del plan (429 + Retry-After si está agotada)
+        admission: Slot de LLM (503 + Retry-After si el proceso está saturado)
         arq_pool: Pool de Redis para Arq (inyectado automáticamente)
         chat_request: Datos del mensaje
         chat_service: Servicio de chat (inyectado)
@@ -58,7 +94,7 @@ async def send_message(
         ChatMessageResponse: Respuesta del motor de IA
     
     Raises:
-        HTTPException: Si el procesamiento falla
+        HTTPException: Si el procesamiento falla o se supera el deadline
     """
     try:
         response_text = await chat_service.process_message(
@@ -69,22 +105,35 @@ async def send_message(
             context=chat_request.context
         )
         
-        # Trackear uso de AI content generation de forma asíncrona
+        # Trackear uso de AI content generation vía buffer de telemetría
+        # (un XADD; el collector lo inserta por lotes en usage_logs).
+        # Solo si el request sigue vivo: process_message ya verificó el deadline
+        tracking_metadata = {
+            "model": chat_service.ai_engine.model_name,
+            "provider": chat_service.ai_engine.provider,
+            "message_length": len(chat_request.text),
+            "response_length": len(response_text)
+        }
         try:
-            await arq_pool.enqueue_job(
-                "track_feature_use",
+            await emit_usage_event(
+                get_redis_client(),
                 user_id=current_user.id,
                 feature_key="ai_content_generation",
-                tracking_metadata={
-                    "model": chat_service.ai_engine.model_name,
-                    "provider": chat_service.ai_engine.provider,
-                    "message_length": len(chat_request.text),
-                    "response_length": len(response_text)
-                }
+                tracking_metadata=tracking_metadata
             )
         except Exception:
-            # Si falla el tracking, no romper el flujo principal
-            pass
+            # Fallback: job individual (camino previo) si el stream no está disponible
+            try:
+                await enqueue(
+                    arq_pool,
+                    "track_feature_use",
+                    user_id=current_user.id,
+                    feature_key="ai_content_generation",
+                    tracking_metadata=tracking_metadata
+                )
+            except Exception:
+                # Si falla el tracking, no romper el flujo principal
+                pass
         
         return ChatMessageResponse(
             response=response_text,
@@ -94,6 +143,11 @@ async def send_message(
             }
         )
     
+    except (DeadlineExceededError, ClientDisconnectedError) as e:
+        raise HTTPException(
+            status_code=e.status_code,
+            detail=e.message
+        )
     except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -113,22 +167,35 @@ async def send_message(
     description="Retorna el historial completo de conversación del usuario"
 )
 async def get_history(
-    chat_service: ChatServiceDep,
-    session: DatabaseDep,
-    current_user: User = Depends(requires_feature("ai_content_generation")),
+    request: Request,
+    response: Response,
+    chat_service: ReadChatServiceDep,
+    session: AsyncReadDatabaseDep,
+    current_user: Principal = Depends(requires_feature("ai_content_generation")),
 ) -> ChatHistoryResponse:
     """
     Endpoint para obtener el historial de conversación.
     
+    Responde con ETag; si el historial no cambió desde el último sondeo
+    (If-None-Match) devuelve 304 sin cargar los mensajes.
+    
     Args:
-        chat_service: Servicio de chat (inyectado)
-        session: Sesión de base de datos (inyectada)
+        request: Request (If-None-Match)
+        response: Response (recibe el ETag)
+        chat_service: Servicio de chat sobre la sesión de lectura (inyectado)
+        session: Sesión de lectura (réplica si procede; inyectada)
         current_user_id: ID del usuario autenticado
     
     Returns:
-        ChatHistoryResponse: Historial de mensajes
+        ChatHistoryResponse: Historial de mensajes (o 304)
     """
-    messages = chat_service.get_conversation_history(
+    count, max_id = await chat_service.get_history_version(user_id=current_user.id)
+    etag = compute_etag("chat:history", current_user.id, count, max_id)
+    not_modified = conditional_get(request, response, etag)
+    if not_modified is not None:
+        return not_modified
+    
+    messages = await chat_service.get_conversation_history(
         user_id=current_user.id,
         session=session
     )
@@ -158,16 +225,22 @@ async def get_history(
     description="Endpoint público para widgets embebidos en sitios de clientes"
 )
 async def widget_chat(
+    deadline: ChatDeadlineDep,
+    admission: LLMAdmissionDep,
     request: WidgetChatRequest,
     ai_engine: AIEngineDep,
-    session: DatabaseDep
+    session: AsyncDatabaseDep
 ) -> ChatMessageResponse:
     """
     Endpoint público para widgets externos.
     
     No requiere autenticación, pero usa client_id para personalización.
+    Si el visitante cierra la pestaña, la llamada a Gemini se cancela y no
+    se persiste la conversación.
     
     Args:
+        deadline: Deadline del request (default de chat o X-Request-Timeout)
+        admission: Slot de LLM (cap por IP y por client_id)
         request: Datos del mensaje del widget
         ai_engine: Motor de IA (inyectado)
         session: Sesión de base de datos (inyectada)
@@ -178,9 +251,9 @@ async def widget_chat(
     try:
         # Construir system instruction según client_id
         from app.modules.chat.service import ChatService
-        from app.modules.chat.repository import ChatRepository
+        from app.modules.chat.repository import AsyncChatRepository
         
-        repository = ChatRepository(session=session)
+        repository = AsyncChatRepository(session=session)
         service = ChatService(
             ai_engine=ai_engine,
             repository=repository,
@@ -205,6 +278,11 @@ async def widget_chat(
             }
         )
     
+    except (DeadlineExceededError, ClientDisconnectedError) as e:
+        raise HTTPException(
+            status_code=e.status_code,
+            detail=e.message
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -16,15 +16,17 @@ Principio: Single Responsibility (SRP)
 Migrado desde backend/app/services/bai_brain.py y backend/app/services/ai_service.py
 """
 
-from typing import List, Dict, Any, Optional
-from sqlmodel import Session
+from typing import List, Dict, Any, Optional, Tuple
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from app.modules.chat.engine.interface import AIEngineProtocol, AIResponse
-from app.modules.chat.repository import ChatRepository
+from app.modules.chat.repository import AsyncChatRepository
 from app.modules.chat.models import ChatMessage
 from app.modules.chat.utils.prompt_manager import PromptManager
 from app.modules.chat.utils.email_handler import EmailCommandHandler
 from app.infrastructure.cache.redis import CacheService
+from app.infrastructure.db.session import apply_statement_timeout_async
+from app.core.deadline import get_current_deadline, run_with_deadline
 
 
 class ChatService:
@@ -38,7 +40,7 @@ class ChatService:
     def __init__(
         self,
         ai_engine: AIEngineProtocol,
-        repository: ChatRepository,
+        repository: AsyncChatRepository,
         cache: Optional[CacheService] = None
     ):
         """
@@ -46,7 +48,7 @@ class ChatService:
         
         Args:
             ai_engine: Motor de IA (implementa AIEngineProtocol)
-            repository: Repositorio para acceso a datos
+            repository: Repositorio async para acceso a datos
             cache: Servicio de cache (opcional)
         """
         self.ai_engine = ai_engine
@@ -57,7 +59,7 @@ class ChatService:
         self,
         user_id: int,
         message: str,
-        session: Session,
+        session: AsyncSession,
         client_id: Optional[str] = None,
         context: Optional[Dict[str, Any]] = None,
         is_bai_internal: bool = False
@@ -75,7 +77,7 @@ class ChatService:
         Args:
             user_id: ID del usuario
             message: Mensaje del usuario
-            session: Sesión de base de datos
+            session: Sesión async de base de datos
             client_id: ID del cliente (para widgets externos)
             context: Contexto adicional (inventario, datos del cliente)
         
@@ -85,18 +87,29 @@ class ChatService:
         Raises:
             ValueError: Si el mensaje está vacío
             AIEngineError: Si el motor de IA falla
+            DeadlineExceededError: Si el deadline del request expira
+            ClientDisconnectedError: Si el cliente abandona el request
         """
         # Validación
         if not message or not message.strip():
             raise ValueError("El mensaje no puede estar vacío")
         
+        deadline = get_current_deadline()
+        if deadline:
+            await deadline.check()
+            await apply_statement_timeout_async(session, deadline.remaining())
+        
         # 1. Obtener historial
-        history = self._get_conversation_history(
+        history = await self._get_conversation_history(
             user_id=user_id,
             session=session,
             limit=10  # Últimos 10 mensajes
         )
         
+        # Cerrar la transacción de lectura: la conexión vuelve al pool
+        # mientras se espera al motor de IA (segundos)
+        await session.commit()
+        
         # 2. Construir system instruction
         system_instruction = self._build_system_instruction(
             client_id=client_id,
@@ -104,14 +117,21 @@ class ChatService:
             is_bai_internal=is_bai_internal
         )
         
-        # 3. Generar respuesta del motor de IA
-        ai_response = await self.ai_engine.generate_response(
-            prompt=message,
-            history=history,
-            system_instruction=system_instruction,
-            context=context
+        # 3. Generar respuesta del motor de IA (cancelable por deadline/desconexión)
+        ai_response = await run_with_deadline(
+            self.ai_engine.generate_response(
+                prompt=message,
+                history=history,
+                system_instruction=system_instruction,
+                context=context
+            )
         )
         
+        # Si el cliente se fue mientras Gemini respondía, no persistir ni
+        # disparar efectos secundarios para una respuesta que nadie leerá
+        if deadline:
+            await deadline.check()
+        
         # 4. Procesar respuesta: extraer comando de email si existe
         cleaned_response, email = EmailCommandHandler.extract_and_clean(ai_response.content)
         
@@ -120,7 +140,9 @@ class ChatService:
             EmailCommandHandler.trigger_email_webhook(email, cleaned_response)
         
         # 6. Guardar mensaje y respuesta (transacción atómica)
-        self.repository.save_conversation_pair(
+        if deadline:
+            await apply_statement_timeout_async(session, deadline.remaining())
+        await self.repository.save_conversation_pair(
             user_id=user_id,
             user_message=message,
             ai_response=cleaned_response
@@ -132,10 +154,10 @@ class ChatService:
         
         return cleaned_response
     
-    def _get_conversation_history(
+    async def _get_conversation_history(
         self,
         user_id: int,
-        session: Session,
+        session: AsyncSession,
         limit: int = 10
     ) -> List[Dict[str, str]]:
         """
@@ -143,13 +165,13 @@ class ChatService:
         
         Args:
             user_id: ID del usuario
-            session: Sesión de base de datos
+            session: Sesión async de base de datos
             limit: Número máximo de mensajes a retornar
         
         Returns:
             List[Dict[str, str]]: Historial en formato [{"role": "user", "content": "..."}]
         """
-        messages = self.repository.get_recent_messages(
+        messages = await self.repository.get_recent_messages(
             user_id=user_id,
             limit=limit
         )
@@ -199,22 +221,37 @@ class ChatService:
         # Fallback: prompt genérico
         return PromptManager.BAI_BASE_PROMPT
     
-    def get_conversation_history(
+    async def get_conversation_history(
         self,
         user_id: int,
-        session: Session
+        session: AsyncSession
     ) -> List[ChatMessage]:
         """
         Obtiene el historial completo de conversación.
         
         Args:
             user_id: ID del usuario
-            session: Sesión de base de datos
+            session: Sesión async de base de datos
         
         Returns:
             List[ChatMessage]: Lista de mensajes ordenados por timestamp
         """
-        return self.repository.get_all_messages(
+        return await self.repository.get_all_messages(
             user_id=user_id
         )
+    
+    async def get_history_version(
+        self,
+        user_id: int
+    ) -> Tuple[int, Optional[int]]:
+        """
+        Versión del historial (para ETags del endpoint de polling).
+        
+        Args:
+            user_id: ID del usuario
+        
+        Returns:
+            Tuple[int, Optional[int]]: (número de mensajes, id más alto)
+        """
+        return await self.repository.get_history_version(user_id=user_id)
 
@@ -9,6 +9,8 @@ import re
 import httpx
 from typing import Tuple, Optional
 
+from app.core.deadline import remaining_timeout
+
 
 class EmailCommandHandler:
     """
@@ -48,8 +50,14 @@ class EmailCommandHandler:
             email: Email destino
             content: Contenido del email
         """
+        # El webhook nunca debe alargar el request más allá de su deadline
+        timeout = remaining_timeout(cls.WEBHOOK_TIMEOUT)
+        if timeout <= 0:
+            print("Skipping email webhook: request deadline exceeded")
+            return
+        
         try:
-            with httpx.Client(timeout=cls.WEBHOOK_TIMEOUT) as client:
+            with httpx.Client(timeout=timeout) as client:
                 client.post(
                     cls.N8N_EMAIL_WEBHOOK,
                     json={
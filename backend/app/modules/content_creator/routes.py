@@ -16,12 +16,15 @@ from app.modules.content_creator.schemas import (
     CampaignListResponse,
     CampaignJobStatusResponse
 )
-from app.modules.content_creator.service import ContentCreatorService
+from app.modules.content_creator.service import ContentCreatorService, LIST_HEAVY_FIELDS
 from app.modules.content_creator.models import Campaign, CampaignStatus
 from app.api.deps import requires_plan
+from app.core.principal import Principal
+from app.core.projection import parse_include, projected
 from app.core.database import get_session
-from app.core.dependencies import ArqRedisDep
-from app.models.user import User, PlanTier
+from app.core.dependencies import ArqRedisDep, get_read_db
+from app.workers.priority import enqueue_prioritized
+from app.models.user import PlanTier
 from sqlmodel import Session
 
 
@@ -44,7 +47,7 @@ def get_content_creator_service() -> ContentCreatorService:
 async def create_campaign(
     campaign_data: CampaignCreateRequest,
     arq_pool: ArqRedisDep,
-    current_user: User = Depends(requires_plan(PlanTier.PARTNER)),
+    current_user: Principal = Depends(requires_plan(PlanTier.PARTNER)),
     session: Session = Depends(get_session),
     service: ContentCreatorService = Depends(get_content_creator_service)
 ) -> CampaignCreatedResponse:
@@ -89,9 +92,12 @@ async def create_campaign(
         
         # Encolar tarea de generación de contenido en el worker
         try:
-            # Encolar tarea asíncrona usando pool singleton
-            job = await arq_pool.enqueue_job(
+            # Encolar tarea asíncrona usando pool singleton, con la
+            # prioridad del plan del usuario (PARTNER se drena primero)
+            job = await enqueue_prioritized(
+                arq_pool,
                 "generate_influencer_content",
+                plan_tier=current_user.plan_tier,
                 campaign_id=campaign.id
             )
             
@@ -144,15 +150,17 @@ async def create_campaign(
 @router.get(
     "/campaigns",
     response_model=CampaignListResponse,
+    response_model_exclude_unset=True,
     summary="Listar campañas del usuario",
     description="Retorna todas las campañas de contenido del usuario autenticado"
 )
 async def list_campaigns(
-    current_user: User = Depends(requires_plan(PlanTier.PARTNER)),
-    session: Session = Depends(get_session),
+    current_user: Principal = Depends(requires_plan(PlanTier.PARTNER)),
+    session: Session = Depends(get_read_db),
     service: ContentCreatorService = Depends(get_content_creator_service),
     limit: int = 50,
-    offset: int = 0
+    offset: int = 0,
+    include: str | None = None
 ) -> CampaignListResponse:
     """
     Endpoint para listar las campañas del usuario.
@@ -165,20 +173,27 @@ async def list_campaigns(
         service: Servicio de content creator (inyectado)
         limit: Número máximo de resultados
         offset: Offset para paginación
+        include: Campos pesados a incluir, separados por comas (generated_content) o
+            "all"; por defecto se omiten (usar el endpoint de detalle)
     
     Returns:
         CampaignListResponse: Lista de campañas
     """
+    included = parse_include(include, LIST_HEAVY_FIELDS)
     campaigns = service.list_campaigns(
         user_id=current_user.id,
         session=session,
         limit=limit,
-        offset=offset
+        offset=offset,
+        include=included
     )
     
     # Convertir a schemas de respuesta
     campaign_responses = [
-        CampaignResponse(
+        CampaignResponse(**projected(
+            campaign,
+            LIST_HEAVY_FIELDS,
+            included,
             id=campaign.id,
             user_id=campaign.user_id,
             name=campaign.name,
@@ -190,12 +205,11 @@ async def list_campaigns(
             scheduled_at=campaign.scheduled_at,
             started_at=campaign.started_at,
             completed_at=campaign.completed_at,
-            generated_content=campaign.generated_content,
             error_message=campaign.error_message,
             arq_job_id=campaign.arq_job_id,
             created_at=campaign.created_at,
             updated_at=campaign.updated_at
-        )
+        ))
         for campaign in campaigns
     ]
     
@@ -213,8 +227,8 @@ async def list_campaigns(
 )
 async def get_campaign(
     campaign_id: int,
-    current_user: User = Depends(requires_plan(PlanTier.PARTNER)),
-    session: Session = Depends(get_session),
+    current_user: Principal = Depends(requires_plan(PlanTier.PARTNER)),
+    session: Session = Depends(get_read_db),
     service: ContentCreatorService = Depends(get_content_creator_service)
 ) -> CampaignResponse:
     """
@@ -275,7 +289,7 @@ async def get_campaign(
 async def get_campaign_job_status(
     campaign_id: int,
     arq_pool: ArqRedisDep,
-    current_user: User = Depends(requires_plan(PlanTier.PARTNER)),
+    current_user: Principal = Depends(requires_plan(PlanTier.PARTNER)),
     session: Session = Depends(get_session),
     service: ContentCreatorService = Depends(get_content_creator_service)
 ) -> CampaignJobStatusResponse:
@@ -48,7 +48,7 @@ class CampaignResponse(BaseModel):
     scheduled_at: Optional[datetime]
     started_at: Optional[datetime]
     completed_at: Optional[datetime]
-    generated_content: Optional[Dict[str, Any]]
+    generated_content: Optional[Dict[str, Any]] = None  # Omitido en el listado salvo include=
     error_message: Optional[str]
     arq_job_id: Optional[str]
     created_at: datetime
@@ -11,11 +11,12 @@ Principio: Single Responsibility (SRP)
 - No conoce detalles de HTTP (routes) ni de persistencia (repository)
 """
 
-from typing import Dict, Any, List, Optional, TYPE_CHECKING
+from typing import Dict, Any, FrozenSet, List, Optional, TYPE_CHECKING
 from datetime import datetime, timedelta
 from sqlmodel import Session, select
 
 from app.modules.content_creator.models import Campaign, CampaignStatus
+from app.core.projection import defer_heavy
 from app.models.user import User
 
 if TYPE_CHECKING:
@@ -23,6 +24,10 @@ if TYPE_CHECKING:
     from arq.jobs import Job
 
 
+# Columnas JSONB que los listados no cargan salvo `include=`
+LIST_HEAVY_FIELDS = ("generated_content",)
+
+
 class ContentCreatorService:
     """
     Servicio de negocio para el módulo Content Creator.
@@ -154,7 +159,8 @@ class ContentCreatorService:
         user_id: int,
         session: Session,
         limit: int = 50,
-        offset: int = 0
+        offset: int = 0,
+        include: FrozenSet[str] = frozenset()
     ) -> List[Campaign]:
         """
         Lista las campañas del usuario.
@@ -164,6 +170,8 @@ class ContentCreatorService:
             session: Sesión de base de datos
             limit: Número máximo de resultados
             offset: Offset para paginación
+            include: Columnas de LIST_HEAVY_FIELDS a cargar (el resto se
+                difiere y no se lee de la base de datos)
         
         Returns:
             List[Campaign]: Lista de campañas ordenadas por fecha de creación (más recientes primero)
@@ -171,6 +179,7 @@ class ContentCreatorService:
         statement = (
             select(Campaign)
             .where(Campaign.user_id == user_id)
+            .options(*defer_heavy(Campaign, LIST_HEAVY_FIELDS, include))
             .order_by(Campaign.created_at.desc())
             .limit(limit)
             .offset(offset)
@@ -248,6 +257,7 @@ class ContentCreatorService:
             Dict[str, Any]: Un diccionario con el estado del job, progreso, resultado y error.
         """
         from arq.jobs import Job
+        from app.workers.queues import queue_for
         
         campaign = self.get_campaign(campaign_id, user_id, session)
         if not campaign:
@@ -265,7 +275,7 @@ class ContentCreatorService:
         
         try:
             # Usar la nueva API de arq: Job(job_id, redis)
-            job = Job(campaign.arq_job_id, arq_pool)
+            job = Job(campaign.arq_job_id, arq_pool, _queue_name=queue_for("generate_influencer_content"))
             job_status = await job.status()
             
             # Si el job no existe en Redis (expiró), usar el estado de la DB
@@ -5,7 +5,7 @@ Define los endpoints HTTP para el módulo Content Planner.
 Solo maneja HTTP (request/response), delega la lógica a ContentPlannerService.
 """
 
-from fastapi import APIRouter, HTTPException, status, Depends, Header
+from fastapi import APIRouter, HTTPException, status, Depends, Header, Request, Response
 from typing import List
 from datetime import datetime, timedelta
 
@@ -18,19 +18,34 @@ from app.modules.content_planner.schemas import (
     N8nCallbackRequest,
     N8nCallbackResponse,
 )
-from app.modules.content_planner.service import ContentPlannerService
+from app.modules.content_planner.service import ContentPlannerService, LIST_HEAVY_FIELDS
 from app.modules.content_planner.models import ContentCampaign, CampaignStatus
 from app.api.deps import requires_plan
+from app.core.principal import Principal
+from app.core.projection import parse_include, projected
 from app.core.database import get_session
+from app.core.callbacks import KIND_PLANNER, apply_callbacks, enqueue_callback
+from app.core.conditional import compute_etag, conditional_get
 from app.core.config import settings
-from app.core.dependencies import ArqRedisDep
-from app.models.user import User, PlanTier
+from app.core.dependencies import ArqRedisDep, get_read_db
+from app.infrastructure.cache.redis import get_redis_client
+from app.workers.priority import enqueue_prioritized
+from app.models.user import PlanTier
 from sqlmodel import Session, select
 from typing import Optional
 
 
 router = APIRouter(prefix="/content-planner", tags=["content-planner"])
 
+# Estados en los que la respuesta de /status ya no cambia (mientras el job
+# corre, el progreso se estima por tiempo y cada sondeo es distinto)
+STABLE_CAMPAIGN_STATUSES = frozenset({
+    CampaignStatus.REVIEW_READY,
+    CampaignStatus.COMPLETED,
+    CampaignStatus.FAILED,
+    CampaignStatus.CANCELLED,
+})
+
 
 # Dependency para obtener ContentPlannerService
 def get_content_planner_service() -> ContentPlannerService:
@@ -48,7 +63,7 @@ def get_content_planner_service() -> ContentPlannerService:
 async def launch_monthly_campaign(
     campaign_data: ContentCampaignCreate,
     arq_pool: ArqRedisDep,
-    current_user: User = Depends(requires_plan(PlanTier.CEREBRO)),
+    current_user: Principal = Depends(requires_plan(PlanTier.CEREBRO)),
     session: Session = Depends(get_session),
     service: ContentPlannerService = Depends(get_content_planner_service)
 ) -> LaunchCampaignResponse:
@@ -93,9 +108,12 @@ async def launch_monthly_campaign(
         
         # Encolar tarea de generación de contenido en el worker
         try:
-            # Encolar tarea asíncrona usando pool singleton
-            job = await arq_pool.enqueue_job(
+            # Encolar tarea asíncrona usando pool singleton, con la
+            # prioridad del plan del usuario (PARTNER se drena primero)
+            job = await enqueue_prioritized(
+                arq_pool,
                 "schedule_monthly_content",
+                plan_tier=current_user.plan_tier,
                 campaign_id=campaign.id
             )
             
@@ -148,15 +166,17 @@ async def launch_monthly_campaign(
 @router.get(
     "/campaigns",
     response_model=ContentCampaignListResponse,
+    response_model_exclude_unset=True,
     summary="Listar campañas del usuario",
     description="Retorna todas las campañas de contenido mensual del usuario autenticado"
 )
 async def list_campaigns(
-    current_user: User = Depends(requires_plan(PlanTier.CEREBRO)),
-    session: Session = Depends(get_session),
+    current_user: Principal = Depends(requires_plan(PlanTier.CEREBRO)),
+    session: Session = Depends(get_read_db),
     service: ContentPlannerService = Depends(get_content_planner_service),
     limit: int = 50,
-    offset: int = 0
+    offset: int = 0,
+    include: str | None = None
 ) -> ContentCampaignListResponse:
     """
     Endpoint para listar las campañas del usuario.
@@ -169,20 +189,27 @@ async def list_campaigns(
         service: Servicio de content planner (inyectado)
         limit: Número máximo de resultados
         offset: Offset para paginación
+        include: Campos pesados a incluir, separados por comas (generated_content, campaign_metadata) o
+            "all"; por defecto se omiten (usar el endpoint de detalle)
     
     Returns:
         ContentCampaignListResponse: Lista de campañas
     """
+    included = parse_include(include, LIST_HEAVY_FIELDS)
     campaigns = service.list_campaigns(
         user_id=current_user.id,
         session=session,
         limit=limit,
-        offset=offset
+        offset=offset,
+        include=included
     )
     
     # Convertir a schemas de respuesta
     campaign_responses = [
-        ContentCampaignResponse(
+        ContentCampaignResponse(**projected(
+            campaign,
+            LIST_HEAVY_FIELDS,
+            included,
             id=campaign.id,
             user_id=campaign.user_id,
             month=campaign.month,
@@ -190,16 +217,14 @@ async def list_campaigns(
             themes=campaign.themes,
             target_platforms=campaign.target_platforms,
             status=campaign.status,
-            generated_content=campaign.generated_content,
             error_message=campaign.error_message,
             arq_job_id=campaign.arq_job_id,
             scheduled_at=campaign.scheduled_at,
             started_at=campaign.started_at,
             completed_at=campaign.completed_at,
-            campaign_metadata=campaign.campaign_metadata,
             created_at=campaign.created_at,
             updated_at=campaign.updated_at
-        )
+        ))
         for campaign in campaigns
     ]
     
@@ -217,8 +242,8 @@ async def list_campaigns(
 )
 async def get_campaign(
     campaign_id: int,
-    current_user: User = Depends(requires_plan(PlanTier.CEREBRO)),
-    session: Session = Depends(get_session),
+    current_user: Principal = Depends(requires_plan(PlanTier.CEREBRO)),
+    session: Session = Depends(get_read_db),
     service: ContentPlannerService = Depends(get_content_planner_service)
 ) -> ContentCampaignResponse:
     """
@@ -278,8 +303,10 @@ async def get_campaign(
 )
 async def get_campaign_job_status(
     campaign_id: int,
+    request: Request,
+    response: Response,
     arq_pool: ArqRedisDep,
-    current_user: User = Depends(requires_plan(PlanTier.CEREBRO)),
+    current_user: Principal = Depends(requires_plan(PlanTier.CEREBRO)),
     session: Session = Depends(get_session),
     service: ContentPlannerService = Depends(get_content_planner_service)
 ) -> CampaignStatusResponse:
@@ -294,19 +321,42 @@ async def get_campaign_job_status(
     3. Consulta el estado del job en Arq Redis
     4. Retorna el estado combinado (campaign status + job status)
     
+    En estados finales responde con ETag y devuelve 304 si el cliente ya
+    tiene esa versión (If-None-Match), sin consultar Arq ni cargar JSONB.
+    
     Args:
         arq_pool: Pool de Redis para Arq (inyectado automáticamente)
         campaign_id: ID de la campaña
+        request: Request (If-None-Match)
+        response: Response (recibe el ETag)
         current_user: Usuario autenticado (debe ser CEREBRO o superior)
         session: Sesión de base de datos
         service: Servicio de content planner (inyectado)
     
     Returns:
-        CampaignStatusResponse: Estado del job y de la campaña
+        CampaignStatusResponse: Estado del job y de la campaña (o 304)
     
     Raises:
         HTTPException 404: Si la campaña no existe o no pertenece al usuario
     """
+    # Versión de la campaña: un lookup por PK sin JSONB
+    version = service.get_campaign_version(
+        campaign_id=campaign_id,
+        user_id=current_user.id,
+        session=session
+    )
+    if not version:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Campaña con ID {campaign_id} no encontrada"
+        )
+    campaign_status, updated_at = version
+    if campaign_status in STABLE_CAMPAIGN_STATUSES:
+        etag = compute_etag("content-planner:status", campaign_id, campaign_status.value, updated_at)
+        not_modified = conditional_get(request, response, etag)
+        if not_modified is not None:
+            return not_modified
+    
     # Obtener campaña y verificar propiedad
     campaign = service.get_campaign(
         campaign_id=campaign_id,
@@ -373,15 +423,15 @@ async def get_campaign_job_status(
 @router.post(
     "/webhook/callback",
     response_model=N8nCallbackResponse,
-    status_code=status.HTTP_200_OK,
+    status_code=status.HTTP_202_ACCEPTED,
     summary="Callback de n8n con contenido generado",
-    description="Endpoint público para recibir callbacks de n8n con el contenido generado. Requiere autenticación mediante header X-BAI-Secret."
+    description="Endpoint público para recibir callbacks de n8n con el contenido generado. Requiere autenticación mediante header X-BAI-Secret. Responde 202 y aplica el callback en segundo plano."
 )
 async def n8n_callback(
     callback_data: N8nCallbackRequest,
+    response: Response,
     x_bai_secret: Optional[str] = Header(None, alias="X-BAI-Secret"),
-    session: Session = Depends(get_session),
-    service: ContentPlannerService = Depends(get_content_planner_service)
+    session: Session = Depends(get_session)
 ) -> N8nCallbackResponse:
     """
     Endpoint para recibir callbacks de n8n con contenido generado.
@@ -392,22 +442,26 @@ async def n8n_callback(
     Flujo:
     1. n8n genera el contenido (4 Posts + 1 Reel)
     2. n8n hace POST a este endpoint con el contenido generado
-    3. Este endpoint actualiza la campaña en la DB con el contenido
-    4. La campaña queda en estado REVIEW_READY para que el usuario la revise
+    3. Este endpoint valida el secret, encola el callback en el stream de
+       callbacks y responde 202 (fast-ack, ver app/core/callbacks.py)
+    4. El worker actualiza la campaña con el contenido (COMPLETED) o la
+       marca FAILED si el callback trae `error`
+    
+    Sin Redis el callback se aplica en línea (200).
     
     Args:
         callback_data: Datos del callback de n8n (campaign_id, generated_content, error)
+        response: Response inyectada (200 si se aplica en línea)
         x_bai_secret: Header de seguridad (debe coincidir con INTERNAL_WEBHOOK_SECRET)
-        session: Sesión de base de datos
-        service: Servicio de content planner (inyectado)
+        session: Sesión de base de datos (solo para el camino en línea)
     
     Returns:
         N8nCallbackResponse: Confirmación de recepción
     
     Raises:
         HTTPException 401: Si el secret no coincide
-        HTTPException 404: Si la campaña no existe
         HTTPException 400: Si los datos son inválidos
+        HTTPException 404: Si la campaña no existe (solo en el camino en línea)
     """
     # Validar secret (seguridad)
     if not settings.INTERNAL_WEBHOOK_SECRET:
@@ -424,59 +478,48 @@ async def n8n_callback(
             detail="Secret inválido. El callback debe incluir el header 'X-BAI-Secret' correcto."
         )
     
+    # Validar que haya contenido generado (salvo callbacks de error)
+    if not callback_data.error and not callback_data.generated_content:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="El callback debe incluir 'generated_content' con el contenido generado"
+        )
+    
+    # El secret no viaja al stream
+    payload = callback_data.model_dump(exclude={"secret_token"})
+    
     try:
-        # Obtener campaña (sin verificar user_id porque es un callback interno)
-        campaign = session.exec(
-            select(ContentCampaign).where(ContentCampaign.id == callback_data.campaign_id)
-        ).first()
-        
-        if not campaign:
+        await enqueue_callback(get_redis_client(), KIND_PLANNER, callback_data.campaign_id, payload)
+    except Exception as e:
+        print(f"⚠️  WARNING: Callback stream no disponible ({str(e)}); aplicando campaña {callback_data.campaign_id} en línea")
+        try:
+            counts = apply_callbacks(session, [{
+                "entry_id": "inline",
+                "kind": KIND_PLANNER,
+                "key": callback_data.campaign_id,
+                "user_id": None,
+                "payload": payload,
+            }])
+        except Exception as apply_error:
             raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"Campaña con ID {callback_data.campaign_id} no encontrada"
-            )
-        
-        # Si hay error en el callback, marcar como FAILED
-        if callback_data.error:
-            service.update_campaign_status(
-                campaign_id=callback_data.campaign_id,
-                status=CampaignStatus.FAILED,
-                session=session,
-                error_message=callback_data.error
-            )
-            
-            return N8nCallbackResponse(
-                success=False,
-                message=f"Campaña {callback_data.campaign_id} marcada como fallida: {callback_data.error}",
-                campaign_id=callback_data.campaign_id
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Error procesando callback de n8n: {str(apply_error)}"
             )
-        
-        # Validar que haya contenido generado
-        if not callback_data.generated_content:
+        if not counts["campaigns_updated"]:
             raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="El callback debe incluir 'generated_content' con el contenido generado"
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Campaña con ID {callback_data.campaign_id} no encontrada"
             )
-        
-        # Actualizar campaña con contenido generado y estado COMPLETED
-        service.update_campaign_status(
-            campaign_id=callback_data.campaign_id,
-            status=CampaignStatus.COMPLETED,
-            session=session,
-            generated_content=callback_data.generated_content
-        )
-        
+        response.status_code = status.HTTP_200_OK
         return N8nCallbackResponse(
-            success=True,
-            message=f"Campaña {callback_data.campaign_id} actualizada. Contenido generado y listo.",
+            success=not callback_data.error,
+            message=f"Campaña {callback_data.campaign_id} actualizada.",
             campaign_id=callback_data.campaign_id
         )
     
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Error procesando callback de n8n: {str(e)}"
-        )
+    return N8nCallbackResponse(
+        success=True,
+        message=f"Callback de la campaña {callback_data.campaign_id} recibido; se aplicará en segundo plano.",
+        campaign_id=callback_data.campaign_id
+    )
 
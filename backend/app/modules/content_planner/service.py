@@ -11,16 +11,21 @@ Principio: Single Responsibility (SRP)
 - No conoce detalles de HTTP (routes) ni de persistencia (repository)
 """
 
-from typing import Dict, Any, List, Optional, TYPE_CHECKING
+from typing import Dict, Any, FrozenSet, List, Optional, Tuple, TYPE_CHECKING
 from datetime import datetime
 from sqlmodel import Session, select
 
 from app.modules.content_planner.models import ContentCampaign, CampaignStatus
+from app.core.projection import defer_heavy
 
 if TYPE_CHECKING:
     from arq import ArqRedis
 
 
+# Columnas JSONB que los listados no cargan salvo `include=`
+LIST_HEAVY_FIELDS = ("generated_content", "campaign_metadata")
+
+
 class ContentPlannerService:
     """
     Servicio de negocio para el módulo Content Planner.
@@ -154,12 +159,39 @@ class ContentPlannerService:
         )
         return session.exec(statement).first()
     
+    def get_campaign_version(
+        self,
+        campaign_id: int,
+        user_id: int,
+        session: Session
+    ) -> Optional[Tuple[CampaignStatus, Optional[datetime]]]:
+        """
+        Versión de una campaña (estado y updated_at) sin cargar sus JSONB.
+        
+        Lookup por clave primaria para ETags de los endpoints de polling.
+        
+        Args:
+            campaign_id: ID de la campaña
+            user_id: ID del usuario (para verificación de propiedad)
+            session: Sesión de base de datos
+        
+        Returns:
+            (status, updated_at) o None si no existe o no pertenece al usuario
+        """
+        statement = select(ContentCampaign.status, ContentCampaign.updated_at).where(
+            ContentCampaign.id == campaign_id,
+            ContentCampaign.user_id == user_id
+        )
+        row = session.exec(statement).first()
+        return tuple(row) if row else None
+    
     def list_campaigns(
         self,
         user_id: int,
         session: Session,
         limit: int = 50,
-        offset: int = 0
+        offset: int = 0,
+        include: FrozenSet[str] = frozenset()
     ) -> List[ContentCampaign]:
         """
         Lista las campañas del usuario.
@@ -169,6 +201,8 @@ class ContentPlannerService:
             session: Sesión de base de datos
             limit: Número máximo de resultados
             offset: Offset para paginación
+            include: Columnas de LIST_HEAVY_FIELDS a cargar (el resto se
+                difiere y no se lee de la base de datos)
         
         Returns:
             List[ContentCampaign]: Lista de campañas ordenadas por fecha de creación (más recientes primero)
@@ -176,6 +210,7 @@ class ContentPlannerService:
         statement = (
             select(ContentCampaign)
             .where(ContentCampaign.user_id == user_id)
+            .options(*defer_heavy(ContentCampaign, LIST_HEAVY_FIELDS, include))
             .order_by(ContentCampaign.created_at.desc())
             .limit(limit)
             .offset(offset)
@@ -287,9 +322,10 @@ class ContentPlannerService:
         
         try:
             from arq.jobs import Job
+            from app.workers.queues import queue_for
             
             # Usar la nueva API de arq: Job(job_id, redis)
-            job = Job(campaign.arq_job_id, arq_pool)
+            job = Job(campaign.arq_job_id, arq_pool, _queue_name=queue_for("schedule_monthly_content"))
             job_status = await job.status()
             
             # Si el job no existe en Redis (expiró), usar el estado de la DB
@@ -5,7 +5,7 @@ Define los endpoints HTTP para el módulo Data Mining.
 Solo maneja HTTP (request/response), delega la lógica a DataMiningService.
 """
 
-from fastapi import APIRouter, HTTPException, status, Depends
+from fastapi import APIRouter, HTTPException, status, Depends, Request, Response
 from typing import List
 from datetime import datetime, timedelta
 
@@ -17,17 +17,29 @@ from app.modules.data_mining.schemas import (
     ExtractionQueryStatusResponse,
     ExtractionQueryResultsResponse
 )
-from app.modules.data_mining.service import DataMiningService
+from app.modules.data_mining.service import DataMiningService, LIST_HEAVY_FIELDS
 from app.modules.data_mining.models import ExtractionQuery, ExtractionStatus
 from app.api.deps import requires_plan
+from app.core.principal import Principal
+from app.core.projection import parse_include, projected
+from app.core.conditional import compute_etag, conditional_get
 from app.core.database import get_session
-from app.core.dependencies import ArqRedisDep
-from app.models.user import User, PlanTier
+from app.core.dependencies import ArqRedisDep, get_read_db
+from app.workers.priority import enqueue_prioritized
+from app.models.user import PlanTier
 from sqlmodel import Session
 
 
 router = APIRouter(prefix="/data-mining", tags=["data-mining"])
 
+# Estados en los que la respuesta de /status ya no cambia (mientras el job
+# corre, cada sondeo puede traer otro estado de Arq)
+STABLE_QUERY_STATUSES = frozenset({
+    ExtractionStatus.COMPLETED,
+    ExtractionStatus.FAILED,
+    ExtractionStatus.CANCELLED,
+})
+
 
 # Dependency para obtener DataMiningService
 def get_data_mining_service() -> DataMiningService:
@@ -45,7 +57,7 @@ def get_data_mining_service() -> DataMiningService:
 async def launch_query(
     query_data: ExtractionQueryCreate,
     arq_pool: ArqRedisDep,
-    current_user: User = Depends(requires_plan(PlanTier.CEREBRO)),
+    current_user: Principal = Depends(requires_plan(PlanTier.CEREBRO)),
     session: Session = Depends(get_session),
     service: DataMiningService = Depends(get_data_mining_service)
 ) -> LaunchQueryResponse:
@@ -86,9 +98,12 @@ async def launch_query(
         
         # Encolar tarea de extracción en el worker
         try:
-            # Encolar tarea asíncrona usando pool singleton
-            job = await arq_pool.enqueue_job(
+            # Encolar tarea asíncrona usando pool singleton, con la
+            # prioridad del plan del usuario (PARTNER se drena primero)
+            job = await enqueue_prioritized(
+                arq_pool,
                 "launch_deep_extraction",
+                plan_tier=current_user.plan_tier,
                 query_id=query.id
             )
             
@@ -141,15 +156,17 @@ async def launch_query(
 @router.get(
     "/queries",
     response_model=ExtractionQueryListResponse,
+    response_model_exclude_unset=True,
     summary="Listar queries del usuario",
     description="Retorna todas las queries de extracción del usuario autenticado"
 )
 async def list_queries(
-    current_user: User = Depends(requires_plan(PlanTier.CEREBRO)),
-    session: Session = Depends(get_session),
+    current_user: Principal = Depends(requires_plan(PlanTier.CEREBRO)),
+    session: Session = Depends(get_read_db),
     service: DataMiningService = Depends(get_data_mining_service),
     limit: int = 50,
-    offset: int = 0
+    offset: int = 0,
+    include: str | None = None
 ) -> ExtractionQueryListResponse:
     """
     Endpoint para listar las queries del usuario.
@@ -162,33 +179,38 @@ async def list_queries(
         service: Servicio de data mining (inyectado)
         limit: Número máximo de resultados
         offset: Offset para paginación
+        include: Campos pesados a incluir, separados por comas (results, query_metadata) o
+            "all"; por defecto se omiten (usar el endpoint de detalle)
     
     Returns:
         ExtractionQueryListResponse: Lista de queries
     """
+    included = parse_include(include, LIST_HEAVY_FIELDS)
     queries = service.list_queries(
         user_id=current_user.id,
         session=session,
         limit=limit,
-        offset=offset
+        offset=offset,
+        include=included
     )
     
     # Convertir a schemas de respuesta
     query_responses = [
-        ExtractionQueryResponse(
+        ExtractionQueryResponse(**projected(
+            query,
+            LIST_HEAVY_FIELDS,
+            included,
             id=query.id,
             user_id=query.user_id,
             search_topic=query.search_topic,
             status=query.status,
-            results=query.results,
             error_message=query.error_message,
             arq_job_id=query.arq_job_id,
             started_at=query.started_at,
             completed_at=query.completed_at,
-            query_metadata=query.query_metadata,
             created_at=query.created_at,
             updated_at=query.updated_at
-        )
+        ))
         for query in queries
     ]
     
@@ -206,7 +228,7 @@ async def list_queries(
 )
 async def get_query(
     query_id: int,
-    current_user: User = Depends(requires_plan(PlanTier.CEREBRO)),
+    current_user: Principal = Depends(requires_plan(PlanTier.CEREBRO)),
     session: Session = Depends(get_session),
     service: DataMiningService = Depends(get_data_mining_service)
 ) -> ExtractionQueryResponse:
@@ -263,8 +285,10 @@ async def get_query(
 )
 async def get_query_job_status(
     query_id: int,
+    request: Request,
+    response: Response,
     arq_pool: ArqRedisDep,
-    current_user: User = Depends(requires_plan(PlanTier.CEREBRO)),
+    current_user: Principal = Depends(requires_plan(PlanTier.CEREBRO)),
     session: Session = Depends(get_session),
     service: DataMiningService = Depends(get_data_mining_service)
 ) -> ExtractionQueryStatusResponse:
@@ -279,19 +303,42 @@ async def get_query_job_status(
     3. Consulta el estado del job en Arq Redis
     4. Retorna el estado combinado (query status + job status)
     
+    En estados finales responde con ETag y devuelve 304 si el cliente ya
+    tiene esa versión (If-None-Match), sin consultar Arq ni cargar `results`.
+    
     Args:
         arq_pool: Pool de Redis para Arq (inyectado automáticamente)
         query_id: ID de la query
+        request: Request (If-None-Match)
+        response: Response (recibe el ETag)
         current_user: Usuario autenticado (debe ser CEREBRO o superior)
         session: Sesión de base de datos
         service: Servicio de data mining (inyectado)
     
     Returns:
-        ExtractionQueryStatusResponse: Estado del job y de la query
+        ExtractionQueryStatusResponse: Estado del job y de la query (o 304)
     
     Raises:
         HTTPException 404: Si la query no existe o no pertenece al usuario
     """
+    # Versión de la query: un lookup por PK sin JSONB
+    version = service.get_query_version(
+        query_id=query_id,
+        user_id=current_user.id,
+        session=session
+    )
+    if not version:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Query con ID {query_id} no encontrada"
+        )
+    query_status, updated_at = version
+    if query_status in STABLE_QUERY_STATUSES:
+        etag = compute_etag("data-mining:status", query_id, query_status.value, updated_at)
+        not_modified = conditional_get(request, response, etag)
+        if not_modified is not None:
+            return not_modified
+    
     # Obtener query y verificar propiedad
     query = service.get_query(
         query_id=query_id,
@@ -363,7 +410,7 @@ async def get_query_job_status(
 )
 async def get_query_results(
     query_id: int,
-    current_user: User = Depends(requires_plan(PlanTier.CEREBRO)),
+    current_user: Principal = Depends(requires_plan(PlanTier.CEREBRO)),
     session: Session = Depends(get_session),
     service: DataMiningService = Depends(get_data_mining_service)
 ) -> ExtractionQueryResultsResponse:
@@ -11,16 +11,21 @@ Principio: Single Responsibility (SRP)
 - No conoce detalles de HTTP (routes) ni de persistencia (repository)
 """
 
-from typing import Dict, Any, List, Optional, TYPE_CHECKING
+from typing import Dict, Any, FrozenSet, List, Optional, Tuple, TYPE_CHECKING
 from datetime import datetime, timedelta
 from sqlmodel import Session, select
 
 from app.modules.data_mining.models import ExtractionQuery, ExtractionStatus
+from app.core.projection import defer_heavy
 
 if TYPE_CHECKING:
     from arq import ArqRedis
 
 
+# Columnas JSONB que los listados no cargan salvo `include=`
+LIST_HEAVY_FIELDS = ("results", "query_metadata")
+
+
 class DataMiningService:
     """
     Servicio de negocio para el módulo Data Mining.
@@ -130,12 +135,39 @@ class DataMiningService:
         )
         return session.exec(statement).first()
     
+    def get_query_version(
+        self,
+        query_id: int,
+        user_id: int,
+        session: Session
+    ) -> Optional[Tuple[ExtractionStatus, Optional[datetime]]]:
+        """
+        Versión de una query (estado y updated_at) sin cargar `results`.
+        
+        Lookup por clave primaria para ETags de los endpoints de polling.
+        
+        Args:
+            query_id: ID de la query
+            user_id: ID del usuario (para verificación de propiedad)
+            session: Sesión de base de datos
+        
+        Returns:
+            (status, updated_at) o None si no existe o no pertenece al usuario
+        """
+        statement = select(ExtractionQuery.status, ExtractionQuery.updated_at).where(
+            ExtractionQuery.id == query_id,
+            ExtractionQuery.user_id == user_id
+        )
+        row = session.exec(statement).first()
+        return tuple(row) if row else None
+    
     def list_queries(
         self,
         user_id: int,
         session: Session,
         limit: int = 50,
-        offset: int = 0
+        offset: int = 0,
+        include: FrozenSet[str] = frozenset()
     ) -> List[ExtractionQuery]:
         """
         Lista las queries del usuario.
@@ -145,6 +177,8 @@ class DataMiningService:
             session: Sesión de base de datos
             limit: Número máximo de resultados
             offset: Offset para paginación
+            include: Columnas de LIST_HEAVY_FIELDS a cargar (el resto se
+                difiere y no se lee de la base de datos)
         
         Returns:
             List[ExtractionQuery]: Lista de queries ordenadas por fecha de creación (más recientes primero)
@@ -152,6 +186,7 @@ class DataMiningService:
         statement = (
             select(ExtractionQuery)
             .where(ExtractionQuery.user_id == user_id)
+            .options(*defer_heavy(ExtractionQuery, LIST_HEAVY_FIELDS, include))
             .order_by(ExtractionQuery.created_at.desc())
             .limit(limit)
             .offset(offset)
@@ -253,9 +288,10 @@ class DataMiningService:
         
         try:
             from arq.jobs import Job
+            from app.workers.queues import queue_for
             
             # Usar la nueva API de arq: Job(job_id, redis)
-            job = Job(query.arq_job_id, arq_pool)
+            job = Job(query.arq_job_id, arq_pool, _queue_name=queue_for("launch_deep_extraction"))
             job_status = await job.status()
             
             # Si el job no existe en Redis (expiró), usar el estado de la DB
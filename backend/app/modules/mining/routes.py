@@ -7,8 +7,8 @@ from pydantic import BaseModel
 from typing import Optional
 
 from app.api.deps import requires_feature
+from app.core.principal import Principal
 from app.core.database import get_session
-from app.models.user import User
 from app.services.mining_report import generate_mining_report
 from sqlmodel import Session
 
@@ -31,7 +31,7 @@ router = APIRouter(prefix="/api/v1/mining", tags=["mining"])
 )
 async def run_analysis(
     payload: MiningAnalysisRequest,
-    current_user: User = Depends(requires_feature("access_mining")),
+    current_user: Principal = Depends(requires_feature("access_mining")),
     session: Session = Depends(get_session),
 ) -> MiningAnalysisResponse:
     """
@@ -8,7 +8,6 @@ Agnostic to context - works for both internal chatbot and external widgets.
 import os
 import re
 import httpx
-import google.generativeai as genai
 from typing import List, Dict, Any, Optional, Tuple
 
 
@@ -77,7 +76,11 @@ class NeuralCore:
         if not self.api_key:
             raise ValueError("GOOGLE_API_KEY not found in environment or provided")
         
+        # Lazy SDK import: only processes that build a NeuralCore pay for it
+        import google.generativeai as genai
+
         genai.configure(api_key=self.api_key)
+        self._genai = genai
     
     def generate_with_history(
         self,
@@ -123,7 +126,7 @@ class NeuralCore:
         final_prompt = f"{conversation_context}\n[User]: {current_message}\n[AI]:"
         
         # Create model with system instruction
-        model = genai.GenerativeModel(
+        model = self._genai.GenerativeModel(
             self.MODEL_NAME,
             system_instruction=system_instruction
         )
@@ -162,13 +165,13 @@ class NeuralCore:
             # Combine context (History + System) with current message
             final_prompt = f"{context_prompt}\n[Usuario]: {user_message}\n[Agente]:"
             
-            model = genai.GenerativeModel(self.MODEL_NAME)
+            model = self._genai.GenerativeModel(self.MODEL_NAME)
             response = model.generate_content(final_prompt)
             return response.text
         
         # Pattern 2: Simple stateless (backward compatibility)
         if user_input and system_instruction:
-            model = genai.GenerativeModel(
+            model = self._genai.GenerativeModel(
                 self.MODEL_NAME,
                 system_instruction=system_instruction
             )
@@ -11,6 +11,7 @@ from typing import Optional, Dict, Any
 from dataclasses import dataclass
 
 from app.services.tools.search import search_brave
+from app.core.deadline import remaining_timeout
 
 
 @dataclass
@@ -78,7 +79,8 @@ class ToolExecutor:
             return ToolResult(executed=False)
         
         try:
-            async with httpx.AsyncClient(timeout=cls.N8N_TIMEOUT) as client:
+            # Cap n8n timeout to the remaining request deadline
+            async with httpx.AsyncClient(timeout=remaining_timeout(cls.N8N_TIMEOUT)) as client:
                 response = await client.post(
                     cls.N8N_WEBHOOK_URL,
                     json={"user_input": user_input}
@@ -178,28 +180,16 @@ class ToolExecutor:
         # Execute search
         search_results = await search_brave(search_query, limit=5)
         
-        # Log search to database if session provided
-        if session and user_id:
-            from app.models.log import SearchLog
+        # Log search via the telemetry buffer (batched into SearchLog by the
+        # collector worker) instead of a commit inside the chat request
+        if user_id:
             if search_results and not search_results.startswith("Search failed"):
                 summary = search_results[:500] if len(search_results) > 500 else search_results
-                log_entry = SearchLog(
-                    query=search_query,
-                    summary=summary,
-                    status="completed",
-                    user_id=user_id
-                )
-                session.add(log_entry)
-                session.commit()
+                status = "completed"
             else:
-                log_entry = SearchLog(
-                    query=search_query,
-                    summary=f"Search failed: {search_results[:200] if search_results else 'Unknown error'}",
-                    status="failed",
-                    user_id=user_id
-                )
-                session.add(log_entry)
-                session.commit()
+                summary = f"Search failed: {search_results[:200] if search_results else 'Unknown error'}"
+                status = "failed"
+            await cls._log_search(user_id, search_query, summary, status, session)
         
         # Build context update for Gemini
         if search_results and not search_results.startswith("Search failed"):
@@ -224,4 +214,27 @@ class ToolExecutor:
                 error="Search failed",
                 metadata={"query": search_query}
             )
-
+    
+    @classmethod
+    async def _log_search(
+        cls,
+        user_id: int,
+        query: str,
+        summary: str,
+        status: str,
+        session: Optional[Any] = None
+    ) -> None:
+        """Append a search event to the telemetry stream (DB fallback if Redis is down)."""
+        from app.infrastructure.cache.redis import get_redis_client
+        from app.modules.analytics.events import emit_search_event
+        
+        try:
+            await emit_search_event(get_redis_client(), user_id, query, summary, status)
+            return
+        except Exception as e:
+            print(f"Telemetry buffer unavailable, writing SearchLog directly: {e}")
+        
+        if session is not None:
+            from app.models.log import SearchLog
+            session.add(SearchLog(query=query, summary=summary, status=status, user_id=user_id))
+            session.commit()
@@ -0,0 +1,330 @@
+"""
+Media Extraction - URL del media generado a partir de callbacks
+
+Los proveedores de generación (Fal.ai, HeyGen, DALL·E, PiAPI, ...) y n8n
+notifican el media generado con payloads de formato libre. Este módulo
+concentra la extracción de la URL para que la usen tanto los endpoints de
+callback como el consumer que aplica los callbacks encolados
+(app/core/callbacks.py).
+
+La extracción es por reglas:
+
+1. Una huella barata del payload (solo claves de primer nivel) elige la
+   regla del proveedor
+2. Cada regla es una lista de rutas precompiladas (`data[0].url`) que se
+   resuelven con accesos directos, sin recorrer el payload
+3. Solo si ninguna ruta da una URL se usa la búsqueda recursiva
+   heurística, acotada en profundidad y en nodos visitados
+
+Para añadir un proveedor: una función de huella y una MediaRule en
+MEDIA_RULES (antes de la regla genérica).
+"""
+
+import re
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+
+# ============================================================================
+# RUTAS PRECOMPILADAS
+# ============================================================================
+
+PathStep = Union[str, int]
+
+_STEP_PATTERN = re.compile(r"([^.\[\]]+)|\[(\d+)\]")
+
+
+def compile_path(expression: str) -> Tuple[PathStep, ...]:
+    """
+    Compila una ruta tipo `data.output.image_urls[0]` a una tupla de pasos.
+
+    Args:
+        expression: Claves separadas por puntos e índices entre corchetes
+
+    Returns:
+        Tupla de claves (str) e índices (int)
+
+    Raises:
+        ValueError si la expresión no es válida
+    """
+    steps: List[PathStep] = []
+    position = 0
+    for match in _STEP_PATTERN.finditer(expression):
+        separator = expression[position:match.start()]
+        if separator not in ("", "."):
+            raise ValueError(f"Ruta de media inválida: {expression!r}")
+        key, index = match.groups()
+        steps.append(key if key is not None else int(index))
+        position = match.end()
+    if not steps or position != len(expression):
+        raise ValueError(f"Ruta de media inválida: {expression!r}")
+    return tuple(steps)
+
+
+def resolve_path(payload: Any, steps: Tuple[PathStep, ...]) -> Any:
+    """Sigue una ruta compilada; None si algún paso no existe."""
+    value = payload
+    for step in steps:
+        if isinstance(step, int):
+            if not isinstance(value, list) or step >= len(value):
+                return None
+            value = value[step]
+        else:
+            if not isinstance(value, dict):
+                return None
+            value = value.get(step)
+    return value
+
+
+def _is_http_url(value: Any) -> bool:
+    return isinstance(value, str) and value.startswith(("http://", "https://"))
+
+
+def _any_value(value: Any) -> bool:
+    # Campo explícito de URL: se acepta cualquier valor no vacío
+    return bool(value) and not isinstance(value, (dict, list))
+
+
+def _not_webhook(value: Any) -> bool:
+    # `url` de primer nivel puede ser el webhook de retorno, no el media
+    return _is_http_url(value) and "webhook" not in value.lower()
+
+
+@dataclass(frozen=True)
+class MediaPath:
+    """Ruta compilada y validador del valor encontrado."""
+    expression: str
+    steps: Tuple[PathStep, ...]
+    accept: Callable[[Any], bool]
+
+
+def _paths(*expressions: str, accept: Callable[[Any], bool] = _any_value) -> Tuple[MediaPath, ...]:
+    return tuple(MediaPath(expression, compile_path(expression), accept) for expression in expressions)
+
+
+@dataclass(frozen=True)
+class MediaRule:
+    """Regla de extracción de un proveedor."""
+    provider: str
+    matches: Callable[[Dict[str, Any]], bool]  # Huella: solo claves de primer nivel
+    paths: Tuple[MediaPath, ...]
+
+
+# ============================================================================
+# REGISTRO DE REGLAS POR PROVEEDOR
+# ============================================================================
+
+# Fal.ai (respuesta directa o `payload` del webhook de la cola) y campos
+# genéricos, en el orden de prioridad histórico del adaptador
+_FAL_PATHS = (
+    _paths("video.url", "video.file", "video.file_url")
+    + _paths("video", accept=_is_http_url)
+    + _paths("images[0].url", "images[0].file", "images[0].file_url", "images[0].image_url")
+    + _paths("images[0]", accept=_is_http_url)
+    + _paths("image.url", "image.file", "image.file_url", "image.image_url")
+    + _paths("image", accept=_is_http_url)
+)
+_GENERIC_PATHS = _paths("media_url") + _paths("url", accept=_not_webhook)
+
+
+def _is_heygen(payload: Dict[str, Any]) -> bool:
+    # Webhook: {"event_type": "avatar_video.success", "event_data": {...}}
+    # Status API: {"code": 100, "data": {"video_id": ..., "video_url": ...}}
+    event_type = payload.get("event_type")
+    if isinstance(event_type, str) and event_type.startswith("avatar_video"):
+        return True
+    data = payload.get("data")
+    return isinstance(data, dict) and "video_id" in data
+
+
+def _is_piapi(payload: Dict[str, Any]) -> bool:
+    # {"code": 200, "data": {"task_id": ..., "output": {...}}}
+    data = payload.get("data")
+    return isinstance(data, dict) and "task_id" in data
+
+
+def _is_dalle(payload: Dict[str, Any]) -> bool:
+    # {"created": 1700000000, "data": [{"url": ..., "revised_prompt": ...}]}
+    return "created" in payload and isinstance(payload.get("data"), list)
+
+
+def _is_fal_webhook(payload: Dict[str, Any]) -> bool:
+    # {"request_id": ..., "status": "OK", "payload": {"video": {...}}}
+    return "request_id" in payload and isinstance(payload.get("payload"), dict)
+
+
+MEDIA_RULES: Tuple[MediaRule, ...] = (
+    MediaRule(
+        provider="heygen",
+        matches=_is_heygen,
+        paths=_paths("event_data.url", "event_data.video_url", "data.video_url", "data.url", "video_url"),
+    ),
+    MediaRule(
+        provider="piapi",
+        matches=_is_piapi,
+        paths=_paths(
+            "data.output.video_url",
+            "data.output.image_url",
+            "data.output.image_urls[0]",
+            "data.output.url",
+        ),
+    ),
+    MediaRule(
+        provider="dalle",
+        matches=_is_dalle,
+        paths=_paths("data[0].url"),
+    ),
+    MediaRule(
+        provider="fal_webhook",
+        matches=_is_fal_webhook,
+        paths=tuple(
+            MediaPath(f"payload.{path.expression}", ("payload",) + path.steps, path.accept)
+            for path in _FAL_PATHS + _GENERIC_PATHS
+        ),
+    ),
+)
+
+# Sin huella reconocida (Fal.ai directo, n8n, PiAPI plano, ...)
+GENERIC_RULE = MediaRule(provider="generic", matches=lambda payload: True, paths=_FAL_PATHS + _GENERIC_PATHS)
+
+
+# ============================================================================
+# FALLBACK HEURÍSTICO (ACOTADO)
+# ============================================================================
+
+# Cotas de la búsqueda recursiva: payloads grandes (logs, metadatos) no
+# deben costar más que esto por callback
+FALLBACK_MAX_DEPTH = 10
+FALLBACK_MAX_NODES = 2_000
+
+_URL_PATTERN = re.compile(r'https?://[^\s"\'<>)]+')
+_PRIORITY_KEYS = ('url', 'file', 'file_url', 'media_url', 'image_url', 'video_url', 'src', 'href')
+
+
+def find_media_url_heuristic(
+    payload: Any,
+    max_depth: int = FALLBACK_MAX_DEPTH,
+    max_nodes: Optional[int] = FALLBACK_MAX_NODES,
+) -> str | None:
+    """
+    Busca recursivamente la primera URL del payload.
+
+    Recorre primero las claves que sugieren media y después el resto de
+    valores; devuelve la primera URL http(s) encontrada en un string.
+
+    Args:
+        payload: Payload (cualquier estructura JSON)
+        max_depth: Profundidad máxima
+        max_nodes: Nodos visitados como máximo (None = sin tope)
+
+    Returns:
+        URL encontrada o None
+    """
+    budget = [max_nodes if max_nodes is not None else -1]
+
+    def walk(obj: Any, depth: int) -> str | None:
+        if depth > max_depth or budget[0] == 0:
+            return None
+        budget[0] -= 1
+
+        if isinstance(obj, str):
+            match = _URL_PATTERN.search(obj)
+            return match.group(0) if match else None
+
+        if isinstance(obj, dict):
+            # Primero las claves que sugieren media
+            for key in _PRIORITY_KEYS:
+                if key in obj:
+                    result = walk(obj[key], depth + 1)
+                    if result:
+                        return result
+            for key, value in obj.items():
+                if key in _PRIORITY_KEYS:
+                    continue
+                result = walk(value, depth + 1)
+                if result:
+                    return result
+
+        elif isinstance(obj, list):
+            for item in obj:
+                result = walk(item, depth + 1)
+                if result:
+                    return result
+
+        return None
+
+    return walk(payload, 0)
+
+
+# ============================================================================
+# API
+# ============================================================================
+
+def select_media_rule(payload: Dict[str, Any]) -> MediaRule:
+    """Regla del proveedor según la huella del payload (o la genérica)."""
+    for rule in MEDIA_RULES:
+        if rule.matches(payload):
+            return rule
+    return GENERIC_RULE
+
+
+def _match_paths(payload: Dict[str, Any], paths: Tuple[MediaPath, ...]) -> str | None:
+    for path in paths:
+        # La mayoría de rutas no aplican: descartarlas por la clave raíz
+        if path.steps[0] not in payload:
+            continue
+        value = resolve_path(payload, path.steps)
+        if value is not None and path.accept(value):
+            return str(value)
+    return None
+
+
+def match_media_url(payload: Dict[str, Any]) -> Tuple[str | None, str]:
+    """
+    Extrae la URL del media e indica qué regla la encontró.
+
+    Args:
+        payload: Diccionario JSON del callback (cualquier estructura)
+
+    Returns:
+        (url o None, proveedor de la regla | "generic" | "fallback" | "none")
+    """
+    if not payload or not isinstance(payload, dict):
+        return None, "none"
+
+    rule = select_media_rule(payload)
+    url = _match_paths(payload, rule.paths)
+    if url:
+        return url, rule.provider
+
+    # Huella de proveedor pero formato inesperado: probar las rutas genéricas
+    if rule is not GENERIC_RULE:
+        url = _match_paths(payload, GENERIC_RULE.paths)
+        if url:
+            return url, GENERIC_RULE.provider
+
+    url = find_media_url_heuristic(payload)
+    return (url, "fallback") if url else (None, "none")
+
+
+def extract_media_url_from_payload(payload: Dict[str, Any]) -> str | None:
+    """
+    Adaptador Universal: Extrae la URL del media desde cualquier formato de callback.
+
+    Compatible con:
+    - Fal.ai: { "video": { "url": "..." } } o { "images": [{ "url": "..." }] },
+      también dentro del webhook de la cola ({ "request_id": ..., "payload": {...} })
+    - HeyGen: { "event_type": "avatar_video.success", "event_data": { "url": "..." } }
+      o { "data": { "video_id": ..., "video_url": "..." } }
+    - DALL·E: { "created": ..., "data": [{ "url": "..." }] }
+    - PiAPI: { "data": { "task_id": ..., "output": { "image_url": "..." } } }
+    - Genérico: { "media_url": "..." } o { "url": "..." }
+    - Otros formatos: Búsqueda recursiva acotada
+
+    Args:
+        payload: Diccionario JSON del callback (cualquier estructura)
+
+    Returns:
+        URL del media encontrada o None si no se encuentra
+    """
+    return match_media_url(payload)[0]
@@ -0,0 +1,343 @@
+"""
+Media Store - Copia local del media generado, direccionada por contenido
+
+Los media_url que devuelven n8n y los proveedores apuntan a CDNs de
+terceros y a URLs firmadas que caducan. El worker (`store_media_assets`,
+app/workers/tasks/media.py) descarga el media de las piezas completadas a
+este store en el volumen shared_data y el backend lo sirve desde disco
+(app/api/routes/media.py).
+
+Layout (relativo a MEDIA_STORE_DIR):
+
+    objects/ab/cd/abcd...ef      fichero original (nombre = SHA-256)
+    thumbs/ab/abcd...ef.jpg      thumbnail JPEG (si se pudo generar)
+    tmp/                         descargas en curso
+
+- Deduplicado: el mismo contenido descargado para varias piezas (o desde
+  varias URLs) se guarda una vez; el fichero final se publica con un
+  rename atómico, así que nunca se sirve un fichero a medias
+- Inmutable: el contenido de una ruta no cambia nunca, por eso se sirve
+  con caché de un año
+
+Las URLs de origen llegan de terceros, así que la descarga está acotada
+(protección SSRF): solo https, el host inicial debe estar en
+MEDIA_STORE_ALLOWED_HOSTS (CDNs de los proveedores de generación), las
+redirecciones se siguen a mano y en cada salto el host debe resolver solo
+a direcciones públicas (nada privado, loopback ni link-local), y solo se
+guardan imágenes y vídeos (SVG excluido: puede llevar scripts).
+"""
+
+import asyncio
+import hashlib
+import ipaddress
+import logging
+import mimetypes
+import os
+import shutil
+import socket
+import subprocess
+import tempfile
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Optional, Tuple
+from urllib.parse import urljoin, urlsplit
+
+from app.core.config import settings
+
+
+logger = logging.getLogger("bai.media_store")
+
+# Lectura/escritura por bloques (descarga y hash en streaming)
+CHUNK_SIZE = 1024 * 1024
+
+# Firmas de los formatos que generan los proveedores (si el Content-Type
+# del CDN es genérico o falta)
+_SIGNATURES: Tuple[Tuple[int, bytes, str], ...] = (
+    (0, b"\x89PNG\r\n\x1a\n", "image/png"),
+    (0, b"\xff\xd8\xff", "image/jpeg"),
+    (0, b"GIF87a", "image/gif"),
+    (0, b"GIF89a", "image/gif"),
+    (8, b"WEBP", "image/webp"),
+    (4, b"ftypheic", "image/heic"),
+    (4, b"ftypqt", "video/quicktime"),
+    (4, b"ftyp", "video/mp4"),
+    (0, b"\x1a\x45\xdf\xa3", "video/webm"),
+)
+
+_GENERIC_TYPES = ("", "application/octet-stream", "binary/octet-stream")
+
+# Tipos que se guardan y se sirven inline; SVG es image/* pero ejecuta scripts
+SERVABLE_MIME_PREFIXES = ("image/", "video/")
+_UNSAFE_MIME_TYPES = frozenset({"image/svg+xml"})
+
+
+class MediaTooLargeError(Exception):
+    """El fichero supera MEDIA_STORE_MAX_BYTES."""
+
+
+class MediaSourceError(Exception):
+    """URL de origen no permitida (esquema, host o dirección no pública)."""
+
+
+class UnsupportedMediaTypeError(Exception):
+    """El fichero no es una imagen ni un vídeo."""
+
+
+@dataclass
+class StoredMedia:
+    """Resultado de guardar un fichero en el store."""
+    sha256: str
+    size_bytes: int
+    mime_type: str
+    created: bool  # False si el contenido ya estaba en el store
+
+
+def sniff_mime_type(head: bytes, content_type: Optional[str], url: str) -> str:
+    """
+    Tipo MIME del fichero: Content-Type del origen, firma o extensión.
+
+    Args:
+        head: Primeros bytes del fichero
+        content_type: Header Content-Type de la descarga
+        url: URL de origen (extensión como último recurso)
+
+    Returns:
+        str: Tipo MIME ("application/octet-stream" si no se reconoce)
+    """
+    declared = (content_type or "").split(";")[0].strip().lower()
+    if declared not in _GENERIC_TYPES:
+        return declared
+    for offset, signature, mime_type in _SIGNATURES:
+        if head[offset:offset + len(signature)] == signature:
+            return mime_type
+    guessed, _ = mimetypes.guess_type(url.split("?")[0])
+    return guessed or "application/octet-stream"
+
+
+def is_servable_mime_type(mime_type: str) -> bool:
+    """True para imágenes y vídeos que se pueden servir inline."""
+    mime_type = mime_type.lower()
+    return mime_type.startswith(SERVABLE_MIME_PREFIXES) and mime_type not in _UNSAFE_MIME_TYPES
+
+
+def is_allowed_host(host: str) -> bool:
+    """True si `host` es (o es subdominio de) un host de MEDIA_STORE_ALLOWED_HOSTS."""
+    host = host.lower().rstrip(".")
+    allowed = (entry.strip().lower().strip(".") for entry in settings.MEDIA_STORE_ALLOWED_HOSTS.split(","))
+    return any(entry and (host == entry or host.endswith(f".{entry}")) for entry in allowed)
+
+
+def is_public_address(address: str) -> bool:
+    """False para direcciones privadas, loopback, link-local, reservadas, etc."""
+    ip = ipaddress.ip_address(address.split("%")[0])
+    if isinstance(ip, ipaddress.IPv6Address) and ip.ipv4_mapped:
+        ip = ip.ipv4_mapped
+    return ip.is_global
+
+
+async def resolve_host(host: str, port: int) -> List[str]:
+    """Direcciones IP de `host` (getaddrinfo sin bloquear el event loop)."""
+    infos = await asyncio.get_running_loop().getaddrinfo(host, port, type=socket.SOCK_STREAM)
+    return [info[4][0] for info in infos]
+
+
+async def check_source_url(url: str, check_host: bool = True) -> None:
+    """
+    Valida una URL de origen (o un salto de redirección) antes de pedirla.
+
+    Args:
+        url: URL absoluta
+        check_host: Exigir que el host esté en MEDIA_STORE_ALLOWED_HOSTS
+            (la URL inicial; las redirecciones las decide el proveedor)
+
+    Raises:
+        MediaSourceError si no es https, el host no está permitido o
+            resuelve a alguna dirección no pública
+    """
+    parts = urlsplit(url)
+    host = parts.hostname
+    if parts.scheme != "https" or not host:
+        raise MediaSourceError(f"{url[:200]}: solo se descargan URLs https")
+    if check_host and not is_allowed_host(host):
+        raise MediaSourceError(f"{host}: host no permitido (MEDIA_STORE_ALLOWED_HOSTS)")
+    try:
+        addresses = await resolve_host(host, parts.port or 443)
+    except OSError as e:
+        raise MediaSourceError(f"{host}: no se pudo resolver ({str(e)})")
+    blocked = [address for address in addresses if not is_public_address(address)]
+    if not addresses or blocked:
+        raise MediaSourceError(f"{host}: resuelve a direcciones no públicas {blocked}")
+
+
+def _check_peer(response) -> None:
+    """Comprueba la IP con la que se conectó de verdad (DNS rebinding)."""
+    stream = response.extensions.get("network_stream")
+    peer = stream.get_extra_info("server_addr") if stream is not None else None
+    if peer and not is_public_address(peer[0]):
+        raise MediaSourceError(f"{response.url.host}: conectado a una dirección no pública {peer[0]}")
+
+
+class MediaStore:
+    """Store de ficheros direccionado por SHA-256 sobre un directorio local."""
+
+    def __init__(self, root: str):
+        self.root = Path(root)
+
+    def object_path(self, sha256: str) -> Path:
+        return self.root / "objects" / sha256[:2] / sha256[2:4] / sha256
+
+    def thumbnail_path(self, sha256: str) -> Path:
+        return self.root / "thumbs" / sha256[:2] / f"{sha256}.jpg"
+
+    def relative_path(self, path: Path) -> str:
+        """Ruta relativa al store (para X-Accel-Redirect)."""
+        return path.relative_to(self.root).as_posix()
+
+    async def download(self, client, url: str, max_bytes: Optional[int] = None) -> StoredMedia:
+        """
+        Descarga una URL al store calculando el hash en streaming.
+
+        Las redirecciones se siguen a mano (hasta MEDIA_STORE_MAX_REDIRECTS)
+        validando cada salto con `check_source_url`. El fichero se escribe
+        en tmp/ y se publica con un rename atómico en su ruta final; si el
+        contenido ya existía se descarta la copia.
+
+        Args:
+            client: httpx.AsyncClient
+            url: URL del media
+            max_bytes: Tamaño máximo (por defecto MEDIA_STORE_MAX_BYTES)
+
+        Returns:
+            StoredMedia con hash, tamaño y tipo MIME
+
+        Raises:
+            MediaSourceError si la URL o una redirección no está permitida
+            UnsupportedMediaTypeError si no es una imagen ni un vídeo
+            MediaTooLargeError si el fichero supera el máximo
+            httpx.HTTPError si la descarga falla
+        """
+        limit = max_bytes or settings.MEDIA_STORE_MAX_BYTES
+        tmp_dir = self.root / "tmp"
+        tmp_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = tmp_dir / uuid.uuid4().hex
+
+        digest = hashlib.sha256()
+        size = 0
+        head = b""
+        current = url
+        try:
+            for hop in range(settings.MEDIA_STORE_MAX_REDIRECTS + 1):
+                await check_source_url(current, check_host=hop == 0)
+                async with client.stream("GET", current, follow_redirects=False) as response:
+                    _check_peer(response)
+                    if response.is_redirect:
+                        current = urljoin(current, response.headers["location"])
+                        continue
+                    response.raise_for_status()
+                    declared = response.headers.get("content-length")
+                    if declared and declared.isdigit() and int(declared) > limit:
+                        raise MediaTooLargeError(f"{url}: {declared} bytes > {limit}")
+                    content_type = response.headers.get("content-type")
+                    declared_type = (content_type or "").split(";")[0].strip().lower()
+                    if declared_type not in _GENERIC_TYPES and not is_servable_mime_type(declared_type):
+                        raise UnsupportedMediaTypeError(f"{url}: {declared_type}")
+                    with open(tmp_path, "wb") as f:
+                        async for chunk in response.aiter_bytes(CHUNK_SIZE):
+                            size += len(chunk)
+                            if size > limit:
+                                raise MediaTooLargeError(f"{url}: más de {limit} bytes")
+                            if len(head) < 64:
+                                head += chunk[:64 - len(head)]
+                            digest.update(chunk)
+                            f.write(chunk)
+                    break
+            else:
+                raise MediaSourceError(f"{url}: más de {settings.MEDIA_STORE_MAX_REDIRECTS} redirecciones")
+
+            mime_type = sniff_mime_type(head, content_type, current)
+            if not is_servable_mime_type(mime_type):
+                raise UnsupportedMediaTypeError(f"{url}: {mime_type}")
+            sha256 = digest.hexdigest()
+            final_path = self.object_path(sha256)
+            created = not final_path.exists()
+            if created:
+                final_path.parent.mkdir(parents=True, exist_ok=True)
+                os.replace(tmp_path, final_path)
+            return StoredMedia(
+                sha256=sha256,
+                size_bytes=size,
+                mime_type=mime_type,
+                created=created,
+            )
+        finally:
+            tmp_path.unlink(missing_ok=True)
+
+    def make_thumbnail(self, sha256: str, mime_type: str) -> Tuple[bool, Optional[int], Optional[int]]:
+        """
+        Genera el thumbnail JPEG de un fichero del store (bloqueante).
+
+        Imágenes con Pillow; vídeos con el primer fotograma vía ffmpeg si
+        está instalado. Si ya existe no se regenera.
+
+        Args:
+            sha256: Hash del fichero original
+            mime_type: Tipo MIME del original
+
+        Returns:
+            (thumbnail generado, ancho, alto) - dimensiones del original si
+            se conocen
+        """
+        source = self.object_path(sha256)
+        target = self.thumbnail_path(sha256)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        size = settings.MEDIA_STORE_THUMBNAIL_SIZE
+
+        if mime_type.startswith("image/"):
+            from PIL import Image
+
+            with Image.open(source) as image:
+                width, height = image.size
+                if not target.exists():
+                    image.thumbnail((size, size))
+                    self._write_atomic(target, lambda path: image.convert("RGB").save(path, "JPEG", quality=85))
+            return True, width, height
+
+        if mime_type.startswith("video/"):
+            ffmpeg = shutil.which("ffmpeg")
+            if not ffmpeg:
+                return False, None, None
+            if not target.exists():
+                self._write_atomic(target, lambda path: subprocess.run(
+                    [
+                        ffmpeg, "-loglevel", "error", "-y", "-i", str(source),
+                        "-frames:v", "1", "-vf", f"scale={size}:{size}:force_original_aspect_ratio=decrease",
+                        "-f", "image2", "-c:v", "mjpeg", str(path),
+                    ],
+                    check=True,
+                    timeout=60,
+                ))
+            return True, None, None
+
+        return False, None, None
+
+    def _write_atomic(self, target: Path, write) -> None:
+        fd, tmp_name = tempfile.mkstemp(dir=target.parent, suffix=".tmp")
+        os.close(fd)
+        try:
+            write(tmp_name)
+            os.replace(tmp_name, target)
+        finally:
+            if os.path.exists(tmp_name):
+                os.unlink(tmp_name)
+
+    async def thumbnail(self, sha256: str, mime_type: str) -> Tuple[bool, Optional[int], Optional[int]]:
+        """make_thumbnail en un thread (no bloquea el event loop del worker)."""
+        try:
+            return await asyncio.to_thread(self.make_thumbnail, sha256, mime_type)
+        except Exception as e:
+            logger.warning(f"Thumbnail failed for {sha256}: {str(e)}")
+            return False, None, None
+
+
+media_store = MediaStore(settings.MEDIA_STORE_DIR)
@@ -1,6 +1,5 @@
 import os
 import json
-import google.generativeai as genai
 from fastapi.concurrency import run_in_threadpool
 from sqlmodel import Session, select
 from app.models.chat import ChatMessage
@@ -71,6 +70,8 @@ async def generate_mining_report(
     def _generate_with_gemini():
         with Session(engine) as thread_session:
             try:
+                import google.generativeai as genai  # SDK diferido (pesado)
+
                 genai.configure(api_key=api_key)
 
                 # 4. Crear prompt estructurado para Gemini
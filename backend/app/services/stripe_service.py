@@ -3,7 +3,6 @@ Stripe Payment Service
 Handles Stripe checkout session creation for subscription flows.
 """
 
-import stripe
 from app.core.config import settings
 
 
@@ -28,6 +27,9 @@ def create_checkout_session(user_id: int, price_id: str) -> str:
   if not settings.STRIPE_API_KEY:
     raise ValueError("STRIPE_API_KEY is not configured. Please set it in your .env file.")
   
+  # Deferred SDK import: stripe is only loaded by processes that actually bill
+  import stripe
+
   # Set Stripe API key only if it's not None (after validation)
   # This prevents setting stripe.api_key to None at module import time
   stripe.api_key = settings.STRIPE_API_KEY
@@ -2,6 +2,8 @@ import os
 import httpx
 from typing import Optional
 
+from app.core.deadline import remaining_timeout
+
 
 async def search_brave(query: str, limit: int = 5) -> str:
   """
@@ -23,6 +25,11 @@ async def search_brave(query: str, limit: int = 5) -> str:
   if not api_key:
     return "Search failed: BRAVE_API_KEY environment variable is not set."
   
+  # Respect the current request deadline (if any)
+  timeout = remaining_timeout(10.0)
+  if timeout <= 0:
+    return f"Search failed: Request deadline exceeded before searching for '{query}'."
+  
   # Ensure limit is within valid range (Brave API typically allows 1-20)
   limit = max(1, min(limit, 20))
   
@@ -43,7 +50,7 @@ async def search_brave(query: str, limit: int = 5) -> str:
     }
     
     # Make async HTTP GET request
-    async with httpx.AsyncClient(timeout=10.0) as client:
+    async with httpx.AsyncClient(timeout=timeout) as client:
       response = await client.get(url, params=params, headers=headers)
       response.raise_for_status()
       
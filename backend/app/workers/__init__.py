@@ -16,10 +16,17 @@ Estructura:
         job = await arq_pool.enqueue_job("task_name", ...)
 """
 
-from app.workers.settings import WorkerSettings
-
 __all__ = [
     "WorkerSettings",
     # enqueue_task y get_job_status fueron removidos - usar ArqRedisDep en su lugar
 ]
 
+
+def __getattr__(name):
+    # Import diferido: la API importa app.workers.queues/priority para
+    # encolar y no debe cargar arq ni los módulos de tareas (settings)
+    if name == "WorkerSettings":
+        from app.workers.settings import WorkerSettings
+        return WorkerSettings
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
@@ -52,28 +52,28 @@ async def process_ai_inference(
         Dict con la respuesta generada y metadata
     """
     from app.modules.chat.engine.gemini import GeminiEngine
-    from app.infrastructure.db.session import get_session
-    from app.modules.chat.repository import ChatRepository
+    from app.infrastructure.db.session import async_session_scope
+    from app.modules.chat.repository import AsyncChatRepository
     from app.modules.chat.service import ChatService
     
     # Inicializar dependencias
     ai_engine = GeminiEngine()
-    session = next(get_session())
-    repository = ChatRepository(session=session)
-    service = ChatService(
-        ai_engine=ai_engine,
-        repository=repository,
-        cache=None  # Cache opcional en workers
-    )
-    
-    # Procesar mensaje
-    response = await service.process_message(
-        user_id=user_id,
-        message=message,
-        session=session,
-        client_id=client_id,
-        context={"history": history} if history else None
-    )
+    async with async_session_scope() as session:
+        repository = AsyncChatRepository(session=session)
+        service = ChatService(
+            ai_engine=ai_engine,
+            repository=repository,
+            cache=None  # Cache opcional en workers
+        )
+        
+        # Procesar mensaje
+        response = await service.process_message(
+            user_id=user_id,
+            message=message,
+            session=session,
+            client_id=client_id,
+            context={"history": history} if history else None
+        )
     
     return {
         "response": response,
@@ -170,7 +170,7 @@ async def enqueue_ai_task(
     client_id: str = None
 ) -> str:
     """
-    Encola una tarea de inferencia de IA.
+    Encola una tarea de inferencia de IA en la cola interactive.
     
     Args:
         message: Mensaje del usuario
@@ -180,14 +180,21 @@ async def enqueue_ai_task(
     Returns:
         str: ID de la tarea (para tracking)
     """
+    from app.workers.queues import enqueue
+
     redis = await create_pool(REDIS_SETTINGS)
-    
-    job = await redis.enqueue_job(
-        "process_ai_inference",
-        message=message,
-        user_id=user_id,
-        client_id=client_id
-    )
+    try:
+        # enqueue() resuelve la cola (interactive); la cola por defecto de
+        # Arq ya no la consume ningún worker
+        job = await enqueue(
+            redis,
+            "process_ai_inference",
+            message=message,
+            user_id=user_id,
+            client_id=client_id
+        )
+    finally:
+        await redis.aclose()
     
     return job.job_id
 
@@ -6,13 +6,25 @@ Punto de entrada principal para ejecutar el worker de Arq.
 Ejecutar con:
     arq app.workers.main.WorkerSettings
 
-O desde Docker:
-    arq app.workers.main.WorkerSettings
+Workers por cola (producción, escalables por separado):
+    arq app.workers.main.InteractiveWorkerSettings
+    arq app.workers.main.BulkWorkerSettings
+    arq app.workers.main.MaintenanceWorkerSettings
 """
 
-from app.workers.settings import WorkerSettings
+from app.workers.settings import (
+    WorkerSettings,
+    InteractiveWorkerSettings,
+    BulkWorkerSettings,
+    MaintenanceWorkerSettings,
+)
 
 # Exportar configuración para Arq
 # Arq busca esta clase en el módulo especificado
-__all__ = ["WorkerSettings"]
+__all__ = [
+    "WorkerSettings",
+    "InteractiveWorkerSettings",
+    "BulkWorkerSettings",
+    "MaintenanceWorkerSettings",
+]
 
@@ -0,0 +1,60 @@
+"""
+Priority Enqueue - Prioridad por plan en colas de Arq
+
+Arq ordena cada cola como un sorted set cuyo score es el instante (ms) en
+que el job puede ejecutarse, y el worker siempre toma primero los scores
+más bajos. En lugar de mantener una cola física por plan (un worker de Arq
+solo drena una cola), los jobs de planes superiores se encolan con un
+score adelantado `JOB_HEADSTART_SECONDS[clase]`:
+
+- PARTNER pasa delante de todo lo encolado en los últimos 5 minutos
+- CEREBRO pasa delante de lo encolado en el último minuto
+- MOTOR conserva su orden de llegada
+
+Como el adelanto está acotado, un job MOTOR que lleva esperando más que el
+adelanto máximo ya no puede ser superado (sin inanición).
+
+Uso:
+    job = await enqueue_prioritized(
+        arq_pool,
+        "generate_influencer_content",
+        plan_tier=current_user.plan_tier,
+        campaign_id=campaign.id,
+    )
+"""
+
+from datetime import datetime, timedelta, timezone
+from typing import Any, Optional, TYPE_CHECKING
+
+from app.core.priority import JOB_HEADSTART_SECONDS, priority_for_plan
+from app.workers.queues import enqueue
+
+if TYPE_CHECKING:
+    from arq import ArqRedis
+    from arq.jobs import Job
+
+
+async def enqueue_prioritized(
+    arq_pool: "ArqRedis",
+    function: str,
+    *args: Any,
+    plan_tier: Optional[str] = None,
+    **kwargs: Any,
+) -> Optional["Job"]:
+    """
+    Encola un job de Arq en su cola nombrada con la prioridad del plan.
+
+    Args:
+        arq_pool: Pool de Arq (ArqRedisDep)
+        function: Nombre de la tarea registrada en WorkerSettings
+        *args: Argumentos posicionales de la tarea
+        plan_tier: Plan del usuario que origina el job
+        **kwargs: Argumentos de la tarea y opciones `_*` de Arq
+
+    Returns:
+        Job de Arq o None si ya existía un job con el mismo `_job_id`
+    """
+    headstart = JOB_HEADSTART_SECONDS[priority_for_plan(plan_tier)]
+    if headstart and "_defer_until" not in kwargs and "_defer_by" not in kwargs:
+        kwargs["_defer_until"] = datetime.now(timezone.utc) - timedelta(seconds=headstart)
+    return await enqueue(arq_pool, function, *args, **kwargs)
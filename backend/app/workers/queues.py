@@ -0,0 +1,167 @@
+"""
+Named Queues - Colas de Arq por clase de trabajo
+
+Separa las tareas en colas con pools de workers independientes para que
+los jobs largos no bloqueen los sensibles a latencia:
+
+- interactive: tracking de uso, inferencia, emails (segundos)
+- bulk: campañas de contenido, extracciones, data mining (minutos)
+- maintenance: tareas de sistema, compactaciones y reconciliaciones
+
+Cada cola tiene su entry point en app/workers/main.py
+(InteractiveWorkerSettings, BulkWorkerSettings, MaintenanceWorkerSettings)
+con su propio max_jobs/job_timeout, de modo que se escalan por separado.
+
+Uso:
+    from app.workers.queues import enqueue
+    job = await enqueue(arq_pool, "track_feature_use", user_id=1, ...)
+"""
+
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from arq import ArqRedis
+    from arq.jobs import Job
+
+
+# Cola por defecto de Arq (legacy: jobs encolados antes de separar colas)
+DEFAULT_QUEUE = "arq:queue"
+
+QUEUE_INTERACTIVE = "arq:queue:interactive"
+QUEUE_BULK = "arq:queue:bulk"
+QUEUE_MAINTENANCE = "arq:queue:maintenance"
+
+ALL_QUEUES = [QUEUE_INTERACTIVE, QUEUE_BULK, QUEUE_MAINTENANCE]
+
+# Routing de tareas -> cola (fuente única para API y workers)
+TASK_QUEUES: Dict[str, str] = {
+    "track_feature_use": QUEUE_INTERACTIVE,
+    "process_ai_inference": QUEUE_INTERACTIVE,
+    "send_email_report": QUEUE_INTERACTIVE,
+    "collect_telemetry": QUEUE_INTERACTIVE,
+    "dispatch_outbox": QUEUE_INTERACTIVE,
+    "ingest_callbacks": QUEUE_INTERACTIVE,
+    "generate_influencer_content": QUEUE_BULK,
+    "launch_deep_extraction": QUEUE_BULK,
+    "schedule_monthly_content": QUEUE_BULK,
+    "process_data_mining": QUEUE_BULK,
+    "store_media_assets": QUEUE_BULK,
+    "heavy_background_task": QUEUE_MAINTENANCE,
+    "compact_usage_rollups": QUEUE_MAINTENANCE,
+    "reconcile_quota_counters": QUEUE_MAINTENANCE,
+}
+
+# Estadísticas de espera por cola (hash en Redis, escrito por los workers)
+QUEUE_STATS_KEY = "bai:queue_stats:{queue}"
+
+
+def queue_for(function: str) -> str:
+    """
+    Resuelve la cola de una tarea.
+
+    Args:
+        function: Nombre de la tarea registrada en WorkerSettings
+
+    Returns:
+        str: Nombre de la cola (interactive si la tarea no está mapeada)
+    """
+    return TASK_QUEUES.get(function, QUEUE_INTERACTIVE)
+
+
+def tasks_for(queue_name: str) -> List[str]:
+    """Nombres de las tareas enrutadas a una cola."""
+    return [name for name, queue in TASK_QUEUES.items() if queue == queue_name]
+
+
+async def enqueue(
+    arq_pool: "ArqRedis",
+    function: str,
+    *args: Any,
+    **kwargs: Any,
+) -> Optional["Job"]:
+    """
+    Encola una tarea en su cola nombrada.
+
+    Args:
+        arq_pool: Pool de Arq (ArqRedisDep)
+        function: Nombre de la tarea
+        *args: Argumentos posicionales de la tarea
+        **kwargs: Argumentos de la tarea y opciones `_*` de Arq
+
+    Returns:
+        Job de Arq o None si ya existía un job con el mismo `_job_id`
+    """
+    kwargs.setdefault("_queue_name", queue_for(function))
+    return await arq_pool.enqueue_job(function, *args, **kwargs)
+
+
+async def record_job_start(ctx: Dict[str, Any], queue_name: str) -> None:
+    """
+    Hook on_job_start: acumula el tiempo de espera real en cola.
+
+    Usa `enqueue_time` (no el score, que incluye el adelanto por prioridad)
+    para medir lo que realmente esperó el job.
+
+    Args:
+        ctx: Contexto del job (Arq añade enqueue_time, job_id, score)
+        queue_name: Cola que atiende este worker
+    """
+    redis = ctx.get("redis")
+    enqueue_time: Optional[datetime] = ctx.get("enqueue_time")
+    if redis is None or enqueue_time is None:
+        return
+    if enqueue_time.tzinfo is None:
+        enqueue_time = enqueue_time.replace(tzinfo=timezone.utc)
+    wait_ms = max(0.0, (datetime.now(timezone.utc) - enqueue_time).total_seconds() * 1000)
+    key = QUEUE_STATS_KEY.format(queue=queue_name)
+    try:
+        async with redis.pipeline(transaction=False) as pipe:
+            pipe.hincrby(key, "jobs_started", 1)
+            pipe.hincrbyfloat(key, "wait_ms_total", wait_ms)
+            pipe.hset(key, mapping={"last_wait_ms": round(wait_ms, 1), "last_start_ts": int(time.time())})
+            await pipe.execute()
+    except Exception:
+        # Las métricas nunca deben hacer fallar un job
+        pass
+
+
+async def get_queue_stats(redis: Any) -> List[Dict[str, Any]]:
+    """
+    Profundidad y tiempos de espera de cada cola nombrada.
+
+    Args:
+        redis: Cliente redis.asyncio (decode_responses=True)
+
+    Returns:
+        Lista con depth, ready (ejecutables ya), oldest_ready_age_s y las
+        medias de espera registradas por los workers
+    """
+    now_ms = time.time() * 1000
+    stats = []
+    for queue_name in [*ALL_QUEUES, DEFAULT_QUEUE]:
+        depth = await redis.zcard(queue_name)
+        ready = await redis.zcount(queue_name, "-inf", now_ms)
+        oldest = await redis.zrange(queue_name, 0, 0, withscores=True)
+        raw = await redis.hgetall(QUEUE_STATS_KEY.format(queue=queue_name))
+        started = int(raw.get("jobs_started", 0))
+        stats.append({
+            "queue": queue_name,
+            "depth": depth,
+            "ready": ready,
+            # Edad del job listo más antiguo según score (incluye adelanto de prioridad)
+            "oldest_ready_age_s": round(max(0.0, now_ms - oldest[0][1]) / 1000, 1) if oldest and ready else 0.0,
+            "jobs_started": started,
+            "avg_wait_ms": round(float(raw.get("wait_ms_total", 0)) / started, 1) if started else None,
+            "last_wait_ms": float(raw["last_wait_ms"]) if "last_wait_ms" in raw else None,
+        })
+    return stats
+
+
+async def get_total_queue_depth(redis: Any) -> int:
+    """Jobs pendientes en todas las colas (las colas de Arq son sorted sets)."""
+    total = 0
+    for queue_name in [*ALL_QUEUES, DEFAULT_QUEUE]:
+        total += await redis.zcard(queue_name)
+    return total
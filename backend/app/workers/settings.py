@@ -3,15 +3,32 @@ Arq Worker Settings
 
 Configuración completa del worker de Arq con eventos de ciclo de vida.
 Define on_startup y on_shutdown para inicializar y limpiar recursos.
+
+Además del WorkerSettings "todo en uno" (cola por defecto de Arq), se
+generan entry points por cola nombrada (ver app/workers/queues.py), cada
+uno con su propio max_jobs/job_timeout:
+
+    arq app.workers.main.InteractiveWorkerSettings
+    arq app.workers.main.BulkWorkerSettings
+    arq app.workers.main.MaintenanceWorkerSettings
 """
 
-from typing import Dict, Any
+from typing import Dict, Any, Callable, List, Optional
+from arq import cron
 from arq.connections import RedisSettings
 from arq.worker import Worker
 
 from app.core.config import settings
-from app.infrastructure.db.session import init_db
+from app.infrastructure.db.migrations import check_schema_revision
+from app.infrastructure.db.session import engine
 from app.infrastructure.cache.redis import get_redis_client, close_redis
+from app.workers.queues import (
+    QUEUE_INTERACTIVE,
+    QUEUE_BULK,
+    QUEUE_MAINTENANCE,
+    record_job_start,
+    tasks_for,
+)
 # Importar modelos para registrar metadata antes de usar la DB
 from app.models.user import User  # noqa: F401
 from app.modules.chat.models import ChatMessage  # noqa: F401
@@ -19,7 +36,11 @@ from app.modules.chat.models import ChatMessage  # noqa: F401
 
 class WorkerSettings:
     """
-    Configuración para el worker de Arq.
+    Configuración para el worker de Arq (cola por defecto, todas las tareas).
+    
+    Útil en desarrollo con un único worker y para drenar jobs encolados en
+    `arq:queue` antes de separar colas. En producción usar los entry points
+    por cola.
     
     Define:
     - Funciones disponibles como tareas
@@ -76,6 +97,31 @@ class WorkerSettings:
         schedule_monthly_content,
     ]
     
+    # ============================================
+    # CRON JOBS
+    # ============================================
+    
+    from app.workers.tasks.telemetry import collect_telemetry
+    from app.workers.tasks.analytics import compact_usage_rollups, reconcile_quota_counters
+    from app.workers.tasks.outbox import dispatch_outbox
+    from app.workers.tasks.callbacks import ingest_callbacks
+    from app.workers.tasks.media import store_media_assets
+    
+    cron_jobs = [
+        # Drena el buffer de telemetría (Redis Stream -> INSERT multi-fila)
+        cron(collect_telemetry, second={0, 10, 20, 30, 40, 50}, timeout=60),
+        # Entrega los eventos del outbox transaccional a n8n
+        cron(dispatch_outbox, second=set(range(0, 60, 5)), timeout=60),
+        # Aplica los callbacks de n8n encolados con fast-ack (stream -> UPDATE en bloque)
+        cron(ingest_callbacks, second=set(range(60)), timeout=60),
+        # Copia local (media store) del media de las piezas completadas
+        cron(store_media_assets, second={0}, timeout=120),
+        # Consolida usage_logs en el rollup diario usage_daily
+        cron(compact_usage_rollups, minute={0, 15, 30, 45}, timeout=300),
+        # Alinea los contadores de cuota (Redis) con el uso durable
+        cron(reconcile_quota_counters, minute={5, 15, 25, 35, 45, 55}, timeout=300),
+    ]
+    
     # ============================================
     # LIFECYCLE EVENTS
     # ============================================
@@ -85,7 +131,7 @@ class WorkerSettings:
         Evento de inicio del worker.
         
         Inicializa:
-        - Base de datos (tablas si no existen)
+        - Base de datos (verifica que el esquema está en la head de Alembic)
         - Cliente de Redis (verificación de conexión)
         - Logging estructurado
         
@@ -108,12 +154,11 @@ class WorkerSettings:
         
         logger.info(f"Worker starting - Environment: {settings.ENVIRONMENT}")
         
-        # Inicializar base de datos
+        # Verificar revisión del esquema (las migraciones las aplica el job `migrate`)
         try:
-            init_db()
-            logger.info("Database initialized")
+            check_schema_revision(engine)
         except Exception as e:
-            logger.error(f"Database init failed: {str(e)}")
+            logger.error(f"Database schema check failed: {str(e)}")
             raise
         
         # Verificar conexión a Redis
@@ -159,3 +204,94 @@ class WorkerSettings:
         if logger:
             logger.info("Worker shutdown complete")
 
+
+
+# ============================================
+# PER-QUEUE WORKER SETTINGS
+# ============================================
+
+def _make_on_startup(queue_name: str, max_jobs: int) -> Callable:
+    """Reutiliza el on_startup común y registra la cola atendida."""
+    async def on_startup(ctx: Dict[str, Any]) -> None:
+        await WorkerSettings.on_startup(ctx)
+        ctx["queue_name"] = queue_name
+        ctx["logger"].info(f"Serving queue {queue_name} - Max jobs: {max_jobs}")
+    return on_startup
+
+
+def _make_on_job_start(queue_name: str) -> Callable:
+    async def on_job_start(ctx: Dict[str, Any]) -> None:
+        await record_job_start(ctx, queue_name)
+    return on_job_start
+
+
+def build_queue_worker_settings(
+    name: str,
+    queue_name: str,
+    max_jobs: int,
+    job_timeout: int,
+    cron_jobs: Optional[List[Any]] = None,
+) -> type:
+    """
+    Construye una clase de settings de Arq para una cola nombrada.
+    
+    Arq lee la configuración de `settings_cls.__dict__` (no de la jerarquía
+    de clases), por eso cada entry point es una clase nueva con todos sus
+    atributos en lugar de una subclase de WorkerSettings.
+    
+    Args:
+        name: Nombre de la clase generada
+        queue_name: Cola que drena el worker
+        max_jobs: Trabajos concurrentes
+        job_timeout: Timeout por trabajo (segundos)
+        cron_jobs: Crons de Arq de este worker (por defecto, los de
+            WorkerSettings cuya tarea está enrutada a `queue_name`)
+    
+    Returns:
+        type: Clase lista para `arq app.workers.main.<name>`
+    """
+    task_names = set(tasks_for(queue_name))
+    functions: List[Callable] = [
+        fn for fn in WorkerSettings.functions if fn.__name__ in task_names
+    ]
+    if cron_jobs is None:
+        cron_jobs = [
+            job for job in WorkerSettings.cron_jobs if job.coroutine.__name__ in task_names
+        ]
+    return type(name, (), {
+        "__doc__": f"Worker de Arq para la cola {queue_name}.",
+        "redis_settings": WorkerSettings.redis_settings,
+        "queue_name": queue_name,
+        "max_jobs": max_jobs,
+        "job_timeout": job_timeout,
+        "functions": functions,
+        "on_startup": _make_on_startup(queue_name, max_jobs),
+        "on_shutdown": WorkerSettings.on_shutdown,
+        "on_job_start": _make_on_job_start(queue_name),
+        "cron_jobs": cron_jobs,
+    })
+
+
+# Latencia baja: muchos jobs cortos en paralelo
+InteractiveWorkerSettings = build_queue_worker_settings(
+    "InteractiveWorkerSettings",
+    queue_name=QUEUE_INTERACTIVE,
+    max_jobs=settings.WORKER_INTERACTIVE_MAX_JOBS,
+    job_timeout=settings.WORKER_INTERACTIVE_JOB_TIMEOUT,
+)
+
+# Jobs de minutos: pocos en paralelo por proceso, se escalan con réplicas
+BulkWorkerSettings = build_queue_worker_settings(
+    "BulkWorkerSettings",
+    queue_name=QUEUE_BULK,
+    max_jobs=settings.WORKER_BULK_MAX_JOBS,
+    job_timeout=settings.WORKER_BULK_JOB_TIMEOUT,
+)
+
+# Mantenimiento: compactaciones, reconciliaciones y tareas de sistema
+MaintenanceWorkerSettings = build_queue_worker_settings(
+    "MaintenanceWorkerSettings",
+    queue_name=QUEUE_MAINTENANCE,
+    max_jobs=settings.WORKER_MAINTENANCE_MAX_JOBS,
+    job_timeout=settings.WORKER_MAINTENANCE_JOB_TIMEOUT,
+)
@@ -0,0 +1,130 @@
+"""
+Stream Consumers - Utilidades comunes de los consumers de Redis Streams
+
+El collector de telemetría (app/workers/tasks/telemetry.py) y el consumer
+de callbacks (app/workers/tasks/callbacks.py) leen con consumer groups y
+solo confirman (XACK + XDEL) tras el commit. Una entrada que la base de
+datos rechaza siempre (valor fuera de rango, FK inexistente) haría que su
+lote se reintentara para siempre y bloquearía el stream, así que:
+
+- Si el lote falla por un error no transitorio, se reintenta entrada a
+  entrada para aislar las culpables
+- Las que siguen fallando se mueven a un stream de dead-letter (con el
+  error y el ID original) y se confirman
+- Los errores transitorios (conexión, pool) nunca mandan nada a
+  dead-letter: el lote queda pendiente y se reintenta entero
+
+El consumer de callbacks conserva el orden por pieza, así que una entrada
+fallida no se aparta a la primera: detiene la ejecución sin ACK y solo va
+a dead-letter cuando ya se ha entregado CALLBACK_MAX_DELIVERIES veces
+(`delivery_counts`).
+"""
+
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Sequence, Tuple
+
+from sqlalchemy.exc import DBAPIError, InterfaceError, OperationalError
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+
+# Tope aproximado de cada stream de dead-letter (XADD MAXLEN ~)
+DEAD_LETTER_MAXLEN = 10_000
+
+Entry = Tuple[str, Dict[str, str]]
+
+
+def normalize_entries(entries: Sequence[Any]) -> List[Entry]:
+    """Acepta respuestas con bytes o str (según decode_responses del cliente)."""
+    normalized = []
+    for entry_id, fields in entries:
+        if isinstance(entry_id, bytes):
+            entry_id = entry_id.decode()
+        decoded = {
+            (k.decode() if isinstance(k, bytes) else k): (v.decode() if isinstance(v, bytes) else v)
+            for k, v in (fields or {}).items()
+        }
+        normalized.append((entry_id, decoded))
+    return normalized
+
+
+def is_transient_error(error: BaseException) -> bool:
+    """
+    Indica si un error de escritura se arreglaría reintentando más tarde.
+
+    Args:
+        error: Excepción del INSERT/UPDATE
+
+    Returns:
+        bool: True para errores de conexión o de pool (no son culpa de la
+            entrada y no deben mandarla a dead-letter)
+    """
+    if isinstance(error, (OperationalError, InterfaceError, PoolTimeoutError)):
+        return True
+    return isinstance(error, DBAPIError) and error.connection_invalidated
+
+
+async def dead_letter(
+    redis: Any,
+    stream: str,
+    group: str,
+    dead_stream: str,
+    entry: Entry,
+    error: BaseException,
+) -> None:
+    """
+    Mueve una entrada a su stream de dead-letter y la confirma.
+
+    La copia conserva los campos originales y añade `source_id`, `error` y
+    `failed_at` para poder inspeccionarla o reinyectarla a mano.
+
+    Args:
+        redis: Cliente redis.asyncio
+        stream: Stream de origen
+        group: Consumer group de origen
+        dead_stream: Stream de dead-letter
+        entry: (entry_id, fields) normalizada
+        error: Excepción con la que falló
+    """
+    entry_id, fields = entry
+    async with redis.pipeline(transaction=True) as pipe:
+        pipe.xadd(
+            dead_stream,
+            {
+                **fields,
+                "source_id": entry_id,
+                "error": f"{type(error).__name__}: {str(error)}"[:2000],
+                "failed_at": datetime.now(timezone.utc).isoformat(),
+            },
+            maxlen=DEAD_LETTER_MAXLEN,
+            approximate=True,
+        )
+        pipe.xack(stream, group, entry_id)
+        pipe.xdel(stream, entry_id)
+        await pipe.execute()
+
+
+async def delivery_counts(redis: Any, stream: str, group: str, ids: Sequence[str]) -> Dict[str, int]:
+    """
+    Veces que se ha entregado cada entrada pendiente (XPENDING).
+
+    Args:
+        redis: Cliente redis.asyncio
+        stream: Stream
+        group: Consumer group
+        ids: IDs de las entradas (en orden de stream)
+
+    Returns:
+        dict entry_id -> times_delivered (las entradas ya confirmadas no aparecen)
+    """
+    if not ids:
+        return {}
+    pending = await redis.xpending_range(stream, group, min=ids[0], max=ids[-1], count=len(ids))
+    counts = {}
+    for item in pending:
+        entry_id = item["message_id"]
+        if isinstance(entry_id, bytes):
+            entry_id = entry_id.decode()
+        counts[entry_id] = int(item["times_delivered"])
+    return counts
+
+
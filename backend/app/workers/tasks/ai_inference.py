@@ -9,8 +9,8 @@ from typing import Dict, Any, Optional, List
 import logging
 
 from app.modules.chat.engine.gemini import GeminiEngine
-from app.infrastructure.db.session import get_session
-from app.modules.chat.repository import ChatRepository
+from app.infrastructure.db.session import async_session_scope
+from app.modules.chat.repository import AsyncChatRepository
 from app.modules.chat.service import ChatService
 
 
@@ -60,23 +60,23 @@ async def process_ai_inference(
     try:
         # Inicializar dependencias
         ai_engine = GeminiEngine()
-        session = next(get_session())
-        repository = ChatRepository(session=session)
-        service = ChatService(
-            ai_engine=ai_engine,
-            repository=repository,
-            cache=None  # Cache opcional en workers
-        )
-        
-        # Procesar mensaje
-        response = await service.process_message(
-            user_id=user_id,
-            message=message,
-            session=session,
-            client_id=client_id,
-            context={"history": history} if history else None,
-            is_bai_internal=(client_id is None)
-        )
+        async with async_session_scope() as session:
+            repository = AsyncChatRepository(session=session)
+            service = ChatService(
+                ai_engine=ai_engine,
+                repository=repository,
+                cache=None  # Cache opcional en workers
+            )
+            
+            # Procesar mensaje
+            response = await service.process_message(
+                user_id=user_id,
+                message=message,
+                session=session,
+                client_id=client_id,
+                context={"history": history} if history else None,
+                is_bai_internal=(client_id is None)
+            )
         
         result = {
             "response": response,
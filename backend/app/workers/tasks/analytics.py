@@ -4,8 +4,11 @@ Analytics Tasks - Tareas Asíncronas para Tracking
 Tareas de worker para tracking de uso de features de forma asíncrona.
 """
 
+import logging
 from typing import Dict, Any, Optional
 
+from app.core.quota import current_period, parse_quota_key, quota_enforcer
+from app.modules.analytics.rollups import get_daily_counts, incr_usage_rollup, utc_today
 from app.modules.analytics.service import AnalyticsService
 from app.infrastructure.db.session import get_session
 
@@ -43,13 +46,21 @@ async def track_feature_use(
                 session=session,
                 tracking_metadata=tracking_metadata
             )
-            
-            return {
-                "success": True,
-                "usage_log_id": usage_log.id,
-                "feature_key": feature_key,
-                "user_id": user_id
-            }
+            usage_log_id = usage_log.id
+        
+        # Rollup diario en Redis (la compactación corrige cualquier deriva)
+        if ctx.get("redis") is not None:
+            try:
+                await incr_usage_rollup(ctx["redis"], user_id, feature_key)
+            except Exception:
+                pass
+        
+        return {
+            "success": True,
+            "usage_log_id": usage_log_id,
+            "feature_key": feature_key,
+            "user_id": user_id
+        }
     
     except Exception as e:
         # Log error pero no fallar (tracking no debe romper el flujo principal)
@@ -60,3 +71,84 @@ async def track_feature_use(
             "user_id": user_id
         }
 
+
+async def compact_usage_rollups(ctx) -> Dict[str, Any]:
+    """
+    Cron de mantenimiento: recalcula usage_daily desde usage_logs.
+    
+    Recalcula los últimos días (hoy incluido) con un único upsert
+    idempotente, de modo que los días cerrados quedan consolidados en
+    Postgres antes de salir de la ventana caliente de Redis.
+    
+    Args:
+        ctx: Contexto del worker (Arq)
+    
+    Returns:
+        dict con las filas de rollup escritas
+    """
+    logger = ctx.get("logger") or logging.getLogger("bai.worker.tasks")
+    try:
+        with get_session() as session:
+            rows = AnalyticsService().compact_rollups(session)
+        logger.info(f"Usage rollups compacted - rows: {rows}")
+        return {"status": "completed", "rows": rows}
+    
+    except Exception as e:
+        logger.error(f"Usage rollup compaction failed: {str(e)}")
+        return {
+            "status": "failed",
+            "error": str(e),
+            "error_type": type(e).__name__,
+        }
+
+
+async def reconcile_quota_counters(ctx) -> Dict[str, Any]:
+    """
+    Cron de mantenimiento: alinea los contadores de cuota con el uso durable.
+    
+    Recorre los contadores del mes en curso (SCAN, solo usuarios activos
+    este mes) y sube los que estén por debajo del uso según los rollups
+    (usage_daily + hash caliente de Redis). La escritura es
+    max(contador, durable) en un script Lua: los consumos concurrentes
+    nunca se pierden.
+    
+    Args:
+        ctx: Contexto del worker (Arq)
+    
+    Returns:
+        dict con contadores revisados y reescritos
+    """
+    logger = ctx.get("logger") or logging.getLogger("bai.worker.tasks")
+    redis = ctx["redis"]
+    month_start = utc_today().replace(day=1)
+    checked = 0
+    updated = 0
+    try:
+        with get_session() as session:
+            async for key in redis.scan_iter(match=f"bai:quota:*:*:{current_period()}", count=500):
+                parsed = parse_quota_key(key)
+                observed = await redis.get(key)
+                if parsed is None or observed is None:
+                    continue
+                checked += 1
+                counts = await get_daily_counts(
+                    redis, session, parsed["user_id"], [parsed["feature_key"]], month_start
+                )
+                durable = sum(day[parsed["feature_key"]] for day in counts.values())
+                if durable > int(observed) and await quota_enforcer.reconcile(
+                    redis, key, durable, parsed["period"]
+                ):
+                    updated += 1
+        
+        logger.info(f"Quota counters reconciled - checked: {checked}, updated: {updated}")
+        return {"status": "completed", "checked": checked, "updated": updated}
+    
+    except Exception as e:
+        logger.error(f"Quota reconciliation failed: {str(e)}")
+        return {
+            "status": "failed",
+            "error": str(e),
+            "error_type": type(e).__name__,
+            "checked": checked,
+            "updated": updated,
+        }
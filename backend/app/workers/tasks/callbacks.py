@@ -0,0 +1,228 @@
+"""
+Callback Tasks - Consumer del stream de callbacks de n8n
+
+Aplica los callbacks que los endpoints encolan con fast-ack (ver
+app/core/callbacks.py). Se ejecuta como cron de Arq cada segundo; solo un
+worker a la vez aplica el stream (lock en Redis), así que el orden por
+pieza/campaña se conserva aunque haya varios workers.
+"""
+
+import logging
+import time
+import uuid
+from typing import Dict, Any, List
+
+from redis.exceptions import ResponseError
+
+from app.core.callbacks import (
+    CALLBACK_DEAD_LETTER_STREAM,
+    CALLBACK_GROUP,
+    CALLBACK_LOCK_KEY,
+    CALLBACK_LOCK_TTL_MS,
+    CALLBACK_MAX_DELIVERIES,
+    CALLBACK_STREAM,
+    acquire_consumer_lock,
+    apply_callbacks,
+    decode_callbacks,
+    release_consumer_lock,
+)
+from app.infrastructure.db.session import get_session
+from app.modules.analytics.events import consumer_name
+from app.workers.streams import Entry, dead_letter, delivery_counts, is_transient_error, normalize_entries
+
+
+logger = logging.getLogger("bai.worker.tasks")
+
+# Entradas por lote (una transacción y un UPDATE en bloque por lote)
+BATCH_SIZE = 200
+
+# Presupuesto por ejecución: deja margen respecto al TTL del lock
+MAX_RUN_SECONDS = 20.0
+
+
+async def _ensure_group(redis) -> None:
+    try:
+        await redis.xgroup_create(CALLBACK_STREAM, CALLBACK_GROUP, id="0", mkstream=True)
+    except ResponseError as e:
+        if "BUSYGROUP" not in str(e):
+            raise
+
+
+async def _ack(redis, ids: List[str]) -> None:
+    if not ids:
+        return
+    async with redis.pipeline(transaction=True) as pipe:
+        pipe.xack(CALLBACK_STREAM, CALLBACK_GROUP, *ids)
+        pipe.xdel(CALLBACK_STREAM, *ids)
+        pipe.pexpire(CALLBACK_LOCK_KEY, CALLBACK_LOCK_TTL_MS)
+        await pipe.execute()
+
+
+async def _flush_each(redis, entries: List[Entry]) -> Dict[str, int]:
+    """
+    Reaplica un lote fallido entrada a entrada, en orden.
+
+    Una entrada que falla detiene el lote sin ACK (la siguiente ejecución
+    la reintenta antes que las posteriores) salvo que ya se haya entregado
+    CALLBACK_MAX_DELIVERIES veces: entonces va a dead-letter y se sigue.
+    """
+    counts = {"entries": 0, "pieces_updated": 0, "campaigns_updated": 0, "rejected": 0, "dead_lettered": 0}
+    deliveries = await delivery_counts(redis, CALLBACK_STREAM, CALLBACK_GROUP, [entry_id for entry_id, _ in entries])
+    done: List[str] = []
+    try:
+        for entry in entries:
+            callbacks, ids = decode_callbacks([entry])
+            if callbacks:
+                try:
+                    with get_session() as session:
+                        applied = apply_callbacks(session, callbacks)
+                except Exception as e:
+                    if is_transient_error(e) or deliveries.get(entry[0], 0) < CALLBACK_MAX_DELIVERIES:
+                        raise
+                    logger.error(
+                        f"Callback entry {entry[0]} dead-lettered after {deliveries[entry[0]]} deliveries: "
+                        f"{type(e).__name__}: {str(e)}"
+                    )
+                    await dead_letter(redis, CALLBACK_STREAM, CALLBACK_GROUP, CALLBACK_DEAD_LETTER_STREAM, entry, e)
+                    counts["dead_lettered"] += 1
+                    continue
+                for key in ("pieces_updated", "campaigns_updated", "rejected"):
+                    counts[key] += applied[key]
+            done.extend(ids)
+            counts["entries"] += len(ids)
+    finally:
+        # Lo ya aplicado se confirma aunque la entrada culpable corte el lote
+        await _ack(redis, done)
+    return counts
+
+
+async def _flush(redis, entries) -> Dict[str, int]:
+    """Aplica un lote y solo entonces lo confirma en el stream."""
+    entries = normalize_entries(entries)
+    callbacks, ids = decode_callbacks(entries)
+    counts = {"pieces_updated": 0, "campaigns_updated": 0, "rejected": 0}
+    if callbacks:
+        try:
+            with get_session() as session:
+                counts = apply_callbacks(session, callbacks)
+        except Exception as e:
+            if is_transient_error(e):
+                raise
+            logger.warning(f"Callback batch failed ({type(e).__name__}: {str(e)}), retrying entry by entry")
+            return await _flush_each(redis, entries)
+    await _ack(redis, ids)
+    return {**counts, "entries": len(ids)}
+
+
+async def _claim_orphans(redis, consumer: str) -> List[Any]:
+    """
+    Entradas entregadas y sin ACK de cualquier consumer, en orden.
+
+    Con el lock tomado nadie más está aplicando el stream, así que todo lo
+    pendiente es de un consumer caído o de una ejecución fallida y va
+    antes que las entradas nuevas.
+    """
+    orphans: List[Any] = []
+    start_id = "0-0"
+    while True:
+        claimed = await redis.xautoclaim(
+            CALLBACK_STREAM,
+            CALLBACK_GROUP,
+            consumer,
+            min_idle_time=0,
+            start_id=start_id,
+            count=BATCH_SIZE,
+        )
+        if not claimed:
+            break
+        orphans.extend(claimed[1] or [])
+        start_id = claimed[0]
+        if isinstance(start_id, bytes):
+            start_id = start_id.decode()
+        if start_id == "0-0":
+            break
+    return orphans
+
+
+async def ingest_callbacks(ctx: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Aplica los callbacks encolados en lotes, en orden de llegada.
+
+    Orden:
+    1. Toma el lock de consumer único (si otro worker lo tiene, sale)
+    2. Reaplica las entradas pendientes sin ACK (XAUTOCLAIM)
+    3. Lee entradas nuevas en lotes de BATCH_SIZE hasta vaciar el stream
+       o agotar MAX_RUN_SECONDS
+
+    Si un lote falla, la ejecución se detiene sin ACK: la siguiente lo
+    reintenta antes de leer nada nuevo, así no se adelantan callbacks
+    posteriores de la misma pieza. Un error no transitorio se aísla
+    entrada a entrada y la culpable va a dead-letter tras
+    CALLBACK_MAX_DELIVERIES entregas (ver `_flush_each`).
+
+    Args:
+        ctx: Contexto del worker (Arq)
+
+    Returns:
+        dict con entradas procesadas, piezas/campañas actualizadas, rechazos
+        y entradas movidas a dead-letter
+    """
+    logger = ctx.get("logger") or logging.getLogger("bai.worker.tasks")
+    redis = ctx["redis"]
+    consumer = consumer_name()
+    token = f"{consumer}-{uuid.uuid4().hex[:8]}"
+    totals = {"entries": 0, "pieces_updated": 0, "campaigns_updated": 0, "rejected": 0, "dead_lettered": 0, "batches": 0}
+    started = time.monotonic()
+
+    if not await acquire_consumer_lock(redis, token):
+        return {"status": "skipped", "reason": "another consumer holds the lock", **totals}
+
+    def add(counts: Dict[str, int]) -> None:
+        for key in ("entries", "pieces_updated", "campaigns_updated", "rejected", "dead_lettered"):
+            totals[key] += counts.get(key, 0)
+        totals["batches"] += 1
+
+    try:
+        await _ensure_group(redis)
+
+        # 1. Pendientes (consumer caído o lote fallido en la ejecución anterior)
+        orphans = await _claim_orphans(redis, consumer)
+        for offset in range(0, len(orphans), BATCH_SIZE):
+            add(await _flush(redis, orphans[offset:offset + BATCH_SIZE]))
+
+        # 2. Entradas nuevas
+        while time.monotonic() - started < MAX_RUN_SECONDS:
+            response = await redis.xreadgroup(
+                CALLBACK_GROUP,
+                consumer,
+                {CALLBACK_STREAM: ">"},
+                count=BATCH_SIZE,
+            )
+            entries = response[0][1] if response else []
+            if not entries:
+                break
+            add(await _flush(redis, entries))
+
+        if totals["batches"]:
+            logger.info(
+                f"Callbacks applied - entries: {totals['entries']}, pieces: {totals['pieces_updated']}, "
+                f"campaigns: {totals['campaigns_updated']}, rejected: {totals['rejected']}, "
+                f"dead-lettered: {totals['dead_lettered']}, "
+                f"batches: {totals['batches']}, elapsed: {time.monotonic() - started:.2f}s"
+            )
+        return {"status": "completed", **totals}
+
+    except Exception as e:
+        logger.error(f"Callback ingestion failed: {str(e)}")
+        return {
+            "status": "failed",
+            "error": str(e),
+            "error_type": type(e).__name__,
+            **totals,
+        }
+
+    finally:
+        try:
+            await release_consumer_lock(redis, token)
+        except Exception:
+            pass
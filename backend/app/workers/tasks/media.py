@@ -0,0 +1,180 @@
+"""
+Media Tasks - Copia local del media de las piezas completadas
+
+Descarga al media store (app/services/media_store.py) el media_url de las
+piezas COMPLETED que aún no tienen copia local, genera el thumbnail y
+enlaza la pieza con su MediaAsset. Solo se descargan URLs que llegaron por
+el camino de servicio (`media_url_from_service`: API key de n8n o callback
+de proveedor); una URL fijada por un usuario nunca la pide el worker. Se ejecuta como cron de Arq en la cola
+bulk; el trabajo es idempotente (direccionado por contenido), así que una
+ejecución solapada o repetida no duplica ficheros ni filas.
+"""
+
+import asyncio
+import logging
+import time
+from datetime import datetime, timezone
+from typing import Dict, Any, List, Optional
+
+from sqlalchemy import func, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session
+
+from app.core.config import settings
+from app.infrastructure.db.session import get_session
+from app.models.content import ContentPiece
+from app.models.media import MediaAsset
+from app.services.media_store import StoredMedia, media_store
+
+
+# Piezas cuya descarga falló: no se reintentan hasta que caduca la clave
+RETRY_KEY = "bai:media_store:retry:{piece_id}"
+
+# Presupuesto por ejecución: deja margen respecto al intervalo del cron
+MAX_RUN_SECONDS = 50.0
+
+
+def _pending_pieces(session: Session, limit: int) -> List[Any]:
+    statement = (
+        select(ContentPiece.id, ContentPiece.media_url)
+        .where(
+            ContentPiece.media_asset_id.is_(None),
+            ContentPiece.media_url_from_service.is_(True),
+            ContentPiece.media_url.like("https://%"),
+            func.upper(ContentPiece.status) == "COMPLETED",
+        )
+        .order_by(ContentPiece.id)
+        .limit(limit)
+    )
+    return session.execute(statement).all()
+
+
+def _asset_id(session: Session, stored: StoredMedia, url: str, thumbnail: tuple) -> int:
+    """ID del MediaAsset del hash, creándolo si no existe (concurrencia-safe)."""
+    existing = session.execute(select(MediaAsset.id).where(MediaAsset.sha256 == stored.sha256)).scalar()
+    if existing is not None:
+        return existing
+    has_thumbnail, width, height = thumbnail
+    try:
+        with session.begin_nested():
+            asset = MediaAsset(
+                sha256=stored.sha256,
+                mime_type=stored.mime_type,
+                size_bytes=stored.size_bytes,
+                width=width,
+                height=height,
+                has_thumbnail=has_thumbnail,
+                source_url=url[:1000],
+            )
+            session.add(asset)
+        return asset.id
+    except IntegrityError:
+        # Otro worker insertó el mismo hash entre la lectura y el INSERT
+        return session.execute(select(MediaAsset.id).where(MediaAsset.sha256 == stored.sha256)).scalar_one()
+
+
+async def store_media_assets(ctx: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Guarda en local el media de las piezas completadas.
+
+    Orden:
+    1. Piezas COMPLETED con media_url https de servicio y sin
+       media_asset_id (las que fallaron hace menos de
+       MEDIA_STORE_RETRY_SECONDS se saltan)
+    2. Una descarga por URL distinta, MEDIA_STORE_CONCURRENCY a la vez,
+       con hash en streaming y thumbnail en un thread (host, redirecciones
+       y tipo validados por el media store)
+    3. Un MediaAsset por hash y UPDATE de las piezas (solo si su media_url
+       no cambió durante la descarga)
+
+    Args:
+        ctx: Contexto del worker (Arq)
+
+    Returns:
+        dict con piezas enlazadas, ficheros nuevos/deduplicados y fallos
+    """
+    import httpx
+
+    logger = ctx.get("logger") or logging.getLogger("bai.worker.tasks")
+    redis = ctx.get("redis")
+    totals = {"pieces_linked": 0, "stored": 0, "deduplicated": 0, "failed": 0}
+    started = time.monotonic()
+
+    try:
+        with get_session() as session:
+            candidates = _pending_pieces(session, settings.MEDIA_STORE_BATCH_SIZE * 4)
+        if redis is not None and candidates:
+            waiting = await redis.mget([RETRY_KEY.format(piece_id=piece_id) for piece_id, _ in candidates])
+            candidates = [row for row, retry in zip(candidates, waiting) if retry is None]
+        candidates = candidates[:settings.MEDIA_STORE_BATCH_SIZE]
+        if not candidates:
+            return {"status": "completed", **totals}
+
+        pieces_by_url: Dict[str, List[int]] = {}
+        for piece_id, url in candidates:
+            pieces_by_url.setdefault(url, []).append(piece_id)
+
+        semaphore = asyncio.Semaphore(settings.MEDIA_STORE_CONCURRENCY)
+
+        async def fetch(client, url: str) -> Optional[tuple]:
+            async with semaphore:
+                if time.monotonic() - started > MAX_RUN_SECONDS:
+                    return None
+                try:
+                    stored = await media_store.download(client, url)
+                    thumbnail_missing = not media_store.thumbnail_path(stored.sha256).exists()
+                    thumbnail = (
+                        await media_store.thumbnail(stored.sha256, stored.mime_type)
+                        if stored.created or thumbnail_missing
+                        else (True, None, None)
+                    )
+                    return url, stored, thumbnail
+                except Exception as e:
+                    logger.warning(f"Media download failed for pieces {pieces_by_url[url]}: {type(e).__name__}: {str(e)}")
+                    totals["failed"] += len(pieces_by_url[url])
+                    if redis is not None:
+                        async with redis.pipeline(transaction=False) as pipe:
+                            for piece_id in pieces_by_url[url]:
+                                pipe.set(RETRY_KEY.format(piece_id=piece_id), "1", ex=settings.MEDIA_STORE_RETRY_SECONDS)
+                            await pipe.execute()
+                    return None
+
+        async with httpx.AsyncClient(timeout=settings.MEDIA_STORE_DOWNLOAD_TIMEOUT_SECONDS) as client:
+            results = await asyncio.gather(*(fetch(client, url) for url in pieces_by_url))
+
+        now = datetime.now(timezone.utc)
+        with get_session() as session:
+            for result in results:
+                if result is None:
+                    continue
+                url, stored, thumbnail = result
+                totals["stored" if stored.created else "deduplicated"] += 1
+                asset_id = _asset_id(session, stored, url, thumbnail)
+                linked = session.execute(
+                    update(ContentPiece)
+                    .where(
+                        ContentPiece.id.in_(pieces_by_url[url]),
+                        ContentPiece.media_url == url,
+                        ContentPiece.media_asset_id.is_(None),
+                    )
+                    .values(media_asset_id=asset_id, updated_at=now)
+                    .execution_options(synchronize_session=False)
+                )
+                totals["pieces_linked"] += linked.rowcount
+            session.commit()
+
+        logger.info(
+            f"Media store - linked: {totals['pieces_linked']}, stored: {totals['stored']}, "
+            f"deduplicated: {totals['deduplicated']}, failed: {totals['failed']}, "
+            f"elapsed: {time.monotonic() - started:.2f}s"
+        )
+        return {"status": "completed", **totals}
+
+    except Exception as e:
+        logger.error(f"Media store run failed: {str(e)}")
+        return {
+            "status": "failed",
+            "error": str(e),
+            "error_type": type(e).__name__,
+            **totals,
+        }
@@ -0,0 +1,77 @@
+"""
+Outbox Tasks - Dispatcher del outbox transaccional
+
+Entrega a n8n los eventos escritos por los endpoints en `outbox_events`
+(ver app/core/outbox.py). Se ejecuta como cron de Arq cada pocos
+segundos; varios workers pueden correrlo a la vez porque cada lote se
+reclama con `FOR UPDATE SKIP LOCKED`.
+"""
+
+import logging
+import time
+from typing import Dict, Any
+
+from app.core.config import settings
+from app.core.outbox import outbox_dispatcher, record_dispatch
+from app.infrastructure.db.session import get_session
+
+
+# Presupuesto por ejecución: deja margen respecto al job_timeout del worker
+MAX_RUN_SECONDS = 20.0
+
+
+async def dispatch_outbox(ctx: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Entrega los eventos pendientes del outbox en lotes.
+
+    Procesa lotes de OUTBOX_BATCH_SIZE hasta que no quedan eventos
+    vencidos o se agota MAX_RUN_SECONDS. Un fallo a mitad de lote deja
+    los eventos reclamados con su lease: se reintentan al vencer
+    (at-least-once, deduplicados en destino por Idempotency-Key).
+
+    Args:
+        ctx: Contexto del worker (Arq)
+
+    Returns:
+        dict con eventos reclamados, entregados, sin confirmar, reintentados y dead
+    """
+    import httpx
+
+    logger = ctx.get("logger") or logging.getLogger("bai.worker.tasks")
+    totals: Dict[str, Any] = {
+        "claimed": 0, "delivered": 0, "unconfirmed": 0, "retried": 0, "dead": 0, "lag_ms_total": 0.0, "batches": 0,
+    }
+    started = time.monotonic()
+
+    try:
+        async with httpx.AsyncClient(timeout=settings.OUTBOX_DELIVERY_TIMEOUT_SECONDS) as client:
+            with get_session() as session:
+                while time.monotonic() - started < MAX_RUN_SECONDS:
+                    counts = await outbox_dispatcher.dispatch_batch(session, client)
+                    if not counts["claimed"]:
+                        break
+                    for key in ("claimed", "delivered", "unconfirmed", "retried", "dead", "lag_ms_total"):
+                        totals[key] += counts[key]
+                    totals["batches"] += 1
+
+        if totals["batches"]:
+            logger.info(
+                f"Outbox dispatched - delivered: {totals['delivered']}, unconfirmed: {totals['unconfirmed']}, "
+                f"retried: {totals['retried']}, "
+                f"dead: {totals['dead']}, batches: {totals['batches']}, "
+                f"elapsed: {time.monotonic() - started:.2f}s"
+            )
+        return {"status": "completed", **totals}
+
+    except Exception as e:
+        logger.error(f"Outbox dispatch failed: {str(e)}")
+        return {
+            "status": "failed",
+            "error": str(e),
+            "error_type": type(e).__name__,
+            **totals,
+        }
+
+    finally:
+        if ctx.get("redis") is not None and totals["claimed"]:
+            await record_dispatch(ctx["redis"], totals, (time.monotonic() - started) * 1000)
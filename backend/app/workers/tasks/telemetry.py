@@ -0,0 +1,178 @@
+"""
+Telemetry Tasks - Collector del buffer de telemetría
+
+Drena el Redis Stream de eventos (ver app/modules/analytics/events.py) y
+los persiste en lotes con INSERTs multi-fila. Se ejecuta como cron de Arq
+cada pocos segundos; varios workers pueden correrlo a la vez porque leen
+a través del mismo consumer group.
+"""
+
+import logging
+import time
+from typing import Dict, Any, List
+
+from redis.exceptions import ResponseError
+
+from app.infrastructure.db.session import get_session
+from app.modules.analytics.events import (
+    TELEMETRY_STREAM,
+    TELEMETRY_DEAD_LETTER_STREAM,
+    COLLECTOR_GROUP,
+    CLAIM_IDLE_MS,
+    consumer_name,
+    decode_events,
+)
+from app.modules.analytics.service import AnalyticsService
+from app.workers.streams import Entry, dead_letter, is_transient_error, normalize_entries
+
+
+logger = logging.getLogger("bai.worker.tasks")
+
+# Entradas por lote (una transacción y un INSERT multi-fila por tabla)
+BATCH_SIZE = 500
+
+# Presupuesto por ejecución: deja margen respecto al job_timeout del worker
+MAX_RUN_SECONDS = 20.0
+
+
+async def _ensure_group(redis) -> None:
+    try:
+        await redis.xgroup_create(TELEMETRY_STREAM, COLLECTOR_GROUP, id="0", mkstream=True)
+    except ResponseError as e:
+        if "BUSYGROUP" not in str(e):
+            raise
+
+
+async def _ack(redis, ids: List[str]) -> None:
+    if not ids:
+        return
+    async with redis.pipeline(transaction=True) as pipe:
+        pipe.xack(TELEMETRY_STREAM, COLLECTOR_GROUP, *ids)
+        pipe.xdel(TELEMETRY_STREAM, *ids)
+        await pipe.execute()
+
+
+async def _flush_each(redis, entries: List[Entry], service: AnalyticsService) -> Dict[str, int]:
+    """Reintenta un lote fallido entrada a entrada; las rechazadas van a dead-letter."""
+    counts = {"usage_logs": 0, "searchlog": 0, "dead_lettered": 0}
+    done: List[str] = []
+    try:
+        for entry in entries:
+            usage_rows, search_rows, ids = decode_events([entry])
+            if usage_rows or search_rows:
+                try:
+                    with get_session() as session:
+                        inserted = service.ingest_events(usage_rows, search_rows, session)
+                except Exception as e:
+                    if is_transient_error(e):
+                        raise
+                    logger.warning(f"Telemetry entry {entry[0]} dead-lettered: {type(e).__name__}: {str(e)}")
+                    await dead_letter(
+                        redis, TELEMETRY_STREAM, COLLECTOR_GROUP, TELEMETRY_DEAD_LETTER_STREAM, entry, e
+                    )
+                    counts["dead_lettered"] += 1
+                    continue
+                counts["usage_logs"] += inserted["usage_logs"]
+                counts["searchlog"] += inserted["searchlog"]
+            done.extend(ids)
+    finally:
+        # Lo ya insertado se confirma aunque un error transitorio corte el lote
+        await _ack(redis, done)
+    return counts
+
+
+async def _flush(redis, entries, service: AnalyticsService) -> Dict[str, int]:
+    """Persiste un lote y solo entonces lo confirma en el stream."""
+    entries = normalize_entries(entries)
+    usage_rows, search_rows, ids = decode_events(entries)
+    counts = {"usage_logs": 0, "searchlog": 0, "dead_lettered": 0}
+    if usage_rows or search_rows:
+        try:
+            with get_session() as session:
+                counts.update(service.ingest_events(usage_rows, search_rows, session))
+        except Exception as e:
+            if is_transient_error(e):
+                raise
+            return await _flush_each(redis, entries, service)
+    await _ack(redis, ids)
+    return counts
+
+
+async def collect_telemetry(ctx: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Drena el buffer de telemetría hacia usage_logs y searchlog.
+    
+    Orden:
+    1. Reclama entradas pendientes de collectors caídos (XAUTOCLAIM)
+    2. Lee entradas nuevas en lotes de BATCH_SIZE hasta vaciar el stream
+       o agotar MAX_RUN_SECONDS
+    
+    Si un INSERT falla por un error transitorio, el lote queda pendiente sin
+    ACK y se reintenta en la siguiente ejecución (at-least-once). Si falla
+    por el contenido de un evento, el lote se reintenta evento a evento y
+    los rechazados van a TELEMETRY_DEAD_LETTER_STREAM.
+    
+    Args:
+        ctx: Contexto del worker (Arq)
+    
+    Returns:
+        dict con filas insertadas y lotes procesados
+    """
+    logger = ctx.get("logger") or logging.getLogger("bai.worker.tasks")
+    redis = ctx["redis"]
+    consumer = consumer_name()
+    service = AnalyticsService()
+    totals = {"usage_logs": 0, "searchlog": 0, "dead_lettered": 0, "batches": 0}
+    started = time.monotonic()
+    
+    try:
+        await _ensure_group(redis)
+        
+        # 1. Entradas huérfanas (consumer caído entre lectura y ACK)
+        claimed = await redis.xautoclaim(
+            TELEMETRY_STREAM,
+            COLLECTOR_GROUP,
+            consumer,
+            min_idle_time=CLAIM_IDLE_MS,
+            start_id="0-0",
+            count=BATCH_SIZE,
+        )
+        if claimed and claimed[1]:
+            counts = await _flush(redis, claimed[1], service)
+            for key in ("usage_logs", "searchlog", "dead_lettered"):
+                totals[key] += counts[key]
+            totals["batches"] += 1
+        
+        # 2. Entradas nuevas
+        while time.monotonic() - started < MAX_RUN_SECONDS:
+            response = await redis.xreadgroup(
+                COLLECTOR_GROUP,
+                consumer,
+                {TELEMETRY_STREAM: ">"},
+                count=BATCH_SIZE,
+            )
+            entries = response[0][1] if response else []
+            if not entries:
+                break
+            counts = await _flush(redis, entries, service)
+            for key in ("usage_logs", "searchlog", "dead_lettered"):
+                totals[key] += counts[key]
+            totals["batches"] += 1
+        
+        if totals["batches"]:
+            logger.info(
+                f"Telemetry collected - usage_logs: {totals['usage_logs']}, "
+                f"searchlog: {totals['searchlog']}, dead-lettered: {totals['dead_lettered']}, "
+                f"batches: {totals['batches']}, "
+                f"elapsed: {time.monotonic() - started:.2f}s"
+            )
+        return {"status": "completed", **totals}
+    
+    except Exception as e:
+        logger.error(f"Telemetry collection failed: {str(e)}")
+        return {
+            "status": "failed",
+            "error": str(e),
+            "error_type": type(e).__name__,
+            **totals,
+        }
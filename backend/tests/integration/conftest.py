@@ -0,0 +1,165 @@
+"""
+Fixtures compartidas de los tests de integración.
+
+`stream_redis` es un Redis en memoria con el subconjunto de comandos que
+usan los consumers de app/workers/tasks (XADD, XREADGROUP, XAUTOCLAIM,
+XPENDING, XACK, XDEL, pipelines) y las claves simples de app/core
+(GET/SET/DEL), para probar ACKs, dead-letter y revocación sin un
+servidor Redis.
+"""
+
+from contextlib import contextmanager
+from typing import Any, Dict, List, Tuple
+
+import pytest
+from sqlmodel import Session, SQLModel, create_engine
+from sqlmodel.pool import StaticPool
+
+
+class _Pipeline:
+    def __init__(self, redis: "StreamRedis"):
+        self.redis = redis
+        self.calls: List[Tuple[str, tuple, dict]] = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def __getattr__(self, name: str):
+        def queue(*args, **kwargs):
+            self.calls.append((name, args, kwargs))
+            return self
+        return queue
+
+    async def execute(self) -> List[Any]:
+        return [await getattr(self.redis, name)(*args, **kwargs) for name, args, kwargs in self.calls]
+
+
+class StreamRedis:
+    """Redis en memoria: streams con un consumer group y claves simples."""
+
+    def __init__(self):
+        self.streams: Dict[str, List[Tuple[str, Dict[str, str]]]] = {}
+        self.delivered: Dict[str, int] = {}
+        self.pending: Dict[str, Dict[str, int]] = {}
+        self.values: Dict[str, Any] = {}
+        self._seq = 0
+
+    def pipeline(self, transaction: bool = True) -> _Pipeline:
+        return _Pipeline(self)
+
+    async def xgroup_create(self, name, groupname, id="0", mkstream=False):
+        self.streams.setdefault(name, [])
+        self.pending.setdefault(name, {})
+
+    async def xadd(self, name, fields, maxlen=None, approximate=True):
+        self._seq += 1
+        entry_id = f"{self._seq}-0"
+        self.streams.setdefault(name, []).append((entry_id, dict(fields)))
+        return entry_id
+
+    async def xreadgroup(self, groupname, consumername, streams, count=None, block=None):
+        (name, _), = streams.items()
+        start = self.delivered.get(name, 0)
+        entries = self.streams.get(name, [])[start:start + (count or 10**9)]
+        if not entries:
+            return []
+        self.delivered[name] = start + len(entries)
+        pending = self.pending.setdefault(name, {})
+        for entry_id, _ in entries:
+            pending[entry_id] = pending.get(entry_id, 0) + 1
+        return [[name, entries]]
+
+    async def xautoclaim(self, name, groupname, consumername, min_idle_time, start_id="0-0", count=None):
+        pending = self.pending.setdefault(name, {})
+        entries = [entry for entry in self.streams.get(name, []) if entry[0] in pending]
+        for entry_id, _ in entries:
+            pending[entry_id] += 1
+        return ["0-0", entries, []]
+
+    async def xpending_range(self, name, groupname, min, max, count, consumername=None):
+        pending = self.pending.get(name, {})
+        return [
+            {"message_id": entry_id, "times_delivered": pending[entry_id]}
+            for entry_id, _ in self.streams.get(name, [])
+            if entry_id in pending
+        ][:count]
+
+    async def xack(self, name, groupname, *ids):
+        pending = self.pending.setdefault(name, {})
+        return sum(1 for entry_id in ids if pending.pop(entry_id, None) is not None)
+
+    async def xdel(self, name, *ids):
+        before = len(self.streams.get(name, []))
+        self.streams[name] = [entry for entry in self.streams.get(name, []) if entry[0] not in ids]
+        self.delivered[name] = max(0, self.delivered.get(name, 0) - (before - len(self.streams[name])))
+        return before - len(self.streams[name])
+
+    async def set(self, name, value, nx=False, px=None, ex=None):
+        if nx and name in self.values:
+            return None
+        self.values[name] = value
+        return True
+
+    async def get(self, name):
+        return self.values.get(name)
+
+    async def delete(self, *names):
+        return sum(1 for name in names if self.values.pop(name, None) is not None)
+
+    async def publish(self, channel, message):
+        return 0
+
+    async def pexpire(self, name, ms):
+        return name in self.values
+
+    async def eval(self, script, numkeys, *args):
+        # Solo el release del lock (GET == token -> DEL)
+        key, token = args[0], args[1]
+        if self.values.get(key) == token:
+            del self.values[key]
+            return 1
+        return 0
+
+
+@pytest.fixture
+def stream_redis() -> StreamRedis:
+    return StreamRedis()
+
+
+@pytest.fixture
+def sqlite_engine():
+    # Todas las tablas (igual que alembic/env.py)
+    from app.models import user, chat, content, log, credits, outbox, media  # noqa: F401
+    from app.modules.analytics import models as analytics_models  # noqa: F401
+    from app.modules.content_creator import models as content_models  # noqa: F401
+    from app.modules.content_planner import models as planner_models  # noqa: F401
+    from app.modules.data_mining import models as data_mining_models  # noqa: F401
+
+    engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    SQLModel.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def session_scope(sqlite_engine):
+    """Equivalente a app.infrastructure.db.session.get_session sobre SQLite."""
+    @contextmanager
+    def scope():
+        session = Session(sqlite_engine)
+        try:
+            yield session
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+    return scope
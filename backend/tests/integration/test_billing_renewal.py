@@ -0,0 +1,104 @@
+"""
+Integration Tests - Renovación mensual de créditos desde Stripe
+
+Verifica que cada factura de renovación pagada (invoice.paid) deja las
+bolsas mensuales en la asignación del plan y lo registra en el libro, que
+un webhook reenviado no renueva dos veces, que las facturas de prorrateo
+no renuevan y que el checkout asigna los créditos del primer período.
+"""
+
+import pytest
+from sqlmodel import Session, select
+
+from app.core.config import settings
+from app.core.credits import MONTHLY_RESET
+from app.models.credits import CreditLedgerEntry
+from app.models.user import PLAN_MONTHLY_CREDITS, PlanTier, User
+from app.modules.billing.service import BillingService
+
+
+@pytest.fixture
+def billing(monkeypatch) -> BillingService:
+    monkeypatch.setattr(settings, "STRIPE_API_KEY", "sk_test_renewal")
+    return BillingService()
+
+
+@pytest.fixture
+def user_id(sqlite_engine) -> int:
+    with Session(sqlite_engine) as session:
+        user = User(
+            email="billing@test.com",
+            hashed_password="x",
+            plan_tier=PlanTier.CEREBRO,
+            stripe_customer_id="cus_123",
+            monthly_credits_video=2,
+            extra_credits_video=7,
+        )
+        session.add(user)
+        session.commit()
+        return user.id
+
+
+def _invoice_paid(invoice_id: str, billing_reason: str = "subscription_cycle") -> dict:
+    return {
+        "type": "invoice.paid",
+        "data": {"object": {"id": invoice_id, "customer": "cus_123", "billing_reason": billing_reason}},
+    }
+
+
+def _handle(billing, sqlite_engine, event) -> dict:
+    with Session(sqlite_engine) as session:
+        return billing.handle_webhook_event(event, session)
+
+
+def _state(sqlite_engine, user_id):
+    with Session(sqlite_engine) as session:
+        user = session.get(User, user_id)
+        resets = session.exec(
+            select(CreditLedgerEntry.resource, CreditLedgerEntry.monthly_delta, CreditLedgerEntry.reason)
+            .where(CreditLedgerEntry.kind == MONTHLY_RESET)
+            .order_by(CreditLedgerEntry.id)
+        ).all()
+        return (user.monthly_credits_video, user.monthly_credits_image, user.extra_credits_video), resets
+
+
+def test_renewal_resets_monthly_credits_once_per_invoice(billing, sqlite_engine, user_id):
+    allowance = PLAN_MONTHLY_CREDITS[PlanTier.CEREBRO]
+
+    assert _handle(billing, sqlite_engine, _invoice_paid("in_1"))["status"] == "success"
+
+    balances, resets = _state(sqlite_engine, user_id)
+    assert balances == (allowance["video"], allowance["image"], 7)
+    assert resets == [
+        ("video", allowance["video"] - 2, "invoice:in_1"),
+        ("image", allowance["image"], "invoice:in_1"),
+    ]
+
+    # Stripe reenvía el webhook: no se renueva otra vez
+    assert _handle(billing, sqlite_engine, _invoice_paid("in_1"))["status"] == "success"
+    assert _state(sqlite_engine, user_id) == (balances, resets)
+
+
+def test_proration_invoice_does_not_reset(billing, sqlite_engine, user_id):
+    result = _handle(billing, sqlite_engine, _invoice_paid("in_2", billing_reason="subscription_update"))
+
+    assert result["status"] == "ignored"
+    assert _state(sqlite_engine, user_id) == ((2, 0, 7), [])
+
+
+def test_checkout_grants_the_first_period_of_the_new_plan(billing, sqlite_engine, user_id):
+    event = {
+        "type": "checkout.session.completed",
+        "data": {"object": {
+            "metadata": {"user_id": str(user_id), "plan_tier": "PARTNER"},
+            "customer": "cus_123",
+            "invoice": "in_first",
+        }},
+    }
+
+    assert _handle(billing, sqlite_engine, event)["status"] == "success"
+
+    allowance = PLAN_MONTHLY_CREDITS[PlanTier.PARTNER]
+    balances, resets = _state(sqlite_engine, user_id)
+    assert balances == (allowance["video"], allowance["image"], 7)
+    assert {reason for _, _, reason in resets} == {"invoice:in_first"}
@@ -0,0 +1,159 @@
+"""
+Integration Tests - bulk-update-media por el stream de callbacks
+
+Verifica que el endpoint bulk encola sus items en el mismo stream que los
+callbacks por pieza: un callback anterior que sigue en el stream no pisa
+el valor bulk más nuevo, y un estado sin URL no descarta la URL más nueva
+del mismo lote. Sin Redis, el lote se aplica en línea.
+"""
+
+import asyncio
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+from app.api.routes import marketing
+from app.core.callbacks import CALLBACK_STREAM, KIND_PIECE_MEDIA, KIND_PIECE_STATUS, enqueue_callback, enqueue_callbacks
+from app.core.database import get_session
+from app.models.content import ContentPiece, MarketingCampaign
+from app.models.user import User
+from app.workers.tasks import callbacks
+
+
+@pytest.fixture
+def piece_ids(sqlite_engine):
+    with Session(sqlite_engine) as session:
+        user = User(email="bulk@test.com", hashed_password="x")
+        session.add(user)
+        session.flush()
+        campaign = MarketingCampaign(
+            user_id=user.id, name="c", influencer_name="i", tone_of_voice="t",
+            topic="x", platforms="instagram", content_count=2, status="in_progress",
+        )
+        session.add(campaign)
+        session.flush()
+        pieces = [
+            ContentPiece(campaign_id=campaign.id, platform="Instagram", type="Reel", caption="c", visual_script="v")
+            for _ in range(2)
+        ]
+        session.add_all(pieces)
+        session.commit()
+        return [piece.id for piece in pieces]
+
+
+@pytest.fixture
+def client(monkeypatch, sqlite_engine, stream_redis):
+    monkeypatch.setattr(marketing, "get_redis_client", lambda: stream_redis)
+
+    def session_override():
+        with Session(sqlite_engine) as session:
+            yield session
+
+    app = FastAPI()
+    app.include_router(marketing.router, prefix="/api/v1/marketing")
+    app.dependency_overrides = {
+        marketing.verify_service_api_key: lambda: True,
+        get_session: session_override,
+    }
+    return TestClient(app)
+
+
+@pytest.fixture
+def consumer(monkeypatch, stream_redis, session_scope):
+    monkeypatch.setattr(callbacks, "get_session", session_scope)
+    return lambda: asyncio.run(callbacks.ingest_callbacks({"redis": stream_redis}))
+
+
+def _piece(sqlite_engine, piece_id):
+    with Session(sqlite_engine) as session:
+        piece = session.get(ContentPiece, piece_id)
+        return piece.media_url, piece.status
+
+
+def _bulk(client, items):
+    return client.patch("/api/v1/marketing/public/content/bulk-update-media", json={"items": items})
+
+
+def test_bulk_is_applied_after_earlier_single_callbacks(client, consumer, stream_redis, sqlite_engine, piece_ids):
+    first, second = piece_ids
+    # Callback por pieza aún sin aplicar cuando llega el bulk
+    asyncio.run(enqueue_callback(stream_redis, KIND_PIECE_MEDIA, first, {"video": {"url": "https://cdn.example.com/old.mp4"}}))
+
+    response = _bulk(client, [
+        {"piece_id": first, "media_url": "https://cdn.example.com/new.mp4"},
+        {"piece_id": second, "status": "FAILED"},
+        {"piece_id": second, "status": "DONE"},
+    ])
+
+    assert response.status_code == 202
+    body = response.json()
+    assert (body["status"], body["accepted"], body["rejected"]) == ("accepted", 2, 1)
+    assert [item["result"] for item in body["results"]] == ["accepted", "accepted", "invalid_status"]
+    # Nada se escribe en el request
+    assert _piece(sqlite_engine, first) == (None, "PENDING")
+
+    assert consumer()["pieces_updated"] == 2
+
+    assert _piece(sqlite_engine, first) == ("https://cdn.example.com/new.mp4", "COMPLETED")
+    assert _piece(sqlite_engine, second) == (None, "FAILED")
+    assert stream_redis.streams[CALLBACK_STREAM] == []
+    with Session(sqlite_engine) as session:
+        campaign_id = session.get(ContentPiece, first).campaign_id
+        assert session.get(MarketingCampaign, campaign_id).status == "completed"
+
+
+def test_status_without_url_keeps_the_newer_url_from_the_same_batch(client, consumer, stream_redis, sqlite_engine, piece_ids):
+    """piece_media con URL seguido de un FAILED sin URL: se aplican campo a campo."""
+    first, second = piece_ids
+    asyncio.run(enqueue_callback(stream_redis, KIND_PIECE_MEDIA, first, {"video": {"url": "https://cdn.example.com/old.mp4"}}))
+    consumer()
+    asyncio.run(enqueue_callback(stream_redis, KIND_PIECE_MEDIA, first, {"video": {"url": "https://cdn.example.com/new.mp4"}}))
+    asyncio.run(enqueue_callback(stream_redis, KIND_PIECE_MEDIA, second, {"video": {"url": "https://cdn.example.com/b.mp4"}}))
+    _bulk(client, [{"piece_id": first, "status": "FAILED"}])
+    # El mismo caso con el dueño de la pieza (otro principal) tras un callback de servicio
+    with Session(sqlite_engine) as session:
+        owner_id = session.get(MarketingCampaign, session.get(ContentPiece, second).campaign_id).user_id
+    asyncio.run(enqueue_callbacks(stream_redis, KIND_PIECE_STATUS, {second: {"media_url": None, "status": "FAILED"}}, user_id=owner_id))
+
+    assert consumer()["pieces_updated"] == 2
+
+    assert _piece(sqlite_engine, first) == ("https://cdn.example.com/new.mp4", "FAILED")
+    assert _piece(sqlite_engine, second) == ("https://cdn.example.com/b.mp4", "FAILED")
+    with Session(sqlite_engine) as session:
+        # La URL la escribió el servicio: sigue marcada para el media store
+        assert session.get(ContentPiece, second).media_url_from_service
+
+
+def test_unknown_piece_is_rejected_by_the_consumer(client, consumer, sqlite_engine, piece_ids):
+    first, _ = piece_ids
+
+    response = _bulk(client, [
+        {"piece_id": first, "media_url": "https://cdn.example.com/a.mp4"},
+        {"piece_id": 999_999, "media_url": "https://cdn.example.com/b.mp4"},
+    ])
+
+    assert response.json()["accepted"] == 2
+    result = consumer()
+    assert (result["pieces_updated"], result["rejected"]) == (1, 1)
+    assert _piece(sqlite_engine, first)[0] == "https://cdn.example.com/a.mp4"
+
+
+def test_bulk_is_applied_inline_without_redis(client, monkeypatch, sqlite_engine, piece_ids):
+    first, second = piece_ids
+
+    async def unavailable(*args, **kwargs):
+        raise ConnectionError("redis down")
+    monkeypatch.setattr(marketing, "enqueue_callbacks", unavailable)
+
+    response = _bulk(client, [
+        {"piece_id": first, "payload": {"video": {"url": "https://cdn.example.com/a.mp4"}}},
+        {"piece_id": second},
+    ])
+
+    assert response.status_code == 200
+    body = response.json()
+    assert (body["status"], body["updated"]) == ("partial", 1)
+    assert [item["result"] for item in body["results"]] == ["updated", "missing_media_url"]
+    assert _piece(sqlite_engine, first) == ("https://cdn.example.com/a.mp4", "COMPLETED")
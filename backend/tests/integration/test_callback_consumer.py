@@ -0,0 +1,186 @@
+"""
+Integration Tests - Consumer de callbacks
+
+Verifica que los callbacks se aplican en orden de stream y se confirman
+tras el commit (uno por lote, también con callbacks del planner), y que una entrada que la base de datos rechaza siempre no
+bloquea el stream: detiene el consumer sin adelantar las posteriores de
+la misma pieza y, tras CALLBACK_MAX_DELIVERIES entregas, se aparta a
+dead-letter y el resto se aplica.
+"""
+
+import asyncio
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.exc import DataError, OperationalError
+from sqlmodel import Session
+
+from app.core import callbacks as core_callbacks
+from app.core.callbacks import (
+    CALLBACK_DEAD_LETTER_STREAM,
+    CALLBACK_MAX_DELIVERIES,
+    CALLBACK_STREAM,
+    KIND_PIECE_MEDIA,
+    KIND_PLANNER,
+    enqueue_callback,
+)
+from app.models.content import ContentPiece, MarketingCampaign
+from app.models.user import User
+from app.modules.content_planner.models import CampaignStatus, ContentCampaign
+from app.workers.tasks import callbacks
+
+
+@pytest.fixture
+def piece_ids(sqlite_engine):
+    with Session(sqlite_engine) as session:
+        user = User(email="cb@test.com", hashed_password="x")
+        session.add(user)
+        session.flush()
+        campaign = MarketingCampaign(
+            user_id=user.id, name="c", influencer_name="i", tone_of_voice="t",
+            topic="x", platforms="instagram", content_count=2, status="in_progress",
+        )
+        session.add(campaign)
+        session.flush()
+        pieces = [
+            ContentPiece(campaign_id=campaign.id, platform="Instagram", type="Reel", caption="c", visual_script="v")
+            for _ in range(2)
+        ]
+        session.add_all(pieces)
+        session.commit()
+        return [piece.id for piece in pieces]
+
+
+@pytest.fixture
+def consumer(monkeypatch, stream_redis, session_scope):
+    monkeypatch.setattr(callbacks, "get_session", session_scope)
+
+    def run():
+        return asyncio.run(callbacks.ingest_callbacks({"redis": stream_redis}))
+    return run
+
+
+def _enqueue(redis, piece_id, url):
+    return asyncio.run(enqueue_callback(redis, KIND_PIECE_MEDIA, piece_id, {"media_url": url}))
+
+
+def _media_url(sqlite_engine, piece_id):
+    with Session(sqlite_engine) as session:
+        return session.get(ContentPiece, piece_id).media_url
+
+
+def _poison(monkeypatch, poison_piece_id, error):
+    """La DB rechaza cualquier lote que toque `poison_piece_id`."""
+    original = core_callbacks.apply_callbacks
+
+    def apply(session, batch):
+        if any(callback["key"] == poison_piece_id for callback in batch):
+            raise error
+        return original(session, batch)
+    monkeypatch.setattr(callbacks, "apply_callbacks", apply)
+
+
+def test_callbacks_applied_in_order_and_acknowledged(consumer, stream_redis, sqlite_engine, piece_ids):
+    first, second = piece_ids
+    _enqueue(stream_redis, first, "https://cdn.example.com/a.mp4")
+    _enqueue(stream_redis, second, "https://cdn.example.com/b.mp4")
+    _enqueue(stream_redis, first, "https://cdn.example.com/c.mp4")
+
+    result = consumer()
+
+    assert result["status"] == "completed"
+    assert (result["entries"], result["pieces_updated"]) == (3, 2)
+    assert _media_url(sqlite_engine, first) == "https://cdn.example.com/c.mp4"
+    assert stream_redis.streams[CALLBACK_STREAM] == []
+    assert stream_redis.pending[CALLBACK_STREAM] == {}
+    with Session(sqlite_engine) as session:
+        campaign_id = session.get(ContentPiece, first).campaign_id
+        assert session.get(MarketingCampaign, campaign_id).status == "completed"
+
+
+def test_mixed_batch_is_applied_in_a_single_commit(consumer, monkeypatch, stream_redis, sqlite_engine, piece_ids):
+    now = datetime.now(timezone.utc)
+    with Session(sqlite_engine) as session:
+        user_id = session.get(MarketingCampaign, session.get(ContentPiece, piece_ids[0]).campaign_id).user_id
+        planner_campaigns = [
+            ContentCampaign(
+                user_id=user_id, month="2026-10", tone_of_voice="t", themes=["IA"],
+                target_platforms=["instagram"], status=CampaignStatus.PROCESSING_REMOTE,
+                created_at=now, updated_at=now,
+            )
+            for _ in range(2)
+        ]
+        session.add_all(planner_campaigns)
+        session.commit()
+        completed, failed = (campaign.id for campaign in planner_campaigns)
+
+    _enqueue(stream_redis, piece_ids[0], "https://cdn.example.com/a.mp4")
+    asyncio.run(enqueue_callback(stream_redis, KIND_PLANNER, completed, {"generated_content": {"posts": [1]}}))
+    asyncio.run(enqueue_callback(stream_redis, KIND_PLANNER, failed, {"error": "n8n timeout"}))
+    asyncio.run(enqueue_callback(stream_redis, KIND_PLANNER, 999_999, {"error": "x"}))
+
+    commits = []
+
+    def apply(session, batch):
+        listener = lambda session: commits.append(session)  # noqa: E731
+        event.listen(session, "after_commit", listener)
+        try:
+            return core_callbacks.apply_callbacks(session, batch)
+        finally:
+            event.remove(session, "after_commit", listener)
+    monkeypatch.setattr(callbacks, "apply_callbacks", apply)
+
+    result = consumer()
+
+    assert len(commits) == 1
+    assert (result["pieces_updated"], result["campaigns_updated"], result["rejected"]) == (1, 2, 1)
+    assert _media_url(sqlite_engine, piece_ids[0]) == "https://cdn.example.com/a.mp4"
+    with Session(sqlite_engine) as session:
+        done = session.get(ContentCampaign, completed)
+        assert (done.status, done.generated_content) == (CampaignStatus.COMPLETED, {"posts": [1]})
+        assert done.completed_at is not None
+        broken = session.get(ContentCampaign, failed)
+        assert (broken.status, broken.error_message) == (CampaignStatus.FAILED, "n8n timeout")
+
+
+def test_poison_entry_blocks_until_max_deliveries_then_dead_letters(
+    consumer, monkeypatch, stream_redis, sqlite_engine, piece_ids
+):
+    first, poisoned = piece_ids
+    _poison(monkeypatch, poisoned, DataError("UPDATE", {}, Exception("value too long for type character varying(1000)")))
+    _enqueue(stream_redis, first, "https://cdn.example.com/a.mp4")
+    poison_id = _enqueue(stream_redis, poisoned, "https://cdn.example.com/" + "x" * 1000)
+    later_id = _enqueue(stream_redis, first, "https://cdn.example.com/b.mp4")
+
+    for _ in range(CALLBACK_MAX_DELIVERIES - 1):
+        result = consumer()
+        assert result["status"] == "failed"
+        # Lo anterior a la culpable se confirmó; lo posterior espera en orden
+        assert _media_url(sqlite_engine, first) == "https://cdn.example.com/a.mp4"
+        assert list(stream_redis.pending[CALLBACK_STREAM]) == [poison_id, later_id]
+        assert CALLBACK_DEAD_LETTER_STREAM not in stream_redis.streams
+
+    result = consumer()
+
+    assert result["status"] == "completed"
+    assert result["dead_lettered"] == 1
+    assert _media_url(sqlite_engine, first) == "https://cdn.example.com/b.mp4"
+    assert stream_redis.streams[CALLBACK_STREAM] == []
+    assert stream_redis.pending[CALLBACK_STREAM] == {}
+    (_, dead), = stream_redis.streams[CALLBACK_DEAD_LETTER_STREAM]
+    assert dead["source_id"] == poison_id
+    assert dead["key"] == str(poisoned)
+    assert dead["error"].startswith("DataError")
+
+
+def test_transient_error_is_never_dead_lettered(consumer, monkeypatch, stream_redis, piece_ids):
+    first, _ = piece_ids
+    _poison(monkeypatch, first, OperationalError("UPDATE", {}, Exception("connection refused")))
+    entry_id = _enqueue(stream_redis, first, "https://cdn.example.com/a.mp4")
+
+    for _ in range(CALLBACK_MAX_DELIVERIES + 1):
+        assert consumer()["status"] == "failed"
+
+    assert list(stream_redis.pending[CALLBACK_STREAM]) == [entry_id]
+    assert CALLBACK_DEAD_LETTER_STREAM not in stream_redis.streams
@@ -0,0 +1,70 @@
+"""
+Integration Tests - Validación de la creación de campañas
+
+Verifica que un content_count no positivo se rechaza con 422 en la
+validación del request, sin llegar al cargo de créditos (que lanzaría un
+ValueError y acabaría en 500) ni crear la campaña.
+"""
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import func
+from sqlmodel import Session, select
+
+from app.api import deps
+from app.api.routes import marketing
+from app.core.database import get_session
+from app.core.principal import Principal
+from app.models.content import MarketingCampaign
+from app.models.credits import CreditLedgerEntry
+from app.models.user import PlanTier, User
+
+
+@pytest.fixture
+def client(sqlite_engine):
+    with Session(sqlite_engine) as session:
+        user = User(
+            email="mk@test.com",
+            hashed_password="x",
+            plan_tier=PlanTier.CEREBRO,
+            monthly_credits_video=10,
+        )
+        session.add(user)
+        session.commit()
+        session.refresh(user)
+        principal = Principal.from_user(user)
+
+    def session_override():
+        with Session(sqlite_engine) as session:
+            yield session
+
+    app = FastAPI()
+    app.include_router(marketing.router, prefix="/api/v1/marketing")
+    app.dependency_overrides = {
+        deps.get_current_principal: lambda: principal,
+        get_session: session_override,
+    }
+    return TestClient(app)
+
+
+def _payload(content_count: int) -> dict:
+    return {
+        "name": "Lanzamiento",
+        "influencer_name": "Ana",
+        "tone_of_voice": "cercano",
+        "platforms": ["instagram"],
+        "content_count": content_count,
+        "topic": "Verano",
+    }
+
+
+@pytest.mark.parametrize("content_count", [-3, 0])
+def test_non_positive_content_count_is_rejected_with_422(client, sqlite_engine, content_count):
+    response = client.post("/api/v1/marketing/create-campaign", json=_payload(content_count))
+
+    assert response.status_code == 422
+    assert response.json()["detail"][0]["loc"] == ["body", "content_count"]
+    with Session(sqlite_engine) as session:
+        assert session.exec(select(func.count(MarketingCampaign.id))).one() == 0
+        assert session.exec(select(func.count(CreditLedgerEntry.id))).one() == 0
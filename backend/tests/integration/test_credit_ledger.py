@@ -0,0 +1,114 @@
+"""
+Integration Tests - Credit Ledger bajo concurrencia
+
+Lanza cientos de cargos en paralelo contra el mismo usuario (cada hilo con
+su propia conexión a una base de datos SQLite en fichero) y verifica que
+el UPDATE condicional nunca cobra más que el saldo, que se gastan primero
+los créditos mensuales y que el libro cuadra con los saldos.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from sqlalchemy import func
+from sqlmodel import Session, SQLModel, create_engine, select
+
+from app.core.credits import DEBIT, REFUND, credit_ledger
+from app.core.exceptions import CreditContentionError, InsufficientCreditsError
+from app.models.credits import CreditLedgerEntry
+from app.models.user import User
+
+
+PARALLEL_LAUNCHES = 300
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'credits.db'}",
+        connect_args={"check_same_thread": False, "timeout": 30},
+        pool_size=32,
+    )
+    SQLModel.metadata.create_all(engine, tables=[User.__table__, CreditLedgerEntry.__table__])
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def user_id(engine) -> int:
+    with Session(engine) as session:
+        user = User(
+            email="credits@test.com",
+            hashed_password="x",
+            monthly_credits_video=50,
+            extra_credits_video=50,
+        )
+        session.add(user)
+        session.commit()
+        return user.id
+
+
+def _launch(engine, user_id: int, cost: int) -> str:
+    with Session(engine) as session:
+        try:
+            credit_ledger.debit(session, user_id, cost, resource="video")
+            session.commit()
+            return "charged"
+        except InsufficientCreditsError:
+            session.rollback()
+            return "insufficient"
+        except CreditContentionError:
+            session.rollback()
+            return "contention"
+
+
+def test_parallel_launches_never_overspend(engine, user_id):
+    """300 lanzamientos de coste 3 sobre 100 créditos: exactamente 33 cobran."""
+    cost = 3
+    with ThreadPoolExecutor(max_workers=32) as pool:
+        results = list(pool.map(lambda _: _launch(engine, user_id, cost), range(PARALLEL_LAUNCHES)))
+
+    charged = results.count("charged")
+    assert charged == 100 // cost
+    assert results.count("insufficient") + results.count("contention") == PARALLEL_LAUNCHES - charged
+
+    with Session(engine) as session:
+        user = session.get(User, user_id)
+        assert user.monthly_credits_video == 0
+        assert user.extra_credits_video == 100 - charged * cost
+
+        monthly_spent, extra_spent, debits = session.exec(
+            select(
+                func.sum(CreditLedgerEntry.monthly_delta),
+                func.sum(CreditLedgerEntry.extra_delta),
+                func.count(CreditLedgerEntry.id),
+            ).where(CreditLedgerEntry.user_id == user_id, CreditLedgerEntry.kind == DEBIT)
+        ).one()
+        assert debits == charged
+        # Primero se agota la bolsa mensual
+        assert monthly_spent == -50
+        assert extra_spent == -(charged * cost - 50)
+
+
+def test_refund_restores_split_once(engine, user_id):
+    """El reembolso devuelve cada bolsa y no se aplica dos veces."""
+    with Session(engine) as session:
+        credit_ledger.debit(session, user_id, 45, resource="video")
+        debit = credit_ledger.debit(session, user_id, 10, resource="video")
+        session.commit()
+        assert (debit.monthly_delta, debit.extra_delta) == (-5, -5)
+
+        refund = credit_ledger.refund(session, debit.entry_id, reason="n8n webhook error 500")
+        session.commit()
+        assert refund is not None
+        assert (refund.monthly_delta, refund.extra_delta) == (5, 5)
+        assert credit_ledger.refund(session, debit.entry_id) is None
+        session.commit()
+
+        user = session.get(User, user_id)
+        session.refresh(user)
+        assert (user.monthly_credits_video, user.extra_credits_video) == (5, 50)
+        refunds = session.exec(
+            select(func.count(CreditLedgerEntry.id)).where(CreditLedgerEntry.kind == REFUND)
+        ).one()
+        assert refunds == 1
@@ -0,0 +1,123 @@
+"""
+Integration Tests - Proyección de los listados (include=)
+
+Verifica que los listados (campañas del planner y del creator, queries de
+data mining) omiten los campos JSON pesados salvo que el cliente los pida
+con include=, que solo devuelven los pedidos y que un campo desconocido
+se rechaza con 400.
+"""
+
+from datetime import datetime, timezone
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+from app.api import deps
+from app.core.dependencies import get_read_db
+from app.core.principal import Principal
+from app.models.user import PlanTier, User
+from app.modules.content_creator import routes as creator_routes
+from app.modules.content_creator.models import Campaign
+from app.modules.content_planner import routes as planner_routes
+from app.modules.content_planner.models import ContentCampaign
+from app.modules.data_mining import routes as data_mining_routes
+from app.modules.data_mining.models import ExtractionQuery
+
+
+# listado -> (ruta, clave de la lista en la respuesta, campos pesados)
+LISTS = {
+    "planner": ("/api/v1/content-planner/campaigns", "campaigns", ("generated_content", "campaign_metadata")),
+    "creator": ("/api/v1/content/campaigns", "campaigns", ("generated_content",)),
+    "data_mining": ("/api/v1/data-mining/queries", "queries", ("results", "query_metadata")),
+}
+
+
+@pytest.fixture
+def client(sqlite_engine):
+    now = datetime.now(timezone.utc)
+    with Session(sqlite_engine) as session:
+        user = User(email="list@test.com", hashed_password="x", plan_tier=PlanTier.PARTNER)
+        session.add(user)
+        session.flush()
+        session.add(ContentCampaign(
+            user_id=user.id, month="2026-10", tone_of_voice="cercano",
+            themes=["IA"], target_platforms=["instagram"],
+            generated_content={"posts": [{"caption": "a"}]},
+            campaign_metadata={"model": "gemini"},
+            created_at=now, updated_at=now,
+        ))
+        session.add(Campaign(
+            user_id=user.id, name="c", influencer_name="i", tone_of_voice="cercano",
+            platforms=["instagram"], content_count=1,
+            generated_content={"pieces": [{"caption": "a"}]},
+            created_at=now, updated_at=now,
+        ))
+        session.add(ExtractionQuery(
+            user_id=user.id, search_topic="clínicas dentales",
+            results={"sources": [{"url": "https://example.com"}]},
+            query_metadata={"engine": "brave"},
+            created_at=now, updated_at=now,
+        ))
+        session.commit()
+        session.refresh(user)
+        principal = Principal.from_user(user)
+
+    def session_override():
+        with Session(sqlite_engine) as session:
+            yield session
+
+    app = FastAPI()
+    for routes in (planner_routes, creator_routes, data_mining_routes):
+        app.include_router(routes.router, prefix="/api/v1")
+    app.dependency_overrides = {
+        deps.get_current_principal: lambda: principal,
+        get_read_db: session_override,
+    }
+    return TestClient(app)
+
+
+def _get(client, listing, include=None):
+    path, _, _ = LISTS[listing]
+    params = {"include": include} if include is not None else {}
+    return client.get(path, params=params)
+
+
+def _item(client, listing, include=None):
+    _, key, _ = LISTS[listing]
+    response = _get(client, listing, include)
+    assert response.status_code == 200
+    (item,) = response.json()[key]
+    return item
+
+
+@pytest.mark.parametrize("listing", LISTS)
+def test_heavy_fields_are_omitted_by_default(client, listing):
+    _, _, heavy = LISTS[listing]
+
+    item = _item(client, listing)
+
+    assert not set(heavy) & set(item)
+    assert "id" in item and "status" in item
+
+
+@pytest.mark.parametrize("listing", LISTS)
+def test_include_returns_only_the_requested_fields(client, listing):
+    _, _, (requested, *others) = LISTS[listing]
+
+    item = _item(client, listing, include=requested)
+
+    assert item[requested]
+    assert not set(others) & set(item)
+    assert set(_item(client, listing, include="all")) >= {requested, *others}
+
+
+@pytest.mark.parametrize("listing", LISTS)
+def test_unknown_include_is_rejected_with_400(client, listing):
+    _, _, (requested, *_) = LISTS[listing]
+
+    response = _get(client, listing, include=f"{requested},bogus")
+
+    assert response.status_code == 400
+    assert "bogus" in response.json()["detail"]
@@ -0,0 +1,207 @@
+"""
+Integration Tests - Restricciones del media store
+
+Verifica que el worker solo descarga URLs de proveedores permitidos que
+llegaron por el camino de servicio, que ningún salto (ni redirección)
+alcanza una dirección interna, que solo se guardan imágenes y vídeos, y
+que el store sirve cada fichero con nosniff y inline solo si es media.
+"""
+
+import asyncio
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+from app.api.routes import media as media_routes
+from app.core.callbacks import write_piece_updates
+from app.core.database import get_session
+from app.models.content import ContentPiece, MarketingCampaign
+from app.models.media import MediaAsset
+from app.models.user import User
+from app.services import media_store as media_store_module
+from app.services.media_store import MediaSourceError, MediaStore, UnsupportedMediaTypeError
+from app.workers.tasks.media import _pending_pieces
+
+
+PNG = b"\x89PNG\r\n\x1a\n" + b"\x00" * 64
+
+DNS = {
+    "v3.fal.media": ["151.101.1.1"],
+    "files2.heygen.ai": ["2606:4700::6810:1"],
+    "evil.fal.media": ["169.254.169.254"],
+    "rebind.heygen.ai": ["151.101.1.2", "10.0.0.7"],
+    "attacker.example.com": ["151.101.9.9"],
+}
+
+
+@pytest.fixture(autouse=True)
+def fake_dns(monkeypatch):
+    async def resolve(host, port):
+        if host not in DNS:
+            raise OSError("Name or service not known")
+        return DNS[host]
+    monkeypatch.setattr(media_store_module, "resolve_host", resolve)
+
+
+@pytest.fixture
+def store(tmp_path):
+    return MediaStore(str(tmp_path))
+
+
+def _download(store, url, handler):
+    requested = []
+
+    def record(request):
+        requested.append(str(request.url))
+        return handler(request)
+
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(record)) as client:
+            return await store.download(client, url)
+    try:
+        return asyncio.run(run()), requested
+    except Exception as e:
+        e.requested = requested
+        raise
+
+
+def _png(request):
+    return httpx.Response(200, content=PNG, headers={"content-type": "image/png"})
+
+
+def test_allowed_provider_image_is_stored(store):
+    stored, requested = _download(store, "https://v3.fal.media/files/a.png", _png)
+
+    assert (stored.mime_type, stored.created) == ("image/png", True)
+    assert store.object_path(stored.sha256).read_bytes() == PNG
+    assert requested == ["https://v3.fal.media/files/a.png"]
+
+
+@pytest.mark.parametrize("url", [
+    "https://attacker.example.com/a.png",  # host fuera de la lista
+    "http://v3.fal.media/files/a.png",  # sin TLS
+    "https://evil.fal.media/latest/meta-data/",  # link-local (metadata)
+    "https://rebind.heygen.ai/a.png",  # alguna IP privada
+    "https://127.0.0.1/a.png",
+])
+def test_disallowed_sources_are_never_requested(store, url):
+    with pytest.raises(MediaSourceError) as exc:
+        _download(store, url, _png)
+    assert exc.value.requested == []
+
+
+def test_each_redirect_hop_is_checked(store):
+    def handler(request):
+        if request.url.host == "v3.fal.media":
+            return httpx.Response(302, headers={"location": "https://evil.fal.media/latest/meta-data/"})
+        return _png(request)
+
+    with pytest.raises(MediaSourceError):
+        _download(store, "https://v3.fal.media/files/a.png", handler)
+
+
+def test_redirect_to_public_cdn_is_followed(store):
+    def handler(request):
+        if request.url.host == "v3.fal.media":
+            return httpx.Response(302, headers={"location": "https://attacker.example.com/signed/a.png"})
+        return _png(request)
+
+    stored, requested = _download(store, "https://v3.fal.media/files/a.png", handler)
+
+    assert stored.mime_type == "image/png"
+    assert requested[-1] == "https://attacker.example.com/signed/a.png"
+
+
+def test_redirect_loops_are_bounded(store):
+    def handler(request):
+        return httpx.Response(302, headers={"location": "/again"})
+
+    with pytest.raises(MediaSourceError):
+        _download(store, "https://v3.fal.media/files/a.png", handler)
+
+
+@pytest.mark.parametrize("content, content_type", [
+    (b"<html><script>alert(1)</script></html>", "text/html"),
+    (b"<svg onload=alert(1)></svg>", "image/svg+xml"),
+    (b"<html><script>alert(1)</script></html>", "application/octet-stream"),
+])
+def test_non_media_is_not_stored(store, content, content_type):
+    def handler(request):
+        return httpx.Response(200, content=content, headers={"content-type": content_type})
+
+    with pytest.raises(UnsupportedMediaTypeError):
+        _download(store, "https://files2.heygen.ai/video.mp4.html", handler)
+    assert not (store.root / "objects").exists()
+
+
+def test_only_service_urls_are_mirrored(sqlite_engine):
+    with Session(sqlite_engine) as session:
+        user = User(email="media@test.com", hashed_password="x")
+        session.add(user)
+        session.flush()
+        campaign = MarketingCampaign(
+            user_id=user.id, name="c", influencer_name="i", tone_of_voice="t",
+            topic="x", platforms="instagram", content_count=2,
+        )
+        session.add(campaign)
+        session.flush()
+        service_piece, user_piece = (
+            ContentPiece(campaign_id=campaign.id, platform="Instagram", type="Reel", caption="c", visual_script="v")
+            for _ in range(2)
+        )
+        session.add_all([service_piece, user_piece])
+        session.flush()
+
+        write_piece_updates(session, {service_piece.id: ("https://v3.fal.media/a.png", "COMPLETED", None)})
+        write_piece_updates(session, {user_piece.id: ("https://v3.fal.media/b.png", "COMPLETED", user.id)})
+        session.commit()
+
+        assert [piece_id for piece_id, _ in _pending_pieces(session, 10)] == [service_piece.id]
+
+        # Un usuario que cambia la URL le quita la marca de servicio
+        write_piece_updates(session, {service_piece.id: ("https://v3.fal.media/c.png", "COMPLETED", user.id)})
+        session.commit()
+        assert _pending_pieces(session, 10) == []
+
+
+@pytest.fixture
+def media_client(monkeypatch, sqlite_engine, store):
+    monkeypatch.setattr(media_routes, "media_store", store)
+
+    def session_override():
+        with Session(sqlite_engine) as session:
+            yield session
+
+    app = FastAPI()
+    app.include_router(media_routes.router, prefix="/api/v1/media")
+    app.dependency_overrides = {get_session: session_override}
+    return TestClient(app)
+
+
+def _asset(sqlite_engine, store, sha256, mime_type):
+    path = store.object_path(sha256)
+    path.parent.mkdir(parents=True)
+    path.write_bytes(b"<html><script>alert(1)</script></html>")
+    with Session(sqlite_engine) as session:
+        session.add(MediaAsset(sha256=sha256, mime_type=mime_type, size_bytes=10, source_url="https://v3.fal.media/x"))
+        session.commit()
+
+
+@pytest.mark.parametrize("mime_type, disposition", [
+    ("image/png", "inline"),
+    ("video/mp4", "inline"),
+    ("text/html", "attachment"),
+    ("image/svg+xml", "attachment"),
+])
+def test_served_with_nosniff_and_inline_only_for_media(media_client, sqlite_engine, store, mime_type, disposition):
+    sha256 = "ab" * 32
+    _asset(sqlite_engine, store, sha256, mime_type)
+
+    response = media_client.get(f"/api/v1/media/{sha256}")
+
+    assert response.status_code == 200
+    assert response.headers["x-content-type-options"] == "nosniff"
+    assert response.headers["content-disposition"] == disposition
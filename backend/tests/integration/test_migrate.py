@@ -0,0 +1,107 @@
+"""
+Integration Tests - migrate() sobre esquemas existentes
+
+Verifica qué hace el paso de despliegue según el estado de la base de
+datos: un esquema creado por el create_all del arranque anterior (sin
+alembic_version) se marca en genesis y se migra a la head, de modo que las
+revisiones posteriores (columnas nuevas, back-fills) sí se aplican.
+"""
+
+import subprocess
+import sys
+import textwrap
+
+import pytest
+from sqlalchemy import inspect
+from sqlmodel import SQLModel, create_engine
+
+from app.infrastructure.db import migrations
+from app.models.user import User
+
+# Metadata completa: todos los modelos con table=True
+from app.models import user, chat, content, log, credits, outbox, media  # noqa: F401
+from app.modules.chat import models as chat_models  # noqa: F401
+from app.modules.analytics import models as analytics_models  # noqa: F401
+from app.modules.content_creator import models as content_models  # noqa: F401
+from app.modules.content_planner import models as content_planner_models  # noqa: F401
+from app.modules.data_mining import models as data_mining_models  # noqa: F401
+
+
+class _AlembicRecorder:
+    def __init__(self):
+        self.calls = []
+
+    def stamp(self, config, revision):
+        self.calls.append(("stamp", revision))
+
+    def upgrade(self, config, revision):
+        self.calls.append(("upgrade", revision))
+
+
+@pytest.fixture
+def alembic_calls(monkeypatch):
+    recorder = _AlembicRecorder()
+    monkeypatch.setattr(migrations, "command", recorder)
+    return recorder.calls
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'migrate.db'}")
+    yield engine
+    engine.dispose()
+
+
+def test_create_all_schema_is_stamped_at_genesis_then_upgraded(engine, alembic_calls):
+    """El esquema legacy no se da por migrado: se aplican todas las revisiones."""
+    SQLModel.metadata.create_all(engine, tables=[User.__table__])
+
+    migrations.migrate(engine)
+
+    assert alembic_calls == [("stamp", migrations.GENESIS_REVISION), ("upgrade", "head")]
+    # No se crean tablas por fuera de las migraciones
+    assert inspect(engine).get_table_names() == ["user"]
+
+
+def test_empty_database_is_created_and_stamped_at_head(engine, tmp_path):
+    """
+    En un proceso nuevo (como el servicio `migrate`): solo los modelos que
+    importa migrate() están en la metadata, y debe crear todas las tablas.
+    """
+    script = textwrap.dedent(f"""
+        from sqlmodel import create_engine
+        from app.infrastructure.db import migrations
+
+        class Recorder:
+            def stamp(self, config, revision):
+                print("stamp", revision)
+
+            def upgrade(self, config, revision):
+                print("upgrade", revision)
+
+        migrations.command = Recorder()
+        migrations.migrate(create_engine("sqlite:///{tmp_path / 'migrate.db'}"))
+    """)
+
+    result = subprocess.run(
+        [sys.executable, "-c", script],
+        cwd=migrations.BACKEND_DIR, capture_output=True, text=True, check=True,
+    )
+
+    assert result.stdout.splitlines() == ["stamp head"]
+    assert set(inspect(engine).get_table_names()) == set(SQLModel.metadata.tables)
+
+
+def test_versioned_database_is_upgraded(engine, alembic_calls, monkeypatch):
+    monkeypatch.setattr(migrations, "get_current_heads", lambda _: frozenset({migrations.GENESIS_REVISION}))
+
+    migrations.migrate(engine)
+
+    assert alembic_calls == [("upgrade", "head")]
+
+
+def test_genesis_revision_is_the_root_of_the_chain():
+    from alembic.script import ScriptDirectory
+
+    script = ScriptDirectory.from_config(migrations._alembic_config())
+    assert script.get_base() == migrations.GENESIS_REVISION
@@ -0,0 +1,171 @@
+"""
+Integration Tests - Outbox transaccional hacia n8n
+
+Verifica la liquidación de cada resultado de entrega: un POST sin
+respuesta (timeout de lectura) queda "unconfirmed" sin reintento ni
+reembolso; un error antes de enviar o un 5xx se reintenta; un 4xx o los
+intentos agotados van a dead-letter, reembolsan el cargo y marcan la
+campaña "failed". También que save-plan es idempotente por campaña.
+"""
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import httpx
+import pytest
+from sqlalchemy import func
+from sqlmodel import Session, select
+
+from app.api.routes.marketing import ContentPiecePlan, SavePlanRequest, persist_content_plan
+from app.core.config import settings
+from app.core.credits import REFUND, credit_ledger
+from app.core.outbox import (
+    DEAD,
+    DELIVERED,
+    PENDING,
+    TOPIC_MARKETING_CAMPAIGN,
+    UNCONFIRMED,
+    enqueue_event,
+    outbox_dispatcher,
+)
+from app.models.content import ContentPiece, MarketingCampaign
+from app.models.credits import CreditLedgerEntry
+from app.models.outbox import OutboxEvent
+from app.models.user import User
+
+
+@pytest.fixture
+def campaign_id(sqlite_engine) -> int:
+    """Campaña lanzada como en create_campaign: campaña + evento + cargo."""
+    with Session(sqlite_engine) as session:
+        user = User(email="outbox@test.com", hashed_password="x", monthly_credits_video=10)
+        session.add(user)
+        session.flush()
+        campaign = MarketingCampaign(
+            user_id=user.id, name="c", influencer_name="i", tone_of_voice="t",
+            topic="x", platforms="instagram", content_count=3,
+        )
+        session.add(campaign)
+        session.flush()
+        enqueue_event(
+            session, TOPIC_MARKETING_CAMPAIGN,
+            {"campaign_id": campaign.id, "pieces": 3},
+            dedup_key=f"marketing_campaign:{campaign.id}",
+        )
+        credit_ledger.debit(session, user.id, 3, campaign_id=campaign.id, reason="marketing_campaign")
+        session.commit()
+        return campaign.id
+
+
+def _dispatch(sqlite_engine, handler):
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            with Session(sqlite_engine) as session:
+                return await outbox_dispatcher.dispatch_batch(session, client)
+    return asyncio.run(run())
+
+
+def _state(sqlite_engine, campaign_id):
+    with Session(sqlite_engine) as session:
+        event = session.exec(select(OutboxEvent)).one()
+        campaign = session.get(MarketingCampaign, campaign_id)
+        refunds = session.exec(
+            select(func.count(CreditLedgerEntry.id)).where(CreditLedgerEntry.kind == REFUND)
+        ).one()
+        user = session.get(User, campaign.user_id)
+        return event, campaign.status, refunds, user.monthly_credits_video
+
+
+def _raise(exc_type):
+    def handler(request):
+        raise exc_type("boom", request=request)
+    return handler
+
+
+def test_successful_delivery(sqlite_engine, campaign_id):
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        return httpx.Response(200)
+
+    counts = _dispatch(sqlite_engine, handler)
+
+    assert (counts["claimed"], counts["delivered"]) == (1, 1)
+    assert requests[0].headers["Idempotency-Key"] == f"marketing_campaign:{campaign_id}"
+    event, _, _, _ = _state(sqlite_engine, campaign_id)
+    assert event.status == DELIVERED
+
+
+@pytest.mark.parametrize("exc_type", [httpx.ReadTimeout, httpx.ReadError, httpx.RemoteProtocolError])
+def test_no_response_after_send_is_unconfirmed_not_retried_nor_refunded(sqlite_engine, campaign_id, exc_type):
+    """n8n responde al terminar el workflow: sin respuesta no es un fallo."""
+    counts = _dispatch(sqlite_engine, _raise(exc_type))
+
+    assert (counts["unconfirmed"], counts["retried"], counts["dead"]) == (1, 0, 0)
+    event, campaign_status, refunds, credits = _state(sqlite_engine, campaign_id)
+    assert event.status == UNCONFIRMED
+    assert event.last_error.startswith(exc_type.__name__)
+    assert (campaign_status, refunds, credits) == ("pending", 0, 7)
+
+    # No se vuelve a reclamar
+    assert _dispatch(sqlite_engine, _raise(exc_type))["claimed"] == 0
+
+
+@pytest.mark.parametrize("handler", [
+    _raise(httpx.ConnectError),
+    _raise(httpx.ConnectTimeout),
+    lambda request: httpx.Response(503),
+    lambda request: httpx.Response(429),
+])
+def test_not_received_is_retried_with_backoff(sqlite_engine, campaign_id, handler):
+    before = datetime.now(timezone.utc)
+
+    counts = _dispatch(sqlite_engine, handler)
+
+    assert (counts["retried"], counts["dead"]) == (1, 0)
+    event, campaign_status, refunds, _ = _state(sqlite_engine, campaign_id)
+    assert (event.status, event.attempts) == (PENDING, 1)
+    next_attempt_at = event.next_attempt_at.replace(tzinfo=event.next_attempt_at.tzinfo or timezone.utc)
+    assert next_attempt_at > before + timedelta(seconds=settings.OUTBOX_RETRY_BASE_SECONDS / 2 - 1)
+    assert (campaign_status, refunds) == ("pending", 0)
+
+
+def test_rejected_event_is_dead_lettered_and_refunded(sqlite_engine, campaign_id):
+    counts = _dispatch(sqlite_engine, lambda request: httpx.Response(400))
+
+    assert counts["dead"] == 1
+    event, campaign_status, refunds, credits = _state(sqlite_engine, campaign_id)
+    assert (event.status, event.last_error) == (DEAD, "HTTP 400")
+    assert (campaign_status, refunds, credits) == ("failed", 1, 10)
+
+
+def test_retries_exhausted_are_dead_lettered(sqlite_engine, campaign_id, monkeypatch):
+    monkeypatch.setattr(settings, "OUTBOX_MAX_ATTEMPTS", 1)
+
+    counts = _dispatch(sqlite_engine, lambda request: httpx.Response(502))
+
+    assert (counts["retried"], counts["dead"]) == (0, 1)
+    event, campaign_status, refunds, _ = _state(sqlite_engine, campaign_id)
+    assert event.status == DEAD
+    assert (campaign_status, refunds) == ("failed", 1)
+
+
+def test_save_plan_is_idempotent_per_campaign(sqlite_engine, campaign_id):
+    """Un workflow repetido devuelve las piezas ya guardadas, sin duplicarlas."""
+    def save(captions):
+        plan = SavePlanRequest(pieces=[
+            ContentPiecePlan(platform="Instagram", type="Reel", caption=caption, visual_script="v")
+            for caption in captions
+        ])
+        with Session(sqlite_engine) as session:
+            return persist_content_plan(session, campaign_id, plan)
+
+    first = save(["a", "b", "c"])
+    second = save(["x", "y", "z"])
+
+    assert [piece.id for piece in second.pieces] == [piece.id for piece in first.pieces]
+    assert [piece.caption for piece in second.pieces] == ["a", "b", "c"]
+    with Session(sqlite_engine) as session:
+        assert session.exec(select(func.count(ContentPiece.id))).one() == 3
+        assert session.get(MarketingCampaign, campaign_id).status == "in_progress"
@@ -0,0 +1,63 @@
+"""
+Integration Tests - Routing de tareas a colas de Arq
+
+Verifica que toda tarea registrada la drena algún worker de cola nombrada
+y que los helpers de encolado no dejan jobs en la cola por defecto de Arq,
+que ya no consume ningún worker.
+"""
+
+import asyncio
+
+from app.workers import config as worker_config
+from app.workers.queues import ALL_QUEUES, DEFAULT_QUEUE, QUEUE_INTERACTIVE, queue_for
+from app.workers.settings import (
+    BulkWorkerSettings,
+    InteractiveWorkerSettings,
+    MaintenanceWorkerSettings,
+    WorkerSettings,
+)
+
+
+class _FakeJob:
+    job_id = "job-1"
+
+
+class _FakeArqPool:
+    def __init__(self):
+        self.enqueued = []
+        self.closed = False
+
+    async def enqueue_job(self, function, *args, **kwargs):
+        self.enqueued.append((function, kwargs))
+        return _FakeJob()
+
+    async def aclose(self):
+        self.closed = True
+
+
+def test_every_registered_task_is_drained_by_a_queue_worker():
+    drained = {}
+    for worker in (InteractiveWorkerSettings, BulkWorkerSettings, MaintenanceWorkerSettings):
+        assert worker.queue_name in ALL_QUEUES
+        for fn in worker.functions:
+            drained[fn.__name__] = worker.queue_name
+
+    for fn in WorkerSettings.functions:
+        assert drained.get(fn.__name__) == queue_for(fn.__name__)
+
+
+def test_enqueue_ai_task_uses_interactive_queue(monkeypatch):
+    pool = _FakeArqPool()
+
+    async def fake_create_pool(_settings):
+        return pool
+
+    monkeypatch.setattr(worker_config, "create_pool", fake_create_pool)
+
+    job_id = asyncio.run(worker_config.enqueue_ai_task("hola", user_id=7))
+
+    assert job_id == "job-1"
+    function, kwargs = pool.enqueued[0]
+    assert function == "process_ai_inference"
+    assert kwargs["_queue_name"] == QUEUE_INTERACTIVE != DEFAULT_QUEUE
+    assert pool.closed
@@ -0,0 +1,151 @@
+"""
+Integration Tests - Consumo de cuota desde los claims del JWT
+
+Verifica que quota_guard solo consume con un token vigente (con un `tv`
+viejo o una cuenta desactivada no se consume nada antes de validar al
+usuario) y que
+la unidad se devuelve si el request se descarta (503 del admission
+control) o falla, también cuando la consume el fallback de
+requires_feature.
+"""
+
+from typing import Dict, Optional, Tuple
+
+import pytest
+from fastapi import Depends, FastAPI, HTTPException
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+from app.api import deps
+from app.core.database import get_session
+from app.core.principal import TOKEN_VERSION_KEY, Principal, principal_cache
+from app.core.quota import QuotaUsage, current_period
+from app.core.security import create_access_token
+from app.models.user import PlanTier, User
+
+
+FEATURE = "ai_content_generation"
+
+
+class _Enforcer:
+    """quota_enforcer en memoria: contador por usuario."""
+
+    def __init__(self):
+        self.used: Dict[int, int] = {}
+
+    async def consume(self, redis, user_id, feature_key, limit) -> Optional[QuotaUsage]:
+        self.used[user_id] = self.used.get(user_id, 0) + 1
+        return QuotaUsage(user_id, feature_key, limit, self.used[user_id], current_period())
+
+    async def release(self, redis, usage: QuotaUsage) -> None:
+        self.used[usage.user_id] -= 1
+
+
+def _shed():
+    raise HTTPException(status_code=503, detail="overloaded")
+
+
+@pytest.fixture
+def enforcer(monkeypatch, stream_redis) -> _Enforcer:
+    enforcer = _Enforcer()
+    monkeypatch.setattr(deps, "quota_enforcer", enforcer)
+    monkeypatch.setattr(deps, "get_redis_client", lambda: stream_redis)
+    return enforcer
+
+
+@pytest.fixture
+def user(sqlite_engine) -> User:
+    with Session(sqlite_engine) as session:
+        user = User(email="quota@test.com", hashed_password="x", plan_tier=PlanTier.CEREBRO)
+        session.add(user)
+        session.commit()
+        session.refresh(user)
+        principal_cache.evict(user.email)
+        return user
+
+
+@pytest.fixture
+def client(sqlite_engine, enforcer) -> TestClient:
+    def session_override():
+        with Session(sqlite_engine) as session:
+            yield session
+
+    quota = Depends(deps.quota_guard(FEATURE))
+    feature = Depends(deps.requires_feature(FEATURE, consume_quota=True))
+    app = FastAPI()
+
+    @app.post("/served")
+    async def served(usage=quota, current_user=feature):
+        return {"used": usage.used if usage else None}
+
+    @app.post("/shed")
+    async def shed(usage=quota, admission=Depends(_shed), current_user=feature):
+        return {}
+
+    @app.post("/fails")
+    async def fails(usage=quota, current_user=feature):
+        raise HTTPException(status_code=500, detail="engine error")
+
+    app.dependency_overrides = {get_session: session_override}
+    return TestClient(app)
+
+
+def _token(user: User, without: Tuple[str, ...] = ()) -> Dict[str, str]:
+    claims = Principal.from_user(user).to_claims(user.token_version)
+    for claim in without:
+        claims.pop(claim)
+    return {"Authorization": f"Bearer {create_access_token(data=claims)}"}
+
+
+def _token_state(stream_redis, user: User, token_version: int, is_active: bool) -> None:
+    stream_redis.values[TOKEN_VERSION_KEY.format(user_id=user.id)] = f"{token_version}:{int(is_active)}"
+
+
+def test_served_request_consumes_once(client, enforcer, stream_redis, user):
+    _token_state(stream_redis, user, 0, True)
+
+    response = client.post("/served", headers=_token(user))
+
+    assert response.status_code == 200
+    assert response.json() == {"used": 1}
+    assert enforcer.used == {user.id: 1}
+
+
+@pytest.mark.parametrize("path, status_code", [("/shed", 503), ("/fails", 500)])
+def test_unit_is_refunded_when_the_request_is_shed_or_fails(client, enforcer, stream_redis, user, path, status_code):
+    _token_state(stream_redis, user, 0, True)
+
+    assert client.post(path, headers=_token(user)).status_code == status_code
+    assert enforcer.used == {user.id: 0}
+
+
+def test_deactivated_account_does_not_consume(client, enforcer, stream_redis, user):
+    _token_state(stream_redis, user, 0, False)
+
+    response = client.post("/served", headers=_token(user))
+
+    assert response.status_code == 403
+    assert enforcer.used.get(user.id, 0) == 0
+
+
+def test_revoked_claims_are_not_trusted_for_quota(client, enforcer, stream_redis, user):
+    """Con `tv` viejo consume requires_feature, tras resolver al usuario por la DB."""
+    _token_state(stream_redis, user, 1, True)
+
+    response = client.post("/served", headers=_token(user))
+
+    assert response.status_code == 200
+    assert response.json() == {"used": None}
+    assert enforcer.used == {user.id: 1}
+
+
+def test_fallback_consumption_is_refunded_on_failure(client, enforcer, stream_redis, user):
+    """Token sin `tv`: consume requires_feature tras validar al usuario."""
+    _token_state(stream_redis, user, 0, True)
+    headers = _token(user, without=("tv",))
+
+    assert client.post("/served", headers=headers).status_code == 200
+    assert enforcer.used == {user.id: 1}
+
+    assert client.post("/fails", headers=headers).status_code == 500
+    assert enforcer.used == {user.id: 1}
@@ -0,0 +1,49 @@
+"""
+Integration Tests - Enrutado de lecturas del chat
+
+Verifica que el servicio de chat de los endpoints de solo lectura (el
+historial) consulta a través de la sesión de lectura, y no de la sesión
+primaria que usa el resto del módulo.
+"""
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.core import dependencies
+from app.core.dependencies import ReadChatServiceDep
+from app.modules.chat.routes import get_history
+
+
+READ_SESSION = object()
+
+
+def test_history_service_reads_through_read_session():
+    app = FastAPI()
+
+    @app.get("/probe")
+    async def probe(chat_service: ReadChatServiceDep):
+        return {"read_session": chat_service.repository.session is READ_SESSION}
+
+    async def read_db():
+        yield READ_SESSION
+
+    async def primary_db():
+        raise AssertionError("la sesión primaria no debe abrirse en una lectura")
+        yield
+
+    app.dependency_overrides = {
+        dependencies.get_async_read_db: read_db,
+        dependencies.get_async_db: primary_db,
+        dependencies.get_ai_engine: lambda: None,
+        dependencies.get_cache_service: lambda: None,
+    }
+
+    response = TestClient(app).get("/probe")
+
+    assert response.status_code == 200
+    assert response.json() == {"read_session": True}
+
+
+def test_history_endpoint_uses_read_chat_service():
+    annotation = get_history.__annotations__["chat_service"]
+    assert annotation is ReadChatServiceDep
@@ -0,0 +1,101 @@
+"""
+Integration Tests - Deadlines por request
+
+Verifica que el trabajo en curso se cancela al expirar el deadline o al
+desconectarse el cliente, y que el header X-Request-Timeout nunca supera
+el tope configurado.
+"""
+
+import asyncio
+
+import pytest
+
+from app.core.deadline import (
+    RequestDeadline,
+    parse_timeout_header,
+    remaining_timeout,
+    reset_current_deadline,
+    set_current_deadline,
+)
+from app.core.exceptions import ClientDisconnectedError, DeadlineExceededError
+
+
+class _DisconnectingRequest:
+    """Request mínimo que se desconecta tras N consultas."""
+
+    def __init__(self, after: int):
+        self.calls = 0
+        self.after = after
+
+    async def is_disconnected(self) -> bool:
+        self.calls += 1
+        return self.calls > self.after
+
+
+def test_guard_cancels_work_when_deadline_expires():
+    """La corrutina en curso se cancela y el request recibe un 504."""
+    cancelled = asyncio.Event()
+
+    async def slow():
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    async def scenario():
+        deadline = RequestDeadline(0.2)
+        with pytest.raises(DeadlineExceededError) as exc:
+            await deadline.guard(slow())
+        await asyncio.sleep(0)
+        return exc.value
+
+    error = asyncio.run(scenario())
+    assert error.status_code == 504
+    assert cancelled.is_set()
+
+
+def test_guard_cancels_work_when_client_disconnects():
+    """La desconexión del cliente corta el trabajo antes del deadline."""
+    async def scenario():
+        deadline = RequestDeadline(30, request=_DisconnectingRequest(after=1))
+        with pytest.raises(ClientDisconnectedError):
+            await deadline.guard(asyncio.sleep(5))
+        return deadline.remaining()
+
+    assert asyncio.run(scenario()) > 25
+
+
+def test_guard_returns_result_within_deadline():
+    async def scenario():
+        return await RequestDeadline(5).guard(asyncio.sleep(0, result="ok"))
+
+    assert asyncio.run(scenario()) == "ok"
+
+
+def test_remaining_timeout_is_capped_by_current_deadline():
+    """Los timeouts de I/O se recortan al tiempo restante del request."""
+    assert remaining_timeout(10.0) == 10.0
+
+    token = set_current_deadline(RequestDeadline(1.0))
+    try:
+        assert remaining_timeout(10.0) <= 1.0
+        assert remaining_timeout(0.5) == 0.5
+    finally:
+        reset_current_deadline(token)
+    assert remaining_timeout(10.0) == 10.0
+
+
+@pytest.mark.parametrize(
+    "value, expected",
+    [
+        (None, 30.0),
+        ("12.5", 12.5),
+        ("600", 120.0),
+        ("0", 30.0),
+        ("-3", 30.0),
+        ("abc", 30.0),
+    ],
+)
+def test_parse_timeout_header(value, expected):
+    assert parse_timeout_header(value, default=30.0, maximum=120.0) == expected
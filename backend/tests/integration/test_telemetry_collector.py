@@ -0,0 +1,77 @@
+"""
+Integration Tests - Collector de telemetría
+
+Verifica que un evento que Postgres rechaza no bloquea el stream: el lote
+se reintenta evento a evento, el culpable va a dead-letter y todo se
+confirma; y que un error transitorio deja el lote pendiente sin ACK.
+"""
+
+import asyncio
+import json
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import func
+from sqlalchemy.exc import OperationalError
+from sqlmodel import Session, select
+
+from app.modules.analytics.events import TELEMETRY_DEAD_LETTER_STREAM, TELEMETRY_STREAM
+from app.modules.analytics.models import UsageLog
+from app.workers.tasks import telemetry
+
+
+def _usage_fields(user_id, feature_key):
+    return {
+        "type": "usage",
+        "ts": datetime(2025, 1, 15, 12, 0, tzinfo=timezone.utc).isoformat(),
+        "payload": json.dumps({"user_id": user_id, "feature_key": feature_key}),
+    }
+
+
+@pytest.fixture
+def collector(monkeypatch, stream_redis, session_scope):
+    monkeypatch.setattr(telemetry, "get_session", session_scope)
+
+    async def run():
+        return await telemetry.collect_telemetry({"redis": stream_redis})
+    return run
+
+
+def test_poison_event_is_dead_lettered_and_batch_acknowledged(collector, stream_redis, sqlite_engine):
+    """feature_key NULL viola NOT NULL: solo ese evento se aparta."""
+    for fields in (_usage_fields(1, "chat"), _usage_fields(1, None), _usage_fields(2, "chat")):
+        asyncio.run(stream_redis.xadd(TELEMETRY_STREAM, fields))
+
+    result = asyncio.run(collector())
+
+    assert result["status"] == "completed"
+    assert (result["usage_logs"], result["dead_lettered"]) == (2, 1)
+    assert stream_redis.streams[TELEMETRY_STREAM] == []
+    assert stream_redis.pending[TELEMETRY_STREAM] == {}
+
+    (dead_id, dead), = stream_redis.streams[TELEMETRY_DEAD_LETTER_STREAM]
+    assert dead["source_id"] == "2-0"
+    assert dead["error"].startswith("IntegrityError")
+    assert json.loads(dead["payload"])["feature_key"] is None
+
+    with Session(sqlite_engine) as session:
+        assert session.exec(select(func.count(UsageLog.id))).one() == 2
+
+    # La siguiente ejecución no reintenta nada
+    assert asyncio.run(collector())["batches"] == 0
+
+
+def test_transient_error_leaves_batch_pending(collector, monkeypatch, stream_redis):
+    """Sin base de datos no se manda nada a dead-letter ni se hace ACK."""
+    def unavailable(*args, **kwargs):
+        raise OperationalError("INSERT", {}, Exception("connection refused"))
+
+    monkeypatch.setattr(telemetry.AnalyticsService, "ingest_events", unavailable)
+    asyncio.run(stream_redis.xadd(TELEMETRY_STREAM, _usage_fields(1, "chat")))
+
+    result = asyncio.run(collector())
+
+    assert result["status"] == "failed"
+    assert len(stream_redis.streams[TELEMETRY_STREAM]) == 1
+    assert list(stream_redis.pending[TELEMETRY_STREAM]) == ["1-0"]
+    assert TELEMETRY_DEAD_LETTER_STREAM not in stream_redis.streams
@@ -0,0 +1,132 @@
+"""
+Integration Tests - Revocación de tokens autodescriptivos
+
+Verifica que la versión de token es durable (User.token_version): un
+token revocado no vuelve a ser válido aunque Redis pierda la clave, y una
+cuenta desactivada no se autoriza con sus claims. Los endpoints sobre
+AsyncDatabaseDep resuelven el principal con la sesión del request.
+"""
+
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.api import deps
+from app.core.database import get_session
+from app.core.dependencies import get_async_db
+from app.core.principal import TOKEN_VERSION_KEY, Principal, principal_cache
+from app.infrastructure.db import session as db_session
+from app.core.security import create_access_token
+from app.models.user import PlanTier, User
+
+
+@pytest.fixture
+def session(sqlite_engine):
+    with Session(sqlite_engine) as session:
+        yield session
+
+
+@pytest.fixture
+def user(session) -> User:
+    user = User(email="tv@test.com", hashed_password="x", plan_tier=PlanTier.CEREBRO)
+    session.add(user)
+    session.commit()
+    session.refresh(user)
+    principal_cache.evict(user.email)
+    return user
+
+
+@pytest.fixture
+def authorize(monkeypatch, stream_redis, session):
+    monkeypatch.setattr(deps, "get_redis_client", lambda: stream_redis)
+
+    def run(token: str) -> Principal:
+        return asyncio.run(deps.get_current_principal(session=session, token=token))
+    return run
+
+
+def _token(user: User) -> str:
+    return create_access_token(data=Principal.from_user(user).to_claims(user.token_version))
+
+
+def test_claims_accepted_and_state_cached_from_db(authorize, user, stream_redis):
+    principal = authorize(_token(user))
+
+    assert principal.features_resolved
+    assert principal.plan_tier == PlanTier.CEREBRO
+    assert stream_redis.values[TOKEN_VERSION_KEY.format(user_id=user.id)] == "0:1"
+
+
+def test_revoked_token_stays_revoked_after_redis_loses_the_key(authorize, user, session, stream_redis):
+    """Sin la clave en Redis se lee la DB: nunca se asume la versión 0."""
+    old_token = _token(user)
+    asyncio.run(principal_cache.invalidate(user.email, user_id=user.id, redis=stream_redis, session=session))
+    session.refresh(user)
+    assert user.token_version == 1
+
+    stream_redis.values.clear()  # FLUSHALL / eviction
+
+    # Los claims del token viejo no se usan: se resuelve por el cache (DB)
+    principal = authorize(old_token)
+    assert not principal.features_resolved
+    assert stream_redis.values[TOKEN_VERSION_KEY.format(user_id=user.id)] == "1:1"
+
+    # Un token emitido tras la revocación sí se autoriza con sus claims
+    assert authorize(_token(user)).features_resolved
+
+
+def test_deactivated_user_is_rejected_despite_valid_claims(authorize, user, session):
+    token = _token(user)
+    user.is_active = False
+    session.add(user)
+    session.commit()
+
+    with pytest.raises(HTTPException) as exc:
+        authorize(token)
+    assert exc.value.status_code == 403
+
+
+class _AsyncRequestSession(AsyncSession):
+    """AsyncSession del request sobre la sesión SQLite del test."""
+
+    def __init__(self, session: Session):
+        self.sync = session
+        self.statements = 0
+
+    async def exec(self, statement):
+        self.statements += 1
+        return self.sync.exec(statement)
+
+
+def test_async_principal_uses_the_request_session(monkeypatch, stream_redis, user, session):
+    monkeypatch.setattr(deps, "get_redis_client", lambda: stream_redis)
+
+    def no_own_session():
+        raise AssertionError("opened a second session")
+    monkeypatch.setattr(db_session, "async_session_scope", no_own_session)
+    request_session = _AsyncRequestSession(session)
+
+    # Fallo de cache (sin clave en Redis ni entrada en el LRU)
+    principal = asyncio.run(deps.get_current_principal_async(session=request_session, token=_token(user)))
+
+    assert principal.id == user.id
+    assert request_session.statements == 1
+
+
+def _dependency_calls(dependant):
+    for dependency in dependant.dependencies:
+        yield dependency.call
+        yield from _dependency_calls(dependency)
+
+
+def test_send_message_resolves_a_single_request_session():
+    from app.modules.chat.routes import router
+
+    (route,) = [route for route in router.routes if route.path == "/api/v1/chat/message"]
+    calls = set(_dependency_calls(route.dependant))
+
+    assert get_async_db in calls
+    assert get_session not in calls
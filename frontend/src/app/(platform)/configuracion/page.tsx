@@ -232,7 +232,8 @@ export default function ConfiguracionPage() {
     
     try {
       setIsLoadingMonthlyCampaigns(true);
-      const response = await getMonthlyCampaigns(50, 0);
+      // La lista y el visor de resultados usan generated_content
+      const response = await getMonthlyCampaigns(50, 0, ["generated_content"]);
       setMonthlyCampaigns(response.campaigns);
     } catch (error) {
       if (error instanceof ApiError && error.status !== 401) {
@@ -36,7 +36,8 @@ export function ExtractionStatusList({
     try {
       setIsLoading(true);
       setError(null);
-      const response = await getExtractionQueries(50, 0);
+      // El resumen de cada query ("N fuentes encontradas") usa results
+      const response = await getExtractionQueries(50, 0, ["results"]);
       setQueries(response.queries);
     } catch (err) {
       setError(err instanceof Error ? err : new Error("Error al cargar queries"));
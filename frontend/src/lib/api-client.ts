@@ -302,17 +302,23 @@ export async function launchExtractionQuery(
 /**
  * Obtener lista de queries de extracción del usuario
  * 
+ * El listado omite `results` y `query_metadata` salvo que se pidan en
+ * `include` (p.ej. ["results"]); el detalle los trae siempre.
+ * 
  * @param limit - Número máximo de resultados
  * @param offset - Offset para paginación
+ * @param include - Campos pesados a incluir en cada query
  * @returns Lista de queries
  * @throws ApiError si falla la petición
  */
 export async function getExtractionQueries(
   limit: number = 50,
-  offset: number = 0
+  offset: number = 0,
+  include: Array<"results" | "query_metadata"> = []
 ): Promise<ExtractionQueryListResponse> {
+  const includeParam = include.length ? `&include=${include.join(",")}` : "";
   return apiGet<ExtractionQueryListResponse>(
-    `/api/v1/data-mining/queries?limit=${limit}&offset=${offset}`
+    `/api/v1/data-mining/queries?limit=${limit}&offset=${offset}${includeParam}`
   );
 }
 
@@ -417,17 +423,24 @@ export async function launchMonthlyCampaign(
 /**
  * Obtener lista de campañas mensuales del usuario
  * 
+ * El listado omite `generated_content` y `campaign_metadata` salvo que se
+ * pidan en `include` (p.ej. ["generated_content"]); el detalle los trae
+ * siempre.
+ * 
  * @param limit - Número máximo de resultados
  * @param offset - Offset para paginación
+ * @param include - Campos pesados a incluir en cada campaña
  * @returns Lista de campañas
  * @throws ApiError si falla la petición
  */
 export async function getMonthlyCampaigns(
   limit: number = 50,
-  offset: number = 0
+  offset: number = 0,
+  include: Array<"generated_content" | "campaign_metadata"> = []
 ): Promise<ContentCampaignListResponse> {
+  const includeParam = include.length ? `&include=${include.join(",")}` : "";
   return apiGet<ContentCampaignListResponse>(
-    `/api/v1/content-planner/campaigns?limit=${limit}&offset=${offset}`
+    `/api/v1/content-planner/campaigns?limit=${limit}&offset=${offset}${includeParam}`
   );
 }
 
@@ -0,0 +1,183 @@
+"""
+Benchmark - Ráfagas de callbacks update-media de n8n
+
+Simula el final de una campaña: `--burst` callbacks simultáneos a
+`PATCH /public/content/{piece_id}/update-media` (uno por pieza, payload
+de Fal.ai) y mide:
+
+- Latencia de respuesta de cada callback (p50/p99/max): lo que n8n espera
+  con su ejecución abierta
+- Throughput de la ráfaga (callbacks/s)
+- Tiempo hasta que todas las piezas quedan COMPLETED en la base de datos
+  (con fast-ack, lo que tarda el consumer `ingest_callbacks` en aplicarlos)
+
+Con `--bulk` envía la ronda como una sola llamada a
+`PATCH /public/content/bulk-update-media` (encolada en el mismo stream
+de callbacks) para comparar round trips y tiempo total con el modo por
+pieza.
+
+Crea un usuario, una campaña y `--burst` piezas temporales y los borra al
+terminar. Ejecutar antes y después de un cambio y comparar.
+
+Requisitos:
+- Dependencias del backend y httpx
+- API y worker (cola interactive) en marcha contra la misma base de datos
+  y Redis que `backend/.env`; N8N_SERVICE_API_KEY configurada
+
+Uso:
+    python scripts/bench_callbacks.py --base-url http://localhost:8000 --burst 50 --rounds 5
+    python scripts/bench_callbacks.py --base-url http://localhost:8000 --burst 50 --rounds 5 --bulk
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+import uuid
+from typing import Dict, List
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend"))
+
+
+def _summary(samples_ms: List[float]) -> Dict[str, float]:
+    ordered = sorted(samples_ms)
+
+    def pct(p: float) -> float:
+        return ordered[max(0, min(len(ordered) - 1, int(round(len(ordered) * p / 100)) - 1))]
+
+    return {
+        "p50_ms": round(pct(50), 2),
+        "p99_ms": round(pct(99), 2),
+        "max_ms": round(ordered[-1], 2),
+        "mean_ms": round(statistics.fmean(ordered), 2),
+    }
+
+
+async def _fire(client, base_url: str, api_key: str, piece_ids: List[int], round_no: int) -> List[float]:
+    async def one(piece_id: int) -> float:
+        start = time.perf_counter()
+        response = await client.patch(
+            f"{base_url}/api/v1/marketing/public/content/{piece_id}/update-media",
+            json={"video": {"url": f"https://cdn.example.com/bench/{round_no}/{piece_id}.mp4"}},
+            headers={"X-API-Key": api_key},
+        )
+        elapsed = (time.perf_counter() - start) * 1000
+        if response.status_code not in (200, 202):
+            raise RuntimeError(f"piece {piece_id}: HTTP {response.status_code} {response.text[:200]}")
+        return elapsed
+
+    return list(await asyncio.gather(*(one(piece_id) for piece_id in piece_ids)))
+
+
+async def _fire_bulk(client, base_url: str, api_key: str, piece_ids: List[int], round_no: int) -> List[float]:
+    start = time.perf_counter()
+    response = await client.patch(
+        f"{base_url}/api/v1/marketing/public/content/bulk-update-media",
+        json={"items": [
+            {"piece_id": piece_id, "payload": {"video": {"url": f"https://cdn.example.com/bench/{round_no}/{piece_id}.mp4"}}}
+            for piece_id in piece_ids
+        ]},
+        headers={"X-API-Key": api_key},
+    )
+    elapsed = (time.perf_counter() - start) * 1000
+    if response.status_code != 202 or response.json()["accepted"] != len(piece_ids):
+        raise RuntimeError(f"bulk: HTTP {response.status_code} {response.text[:200]}")
+    return [elapsed]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--burst", type=int, default=50, help="Callbacks simultáneos (piezas)")
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--bulk", action="store_true", help="Una llamada bulk por ronda en vez de una por pieza")
+    parser.add_argument("--drain-timeout", type=float, default=60.0, help="Máximo de espera a que se apliquen (s)")
+    args = parser.parse_args()
+
+    import httpx
+    from sqlalchemy import create_engine, delete, func, select, update
+    from sqlmodel import Session
+
+    from app.core.config import settings
+    from app.models.content import ContentPiece, MarketingCampaign
+    from app.models.user import User
+
+    if not settings.N8N_SERVICE_API_KEY:
+        sys.exit("N8N_SERVICE_API_KEY no está configurada")
+
+    engine = create_engine(settings.DATABASE_URL)
+    with Session(engine) as session:
+        user = User(email=f"bench-{uuid.uuid4().hex[:8]}@bai.local", hashed_password="x")
+        session.add(user)
+        session.commit()
+        campaign = MarketingCampaign(
+            user_id=user.id, name="bench", influencer_name="bench", tone_of_voice="neutral",
+            topic="bench", platforms="Instagram", content_count=args.burst,
+        )
+        session.add(campaign)
+        session.commit()
+        pieces = [
+            ContentPiece(campaign_id=campaign.id, platform="Instagram", type="Reel",
+                         caption="c", visual_script="v", status="PENDING")
+            for _ in range(args.burst)
+        ]
+        session.add_all(pieces)
+        session.commit()
+        user_id, campaign_id = user.id, campaign.id
+        piece_ids = [piece.id for piece in pieces]
+
+    def completed(round_no: int) -> int:
+        with Session(engine) as session:
+            return session.execute(
+                select(func.count(ContentPiece.id)).where(
+                    ContentPiece.campaign_id == campaign_id,
+                    ContentPiece.media_url.like(f"%/bench/{round_no}/%"),
+                )
+            ).scalar_one()
+
+    async def run() -> None:
+        limits = httpx.Limits(max_connections=args.burst, max_keepalive_connections=args.burst)
+        async with httpx.AsyncClient(timeout=60.0, limits=limits) as client:
+            for round_no in range(args.rounds):
+                with Session(engine) as session:
+                    session.execute(
+                        update(ContentPiece)
+                        .where(ContentPiece.campaign_id == campaign_id)
+                        .values(status="PENDING", media_url=None)
+                    )
+                    session.commit()
+
+                start = time.perf_counter()
+                fire = _fire_bulk if args.bulk else _fire
+                latencies = await fire(client, args.base_url, settings.N8N_SERVICE_API_KEY, piece_ids, round_no)
+                burst_s = time.perf_counter() - start
+
+                applied_s = None
+                while time.perf_counter() - start < args.drain_timeout:
+                    if completed(round_no) == len(piece_ids):
+                        applied_s = time.perf_counter() - start
+                        break
+                    await asyncio.sleep(0.05)
+
+                print(
+                    f"ronda {round_no + 1}: {_summary(latencies)}, "
+                    f"ráfaga {burst_s * 1000:.0f} ms ({len(piece_ids) / burst_s:.0f} callbacks/s), "
+                    f"aplicados en {'TIMEOUT' if applied_s is None else f'{applied_s * 1000:.0f} ms'}"
+                )
+
+    try:
+        asyncio.run(run())
+    finally:
+        with Session(engine) as session:
+            session.execute(delete(ContentPiece).where(ContentPiece.campaign_id == campaign_id))
+            session.execute(delete(MarketingCampaign).where(MarketingCampaign.id == campaign_id))
+            session.execute(delete(User).where(User.id == user_id))
+            session.commit()
+
+
+if __name__ == "__main__":
+    main()
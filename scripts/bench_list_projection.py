@@ -0,0 +1,171 @@
+"""
+Benchmark - Listados con y sin columnas JSONB pesadas
+
+Para los tres listados (campañas del content planner y del content
+creator, queries de data mining) mide, sin `include=` y con `include=all`:
+
+- Bytes de la respuesta JSON (lo que serializa el endpoint)
+- Bytes leídos de la base de datos: bloques de buffers (shared hit + read)
+  de `EXPLAIN (ANALYZE, BUFFERS)` de la query del listado, incluida la
+  lectura de TOAST, y `pg_column_size` de las columnas devueltas
+- Latencia de la llamada (servicio + serialización), p50 sobre `--rounds`
+
+Crea `--rows` filas temporales por tabla para un usuario nuevo con un
+JSONB de `--payload-kb` KB y las borra al terminar.
+
+Requisitos:
+- Postgres accesible vía DATABASE_URL (mismo .env que el backend)
+
+Uso:
+    cd backend && python ../scripts/bench_list_projection.py --rows 50 --payload-kb 64
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+import uuid
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend"))
+
+from sqlalchemy import delete, insert, text  # noqa: E402
+from sqlalchemy.dialects import postgresql  # noqa: E402
+from sqlmodel import Session, select  # noqa: E402
+
+from app.core.projection import defer_heavy, parse_include  # noqa: E402
+from app.infrastructure.db.session import engine  # noqa: E402
+from app.models.user import User  # noqa: E402
+from app.modules.content_creator import routes as creator_routes  # noqa: E402
+from app.modules.content_creator import service as creator_service  # noqa: E402
+from app.modules.content_creator.models import Campaign, CampaignStatus as CreatorStatus  # noqa: E402
+from app.modules.content_planner import routes as planner_routes  # noqa: E402
+from app.modules.content_planner import service as planner_service  # noqa: E402
+from app.modules.content_planner.models import CampaignStatus as PlannerStatus, ContentCampaign  # noqa: E402
+from app.modules.data_mining import routes as mining_routes  # noqa: E402
+from app.modules.data_mining import service as mining_service  # noqa: E402
+from app.modules.data_mining.models import ExtractionQuery, ExtractionStatus  # noqa: E402
+
+BLOCK_SIZE = 8192
+
+
+def _payload(kb: int) -> dict:
+    # Texto poco compresible para que TOAST no lo reduzca a casi nada
+    items = [os.urandom(128).hex() for _ in range(max(1, kb * 1024 // 256))]
+    return {"posts": [{"caption": item, "hashtags": ["#bai"] * 5} for item in items]}
+
+
+def _seed(session: Session, user_id: int, rows: int, kb: int) -> None:
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    payload = _payload(kb)
+    session.execute(insert(ContentCampaign.__table__), [
+        {"user_id": user_id, "month": "2025-02", "tone_of_voice": "bench", "themes": ["bench"],
+         "target_platforms": ["Instagram"], "status": PlannerStatus.COMPLETED, "generated_content": payload,
+         "campaign_metadata": {"bench": True}, "created_at": now, "updated_at": now}
+        for _ in range(rows)
+    ])
+    session.execute(insert(Campaign.__table__), [
+        {"user_id": user_id, "name": "bench", "influencer_name": "bench", "tone_of_voice": "bench",
+         "platforms": ["Instagram"], "content_count": 5, "status": CreatorStatus.COMPLETED,
+         "generated_content": payload, "created_at": now, "updated_at": now}
+        for _ in range(rows)
+    ])
+    session.execute(insert(ExtractionQuery.__table__), [
+        {"user_id": user_id, "search_topic": "bench", "status": ExtractionStatus.COMPLETED, "results": payload,
+         "query_metadata": {"bench": True}, "created_at": now, "updated_at": now}
+        for _ in range(rows)
+    ])
+    session.commit()
+
+
+def _db_bytes(session: Session, model, heavy, include, user_id: int, limit: int) -> tuple[int, int]:
+    statement = (
+        select(model)
+        .where(model.user_id == user_id)
+        .options(*defer_heavy(model, heavy, include))
+        .order_by(model.created_at.desc())
+        .limit(limit)
+    )
+    sql = str(statement.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
+    plan = session.execute(text(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) SELECT row_to_json(q)::text FROM ({sql}) q")).scalar()
+    plan = plan if isinstance(plan, list) else json.loads(plan)
+    node = plan[0]["Plan"]
+    blocks = node.get("Shared Hit Blocks", 0) + node.get("Shared Read Blocks", 0)
+    columns = ", ".join(column.name for column in model.__table__.columns if column.name not in heavy or column.name in include)
+    size = session.execute(text(
+        f"SELECT COALESCE(SUM(pg_column_size(q.*)), 0) FROM ("
+        f"SELECT {columns} FROM {model.__tablename__} WHERE user_id = :user_id "
+        f"ORDER BY created_at DESC LIMIT :limit) q"
+    ), {"user_id": user_id, "limit": limit}).scalar()
+    return blocks * BLOCK_SIZE, int(size)
+
+
+async def _measure(endpoint, service, model, heavy, include_param, user_id: int, rows: int, rounds: int):
+    principal = type("Principal", (), {"id": user_id})()
+    include = parse_include(include_param, heavy)
+    timings = []
+    body = b""
+    for _ in range(rounds):
+        with Session(engine) as session:
+            start = time.perf_counter()
+            response = await endpoint(
+                current_user=principal, session=session, service=service,
+                limit=rows, offset=0, include=include_param,
+            )
+            body = response.model_dump_json(exclude_unset=True).encode()
+            timings.append((time.perf_counter() - start) * 1000)
+    with Session(engine) as session:
+        buffer_bytes, column_bytes = _db_bytes(session, model, heavy, include, user_id, rows)
+    return len(body), buffer_bytes, column_bytes, statistics.median(timings)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=50, help="Filas por tabla (y tamaño de página)")
+    parser.add_argument("--payload-kb", type=int, default=64, help="Tamaño del JSONB pesado por fila")
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    with Session(engine) as session:
+        user = User(email=f"bench-{uuid.uuid4().hex[:8]}@bai.local", hashed_password="x")
+        session.add(user)
+        session.commit()
+        user_id = user.id
+        _seed(session, user_id, args.rows, args.payload_kb)
+
+    listings = [
+        ("content_planner", planner_routes.list_campaigns, planner_service.ContentPlannerService(),
+         ContentCampaign, planner_service.LIST_HEAVY_FIELDS),
+        ("content_creator", creator_routes.list_campaigns, creator_service.ContentCreatorService(),
+         Campaign, creator_service.LIST_HEAVY_FIELDS),
+        ("data_mining", mining_routes.list_queries, mining_service.DataMiningService(),
+         ExtractionQuery, mining_service.LIST_HEAVY_FIELDS),
+    ]
+
+    try:
+        print(f"Filas: {args.rows} | JSONB: {args.payload_kb} KB/fila | rondas: {args.rounds}")
+        print(f"  {'listado':<16} {'include':<8} {'respuesta':>12} {'buffers DB':>12} {'columnas':>12} {'p50 ms':>8}")
+        for name, endpoint, service, model, heavy in listings:
+            for include_param in (None, "all"):
+                body, buffers, columns, p50 = asyncio.run(
+                    _measure(endpoint, service, model, heavy, include_param, user_id, args.rows, args.rounds)
+                )
+                print(
+                    f"  {name:<16} {include_param or '-':<8} {body / 1024:>10.1f}KB "
+                    f"{buffers / 1024:>10.1f}KB {columns / 1024:>10.1f}KB {p50:>8.2f}"
+                )
+    finally:
+        with Session(engine) as session:
+            for model in (ContentCampaign, Campaign, ExtractionQuery):
+                session.execute(delete(model).where(model.user_id == user_id))
+            session.execute(delete(User).where(User.id == user_id))
+            session.commit()
+
+
+if __name__ == "__main__":
+    main()
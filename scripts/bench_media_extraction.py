@@ -0,0 +1,99 @@
+"""
+Benchmark - Extracción de media_url de callbacks: reglas vs. heurística
+
+Sobre los payloads grabados de `scripts/fixtures/media_callbacks.json`
+(Fal.ai, HeyGen, DALL·E, PiAPI, n8n, desconocidos) compara:
+
+- Reglas: `extract_media_url_from_payload` (huella + rutas precompiladas,
+  heurística acotada solo como fallback)
+- Heurística: `find_media_url_heuristic` sin tope de nodos (recorrido
+  recursivo del payload completo)
+
+Antes de medir comprueba que las reglas devuelven la URL y la regla
+esperadas de cada fixture. `--inflate N` antepone N entradas de log a cada
+payload para simular respuestas grandes de proveedor.
+
+Requisitos:
+- Dependencias del backend (no necesita base de datos ni Redis)
+
+Uso:
+    cd backend && python ../scripts/bench_media_extraction.py --iterations 20000 --inflate 200
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import timeit
+from typing import Any, Dict, List
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend"))
+
+from app.services.media_extraction import (  # noqa: E402
+    extract_media_url_from_payload,
+    find_media_url_heuristic,
+    match_media_url,
+)
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "media_callbacks.json")
+
+
+def _inflate(payload: Dict[str, Any], entries: int) -> Dict[str, Any]:
+    if not entries:
+        return payload
+    logs = [
+        {"level": "INFO", "message": f"step {i}/{entries}: denoising latents, scheduler=euler, cfg=7.0"}
+        for i in range(entries)
+    ]
+    return {"logs": logs, **payload}
+
+
+def load_fixtures(inflate: int) -> List[Dict[str, Any]]:
+    with open(FIXTURES, encoding="utf-8") as f:
+        fixtures = json.load(f)
+    for fixture in fixtures:
+        fixture["payload"] = _inflate(fixture["payload"], inflate)
+    return fixtures
+
+
+def check(fixtures: List[Dict[str, Any]]) -> None:
+    failures = []
+    for fixture in fixtures:
+        url, provider = match_media_url(fixture["payload"])
+        if url != fixture["expected"] or provider != fixture["provider"]:
+            failures.append(f"  {fixture['name']}: {provider} -> {url!r} (esperado {fixture['provider']} -> {fixture['expected']!r})")
+    if failures:
+        raise SystemExit("Fixtures con resultado inesperado:\n" + "\n".join(failures))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=20000, help="Extracciones por fixture y camino")
+    parser.add_argument("--inflate", type=int, default=0, help="Entradas de log añadidas a cada payload")
+    args = parser.parse_args()
+
+    fixtures = load_fixtures(args.inflate)
+    check(fixtures)
+
+    print(f"Fixtures: {len(fixtures)} | iteraciones: {args.iterations} | inflate: {args.inflate}")
+    print(f"  {'fixture':<24} {'regla':<12} {'reglas µs':>10} {'heurística µs':>14} {'speedup':>8}  heurística acierta")
+    total_rules = total_heuristic = 0.0
+    for fixture in fixtures:
+        payload = fixture["payload"]
+        rules_s = timeit.timeit(lambda: extract_media_url_from_payload(payload), number=args.iterations)
+        heuristic_s = timeit.timeit(lambda: find_media_url_heuristic(payload, max_nodes=None), number=args.iterations)
+        total_rules += rules_s
+        total_heuristic += heuristic_s
+        correct = find_media_url_heuristic(payload, max_nodes=None) == fixture["expected"]
+        print(
+            f"  {fixture['name']:<24} {fixture['provider']:<12} "
+            f"{rules_s / args.iterations * 1e6:>10.2f} {heuristic_s / args.iterations * 1e6:>14.2f} "
+            f"{heuristic_s / rules_s:>7.1f}x  {'sí' if correct else 'NO'}"
+        )
+    print(f"  {'total':<37} {total_rules:>9.3f}s {total_heuristic:>13.3f}s {total_heuristic / total_rules:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+"""
+Benchmark - bcrypt en el event loop vs. pool dedicado
+
+Dos modos:
+
+- `local` (por defecto): en proceso, sin servidor. Lanza `--logins`
+  verificaciones concurrentes de bcrypt y, en paralelo, un "endpoint
+  rápido" simulado (un tick cada `--interval` s). Compara:
+    * inline: `pwd_context.verify` dentro de la corrutina (camino previo
+      de `authenticate_user`)
+    * pool: `password_hasher.verify` (app/core/hashing.py)
+  e informa throughput de logins y retraso p50/p99/max de los ticks (lo
+  que un request de chat esperaría al event loop).
+
+- `http`: contra un servidor en marcha. `--concurrency` clientes hacen
+  login en bucle en /api/auth/token mientras un cliente de control mide
+  la latencia de `--fast-path`. Ejecutar con un único worker de uvicorn
+  antes y después del cambio para comparar.
+
+Requisitos:
+- Modo local: dependencias del backend (passlib[bcrypt])
+- Modo http: httpx y un usuario existente (`--email`/`--password`)
+
+Uso:
+    cd backend && python ../scripts/bench_password_hashing.py --logins 32
+    python scripts/bench_password_hashing.py --mode http --email a@b.com --password secret
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from typing import Awaitable, Callable, Dict, List
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend"))
+
+
+FAST_ENDPOINT = "/api/v1/health/simple"
+LOGIN_ENDPOINT = "/api/auth/token"
+
+
+def _summary(samples_ms: List[float]) -> Dict[str, float]:
+    if not samples_ms:
+        return {"samples": 0}
+    ordered = sorted(samples_ms)
+
+    def pct(p: float) -> float:
+        return ordered[max(0, min(len(ordered) - 1, int(round(len(ordered) * p / 100)) - 1))]
+
+    return {
+        "samples": len(ordered),
+        "p50_ms": round(pct(50), 1),
+        "p99_ms": round(pct(99), 1),
+        "max_ms": round(ordered[-1], 1),
+        "mean_ms": round(statistics.fmean(ordered), 1),
+    }
+
+
+async def _tick_lag(stop: asyncio.Event, interval: float, lags_ms: List[float]) -> None:
+    """Mide cuánto se retrasa un `sleep(interval)` respecto a lo previsto."""
+    while not stop.is_set():
+        expected = time.perf_counter() + interval
+        await asyncio.sleep(interval)
+        lags_ms.append(max(0.0, (time.perf_counter() - expected) * 1000))
+
+
+async def _run_local(name: str, verify: Callable[[], Awaitable[bool]], logins: int, interval: float) -> None:
+    stop = asyncio.Event()
+    lags: List[float] = []
+    ticker = asyncio.create_task(_tick_lag(stop, interval, lags))
+    await asyncio.sleep(interval * 3)
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*(verify() for _ in range(logins)), return_exceptions=True)
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await ticker
+
+    ok = sum(1 for r in results if r is True)
+    print(f"  {name}")
+    print(f"    logins          {ok}/{logins} en {elapsed:.2f}s ({ok / elapsed:.1f}/s)")
+    for key, value in _summary(lags).items():
+        print(f"    tick {key:<10} {value}")
+
+
+async def main_local(args: argparse.Namespace) -> None:
+    from app.core.hashing import PasswordHasher
+    from app.core.security import pwd_context
+
+    hashed = pwd_context.hash(args.password)
+    hasher = PasswordHasher(max_workers=args.workers, max_queue=args.logins)
+
+    async def inline_verify() -> bool:
+        return pwd_context.verify(args.password, hashed)
+
+    async def pooled_verify() -> bool:
+        return await hasher.verify(args.password, hashed)
+
+    print(f"{args.logins} logins concurrentes, tick cada {args.interval * 1000:.0f} ms")
+    await _run_local("inline (event loop)", inline_verify, args.logins, args.interval)
+    await _run_local(f"pool ({args.workers} threads)", pooled_verify, args.logins, args.interval)
+    print(f"  métricas del pool: {hasher.snapshot()}")
+
+
+async def main_http(args: argparse.Namespace) -> None:
+    import httpx
+
+    stop = asyncio.Event()
+    login_ms: List[float] = []
+    fast_ms: List[float] = []
+    errors = {"login": 0, "fast": 0}
+
+    async def login_loop(client: httpx.AsyncClient) -> None:
+        while not stop.is_set():
+            start = time.perf_counter()
+            response = await client.post(
+                f"{args.base_url}{LOGIN_ENDPOINT}",
+                data={"username": args.email, "password": args.password},
+                timeout=60.0,
+            )
+            if response.status_code != 200:
+                errors["login"] += 1
+                continue
+            login_ms.append((time.perf_counter() - start) * 1000)
+
+    async def probe(client: httpx.AsyncClient) -> None:
+        while not stop.is_set():
+            start = time.perf_counter()
+            response = await client.get(f"{args.base_url}{args.fast_path}", timeout=30.0)
+            if response.status_code >= 400:
+                errors["fast"] += 1
+            else:
+                fast_ms.append((time.perf_counter() - start) * 1000)
+            await asyncio.sleep(args.interval)
+
+    limits = httpx.Limits(max_connections=args.concurrency + 5)
+    async with httpx.AsyncClient(limits=limits) as client:
+        tasks = [asyncio.create_task(login_loop(client)) for _ in range(args.concurrency)]
+        tasks.append(asyncio.create_task(probe(client)))
+        await asyncio.sleep(args.duration)
+        stop.set()
+        await asyncio.gather(*tasks)
+
+    print(f"{args.concurrency} clientes de login durante {args.duration:.0f}s")
+    print(f"  login: {len(login_ms) / args.duration:.1f}/s, errores {errors['login']}, {_summary(login_ms)}")
+    print(f"  {args.fast_path}: errores {errors['fast']}, {_summary(fast_ms)}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mode", choices=["local", "http"], default="local")
+    parser.add_argument("--logins", type=int, default=32, help="Modo local: verificaciones concurrentes")
+    parser.add_argument("--workers", type=int, default=2, help="Modo local: threads del pool")
+    parser.add_argument("--interval", type=float, default=0.01, help="Periodo del endpoint rápido (s)")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--fast-path", default=FAST_ENDPOINT)
+    parser.add_argument("--email", default=None)
+    parser.add_argument("--password", default="benchmark-password")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=20.0)
+    args = parser.parse_args()
+
+    if args.mode == "http":
+        if not args.email:
+            parser.error("--email es obligatorio en modo http")
+        asyncio.run(main_http(args))
+    else:
+        asyncio.run(main_local(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""
+Benchmark - save-plan: flush/refresh por pieza vs. INSERT multi-fila
+
+Mide la latencia de persistir un plan de contenido de `--sizes` piezas
+(10/50/100 por defecto) con dos caminos:
+
+- per-row: camino previo de save_content_plan (session.add + flush por
+  pieza, commit y session.refresh por pieza)
+- bulk: `persist_content_plan` (app/api/routes/marketing.py): UPDATE de la
+  campaña con RETURNING + un INSERT multi-fila con RETURNING + COMMIT
+
+Para cada tamaño informa p50/p99/max y las sentencias SQL enviadas por
+operación (round trips). Crea un usuario y una campaña temporales y los
+borra al terminar.
+
+Requisitos:
+- Dependencias del backend y una base de datos PostgreSQL migrada
+  (DATABASE_URL o `--database-url`). Con SQLite el INSERT multi-fila con
+  RETURNING ordenado se degrada a una sentencia por fila.
+
+Uso:
+    cd backend && python ../scripts/bench_save_plan.py
+    python scripts/bench_save_plan.py --sizes 10 50 100 --runs 30 --database-url postgresql+psycopg://...
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import statistics
+import sys
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Callable, Dict, List
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend"))
+
+
+def _summary(samples_ms: List[float]) -> Dict[str, float]:
+    ordered = sorted(samples_ms)
+
+    def pct(p: float) -> float:
+        return ordered[max(0, min(len(ordered) - 1, int(round(len(ordered) * p / 100)) - 1))]
+
+    return {
+        "p50_ms": round(pct(50), 2),
+        "p99_ms": round(pct(99), 2),
+        "max_ms": round(ordered[-1], 2),
+        "mean_ms": round(statistics.fmean(ordered), 2),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 50, 100])
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--database-url", default=None)
+    args = parser.parse_args()
+
+    if args.database_url:
+        os.environ["DATABASE_URL"] = args.database_url
+
+    from sqlalchemy import create_engine, delete, event
+    from sqlmodel import Session
+
+    from app.api.routes.marketing import ContentPiecePlan, SavePlanRequest, persist_content_plan
+    from app.core.config import settings
+    from app.models.content import ContentPiece, MarketingCampaign
+    from app.models.user import User
+
+    engine = create_engine(settings.DATABASE_URL)
+    statements = {"count": 0}
+    event.listen(engine, "before_cursor_execute", lambda *a, **k: statements.__setitem__("count", statements["count"] + 1))
+
+    with Session(engine) as session:
+        user = User(email=f"bench-{uuid.uuid4().hex[:8]}@bai.local", hashed_password="x")
+        session.add(user)
+        session.commit()
+        campaign = MarketingCampaign(
+            user_id=user.id, name="bench", influencer_name="bench", tone_of_voice="neutral",
+            topic="bench", platforms="Instagram", content_count=0,
+        )
+        session.add(campaign)
+        session.commit()
+        user_id, campaign_id = user.id, campaign.id
+
+    def make_plan(size: int) -> SavePlanRequest:
+        return SavePlanRequest(pieces=[
+            ContentPiecePlan(
+                platform="Instagram", type="Reel",
+                caption="c" * 400, visual_script="v" * 800, style="cinematic",
+            )
+            for _ in range(size)
+        ])
+
+    def per_row(plan: SavePlanRequest) -> None:
+        with Session(engine) as session:
+            campaign = session.get(MarketingCampaign, campaign_id)
+            created = []
+            for piece_data in plan.pieces:
+                piece = ContentPiece(
+                    campaign_id=campaign_id, platform=piece_data.platform, type=piece_data.type,
+                    caption=piece_data.caption, visual_script=piece_data.visual_script,
+                    style=piece_data.style, status="PENDING", created_at=datetime.now(timezone.utc),
+                )
+                session.add(piece)
+                session.flush()
+                created.append(piece)
+            campaign.status = "in_progress"
+            session.add(campaign)
+            session.commit()
+            for piece in created:
+                session.refresh(piece)
+
+    def bulk(plan: SavePlanRequest) -> None:
+        with Session(engine) as session:
+            persist_content_plan(session, campaign_id, plan, user_id=user_id)
+
+    def measure(fn: Callable[[SavePlanRequest], None], plan: SavePlanRequest) -> Dict[str, float]:
+        fn(plan)  # warm-up (pool, caches de compilación)
+        samples: List[float] = []
+        statements["count"] = 0
+        for _ in range(args.runs):
+            start = time.perf_counter()
+            fn(plan)
+            samples.append((time.perf_counter() - start) * 1000)
+        return {**_summary(samples), "statements_per_op": round(statements["count"] / args.runs, 1)}
+
+    try:
+        for size in args.sizes:
+            plan = make_plan(size)
+            print(f"{size} piezas ({args.runs} ejecuciones)")
+            for name, fn in (("per-row", per_row), ("bulk", bulk)):
+                print(f"  {name:<8} {measure(fn, plan)}")
+    finally:
+        with Session(engine) as session:
+            session.exec(delete(ContentPiece).where(ContentPiece.campaign_id == campaign_id))
+            session.exec(delete(MarketingCampaign).where(MarketingCampaign.id == campaign_id))
+            session.exec(delete(User).where(User.id == user_id))
+            session.commit()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""
+Benchmark - Tiempo de arranque de la API
+
+Arranca `uvicorn app.main:app` `--runs` veces y mide, en cada arranque, el
+tiempo hasta que `--health-path` responde 200 (import de la app + lifespan:
+comprobación de la revisión del esquema, pool de Arq, listeners). Entre
+arranques el proceso se detiene, así cada medida es un arranque en frío
+del proceso (la base de datos y Redis siguen en marcha).
+
+Ejecutar antes y después de un cambio que afecte al arranque y comparar
+p50/max; con `--record` se añade una línea JSON por ejecución a un fichero
+para seguir la evolución.
+
+Requisitos:
+- Dependencias del backend y httpx
+- Base de datos migrada (`python -m app.infrastructure.db.migrations`)
+  y Redis accesibles con la configuración de `backend/.env`
+
+Uso:
+    python scripts/bench_startup.py --runs 10
+    python scripts/bench_startup.py --runs 5 --record scripts/startup_history.jsonl
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend")
+
+HEALTH_ENDPOINT = "/api/v1/health/simple"
+
+
+def _summary(samples_ms: List[float]) -> Dict[str, float]:
+    if not samples_ms:
+        return {"samples": 0}
+    ordered = sorted(samples_ms)
+    return {
+        "samples": len(ordered),
+        "p50_ms": round(statistics.median(ordered), 1),
+        "min_ms": round(ordered[0], 1),
+        "max_ms": round(ordered[-1], 1),
+        "mean_ms": round(statistics.fmean(ordered), 1),
+    }
+
+
+def _wait_ready(url: str, process: subprocess.Popen, timeout: float) -> Optional[float]:
+    """Segundos hasta el primer 200 de `url` (None si el proceso muere o vence el timeout)."""
+    import httpx
+
+    start = time.perf_counter()
+    while time.perf_counter() - start < timeout:
+        if process.poll() is not None:
+            return None
+        try:
+            if httpx.get(url, timeout=0.5).status_code == 200:
+                return time.perf_counter() - start
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.02)
+    return None
+
+
+def _run_once(args: argparse.Namespace) -> Optional[float]:
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", args.app, "--host", "127.0.0.1", "--port", str(args.port)],
+        cwd=BACKEND_DIR,
+        stdout=subprocess.DEVNULL,
+        stderr=None if args.verbose else subprocess.DEVNULL,
+    )
+    try:
+        return _wait_ready(f"http://127.0.0.1:{args.port}{args.health_path}", process, args.timeout)
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--app", default="app.main:app")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--health-path", default=HEALTH_ENDPOINT)
+    parser.add_argument("--timeout", type=float, default=60.0, help="Máximo por arranque (s)")
+    parser.add_argument("--record", default=None, help="Fichero JSONL donde añadir el resultado")
+    parser.add_argument("--label", default=None, help="Etiqueta del resultado (p.ej. commit)")
+    parser.add_argument("--verbose", action="store_true", help="Mostrar stderr de uvicorn")
+    args = parser.parse_args()
+
+    samples: List[float] = []
+    failures = 0
+    for run in range(1, args.runs + 1):
+        elapsed = _run_once(args)
+        if elapsed is None:
+            failures += 1
+            print(f"  arranque {run}: FALLO (sin 200 en {args.health_path})")
+            continue
+        samples.append(elapsed * 1000)
+        print(f"  arranque {run}: {elapsed * 1000:.0f} ms")
+
+    summary = _summary(samples)
+    print(f"{args.app}: {summary}, fallos {failures}")
+
+    if args.record:
+        entry = {
+            "at": datetime.now(timezone.utc).isoformat(),
+            "label": args.label,
+            "app": args.app,
+            "failures": failures,
+            **summary,
+        }
+        with open(args.record, "a", encoding="utf-8") as fh:
+            fh.write(json.dumps(entry) + "\n")
+
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
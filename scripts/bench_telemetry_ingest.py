@@ -0,0 +1,116 @@
+"""
+Benchmark - Ingesta de telemetría: fila a fila vs. lotes
+
+Compara el throughput de inserción en `usage_logs` de:
+- Camino previo: un `AnalyticsService.log_feature_usage` por evento
+  (add + commit + refresh, lo que hacía cada job `track_feature_use`)
+- Camino con buffer: `AnalyticsService.ingest_events` con lotes de
+  `--batch-size` filas (lo que hace el collector `collect_telemetry`)
+
+Las filas insertadas se marcan con un run_id en tracking_metadata y se
+borran al terminar.
+
+Requisitos:
+- Postgres accesible vía DATABASE_URL (mismo .env que el backend)
+- Al menos un usuario en la tabla "user" (o pasar --user-id)
+
+Uso:
+    cd backend && python ../scripts/bench_telemetry_ingest.py --events 5000 --batch-size 500
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+import uuid
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend"))
+
+from sqlalchemy import text  # noqa: E402
+from sqlmodel import Session, select  # noqa: E402
+
+from app.infrastructure.db.session import engine  # noqa: E402
+from app.models.user import User  # noqa: E402
+from app.modules.analytics.service import AnalyticsService  # noqa: E402
+
+
+def _resolve_user_id(user_id: int | None) -> int:
+    if user_id:
+        return user_id
+    with Session(engine) as session:
+        user = session.exec(select(User).limit(1)).first()
+        if not user:
+            raise SystemExit("No hay usuarios en la base de datos; crea uno o usa --user-id")
+        return user.id
+
+
+def bench_row_by_row(service: AnalyticsService, user_id: int, events: int, run_id: str) -> float:
+    start = time.perf_counter()
+    for i in range(events):
+        with Session(engine) as session:
+            service.log_feature_usage(
+                user_id=user_id,
+                feature_key="ai_content_generation",
+                session=session,
+                tracking_metadata={"bench": run_id, "path": "row", "i": i},
+            )
+    return time.perf_counter() - start
+
+
+def bench_batched(service: AnalyticsService, user_id: int, events: int, batch_size: int, run_id: str) -> float:
+    start = time.perf_counter()
+    for offset in range(0, events, batch_size):
+        now = datetime.utcnow()
+        rows = [
+            {
+                "user_id": user_id,
+                "feature_key": "ai_content_generation",
+                "tracking_metadata": {"bench": run_id, "path": "batch", "i": i},
+                "timestamp": now,
+                "created_at": now,
+            }
+            for i in range(offset, min(offset + batch_size, events))
+        ]
+        with Session(engine) as session:
+            service.ingest_events(rows, [], session)
+            session.commit()
+    return time.perf_counter() - start
+
+
+def cleanup(run_id: str) -> None:
+    with Session(engine) as session:
+        session.execute(
+            text("DELETE FROM usage_logs WHERE tracking_metadata->>'bench' = :run_id"),
+            {"run_id": run_id},
+        )
+        session.commit()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=2000)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--user-id", type=int, default=None)
+    args = parser.parse_args()
+
+    user_id = _resolve_user_id(args.user_id)
+    service = AnalyticsService()
+    run_id = uuid.uuid4().hex
+
+    try:
+        row_seconds = bench_row_by_row(service, user_id, args.events, run_id)
+        batch_seconds = bench_batched(service, user_id, args.events, args.batch_size, run_id)
+    finally:
+        cleanup(run_id)
+
+    print(f"Eventos: {args.events} | batch size: {args.batch_size}")
+    print(f"  fila a fila : {row_seconds:8.2f}s  ({args.events / row_seconds:10.0f} filas/s)")
+    print(f"  por lotes   : {batch_seconds:8.2f}s  ({args.events / batch_seconds:10.0f} filas/s)")
+    print(f"  speedup     : {row_seconds / batch_seconds:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+"""
+Load Test - Aislamiento de latencia entre endpoints lentos y rápidos
+
+Verifica que un endpoint con carga de base de datos no degrada la latencia
+del resto de endpoints del mismo proceso. Con sesiones sync dentro de
+handlers `async def`, cada query bloquea el event loop y la latencia del
+endpoint rápido sube con la carga; con AsyncDatabaseDep no debería.
+
+Escenario:
+- Fase 1 (baseline): solo el endpoint rápido, un cliente secuencial
+- Fase 2 (carga): el mismo cliente mientras `--concurrency` clientes
+  golpean el endpoint lento durante `--duration` segundos
+
+Ejecutar contra un único worker de uvicorn (`--workers 1`) para que todo
+el tráfico comparta event loop; comparar el resultado con el endpoint lento
+en su versión sync (p.ej. /api/v1/analytics/dashboard-metrics) y en la
+async (p.ej. /api/v1/chat/history).
+
+Requisitos:
+- httpx (instalado en backend requirements)
+- Un token JWT válido si el endpoint lento requiere autenticación
+
+Uso:
+    python scripts/load_test_isolation.py --base-url http://localhost:8000 \\
+        --token $TOKEN --slow-path /api/v1/chat/history --concurrency 50
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import statistics
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+import httpx
+
+
+FAST_ENDPOINT = "/api/v1/health/simple"
+SLOW_ENDPOINT = "/api/v1/chat/history"
+
+
+@dataclass
+class LatencyStats:
+    samples_ms: List[float] = field(default_factory=list)
+    errors: int = 0
+
+    def percentile(self, pct: float) -> float:
+        if not self.samples_ms:
+            return 0.0
+        ordered = sorted(self.samples_ms)
+        index = max(0, min(len(ordered) - 1, int(round(len(ordered) * pct / 100)) - 1))
+        return ordered[index]
+
+    def summary(self) -> Dict[str, float]:
+        return {
+            "requests": len(self.samples_ms),
+            "errors": self.errors,
+            "p50_ms": round(self.percentile(50), 1),
+            "p95_ms": round(self.percentile(95), 1),
+            "p99_ms": round(self.percentile(99), 1),
+            "max_ms": round(max(self.samples_ms), 1) if self.samples_ms else 0.0,
+            "mean_ms": round(statistics.fmean(self.samples_ms), 1) if self.samples_ms else 0.0,
+        }
+
+
+async def _timed_get(client: httpx.AsyncClient, url: str, headers: Dict[str, str], stats: LatencyStats) -> None:
+    start = time.perf_counter()
+    try:
+        response = await client.get(url, headers=headers, timeout=30.0)
+        if response.status_code >= 400:
+            stats.errors += 1
+            return
+    except httpx.HTTPError:
+        stats.errors += 1
+        return
+    stats.samples_ms.append((time.perf_counter() - start) * 1000)
+
+
+async def probe_fast(client: httpx.AsyncClient, url: str, stop: asyncio.Event, interval: float) -> LatencyStats:
+    """Cliente de control: un request cada `interval` segundos hasta `stop`."""
+    stats = LatencyStats()
+    while not stop.is_set():
+        await _timed_get(client, url, {}, stats)
+        await asyncio.sleep(interval)
+    return stats
+
+
+async def hammer_slow(client: httpx.AsyncClient, url: str, headers: Dict[str, str], stop: asyncio.Event, stats: LatencyStats) -> None:
+    """Cliente de carga: requests back-to-back al endpoint lento hasta `stop`."""
+    while not stop.is_set():
+        await _timed_get(client, url, headers, stats)
+
+
+async def run_phase(
+    base_url: str,
+    fast_path: str,
+    slow_path: Optional[str],
+    token: Optional[str],
+    concurrency: int,
+    duration: float,
+    interval: float,
+) -> Dict[str, Dict[str, float]]:
+    headers = {"Authorization": f"Bearer {token}"} if token else {}
+    limits = httpx.Limits(max_connections=concurrency + 10, max_keepalive_connections=concurrency + 10)
+    async with httpx.AsyncClient(limits=limits) as client:
+        stop = asyncio.Event()
+        slow_stats = LatencyStats()
+        load = []
+        if slow_path:
+            load = [
+                asyncio.create_task(hammer_slow(client, f"{base_url}{slow_path}", headers, stop, slow_stats))
+                for _ in range(concurrency)
+            ]
+            # Dejar que la carga se estabilice antes de medir
+            await asyncio.sleep(1.0)
+        probe = asyncio.create_task(probe_fast(client, f"{base_url}{fast_path}", stop, interval))
+        await asyncio.sleep(duration)
+        stop.set()
+        fast_stats = await probe
+        await asyncio.gather(*load)
+
+    result = {"fast": fast_stats.summary()}
+    if slow_path:
+        slow = slow_stats.summary()
+        slow["throughput_rps"] = round(len(slow_stats.samples_ms) / duration, 1)
+        result["slow"] = slow
+    return result
+
+
+def _print_table(title: str, stats: Dict[str, float]) -> None:
+    print(f"  {title}")
+    for key, value in stats.items():
+        print(f"    {key:<15} {value}")
+
+
+async def main_async(args: argparse.Namespace) -> None:
+    print(f"Fase 1: baseline {args.fast_path} ({args.duration:.0f}s)")
+    baseline = await run_phase(args.base_url, args.fast_path, None, args.token, 0, args.duration, args.interval)
+    _print_table("rápido (sin carga)", baseline["fast"])
+
+    print(f"\nFase 2: {args.fast_path} con {args.concurrency} clientes en {args.slow_path} ({args.duration:.0f}s)")
+    loaded = await run_phase(
+        args.base_url, args.fast_path, args.slow_path, args.token,
+        args.concurrency, args.duration, args.interval,
+    )
+    _print_table("rápido (con carga)", loaded["fast"])
+    _print_table("lento", loaded["slow"])
+
+    base_p99 = baseline["fast"]["p99_ms"] or 1.0
+    print(f"\nDegradación p99 del endpoint rápido: x{loaded['fast']['p99_ms'] / base_p99:.1f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--token", default=None, help="JWT para el endpoint lento")
+    parser.add_argument("--fast-path", default=FAST_ENDPOINT)
+    parser.add_argument("--slow-path", default=SLOW_ENDPOINT)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=20.0)
+    parser.add_argument("--interval", type=float, default=0.05, help="Pausa entre requests del cliente de control")
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+"""
+Profiling - Coste de import y memoria por tipo de proceso
+
+Importa en un proceso limpio el entry point de cada tipo de proceso con
+`python -X importtime` y reporta:
+
+- Tiempo total de import y los `--top` módulos con mayor tiempo acumulado
+- RSS máximo del proceso tras el import (ru_maxrss)
+- Qué SDKs pesados quedaron cargados (google.generativeai, stripe,
+  OpenTelemetry SDK, arq, ...): deberían cargarse solo al construir el
+  motor de IA, el servicio de billing, la telemetría o el worker
+
+Tipos de proceso:
+- api: app.main (uvicorn)
+- api-modular: app.main-modular
+- worker: app.workers.main (entry point de las colas de Arq)
+
+Con `--record` se añade una línea JSON por tipo de proceso a un fichero,
+y con `--baseline` se compara contra la última medida registrada de cada
+tipo: sale con código 1 si el import o el RSS empeoran más de
+`--tolerance` (proporción), para detectar regresiones en CI.
+
+El tiempo hasta el primer request servido (lifespan incluido) lo mide
+scripts/bench_startup.py.
+
+Requisitos:
+- Dependencias del backend y las variables de entorno obligatorias de
+  Settings (SECRET_KEY, ...) o backend/.env
+
+Uso:
+    python scripts/profile_imports.py
+    python scripts/profile_imports.py --process api --top 30
+    python scripts/profile_imports.py --record scripts/import_history.jsonl --label $(git rev-parse --short HEAD)
+    python scripts/profile_imports.py --baseline scripts/import_history.jsonl --tolerance 0.15
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend")
+
+PROCESS_MODULES: Dict[str, str] = {
+    "api": "app.main",
+    "api-modular": "app.main-modular",
+    "worker": "app.workers.main",
+}
+
+HEAVY_MODULES = [
+    "google.generativeai",
+    "google.api_core",
+    "stripe",
+    "opentelemetry.sdk",
+    "opentelemetry.exporter.otlp",
+    "arq",
+    "httpx",
+]
+
+# Se ejecuta en el proceso hijo: importa el entry point y devuelve RSS y
+# SDKs cargados como JSON por stdout (importtime va por stderr)
+_CHILD = """
+import importlib, json, resource, sys, warnings
+warnings.simplefilter("ignore")
+importlib.import_module({module!r})
+print(json.dumps({{
+    "max_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    "modules_loaded": len(sys.modules),
+    "heavy_loaded": [m for m in {heavy!r} if m in sys.modules],
+}}))
+"""
+
+
+def _parse_importtime(stderr: str) -> List[Tuple[int, int, str]]:
+    """Filas (self_us, cumulative_us, módulo con indentación) de `-X importtime`."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        _, rest = line.split(":", 1)
+        self_us, cumulative_us, name = rest.split("|", 2)
+        rows.append((int(self_us), int(cumulative_us), name.rstrip()))
+    return rows
+
+
+def profile(process: str, top: int) -> Dict[str, Any]:
+    module = PROCESS_MODULES[process]
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _CHILD.format(module=module, heavy=HEAVY_MODULES)],
+        cwd=BACKEND_DIR,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        tail = "\n".join(line for line in result.stderr.splitlines() if not line.startswith("import time:"))
+        raise RuntimeError(f"import de {module} falló:\n{tail[-2000:]}")
+
+    rows = _parse_importtime(result.stderr)
+    # Los módulos de primer nivel (sin indentación) suman el total
+    total_us = sum(cumulative for _, cumulative, name in rows if not name.startswith("  "))
+    heaviest = sorted(rows, key=lambda row: row[1], reverse=True)[:top]
+    child = json.loads(result.stdout.strip().splitlines()[-1])
+
+    return {
+        "process": process,
+        "module": module,
+        "import_ms": round(total_us / 1000, 1),
+        **child,
+        "top": [{"module": name.strip(), "cumulative_ms": round(cumulative / 1000, 1)} for _, cumulative, name in heaviest],
+    }
+
+
+def _last_recorded(path: str) -> Dict[str, Dict[str, Any]]:
+    last: Dict[str, Dict[str, Any]] = {}
+    if not os.path.exists(path):
+        return last
+    with open(path, encoding="utf-8") as fh:
+        for line in fh:
+            if line.strip():
+                entry = json.loads(line)
+                last[entry["process"]] = entry
+    return last
+
+
+def _regressions(report: Dict[str, Any], baseline: Optional[Dict[str, Any]], tolerance: float) -> List[str]:
+    if not baseline:
+        return []
+    problems = []
+    for key in ("import_ms", "max_rss_mb"):
+        before, after = baseline.get(key), report[key]
+        if before and after > before * (1 + tolerance):
+            problems.append(f"{key} {before} -> {after} (+{(after / before - 1) * 100:.0f}%)")
+    new_heavy = sorted(set(report["heavy_loaded"]) - set(baseline.get("heavy_loaded", [])))
+    if new_heavy:
+        problems.append(f"nuevos SDKs cargados al importar: {', '.join(new_heavy)}")
+    return problems
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--process", action="append", choices=sorted(PROCESS_MODULES), help="Repetible (por defecto todos)")
+    parser.add_argument("--top", type=int, default=15, help="Módulos más lentos a mostrar")
+    parser.add_argument("--record", default=None, help="Fichero JSONL donde añadir los resultados")
+    parser.add_argument("--label", default=None, help="Etiqueta del resultado (p.ej. commit)")
+    parser.add_argument("--baseline", default=None, help="Fichero JSONL con medidas previas a comparar")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="Empeoramiento admitido (0.10 = 10%%)")
+    parser.add_argument("--json", action="store_true", help="Salida JSON en lugar de texto")
+    args = parser.parse_args()
+
+    baseline = _last_recorded(args.baseline) if args.baseline else {}
+    failed = False
+    reports = []
+
+    for process in args.process or list(PROCESS_MODULES):
+        report = profile(process, args.top)
+        problems = _regressions(report, baseline.get(process), args.tolerance)
+        failed = failed or bool(problems)
+        reports.append(report)
+
+        if args.json:
+            continue
+        print(f"{process} ({report['module']})")
+        print(f"  import          {report['import_ms']} ms ({report['modules_loaded']} módulos)")
+        print(f"  max RSS         {report['max_rss_mb']} MB")
+        print(f"  SDKs cargados   {', '.join(report['heavy_loaded']) or '-'}")
+        for row in report["top"]:
+            print(f"    {row['cumulative_ms']:>8.1f} ms  {row['module']}")
+        for problem in problems:
+            print(f"  REGRESIÓN: {problem}")
+
+    if args.json:
+        print(json.dumps(reports, indent=2))
+
+    if args.record:
+        at = datetime.now(timezone.utc).isoformat()
+        with open(args.record, "a", encoding="utf-8") as fh:
+            for report in reports:
+                entry = {key: value for key, value in report.items() if key != "top"}
+                fh.write(json.dumps({"at": at, "label": args.label, **entry}) + "\n")
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()